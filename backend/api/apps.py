@@ -2,4 +2,21 @@ from django.apps import AppConfig
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'api'
\ No newline at end of file
+    name = 'api'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from django.db.models.signals import post_delete, post_save
+
+        from .directory import invalidar_directorio
+        from .instrumentation import al_crear_conexion
+        from .models import Stadmin, Starchivos, Stticket
+        from .user_cache import al_cambiar_archivo, al_cambiar_ticket
+
+        post_save.connect(invalidar_directorio, sender=Stadmin, dispatch_uid='directorio-save')
+        post_delete.connect(invalidar_directorio, sender=Stadmin, dispatch_uid='directorio-delete')
+        post_save.connect(al_cambiar_ticket, sender=Stticket, dispatch_uid='cache-tickets-save')
+        post_delete.connect(al_cambiar_ticket, sender=Stticket, dispatch_uid='cache-tickets-delete')
+        post_save.connect(al_cambiar_archivo, sender=Starchivos, dispatch_uid='cache-archivos-save')
+        post_delete.connect(al_cambiar_archivo, sender=Starchivos, dispatch_uid='cache-archivos-delete')
+        connection_created.connect(al_crear_conexion, dispatch_uid='instrumentacion-sql')
@@ -0,0 +1,258 @@
+"""
+Archivo: api/assignment.py
+Motor de asignación automática de tickets según la carga de cada admin.
+
+Cada admin activo tiene un puntaje = tickets abiertos (PE/PR) + una fracción
+con su tiempo promedio de resolución reciente (desempata a favor del más
+rápido). Se elige siempre el de menor puntaje.
+
+- Con REDIS_URL: los contadores viven en un sorted set de Redis (un heap
+  compartido por todos los workers). Elegir y sumar se hace en un script Lua,
+  así que es atómico entre procesos y cuesta O(log n).
+- Sin Redis: heap local (heapq) protegido con un lock. Solo es exacto con un
+  único proceso; sirve para desarrollo.
+
+En ambos casos los contadores se reconstruyen desde la base de datos cada
+ASIGNACION_TTL_SEGUNDOS, lo que corrige cualquier desvío y toma en cuenta
+admins activados/desactivados.
+"""
+import heapq
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models import Avg, Count, Q
+
+from .models import Stadmin, Stticket
+
+logger = logging.getLogger(__name__)
+
+ROLES_ADMIN = ('SISTEMAS_ADMIN', 'admin')   # También lo usa directory.py
+ESTADOS_ABIERTOS = ('PE', 'PR')
+
+MAX_PROMEDIO_MIN = 99999      # La fracción del puntaje debe quedar en [0, 1)
+ALFA_PROMEDIO = 0.2           # Peso de la última resolución en el promedio móvil
+
+
+def _puntaje(abiertos, promedio_min):
+    return abiertos + min(promedio_min or 0, MAX_PROMEDIO_MIN) / (MAX_PROMEDIO_MIN + 1)
+
+
+def _cargar_desde_bd():
+    """{username: (abiertos, promedio_min)} para todos los admins activos."""
+    admins = list(
+        Stadmin.objects.filter(admin_activo=True, admin_rol__in=ROLES_ADMIN)
+        .values_list('admin_username', flat=True)
+    )
+    desde = datetime.now() - timedelta(days=getattr(settings, 'ASIGNACION_DIAS_PROMEDIO', 30))
+    filas = (
+        Stticket.objects
+        .filter(ticket_asignado_a__in=admins)
+        .values('ticket_asignado_a')
+        .annotate(
+            abiertos=Count('ticket_cod_ticket', filter=Q(ticket_est_ticket__in=ESTADOS_ABIERTOS)),
+            promedio=Avg('ticket_treal_ticket', filter=Q(
+                ticket_est_ticket='FN',
+                ticket_fec_ticket__gte=desde,
+                ticket_treal_ticket__gt=0,
+            )),
+        )
+    )
+    cargas = {username: (0, 0.0) for username in admins}
+    for fila in filas:
+        cargas[fila['ticket_asignado_a']] = (fila['abiertos'] or 0, float(fila['promedio'] or 0))
+    return cargas
+
+
+# ── Backend Redis ─────────────────────────────────────────
+LUA_ELEGIR = """
+local r = redis.call('ZRANGE', KEYS[1], 0, 0)
+if #r == 0 then return false end
+redis.call('ZINCRBY', KEYS[1], 1, r[1])
+return r[1]
+"""
+
+LUA_AJUSTAR = """
+local s = redis.call('ZSCORE', KEYS[1], ARGV[1])
+if not s then return false end
+local abiertos = math.floor(tonumber(s))
+local prom = tonumber(redis.call('HGET', KEYS[2], ARGV[1]) or '0')
+if ARGV[3] ~= '' then
+  local m = tonumber(ARGV[3])
+  if prom == 0 then prom = m else prom = prom + tonumber(ARGV[4]) * (m - prom) end
+  redis.call('HSET', KEYS[2], ARGV[1], prom)
+end
+abiertos = math.max(abiertos + tonumber(ARGV[2]), 0)
+redis.call('ZADD', KEYS[1], abiertos + math.min(prom, tonumber(ARGV[5])) / (tonumber(ARGV[5]) + 1), ARGV[1])
+return abiertos
+"""
+
+
+class CargaRedis:
+    CLAVE_CARGA = 'asignacion:carga'
+    CLAVE_PROMEDIO = 'asignacion:promedio'
+    CLAVE_VIGENTE = 'asignacion:vigente'
+    CLAVE_LOCK = 'asignacion:lock'
+
+    def __init__(self, url):
+        import redis
+        self._redis = redis.Redis.from_url(url)
+        self._elegir = self._redis.register_script(LUA_ELEGIR)
+        self._ajustar = self._redis.register_script(LUA_AJUSTAR)
+
+    def _asegurar_vigente(self):
+        if self._redis.exists(self.CLAVE_VIGENTE):
+            return
+        # Solo un worker reconstruye; los demás siguen usando los contadores actuales
+        if not self._redis.set(self.CLAVE_LOCK, '1', nx=True, ex=30):
+            return
+        try:
+            self.reconstruir()
+        finally:
+            self._redis.delete(self.CLAVE_LOCK)
+
+    def reconstruir(self):
+        cargas = _cargar_desde_bd()
+        ttl = getattr(settings, 'ASIGNACION_TTL_SEGUNDOS', 600)
+        pipe = self._redis.pipeline(transaction=True)
+        pipe.delete(self.CLAVE_CARGA, self.CLAVE_PROMEDIO)
+        if cargas:
+            pipe.zadd(self.CLAVE_CARGA, {u: _puntaje(a, p) for u, (a, p) in cargas.items()})
+            pipe.hset(self.CLAVE_PROMEDIO, mapping={u: p for u, (a, p) in cargas.items()})
+        pipe.set(self.CLAVE_VIGENTE, '1', ex=ttl)
+        pipe.execute()
+        logger.info(f"⚖️ Carga de admins reconstruida en Redis: {len(cargas)} admins")
+
+    def elegir(self):
+        self._asegurar_vigente()
+        elegido = self._elegir(keys=[self.CLAVE_CARGA])
+        return elegido.decode() if elegido else None
+
+    def ajustar(self, username, delta, minutos=None):
+        self._asegurar_vigente()
+        self._ajustar(
+            keys=[self.CLAVE_CARGA, self.CLAVE_PROMEDIO],
+            args=[username, delta, '' if minutos is None else minutos, ALFA_PROMEDIO, MAX_PROMEDIO_MIN],
+        )
+
+    def snapshot(self):
+        self._asegurar_vigente()
+        return [(u.decode(), s) for u, s in self._redis.zrange(self.CLAVE_CARGA, 0, -1, withscores=True)]
+
+
+# ── Backend local (un solo proceso) ───────────────────────
+class CargaLocal:
+    """Heap con invalidación perezosa: cada cambio empuja una entrada nueva."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._heap = []
+        self._cargas = {}        # username -> [abiertos, promedio]
+        self._vigente_hasta = 0.0
+
+    def _asegurar_vigente(self):
+        if time.monotonic() >= self._vigente_hasta:
+            self._reconstruir_sin_lock()
+
+    def _reconstruir_sin_lock(self):
+        self._cargas = {u: [a, p] for u, (a, p) in _cargar_desde_bd().items()}
+        self._heap = [(_puntaje(a, p), u) for u, (a, p) in self._cargas.items()]
+        heapq.heapify(self._heap)
+        self._vigente_hasta = time.monotonic() + getattr(settings, 'ASIGNACION_TTL_SEGUNDOS', 600)
+
+    def reconstruir(self):
+        with self._lock:
+            self._reconstruir_sin_lock()
+
+    def _empujar(self, username):
+        abiertos, promedio = self._cargas[username]
+        heapq.heappush(self._heap, (_puntaje(abiertos, promedio), username))
+        # Compactar si las entradas obsoletas superan a las vigentes
+        if len(self._heap) > 4 * max(len(self._cargas), 1):
+            self._heap = [(_puntaje(a, p), u) for u, (a, p) in self._cargas.items()]
+            heapq.heapify(self._heap)
+
+    def elegir(self):
+        with self._lock:
+            self._asegurar_vigente()
+            while self._heap:
+                puntaje, username = heapq.heappop(self._heap)
+                carga = self._cargas.get(username)
+                if carga is None or puntaje != _puntaje(*carga):
+                    continue  # Entrada obsoleta
+                carga[0] += 1
+                self._empujar(username)
+                return username
+            return None
+
+    def ajustar(self, username, delta, minutos=None):
+        with self._lock:
+            self._asegurar_vigente()
+            carga = self._cargas.get(username)
+            if carga is None:
+                return
+            if minutos is not None:
+                carga[1] = minutos if not carga[1] else carga[1] + ALFA_PROMEDIO * (minutos - carga[1])
+            carga[0] = max(carga[0] + delta, 0)
+            self._empujar(username)
+
+    def snapshot(self):
+        with self._lock:
+            self._asegurar_vigente()
+            return sorted(((u, _puntaje(a, p)) for u, (a, p) in self._cargas.items()), key=lambda x: x[1])
+
+
+class MotorAsignacion:
+    """Fachada usada por las vistas; nunca lanza excepciones hacia afuera."""
+
+    def __init__(self):
+        self._backend = None
+        self._lock = threading.Lock()
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    url = getattr(settings, 'REDIS_URL', None)
+                    self._backend = CargaRedis(url) if url else CargaLocal()
+        return self._backend
+
+    def asignar_automatico(self):
+        """Devuelve el admin activo con menos carga (y ya le suma el ticket)."""
+        try:
+            return self.backend.elegir()
+        except Exception as e:
+            logger.warning(f"⚠️ Motor de asignación no disponible: {e}")
+            return None
+
+    def registrar_cambio(self, admin_anterior, estado_anterior, admin_nuevo, estado_nuevo, minutos=None):
+        """
+        Actualiza los contadores cuando un ticket cambia de técnico o de estado.
+        `minutos` (ticket_treal_ticket) alimenta el promedio al finalizar.
+        """
+        antes = admin_anterior if estado_anterior in ESTADOS_ABIERTOS else None
+        despues = admin_nuevo if estado_nuevo in ESTADOS_ABIERTOS else None
+        if antes == despues:
+            return
+        try:
+            if antes:
+                resuelto = estado_nuevo == 'FN' and admin_nuevo == antes and minutos
+                self.backend.ajustar(antes, -1, minutos=int(minutos) if resuelto else None)
+            if despues:
+                self.backend.ajustar(despues, +1)
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo actualizar la carga de admins: {e}")
+
+    def snapshot(self):
+        try:
+            return self.backend.snapshot()
+        except Exception as e:
+            logger.warning(f"⚠️ Motor de asignación no disponible: {e}")
+            return []
+
+
+# Instancia única por proceso
+motor_asignacion = MotorAsignacion()
@@ -0,0 +1,170 @@
+"""
+Archivo: api/async_views.py
+Versiones async (ORM async de Django) de los endpoints de lectura más llamados:
+
+    GET /api/admin/tickets/new/           (polling del panel, cada pocos segundos)
+    GET /api/notifications/sounds/check/  (y su ruta vieja get-notification-sound/)
+    GET /api/admins/
+    GET /api/tickets/                     (lista de tickets del usuario)
+    GET /api/admin/tickets/               (lista de tickets del admin)
+
+Se activan con VISTAS_ASYNC=True (api/urls.py elige qué vista enrutar). Bajo
+ASGI una vista DRF síncrona pasa entera por sync_to_async; estas atienden el
+request en el event loop y solo las consultas salen al hilo de la BD.
+
+Mismo contrato que las vistas DRF. Todo lo que no es el caso común cae a la
+vista síncrona de siempre (respaldo):
+  - sin cookie 'chatbot-auth' válida (p. ej. header Authorization en local,
+    o 401/403 con el mensaje de DRF),
+  - métodos distintos de GET (POST /api/tickets/ crea el ticket),
+  - listas con ?page= / ?page_size= (facetas, ver api/filters.py).
+"""
+import logging
+from datetime import datetime
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt
+
+from . import sonidos, user_cache, views
+from .authentication import usuario_desde_cookie
+from .db_router import en_replica
+from .directory import directorio
+from .filters import filtrar_tickets, usa_paginacion
+from .http_cache import con_etag, no_modificado
+from .models import Stsonido, Stticket
+from .read_models import CAMPOS_TICKET, afilas_tickets, parsear_campos
+from .renderers import serializar_json
+
+logger = logging.getLogger(__name__)
+
+CAMPOS_COMPLETOS = CAMPOS_TICKET + ['archivos']
+
+
+def vista_async(vista_sync, respaldar_si=None):
+    """
+    Convierte `vista(request, usuario, ...)` async en una vista Django con
+    respaldo a `vista_sync` (ver docstring del módulo).
+    """
+    respaldo = sync_to_async(vista_sync)
+
+    def decorador(vista):
+        @wraps(vista)
+        async def envoltura(request, *args, **kwargs):
+            usuario = usuario_desde_cookie(request) if request.method == 'GET' else None
+            if usuario is None or (respaldar_si and respaldar_si(request)):
+                return await respaldo(request, *args, **kwargs)
+            request.user = usuario
+            return await vista(request, usuario, *args, **kwargs)
+        # Las vistas DRF son csrf_exempt; el respaldo (POST) debe seguir igual
+        return csrf_exempt(envoltura)
+    return decorador
+
+
+def _json(data, status=200):
+    # Mismo JSON que las vistas DRF (ORJSONRenderer)
+    return HttpResponse(serializar_json(data), status=status, content_type='application/json')
+
+
+def _con_paginacion(request):
+    return usa_paginacion(request.GET)
+
+
+# ============================================================
+# POLLING DE TICKETS NUEVOS
+# ============================================================
+@vista_async(views.NewTicketsPollingView.as_view())
+async def nuevos_tickets_polling(request, usuario):
+    try:
+        tickets_qs = Stticket.objects.filter(ticket_asignado_a=usuario.username)
+
+        since_param = request.GET.get('since')
+        if since_param:
+            try:
+                since_dt = datetime.fromisoformat(since_param.replace('Z', '+00:00'))
+                tickets_qs = tickets_qs.filter(ticket_fec_ticket__gt=since_dt)
+            except (ValueError, TypeError):
+                pass
+
+        data = [
+            {
+                'ticket_id':   t.ticket_id_ticket or str(t.ticket_cod_ticket),
+                'ticket_cod':  str(t.ticket_cod_ticket),
+                'titulo':      t.ticket_asu_ticket or 'Sin asunto',
+                'descripcion': (t.ticket_des_ticket or '')[:120],
+                'estado':      t.ticket_est_ticket,
+                'fecha':       t.ticket_fec_ticket.isoformat() if t.ticket_fec_ticket else None,
+                'creado_por':  t.ticket_tusua_ticket or '',
+            }
+            async for t in tickets_qs.order_by('-ticket_fec_ticket')[:20]
+        ]
+    except Exception as e:
+        logger.error(f"Error en nuevos_tickets_polling: {e}")
+        data = []
+
+    return _json({
+        'tickets':    data,
+        'count':      len(data),
+        'checked_at': timezone.now().isoformat(),
+    })
+
+
+# ============================================================
+# SONIDO DE NOTIFICACIÓN (solo stsonido, sin S3)
+# ============================================================
+@vista_async(views.CheckNotificationSoundView.as_view())
+async def check_notification_sound(request, usuario):
+    registro = await Stsonido.objects.filter(sonido_usuario=usuario.username).afirst()
+    cuerpo, etag = sonidos.respuesta_check(usuario.username, registro)
+    if no_modificado(request, etag):
+        return con_etag(HttpResponseNotModified(), etag)
+    return con_etag(_json(cuerpo), etag)
+
+
+# ============================================================
+# LISTA DE ADMINS
+# ============================================================
+@vista_async(views.AdminListView.as_view())
+async def admin_list(request, usuario):
+    try:
+        # En memoria salvo al recargar; la versión se lee de Redis (sync)
+        inst = await sync_to_async(directorio.instantanea)()
+    except Exception as e:
+        return _json({"error": str(e)}, status=500)
+    if no_modificado(request, inst.etag_admins):
+        return con_etag(HttpResponseNotModified(), inst.etag_admins)
+    return con_etag(_json(inst.admins), inst.etag_admins)
+
+
+# ============================================================
+# LISTAS DE TICKETS (lista plana, con filtros y ?fields=)
+# ============================================================
+@vista_async(views.TicketViewSet.as_view({'get': 'list', 'post': 'create'}), respaldar_si=_con_paginacion)
+async def ticket_list(request, usuario):
+    params = request.GET
+    if not usuario.is_staff:
+        # Misma caché por usuario que TicketViewSet.list (api/user_cache.py)
+        qs = filtrar_tickets(
+            Stticket.objects.filter(ticket_tusua_ticket=usuario.username).order_by('-ticket_fec_ticket'), params
+        )
+        return _json(await user_cache.atickets_cacheados(
+            usuario.username, params, lambda: afilas_tickets(qs, parsear_campos(params) or CAMPOS_COMPLETOS),
+        ))
+    if params.get('username'):
+        qs = Stticket.objects.filter(ticket_tusua_ticket=params['username'])
+    else:
+        qs = Stticket.objects.all()
+    qs = filtrar_tickets(qs.order_by('-ticket_fec_ticket'), params)
+    return _json(await afilas_tickets(qs, parsear_campos(params) or CAMPOS_COMPLETOS))
+
+
+@vista_async(views.AdminTicketListView.as_view(), respaldar_si=_con_paginacion)
+async def admin_ticket_list(request, usuario):
+    if not usuario.is_staff:
+        return _json({"error": "No autorizado"}, status=403)
+    params = request.GET
+    qs = filtrar_tickets(Stticket.objects.all().order_by('-ticket_fec_ticket'), params)
+    with en_replica():
+        return _json(await afilas_tickets(qs, parsear_campos(params) or CAMPOS_COMPLETOS))
@@ -20,6 +20,22 @@ class VirtualUser:
     def get_username(self): return self.username
     def is_anonymous(self): return False
 
+
+def usuario_desde_cookie(request):
+    """
+    VirtualUser a partir de la cookie 'chatbot-auth', o None si falta o es inválida.
+    Sin tocar la BD (lo usan las vistas async de api/async_views.py); la
+    sincronización con Stadmin ya la hacen SetAuthCookieView y las vistas DRF.
+    """
+    token = request.COOKIES.get('chatbot-auth')
+    if not token:
+        return None
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"], leeway=300)
+    except jwt.PyJWTError:
+        return None
+    return VirtualUser(payload)
+
 class SSOAuthentication(BaseAuthentication):
     def authenticate(self, request):
         token = request.COOKIES.get('chatbot-auth')
@@ -0,0 +1,188 @@
+"""
+Archivo: api/blobs.py
+Almacén de adjuntos direccionado por contenido (SHA-256) con conteo de
+referencias.
+
+- El navegador calcula el SHA-256 de cada archivo (hasta UPLOAD_MULTIPART_UMBRAL)
+  y lo manda en presign-batch. El objeto va a chatbot-uploads/blobs/<aa>/<sha>,
+  una sola copia para todos los tickets que lo adjunten.
+- El PUT prefirmado incluye x-amz-checksum-sha256: S3 (o el almacén local)
+  rechaza el cuerpo si no coincide con el hash declarado, así que lo que hay en una clave de blob
+  siempre es ese contenido. Al confirmar se vuelve a comprobar (checksum del
+  HEAD o, si no viene, hasheando el objeto) y se exige que el último PUT sea
+  de quien confirma (metadata uploaded-by).
+- Si el usuario ya adjuntó ese mismo contenido antes, presign-batch responde
+  modo=existente y el navegador se salta el PUT. Solo para el mismo usuario
+  (o admins): conocer un hash no debe dar acceso al archivo de otra persona.
+- stblob.blob_refs cuenta las filas de starchivos que apuntan al blob;
+  liberar() lo decrementa y borra el objeto cuando llega a 0.
+"""
+import base64
+import hashlib
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection
+
+from .instrumentation import medir
+from .storage import almacen
+from .uploads import HEAD_EN_PARALELO, ErrorSubida
+
+PREFIJO_BLOBS = 'chatbot-uploads/blobs/'
+_SHA256 = re.compile(r'^[0-9a-f]{64}$')
+
+
+def normalizar_sha(valor):
+    """Hex en minúsculas o None si no es un SHA-256 válido."""
+    if not isinstance(valor, str):
+        return None
+    valor = valor.strip().lower()
+    return valor if _SHA256.match(valor) else None
+
+
+def clave_blob(sha):
+    return f"{PREFIJO_BLOBS}{sha[:2]}/{sha}"
+
+
+def sha_base64(sha):
+    """Formato de x-amz-checksum-sha256 (base64 del digest, no hex)."""
+    return base64.b64encode(bytes.fromhex(sha)).decode()
+
+
+def reutilizables(shas, username, es_admin=False):
+    """
+    Subconjunto de `shas` que este usuario puede reutilizar sin subir: blobs
+    existentes que él mismo ya adjuntó (cualquiera, si es admin).
+    """
+    from .models import Starchivos, Stblob
+
+    shas = list(shas)
+    if not shas:
+        return set()
+    existentes = Stblob.objects.filter(blob_sha256__in=shas)
+    if not es_admin:
+        propios = Starchivos.objects.filter(archivo_sha_archivo__in=shas, archivo_usua_archivo=username)
+        existentes = existentes.filter(blob_sha256__in=propios.values('archivo_sha_archivo'))
+    return set(existentes.values_list('blob_sha256', flat=True))
+
+
+def presignar_blob(archivo, metadata, reutilizable):
+    sha = archivo['sha256']
+    s3_key = clave_blob(sha)
+    if reutilizable:
+        return {'modo': 'existente', 's3_key': s3_key}
+    # El navegador debe mandar los "headers" tal cual (van firmados en la URL)
+    subida = almacen().url_subida(s3_key, archivo['filetype'], metadata=metadata, sha256_b64=sha_base64(sha))
+    return {'modo': 'simple', 's3_key': s3_key, **subida}
+
+
+def _hash_objeto(s3_key):
+    cuerpo = almacen().abrir(s3_key)
+    digest = hashlib.sha256()
+    try:
+        for bloque in iter(lambda: cuerpo.read(1024 * 1024), b''):
+            digest.update(bloque)
+    finally:
+        cuerpo.close()
+    return digest.hexdigest()
+
+
+def verificar_blob(sha):
+    """
+    {size, content_type, uploaded_by} del blob recién subido, o None si no
+    está en el almacén. Lanza ErrorSubida si el contenido no corresponde al hash.
+    """
+    s3_key = clave_blob(sha)
+    objeto = almacen().info(s3_key, checksum=True)
+    if objeto is None:
+        return None
+
+    checksum = objeto['sha256_b64']
+    if checksum and '-' not in checksum:
+        valido = checksum == sha_base64(sha)
+    else:
+        # Objeto sin checksum guardado (o compuesto): hashear el contenido
+        valido = _hash_objeto(s3_key) == sha
+    if not valido:
+        raise ErrorSubida(f'El contenido subido no coincide con sha256 {sha[:12]}…')
+    return {
+        'size': objeto['size'],
+        'content_type': objeto['content_type'],
+        'uploaded_by': objeto['metadata'].get('uploaded-by'),
+    }
+
+
+def verificar_blobs(shas):
+    """verificar_blob() en paralelo: {sha: resultado}."""
+    if not shas:
+        return {}
+    almacen()
+    with medir('s3'), ThreadPoolExecutor(max_workers=min(HEAD_EN_PARALELO, len(shas))) as pool:
+        return dict(zip(shas, pool.map(verificar_blob, shas)))
+
+
+def sumar_referencias(nuevos):
+    """
+    nuevos: {sha: (referencias, tamaño, tipo)}. Crea los blobs que no existen
+    y suma referencias a los que sí, en una sola sentencia.
+    """
+    if not nuevos:
+        return
+    valores = []
+    for sha, (refs, tam, tipo) in nuevos.items():
+        valores.extend([sha, clave_blob(sha), tam, tipo[:100], refs])
+    filas = ', '.join(['(%s, %s, %s, %s, %s, NOW())'] * len(nuevos))
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            INSERT INTO soporte_ti.stblob (blob_sha256, blob_rut_blob, blob_tam_blob, blob_tip_blob, blob_refs, blob_fec_blob)
+            VALUES {filas}
+            ON CONFLICT (blob_sha256) DO UPDATE SET blob_refs = soporte_ti.stblob.blob_refs + EXCLUDED.blob_refs
+        """, valores)
+
+
+def liberar(shas):
+    """
+    Resta una referencia por cada sha (con repeticiones) y borra de S3 los
+    blobs que quedan sin referencias. Llamar al borrar filas de starchivos.
+    """
+    conteo = {}
+    for sha in shas:
+        if sha:
+            conteo[sha] = conteo.get(sha, 0) + 1
+    if not conteo:
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            UPDATE soporte_ti.stblob AS b SET blob_refs = GREATEST(b.blob_refs - d.n, 0)
+            FROM (SELECT unnest(%s::text[]) AS sha, unnest(%s::int[]) AS n) AS d
+            WHERE b.blob_sha256 = d.sha
+            RETURNING b.blob_sha256, b.blob_refs
+        """, [list(conteo), list(conteo.values())])
+        sin_refs = [sha for sha, refs in cursor.fetchall() if refs == 0]
+        if sin_refs:
+            cursor.execute(
+                "DELETE FROM soporte_ti.stblob WHERE blob_sha256 = ANY(%s) AND blob_refs = 0 RETURNING blob_rut_blob",
+                [sin_refs],
+            )
+            claves = [fila[0] for fila in cursor.fetchall()]
+        else:
+            claves = []
+    if claves:
+        almacen().borrar_varios([c + sufijo for c in claves for sufijo in ('', '.thumb.webp', '.preview.webp')])
+    return claves
+
+
+def recontar():
+    """Recalcula blob_refs desde starchivos (por si algo se borró por fuera). Devuelve filas corregidas."""
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            UPDATE soporte_ti.stblob AS b SET blob_refs = COALESCE(r.n, 0)
+            FROM soporte_ti.stblob AS b2
+            LEFT JOIN (
+                SELECT archivo_sha_archivo AS sha, COUNT(*) AS n
+                FROM soporte_ti.starchivos WHERE archivo_sha_archivo IS NOT NULL
+                GROUP BY archivo_sha_archivo
+            ) AS r ON r.sha = b2.blob_sha256
+            WHERE b.blob_sha256 = b2.blob_sha256 AND b.blob_refs IS DISTINCT FROM COALESCE(r.n, 0)
+        """)
+        return cursor.rowcount
@@ -0,0 +1,131 @@
+"""
+Archivo: api/bulk_tickets.py
+Cambios masivos sobre tickets (cerrar o reasignar después de un incidente):
+un solo UPDATE ... FROM (SELECT ... FOR UPDATE) ... RETURNING dentro de la
+transacción, en vez de un get() + save() + serializer por ticket.
+
+El RETURNING trae los valores viejos (del SELECT) y los nuevos, así que
+quien llama puede actualizar la carga de admins, el índice de duplicados y
+mandar UNA notificación por admin afectado sin volver a consultar. La
+versión nueva de cada ticket (la sube el trigger de la migración 0007) va
+en la respuesta para el If-Match del panel.
+"""
+from collections import defaultdict
+
+from django.db import connection
+
+from .models import Stticket
+from .user_cache import invalidar_tickets
+
+MAX_TICKETS = 500
+ESTADOS = ('PE', 'PR', 'FN')
+
+# Campo del request → columna; solo estas se pueden tocar en lote
+CAMPOS = {
+    'ticket_est_ticket':   'ticket_est_ticket',
+    'status':              'ticket_est_ticket',
+    'ticket_asignado_a':   'ticket_asignado_a',
+    'ticket_obs_ticket':   'ticket_obs_ticket',
+    'observation':         'ticket_obs_ticket',
+    'ticket_treal_ticket': 'ticket_treal_ticket',
+}
+_DEVUELTAS = [
+    'ticket_cod_ticket', 'ticket_id_ticket', 'ticket_asu_ticket', 'ticket_des_ticket',
+    'ticket_tusua_ticket', 'ticket_fec_ticket', 'ticket_est_ticket', 'ticket_asignado_a',
+    'ticket_treal_ticket', 'ticket_obs_ticket', 'ticket_ver_ticket',
+]
+
+
+class ErrorLote(Exception):
+    """Request inválido (→ 400)."""
+
+
+def validar(ids, cambios, admins_validos):
+    """
+    (ids únicos, {columna: valor}) o ErrorLote. `admins_validos`: usernames a
+    los que se puede asignar (None/'' desasigna).
+    """
+    if not isinstance(ids, list) or not ids:
+        raise ErrorLote('ids debe ser una lista no vacía')
+    try:
+        ids = list(dict.fromkeys(int(i) for i in ids))
+    except (TypeError, ValueError):
+        raise ErrorLote('ids debe contener enteros')
+    if len(ids) > MAX_TICKETS:
+        raise ErrorLote(f'Máximo {MAX_TICKETS} tickets por lote')
+
+    if not isinstance(cambios, dict):
+        raise ErrorLote('cambios debe ser un objeto')
+    columnas = {}
+    for campo, valor in cambios.items():
+        if campo not in CAMPOS:
+            raise ErrorLote(f'Campo no permitido en lote: {campo}')
+        columnas[CAMPOS[campo]] = valor
+    if not columnas:
+        raise ErrorLote('No hay cambios que aplicar')
+
+    if 'ticket_est_ticket' in columnas and columnas['ticket_est_ticket'] not in ESTADOS:
+        raise ErrorLote(f"Estado no válido (usa {', '.join(ESTADOS)})")
+    if 'ticket_asignado_a' in columnas:
+        columnas['ticket_asignado_a'] = columnas['ticket_asignado_a'] or None
+        if columnas['ticket_asignado_a'] and columnas['ticket_asignado_a'] not in admins_validos:
+            raise ErrorLote(f"{columnas['ticket_asignado_a']} no es un técnico activo")
+    if 'ticket_treal_ticket' in columnas:
+        try:
+            columnas['ticket_treal_ticket'] = int(columnas['ticket_treal_ticket'])
+        except (TypeError, ValueError):
+            raise ErrorLote('ticket_treal_ticket debe ser un entero (minutos)')
+    if 'ticket_obs_ticket' in columnas:
+        columnas['ticket_obs_ticket'] = str(columnas['ticket_obs_ticket'] or '')
+    return ids, columnas
+
+
+def actualizar(ids, columnas):
+    """
+    Aplica `columnas` a los tickets `ids` en una sentencia (llamar dentro de
+    transaction.atomic). Devuelve [(ticket, admin_anterior, estado_anterior)]
+    con `ticket` ya actualizado (instancia sin guardar, solo para leer).
+    """
+    asignaciones = ', '.join(f"{col} = %s" for col in columnas)
+    devueltas = ', '.join(f"t.{col}" for col in _DEVUELTAS)
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            UPDATE soporte_ti.stticket AS t SET {asignaciones}
+            FROM (
+                SELECT ticket_cod_ticket, ticket_asignado_a, ticket_est_ticket
+                FROM soporte_ti.stticket
+                WHERE ticket_cod_ticket = ANY(%s)
+                FOR UPDATE
+            ) AS previo
+            WHERE t.ticket_cod_ticket = previo.ticket_cod_ticket
+            RETURNING {devueltas}, previo.ticket_asignado_a, previo.ticket_est_ticket
+        """, [*columnas.values(), ids])
+        filas = cursor.fetchall()
+
+    n = len(_DEVUELTAS)
+    resultado = [
+        (Stticket(**dict(zip(_DEVUELTAS, fila[:n]))), fila[n], fila[n + 1])
+        for fila in filas
+    ]
+    invalidar_tickets(*{ticket.ticket_tusua_ticket for ticket, _, _ in resultado})
+    return resultado
+
+
+def agrupar_por_admin(resultado, autor=None):
+    """
+    {admin: {'asignados', 'retirados', 'actualizados'}} (listas de tickets)
+    para armar UNA notificación por técnico afectado. El autor del cambio no
+    se notifica a sí mismo.
+    """
+    grupos = defaultdict(lambda: {'asignados': [], 'retirados': [], 'actualizados': []})
+    for ticket, admin_anterior, _ in resultado:
+        admin_nuevo = ticket.ticket_asignado_a
+        if admin_nuevo != admin_anterior:
+            if admin_nuevo:
+                grupos[admin_nuevo]['asignados'].append(ticket)
+            if admin_anterior:
+                grupos[admin_anterior]['retirados'].append(ticket)
+        elif admin_nuevo:
+            grupos[admin_nuevo]['actualizados'].append(ticket)
+    grupos.pop(autor, None)
+    return dict(grupos)
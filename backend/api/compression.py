@@ -0,0 +1,186 @@
+"""
+Archivo: api/compression.py
+Compresión de respuestas (brotli si está instalado y el cliente lo acepta,
+si no gzip). Reemplaza a django.middleware.gzip.GZipMiddleware:
+
+- Solo tipos de texto (JSON, HTML, JS, CSS, CSV, XML, SVG); imágenes,
+  audio, ZIP, etc. ya vienen comprimidos y se dejan tal cual.
+- Respuestas normales: solo si miden al menos COMPRESION_MIN_BYTES y si
+  comprimidas quedan más chicas.
+- Streaming (sync y async): se comprime bloque a bloque con flush, así que
+  cada bloque sale apenas llega (no se junta la respuesta entera en memoria).
+- No toca 206 (Range), 304, respuestas con Content-Encoding (p. ej. los
+  .gz/.br de WhiteNoise) ni las que piden Cache-Control: no-transform.
+- Tampoco los FileResponse (adjuntos del almacén local): conservan su
+  Content-Length y el sendfile del servidor, y el 200 y el 206 de la misma
+  URL no difieren en codificación.
+- El ETag pasa a débil (W/"..."), igual que en GZipMiddleware: el cuerpo
+  comprimido no es byte a byte el mismo que el del ETag fuerte.
+- BREACH: igual que GZipMiddleware (Django ≥ 4.2), la cabecera gzip lleva un
+  nombre de archivo de largo aleatorio (0 a COMPRESION_RELLENO_MAX_BYTES)
+  para que el tamaño comprimido no delate el contenido. brotli no tiene
+  dónde meter ese relleno, así que text/html (admin, allauth y Browsable
+  API, con token CSRF en el cuerpo) va siempre en gzip.
+"""
+import re
+import secrets
+import struct
+import zlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import FileResponse
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # Opcional: sin brotli se usa solo gzip
+    brotli = None
+
+_TIPOS_COMPRIMIBLES = re.compile(
+    r'^(text/|application/(json|javascript|xml|problem\+json|x-ndjson)|image/svg\+xml)'
+)
+_SIN_CUERPO = (204, 206, 304)
+
+
+def elegir_codificacion(accept_encoding, brotli_permitido=True):
+    """'br', 'gzip' o None según el header Accept-Encoding (respeta q=0)."""
+    aceptadas = {}
+    for parte in (accept_encoding or '').split(','):
+        nombre, _, params = parte.strip().partition(';')
+        q = 1.0
+        match = re.search(r'q=([0-9.]+)', params)
+        if match:
+            try:
+                q = float(match.group(1))
+            except ValueError:
+                q = 0.0
+        aceptadas[nombre.strip().lower()] = q
+    comodin = aceptadas.get('*', 0.0)
+    if brotli_permitido and brotli is not None and aceptadas.get('br', comodin) > 0:
+        return 'br'
+    if aceptadas.get('gzip', comodin) > 0:
+        return 'gzip'
+    return None
+
+
+def cabecera_gzip():
+    """Cabecera gzip (RFC 1952) con FNAME de largo aleatorio, como compress_string de Django."""
+    relleno = b'a' * secrets.randbelow(settings.COMPRESION_RELLENO_MAX_BYTES + 1)
+    # ID1 ID2 CM=deflate FLG=FNAME, MTIME=0, XFL=0, OS=desconocido
+    return b'\x1f\x8b\x08\x08\x00\x00\x00\x00\x00\xff' + relleno + b'\x00'
+
+
+class _Compresor:
+    """Interfaz común para gzip (zlib) y brotli, en modo streaming."""
+
+    def __init__(self, codificacion):
+        self.codificacion = codificacion
+        if codificacion == 'br':
+            self._br = brotli.Compressor(quality=settings.COMPRESION_CALIDAD_BR)
+        else:
+            # Deflate crudo: la cabecera (con relleno) y la cola (CRC + largo) van a mano
+            self._gz = zlib.compressobj(settings.COMPRESION_NIVEL_GZIP, zlib.DEFLATED, -zlib.MAX_WBITS)
+            self._pendiente = cabecera_gzip()
+            self._crc = self._largo = 0
+
+    def _deflate(self, datos, modo):
+        self._crc = zlib.crc32(datos, self._crc)
+        self._largo += len(datos)
+        salida = self._pendiente + self._gz.compress(datos) + self._gz.flush(modo)
+        self._pendiente = b''
+        return salida
+
+    def bloque(self, datos):
+        """Comprime y vacía: lo devuelto ya se puede mandar al cliente."""
+        if self.codificacion == 'br':
+            return self._br.process(datos) + self._br.flush()
+        return self._deflate(datos, zlib.Z_SYNC_FLUSH)
+
+    def terminar(self, datos=b''):
+        """Comprime lo que quede (`datos`, si vienen) y cierra el stream."""
+        if self.codificacion == 'br':
+            return self._br.process(datos) + self._br.finish()
+        return self._deflate(datos, zlib.Z_FINISH) + struct.pack('<II', self._crc, self._largo & 0xFFFFFFFF)
+
+
+def comprimir(datos, codificacion):
+    """Comprime un cuerpo completo (sin flush intermedios)."""
+    return _Compresor(codificacion).terminar(datos)
+
+
+def _comprimir_iterable(contenido, codificacion):
+    # El iterador original lo sigue cerrando response.close()
+    compresor = _Compresor(codificacion)
+    for datos in contenido:
+        if datos:
+            salida = compresor.bloque(datos)
+            if salida:
+                yield salida
+    yield compresor.terminar()
+
+
+async def _comprimir_async(contenido, codificacion):
+    compresor = _Compresor(codificacion)
+    async for datos in contenido:
+        if datos:
+            salida = compresor.bloque(datos)
+            if salida:
+                yield salida
+    yield compresor.terminar()
+
+
+class CompresionMiddleware:
+    """Va primero en settings.MIDDLEWARE (después de Prometheus). Sync y async."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self._acall(request)
+        return self._procesar(request, self.get_response(request))
+
+    async def _acall(self, request):
+        return self._procesar(request, await self.get_response(request))
+
+    def _procesar(self, request, response):
+        if isinstance(response, FileResponse):
+            return response
+        tipo = response.get('Content-Type', '')
+        if not _TIPOS_COMPRIMIBLES.match(tipo):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if (response.status_code in _SIN_CUERPO or response.has_header('Content-Encoding')
+                or 'no-transform' in response.get('Cache-Control', '')):
+            return response
+        codificacion = elegir_codificacion(
+            request.META.get('HTTP_ACCEPT_ENCODING'), brotli_permitido=not tipo.startswith('text/html'),
+        )
+        if codificacion is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = _comprimir_async(response.streaming_content, codificacion)
+            else:
+                response.streaming_content = _comprimir_iterable(response.streaming_content, codificacion)
+            del response['Content-Length']
+        else:
+            if len(response.content) < settings.COMPRESION_MIN_BYTES:
+                return response
+            comprimido = comprimir(response.content, codificacion)
+            if len(comprimido) >= len(response.content):
+                return response
+            response.content = comprimido
+            response['Content-Length'] = str(len(comprimido))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = codificacion
+        return response
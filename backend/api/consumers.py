@@ -1,6 +1,7 @@
 import json
 import logging
 from channels.generic.websocket import AsyncWebsocketConsumer
+from .metrics import WS_CONEXIONES
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +25,7 @@ class NotificationConsumer(AsyncWebsocketConsumer):
         )
         
         await self.accept()
+        WS_CONEXIONES.inc()
         logger.info(f"✅ WebSocket conectado: {self.user.username}")
         
         # Confirmar conexión al cliente
@@ -38,6 +40,7 @@ class NotificationConsumer(AsyncWebsocketConsumer):
                 self.group_name,
                 self.channel_name
             )
+            WS_CONEXIONES.dec()
             logger.info(f"🔌 WebSocket desconectado: {getattr(self.user, 'username', 'unknown')}")
 
     async def receive(self, text_data):
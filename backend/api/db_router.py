@@ -0,0 +1,122 @@
+"""
+Archivo: api/db_router.py
+Enrutamiento de lecturas a la réplica de PostgreSQL.
+
+- Solo si DATABASE_REPLICA_URL está definido (settings.DATABASES['replica']).
+- Por defecto TODO va a la primaria. Las vistas de solo lectura pesadas
+  (reportes, listados de admin, logs) se marcan con @lectura_replica y sus
+  consultas de lectura van a la réplica.
+- Read-your-writes: después de una escritura exitosa ReplicaMiddleware deja
+  una cookie por REPLICA_VENTANA_SEGUNDOS; mientras exista, ese usuario lee de
+  la primaria aunque la vista esté marcada (la réplica puede ir atrasada y el
+  usuario no vería el ticket que acaba de crear o editar).
+- Dentro de transaction.atomic() también se lee de la primaria.
+"""
+import contextvars
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+ALIAS_REPLICA = 'replica'
+COOKIE_ESCRITURA = 'ultima_escritura'
+METODOS_SEGUROS = ('GET', 'HEAD', 'OPTIONS')
+
+_usar_replica = contextvars.ContextVar('usar_replica', default=False)
+_fijado_primaria = contextvars.ContextVar('fijado_primaria', default=False)
+
+
+def hay_replica():
+    return ALIAS_REPLICA in settings.DATABASES
+
+
+@contextmanager
+def en_replica():
+    """Las lecturas del bloque van a la réplica (salvo read-your-writes)."""
+    token = _usar_replica.set(True)
+    try:
+        yield
+    finally:
+        _usar_replica.reset(token)
+
+
+def lectura_replica(metodo):
+    """Decorador para métodos get/list de vistas de solo lectura."""
+    @wraps(metodo)
+    def envoltura(*args, **kwargs):
+        with en_replica():
+            return metodo(*args, **kwargs)
+    return envoltura
+
+
+class ReplicaRouter:
+    """settings.DATABASE_ROUTERS. Escrituras y migraciones siempre a 'default'."""
+
+    def db_for_read(self, model, **hints):
+        if not (_usar_replica.get() and hay_replica()):
+            return None
+        if _fijado_primaria.get() or connections['default'].in_atomic_block:
+            return 'default'
+        return ALIAS_REPLICA
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Misma base de datos física: las relaciones entre alias son válidas
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+
+class ReplicaMiddleware:
+    """Va después de AuthenticationMiddleware en settings.MIDDLEWARE. Sync y async."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self._acall(request)
+        if not hay_replica():
+            return self.get_response(request)
+        token = _fijado_primaria.set(self._escribio_hace_poco(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            _fijado_primaria.reset(token)
+        return self._marcar_escritura(request, response)
+
+    async def _acall(self, request):
+        if not hay_replica():
+            return await self.get_response(request)
+        token = _fijado_primaria.set(self._escribio_hace_poco(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            _fijado_primaria.reset(token)
+        return self._marcar_escritura(request, response)
+
+    def _escribio_hace_poco(self, request):
+        try:
+            ultima = float(request.COOKIES.get(COOKIE_ESCRITURA, 0))
+        except ValueError:
+            ultima = 0
+        return time.time() - ultima < settings.REPLICA_VENTANA_SEGUNDOS
+
+    def _marcar_escritura(self, request, response):
+        if request.method not in METODOS_SEGUROS and response.status_code < 400:
+            response.set_cookie(
+                COOKIE_ESCRITURA, f'{time.time():.3f}', max_age=settings.REPLICA_VENTANA_SEGUNDOS,
+                httponly=True, secure=settings.SESSION_COOKIE_SECURE,
+                samesite=settings.SESSION_COOKIE_SAMESITE,
+            )
+        return response
@@ -1,32 +1,208 @@
 import psycopg2
 import psycopg2.extras
 import logging
+import threading
+import time
+from contextlib import contextmanager
 from django.conf import settings
 
 logger = logging.getLogger(__name__)
 
+
+def _parametros_conexion():
+    """kwargs de psycopg2.connect a partir de settings.DATABASES['default']"""
+    db = settings.DATABASES['default']
+    # Obtener la URL de conexión directamente
+    if db.get('URL'):
+        return {'dsn': db['URL']}
+    # Fallback: construir desde campos individuales
+    return {
+        'dbname': db['NAME'],
+        'user': db['USER'],
+        'password': db['PASSWORD'],
+        'host': db['HOST'],
+        'port': db['PORT'],
+    }
+
+
 def get_postgres_connection():
-    """Obtener conexión a PostgreSQL usando la configuración de Django"""
+    """
+    Obtener conexión NUEVA a PostgreSQL usando la configuración de Django.
+    El llamador debe cerrarla. Para SQL crudo dentro de requests usar conexion_pool().
+    """
     try:
-        # Obtener la URL de conexión directamente
-        database_url = settings.DATABASES['default']['URL'] if 'URL' in settings.DATABASES['default'] else None
-        
-        if database_url:
-            # Usar la URL directamente
-            return psycopg2.connect(database_url)
-        else:
-            # Fallback: construir desde campos individuales
-            return psycopg2.connect(
-                dbname=settings.DATABASES['default']['NAME'],
-                user=settings.DATABASES['default']['USER'],
-                password=settings.DATABASES['default']['PASSWORD'],
-                host=settings.DATABASES['default']['HOST'],
-                port=settings.DATABASES['default']['PORT']
-            )
+        return psycopg2.connect(**_parametros_conexion())
     except Exception as e:
         logger.error(f"Error de conexión a PostgreSQL: {e}")
         return None
 
+
+# ==========================================
+# POOL DE CONEXIONES PARA SQL CRUDO
+# ==========================================
+
+class PoolAgotado(Exception):
+    """No se liberó ninguna conexión dentro de DB_POOL_TIMEOUT segundos."""
+
+
+class PoolPostgres:
+    """
+    Pool acotado y thread-safe de conexiones psycopg2.
+
+    - Como máximo `maximo` conexiones abiertas; si están todas en uso,
+      conexion() espera hasta `timeout` segundos y luego lanza PoolAgotado.
+    - Vida máxima: una conexión con más de `vida_maxima` segundos se cierra al
+      devolverla (RDS y los balanceadores cortan conexiones viejas sin avisar).
+    - Health check: si estuvo ociosa más de `chequeo_ocioso` segundos se
+      prueba con SELECT 1 antes de entregarla; si falla se reemplaza.
+    - Al devolverla se hace rollback de cualquier transacción abierta.
+    """
+
+    def __init__(self, parametros, maximo=10, vida_maxima=300, chequeo_ocioso=30, timeout=10):
+        self.parametros = parametros
+        self.maximo = maximo
+        self.vida_maxima = vida_maxima
+        self.chequeo_ocioso = chequeo_ocioso
+        self.timeout = timeout
+        self._cupos = threading.BoundedSemaphore(maximo)
+        self._lock = threading.Lock()
+        self._libres = []       # [(conexion, devuelta_en)], LIFO: la más caliente primero
+        self._creadas = {}      # id(conexion) -> creada_en
+        self._en_uso = 0
+
+    def _nueva(self):
+        conexion = psycopg2.connect(**self.parametros)
+        with self._lock:
+            self._creadas[id(conexion)] = time.monotonic()
+        return conexion
+
+    def _descartar(self, conexion):
+        with self._lock:
+            self._creadas.pop(id(conexion), None)
+        try:
+            conexion.close()
+        except Exception:
+            pass
+
+    def _sana(self, conexion, devuelta_en):
+        if conexion.closed:
+            return False
+        if time.monotonic() - devuelta_en < self.chequeo_ocioso:
+            return True
+        try:
+            with conexion.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            conexion.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _obtener(self):
+        if not self._cupos.acquire(timeout=self.timeout):
+            raise PoolAgotado(f"Sin conexiones libres tras {self.timeout}s (máximo {self.maximo})")
+        try:
+            while True:
+                with self._lock:
+                    libre = self._libres.pop() if self._libres else None
+                if libre is None:
+                    conexion = self._nueva()
+                    break
+                conexion, devuelta_en = libre
+                if self._sana(conexion, devuelta_en):
+                    break
+                logger.info("♻️ Conexión del pool descartada (health check)")
+                self._descartar(conexion)
+        except Exception:
+            self._cupos.release()
+            raise
+        with self._lock:
+            self._en_uso += 1
+        self._publicar()
+        return conexion
+
+    def _devolver(self, conexion, rota=False):
+        with self._lock:
+            self._en_uso -= 1
+            creada_en = self._creadas.get(id(conexion), 0)
+        try:
+            vieja = time.monotonic() - creada_en > self.vida_maxima
+            if rota or conexion.closed or vieja:
+                self._descartar(conexion)
+            else:
+                if conexion.status != psycopg2.extensions.STATUS_READY:
+                    conexion.rollback()
+                with self._lock:
+                    self._libres.append((conexion, time.monotonic()))
+        except Exception:
+            self._descartar(conexion)
+        finally:
+            self._cupos.release()
+            self._publicar()
+
+    @contextmanager
+    def conexion(self):
+        conexion = self._obtener()
+        rota = False
+        try:
+            yield conexion
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            rota = True
+            raise
+        finally:
+            self._devolver(conexion, rota=rota)
+
+    def estado(self):
+        with self._lock:
+            return {'en_uso': self._en_uso, 'libres': len(self._libres), 'maximo': self.maximo}
+
+    def _publicar(self):
+        try:
+            from .metrics import DB_CONEXIONES
+            estado = self.estado()
+            DB_CONEXIONES.labels(alias='default', pool='raw', estado='en_uso').set(estado['en_uso'])
+            DB_CONEXIONES.labels(alias='default', pool='raw', estado='libres').set(estado['libres'])
+        except Exception:
+            pass
+
+    def cerrar(self):
+        with self._lock:
+            libres, self._libres = self._libres, []
+        for conexion, _devuelta_en in libres:
+            self._descartar(conexion)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def obtener_pool():
+    """Pool del proceso, creado al primer uso (después del fork de gunicorn)."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = PoolPostgres(
+                    _parametros_conexion(),
+                    maximo=settings.DB_POOL_MAX,
+                    vida_maxima=settings.DB_POOL_VIDA_MAXIMA,
+                    chequeo_ocioso=settings.DB_POOL_CHEQUEO_OCIOSO,
+                    timeout=settings.DB_POOL_TIMEOUT,
+                )
+    return _pool
+
+
+def conexion_pool():
+    """
+    Conexión prestada del pool, para SQL crudo con psycopg2:
+
+        with conexion_pool() as conn, conn.cursor() as cursor:
+            cursor.execute(...)
+            conn.commit()
+
+    No cerrar la conexión: vuelve sola al pool al salir del bloque.
+    """
+    return obtener_pool().conexion()
+
 def format_file_size(size_bytes):
     """Convertir bytes a formato legible"""
     if size_bytes == 0:
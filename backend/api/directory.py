@@ -0,0 +1,182 @@
+"""
+Archivo: api/directory.py
+Directorio de usuarios/admins (Stadmin) en memoria: listas ya formateadas
+con su ETag y un índice ordenado para búsqueda por prefijo (typeahead).
+
+- Cada worker guarda una instantánea inmutable. Se reconstruye cuando cambia
+  la versión del directorio o cada DIRECTORIO_TTL_SEGUNDOS (cambios hechos
+  por fuera de Django).
+- La versión se sube con post_save/post_delete de Stadmin (ver apps.py). Con
+  REDIS_URL es un contador en Redis, así un login en un worker invalida a
+  todos; sin Redis es local al proceso (desarrollo).
+- El ETag sale del contenido: todos los workers responden el mismo ETag
+  para los mismos datos y el navegador recibe 304.
+- Búsqueda: claves plegadas (minúsculas, sin tildes) para el username, el
+  nombre completo y cada sufijo del nombre desde una palabra ("juan carlos
+  pérez" → "carlos perez", "perez"), en una lista ordenada. Un prefijo es un
+  bisect + recorrido de los que coinciden: O(log n + k).
+"""
+import bisect
+import heapq
+import logging
+import re
+import threading
+import time
+import unicodedata
+
+from django.conf import settings
+from django.db import transaction
+
+from .assignment import ROLES_ADMIN
+from .http_cache import etag_de
+from .models import Stadmin
+
+logger = logging.getLogger(__name__)
+
+LIMITE_BUSQUEDA = 20
+MAX_LIMITE_BUSQUEDA = 100
+
+
+def plegar(texto):
+    """Minúsculas, sin tildes y con espacios colapsados."""
+    texto = unicodedata.normalize('NFKD', texto or '')
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return re.sub(r'\s+', ' ', texto.lower()).strip()
+
+
+def _entrada(admin):
+    nombre_completo = admin.admin_username
+    if admin.admin_nombres or admin.admin_apellidos:
+        nombre_completo = f"{admin.admin_nombres or ''} {admin.admin_apellidos or ''}".strip()
+    return {
+        'username': admin.admin_username,
+        'email': admin.admin_correo,
+        'nombreCompleto': nombre_completo,
+        'rol': admin.admin_rol,
+    }
+
+
+class _Indice:
+    """Claves ordenadas → posición en `entradas`."""
+
+    def __init__(self, entradas):
+        pares = set()
+        for i, entrada in enumerate(entradas):
+            pares.add((plegar(entrada['username']), i))
+            palabras = plegar(entrada['nombreCompleto']).split(' ')
+            for j in range(len(palabras)):
+                pares.add((' '.join(palabras[j:]), i))
+        ordenados = sorted(p for p in pares if p[0])
+        self._claves = [clave for clave, _ in ordenados]
+        self._posiciones = [i for _, i in ordenados]
+
+    def buscar(self, prefijo, grupo):
+        """Genera (clave, grupo, posición) de las claves que empiezan con `prefijo`, en orden."""
+        j = bisect.bisect_left(self._claves, prefijo)
+        while j < len(self._claves) and self._claves[j].startswith(prefijo):
+            yield self._claves[j], grupo, self._posiciones[j]
+            j += 1
+
+
+class Instantanea:
+    """Directorio en un momento dado (no se modifica; se reemplaza entera)."""
+
+    def __init__(self, version, admins, usuarios):
+        self.version = version
+        self.creada = time.monotonic()
+        self.admins = admins
+        self.usuarios = usuarios
+        self.etag_admins = etag_de(admins)
+        self.etag_usuarios = etag_de(usuarios)
+        self._indices = {'admins': _Indice(admins), 'usuarios': _Indice(usuarios)}
+
+    def buscar(self, texto, tipo='todos', limite=LIMITE_BUSQUEDA):
+        prefijo = plegar(texto)
+        if not prefijo:
+            return []
+        grupos = ('admins', 'usuarios') if tipo == 'todos' else (tipo,)
+        listas = {'admins': self.admins, 'usuarios': self.usuarios}
+        # Cada índice ya sale ordenado: merge sin ordenar todo de nuevo
+        encontrados = heapq.merge(*(self._indices[grupo].buscar(prefijo, grupo) for grupo in grupos))
+        resultado, vistos = [], set()
+        for _, grupo, i in encontrados:
+            if (grupo, i) in vistos:
+                continue
+            vistos.add((grupo, i))
+            resultado.append(listas[grupo][i])
+            if len(resultado) >= limite:
+                break
+        return resultado
+
+
+def _cargar(version):
+    admins, usuarios = [], []
+    for admin in Stadmin.objects.filter(admin_activo=True).order_by('admin_username'):
+        (admins if admin.admin_rol in ROLES_ADMIN else usuarios).append(_entrada(admin))
+    return Instantanea(version, admins, usuarios)
+
+
+class Directorio:
+    """Fachada usada por las vistas y las señales."""
+
+    CLAVE_VERSION = 'directorio:version'
+
+    def __init__(self):
+        self._instantanea = None
+        self._lock = threading.Lock()
+        self._redis = None
+        self._version_local = 0
+
+    def _cliente_redis(self):
+        url = getattr(settings, 'REDIS_URL', None)
+        if not url:
+            return None
+        if self._redis is None:
+            import redis
+            self._redis = redis.Redis.from_url(url, socket_timeout=1)
+        return self._redis
+
+    def _version(self):
+        cliente = self._cliente_redis()
+        if cliente is None:
+            return self._version_local
+        try:
+            return int(cliente.get(self.CLAVE_VERSION) or 0)
+        except Exception as e:
+            # Sin Redis se sigue sirviendo: el TTL acota lo desactualizado
+            logger.warning(f"⚠️ Directorio: no se pudo leer la versión en Redis: {e}")
+            return self._instantanea.version if self._instantanea else -1
+
+    def invalidar(self):
+        self._version_local += 1
+        self._instantanea = None
+        cliente = self._cliente_redis()
+        if cliente is not None:
+            try:
+                cliente.incr(self.CLAVE_VERSION)
+            except Exception as e:
+                logger.warning(f"⚠️ Directorio: no se pudo invalidar en Redis: {e}")
+
+    def instantanea(self):
+        version = self._version()
+        actual = self._instantanea
+        if actual is not None and actual.version == version and \
+                time.monotonic() - actual.creada < settings.DIRECTORIO_TTL_SEGUNDOS:
+            return actual
+        with self._lock:
+            actual = self._instantanea
+            if actual is None or actual.version != version or \
+                    time.monotonic() - actual.creada >= settings.DIRECTORIO_TTL_SEGUNDOS:
+                actual = _cargar(version)
+                self._instantanea = actual
+                logger.info(f"📇 Directorio cargado: {len(actual.admins)} admins, {len(actual.usuarios)} usuarios")
+            return actual
+
+
+def invalidar_directorio(sender, **kwargs):
+    """Receptor de post_save/post_delete de Stadmin (después del COMMIT, si hay transacción)."""
+    transaction.on_commit(directorio.invalidar)
+
+
+# Instancia única por proceso
+directorio = Directorio()
@@ -0,0 +1,369 @@
+"""
+Archivo: api/duplicates.py
+Índice MinHash/LSH en memoria sobre los tickets abiertos (PE/PR) para
+detectar casi-duplicados al momento de crear un ticket.
+
+- La firma usa "one permutation hashing": un solo hash por shingle y el
+  mínimo por cubeta, así calcularla cuesta O(n) y no O(n * permutaciones).
+- Las bandas LSH se indexan junto con el asunto normalizado, porque en los
+  incidentes los duplicados comparten `ticket_asu_ticket`.
+- Cada proceso (worker) mantiene su propio índice. Se actualiza en forma
+  incremental con los tickets nuevos y se reconstruye completo cada
+  DUPLICADOS_TTL_SEGUNDOS. La reconstrucción corre en un hilo aparte sobre
+  tablas nuevas que reemplazan a las viejas de una vez: mientras tanto las
+  búsquedas (y las creaciones de tickets) siguen con las anteriores.
+- Cierres hechos en otros workers: antes de devolver candidatos se confirma
+  en la base (por PK) que sigan abiertos; los cerrados salen del índice.
+"""
+import logging
+import re
+import threading
+import time
+import unicodedata
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connections
+
+from .models import Stticket
+
+logger = logging.getLogger(__name__)
+
+ESTADOS_ABIERTOS = ('PE', 'PR')
+
+NUM_CUBETAS = 48          # Largo de la firma
+NUM_BANDAS = 16           # 16 bandas x 3 filas
+FILAS_POR_BANDA = NUM_CUBETAS // NUM_BANDAS
+TAM_SHINGLE = 4           # n-gramas de caracteres
+MAX_CARACTERES = 2000     # Acota el costo de firmar descripciones enormes
+MASCARA_64 = (1 << 64) - 1
+MAX_ANCLAS = 16           # Comparaciones por ticket y cubeta al armar clusters
+
+SEPARADOR_OPCIONES = '--- Opciones Finales'
+
+
+def _normalizar(texto):
+    """Minúsculas, sin tildes y con espacios colapsados."""
+    texto = unicodedata.normalize('NFKD', texto or '')
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return re.sub(r'[^a-z0-9]+', ' ', texto.lower()).strip()
+
+
+def _texto_problema(descripcion):
+    """
+    perform_create agrega las 'Opciones Finales Intentadas' al final de la
+    descripción; son las mismas para toda una subcategoría, así que se
+    descartan para que no inflen la similitud.
+    """
+    return (descripcion or '').split(SEPARADOR_OPCIONES)[0]
+
+
+def calcular_firma(descripcion):
+    """Firma MinHash (tupla de NUM_CUBETAS enteros) o None si no hay texto."""
+    texto = _normalizar(_texto_problema(descripcion))[:MAX_CARACTERES]
+    if not texto:
+        return None
+    if len(texto) <= TAM_SHINGLE:
+        shingles = {texto}
+    else:
+        shingles = {texto[i:i + TAM_SHINGLE] for i in range(len(texto) - TAM_SHINGLE + 1)}
+
+    cubetas = [None] * NUM_CUBETAS
+    for shingle in shingles:
+        h = hash(shingle) & MASCARA_64
+        idx = h % NUM_CUBETAS
+        valor = h // NUM_CUBETAS
+        actual = cubetas[idx]
+        if actual is None or valor < actual:
+            cubetas[idx] = valor
+
+    # Densificación: las cubetas vacías toman el valor de la siguiente llena
+    # (circular) desplazado por la distancia, para no generar colisiones falsas.
+    if None in cubetas:
+        for idx in range(NUM_CUBETAS):
+            if cubetas[idx] is not None:
+                continue
+            for salto in range(1, NUM_CUBETAS):
+                vecino = cubetas[(idx + salto) % NUM_CUBETAS]
+                if vecino is not None and not isinstance(vecino, tuple):
+                    cubetas[idx] = (vecino, salto)
+                    break
+    return tuple(cubetas)
+
+
+def similitud(firma_a, firma_b):
+    """Estimación de Jaccard: fracción de cubetas iguales."""
+    iguales = sum(1 for a, b in zip(firma_a, firma_b) if a == b)
+    return iguales / NUM_CUBETAS
+
+
+def _entrada(cod, id_ticket, asunto, descripcion, usuario, fecha):
+    """(cod, asunto normalizado, firma, meta) listo para indexar, o None sin texto."""
+    firma = calcular_firma(descripcion)
+    if firma is None:
+        return None
+    meta = {
+        'ticket_cod':  cod,
+        'ticket_id':   id_ticket or str(cod),
+        'asunto':      asunto or '',
+        'creado_por':  usuario or '',
+        'fecha':       fecha.isoformat() if fecha else None,
+    }
+    return cod, _normalizar(asunto), firma, meta
+
+
+def _claves(asunto, firma):
+    for banda in range(NUM_BANDAS):
+        inicio = banda * FILAS_POR_BANDA
+        yield (asunto, banda, firma[inicio:inicio + FILAS_POR_BANDA])
+
+
+class _Tablas:
+    """Contenido del índice. Una reconstrucción arma unas nuevas y las cambia enteras."""
+
+    def __init__(self):
+        self.firmas = {}                  # cod -> (asunto, firma)
+        self.meta = {}                    # cod -> datos para mostrar
+        self.cubetas = defaultdict(set)   # (asunto, banda, valores) -> {cod}
+        self.ultimo_cod = 0
+
+    def agregar(self, cod, asunto, firma, meta):
+        self.quitar(cod)
+        self.firmas[cod] = (asunto, firma)
+        self.meta[cod] = meta
+        for clave in _claves(asunto, firma):
+            self.cubetas[clave].add(cod)
+        if cod > self.ultimo_cod:
+            self.ultimo_cod = cod
+
+    def quitar(self, cod):
+        datos = self.firmas.pop(cod, None)
+        self.meta.pop(cod, None)
+        if datos is None:
+            return
+        for clave in _claves(*datos):
+            miembros = self.cubetas.get(clave)
+            if miembros is not None:
+                miembros.discard(cod)
+                if not miembros:
+                    del self.cubetas[clave]
+
+
+class IndiceDuplicados:
+    """Índice LSH de tickets abiertos. Seguro entre hilos del mismo proceso."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._tablas = _Tablas()
+        self._reconstruido_en = 0.0
+        self._cargado = False
+        self._reconstruyendo = False
+        self._pendientes = None           # Cambios llegados durante una reconstrucción
+
+    # ── Base de datos ──────────────────────────────────────
+    @staticmethod
+    def _filas_abiertas(desde_cod=0):
+        """Entradas de los tickets abiertos con cod > desde_cod."""
+        filas = Stticket.objects.filter(
+            ticket_cod_ticket__gt=desde_cod, ticket_est_ticket__in=ESTADOS_ABIERTOS,
+        ).values_list(
+            'ticket_cod_ticket', 'ticket_id_ticket', 'ticket_asu_ticket',
+            'ticket_des_ticket', 'ticket_tusua_ticket', 'ticket_fec_ticket',
+        )
+        for fila in filas.iterator(chunk_size=2000):
+            entrada = _entrada(*fila)
+            if entrada is not None:
+                yield entrada
+
+    @staticmethod
+    def _abiertos_en_base(cods):
+        return set(Stticket.objects.filter(
+            ticket_cod_ticket__in=cods, ticket_est_ticket__in=ESTADOS_ABIERTOS,
+        ).values_list('ticket_cod_ticket', flat=True))
+
+    # ── Mantenimiento ──────────────────────────────────────
+    def _aplicar(self, cambio):
+        """Aplica `cambio(tablas)` a las tablas actuales (y a las que se están armando)."""
+        with self._lock:
+            cambio(self._tablas)
+            if self._pendientes is not None:
+                self._pendientes.append(cambio)
+
+    def reconstruir(self):
+        """
+        Recarga todos los tickets abiertos en tablas nuevas, sin tomar el lock
+        mientras lee la base, y las pone en lugar de las anteriores. Los
+        registrar()/retirar() que llegan en el medio se repiten sobre las nuevas.
+        """
+        inicio = time.monotonic()
+        with self._lock:
+            self._pendientes = []
+        nuevas = _Tablas()
+        try:
+            for entrada in self._filas_abiertas():
+                nuevas.agregar(*entrada)
+        except Exception:
+            with self._lock:
+                self._pendientes = None
+            raise
+        with self._lock:
+            for cambio in self._pendientes:
+                cambio(nuevas)
+            self._pendientes = None
+            self._tablas = nuevas
+            self._reconstruido_en = time.monotonic()
+            self._cargado = True
+        logger.info(f"🧮 Índice de duplicados reconstruido: {len(nuevas.firmas)} tickets en {time.monotonic() - inicio:.2f}s")
+
+    def _reconstruir_en_hilo(self):
+        try:
+            self.reconstruir()
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo reconstruir el índice de duplicados: {e}")
+        finally:
+            self._reconstruyendo = False
+            connections.close_all()   # Conexiones propias de este hilo
+
+    def sincronizar(self):
+        """
+        Trae los tickets abiertos creados (por cualquier worker) desde la
+        última carga. La primera vez carga todo en este hilo; si el índice
+        venció, lanza la reconstrucción en otro hilo y sigue con el actual.
+        """
+        ttl = getattr(settings, 'DUPLICADOS_TTL_SEGUNDOS', 300)
+        with self._lock:
+            if not self._cargado and self._reconstruyendo:
+                return          # Otro hilo está haciendo la primera carga
+            primera = not self._cargado
+            vencido = (not primera and not self._reconstruyendo
+                       and time.monotonic() - self._reconstruido_en > ttl)
+            if primera or vencido:
+                self._reconstruyendo = True
+            desde = self._tablas.ultimo_cod
+        if primera:
+            try:
+                self.reconstruir()
+            finally:
+                self._reconstruyendo = False
+            return
+        if vencido:
+            threading.Thread(target=self._reconstruir_en_hilo, name='duplicados', daemon=True).start()
+        nuevas = list(self._filas_abiertas(desde))
+        if nuevas:
+            def agregar(tablas):
+                for entrada in nuevas:
+                    tablas.agregar(*entrada)
+            self._aplicar(agregar)
+
+    def registrar(self, ticket):
+        """Agrega o actualiza un ticket; si ya no está abierto lo retira."""
+        if not self._cargado:
+            return
+        cod = ticket.ticket_cod_ticket
+        entrada = None
+        if ticket.ticket_est_ticket in ESTADOS_ABIERTOS:
+            entrada = _entrada(cod, ticket.ticket_id_ticket, ticket.ticket_asu_ticket,
+                               ticket.ticket_des_ticket, ticket.ticket_tusua_ticket, ticket.ticket_fec_ticket)
+        if entrada is None:
+            self.retirar(cod)
+        else:
+            self._aplicar(lambda tablas: tablas.agregar(*entrada))
+
+    def retirar(self, cod):
+        self._aplicar(lambda tablas: tablas.quitar(cod))
+
+    def vigentes(self, cods):
+        """Los `cods` que siguen abiertos en la base; los cerrados en otro worker salen del índice."""
+        cods = set(cods)
+        if not cods:
+            return cods
+        abiertos = self._abiertos_en_base(cods)
+        for cod in cods - abiertos:
+            self.retirar(cod)
+        return abiertos
+
+    # ── Consultas ──────────────────────────────────────────
+    def buscar(self, asunto, descripcion, excluir=None, umbral=None, limite=10):
+        """Tickets abiertos parecidos, ordenados por similitud descendente."""
+        if umbral is None:
+            umbral = getattr(settings, 'DUPLICADOS_UMBRAL', 0.6)
+        firma = calcular_firma(descripcion)
+        if firma is None:
+            return []
+        asunto = _normalizar(asunto)
+        with self._lock:
+            tablas = self._tablas
+            candidatos = set()
+            for clave in _claves(asunto, firma):
+                candidatos |= tablas.cubetas.get(clave, set())
+            candidatos.discard(excluir)
+            resultado = []
+            for cod in candidatos:
+                sim = similitud(firma, tablas.firmas[cod][1])
+                if sim >= umbral:
+                    resultado.append({**tablas.meta[cod], 'similitud': round(sim, 2)})
+        resultado.sort(key=lambda r: r['similitud'], reverse=True)
+        return resultado[:limite]
+
+    def clusters(self, umbral=None, min_tamano=2):
+        """Agrupa los tickets abiertos casi-duplicados (union-find sobre las cubetas)."""
+        if umbral is None:
+            umbral = getattr(settings, 'DUPLICADOS_UMBRAL', 0.6)
+        with self._lock:
+            tablas = self._tablas
+            padre = {}
+
+            def raiz(x):
+                padre.setdefault(x, x)
+                while padre[x] != x:
+                    padre[x] = padre[padre[x]]
+                    x = padre[x]
+                return x
+
+            # En cada cubeta se compara contra unas pocas "anclas" en vez de
+            # todos contra todos: en un incidente una cubeta puede tener
+            # cientos de tickets y el costo cuadrático se dispara.
+            for miembros in tablas.cubetas.values():
+                if len(miembros) < 2:
+                    continue
+                anclas = []
+                for cod in sorted(miembros):
+                    firma = tablas.firmas[cod][1]
+                    for ancla in anclas:
+                        if similitud(firma, tablas.firmas[ancla][1]) >= umbral:
+                            ra, rb = raiz(ancla), raiz(cod)
+                            if ra != rb:
+                                padre[max(ra, rb)] = min(ra, rb)
+                            break
+                    else:
+                        if len(anclas) < MAX_ANCLAS:
+                            anclas.append(cod)
+
+            grupos = defaultdict(list)
+            for cod in list(padre):
+                grupos[raiz(cod)].append(tablas.meta[cod])
+
+        resultado = []
+        for tickets in grupos.values():
+            if len(tickets) < min_tamano:
+                continue
+            tickets.sort(key=lambda t: t['ticket_cod'])
+            resultado.append({
+                'asunto':   tickets[0]['asunto'],
+                'cantidad': len(tickets),
+                'tickets':  tickets,
+            })
+        resultado.sort(key=lambda c: c['cantidad'], reverse=True)
+        return resultado
+
+    def clusters_vigentes(self, umbral=None, min_tamano=2):
+        """clusters() sin tickets que otro worker ya cerró."""
+        resultado = self.clusters(umbral, min_tamano)
+        cods = {t['ticket_cod'] for cluster in resultado for t in cluster['tickets']}
+        if self.vigentes(cods) != cods:
+            resultado = self.clusters(umbral, min_tamano)
+        return resultado
+
+
+# Instancia única por proceso
+indice_duplicados = IndiceDuplicados()
@@ -0,0 +1,167 @@
+"""
+Archivo: api/filters.py
+Filtros y facetas para las listas de tickets, calculados en el servidor.
+
+Parámetros (todos opcionales, los de lista separados por coma):
+    estado=PE,PR   tipo=Software   asignado_a=kevin.santana,sin_asignar
+    usuario=maria.lopez   desde=2026-01-01   hasta=2026-01-31
+    page=1   page_size=50
+
+Las facetas (conteos por estado / tipo / asignado) salen de UNA sola consulta
+agrupada por las tres columnas. Cada faceta respeta los demás filtros pero no
+el suyo, así las pestañas de estado siguen mostrando los conteos de todos los
+estados aunque se esté viendo solo "PE".
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db.models import Count, Q
+
+PAGE_SIZE_POR_DEFECTO = 50
+PAGE_SIZE_MAXIMO = 200
+
+SIN_ASIGNAR = 'sin_asignar'
+
+# parámetro -> columna agrupada para facetas
+DIMENSIONES = {
+    'estado':     'ticket_est_ticket',
+    'tipo':       'ticket_tip_ticket',
+    'asignado_a': 'ticket_asignado_a',
+}
+
+
+def _lista(params, nombre):
+    valor = params.get(nombre)
+    if not valor:
+        return None
+    return [v.strip() for v in valor.split(',') if v.strip()] or None
+
+
+def _fecha(valor):
+    """
+    datetime naive en hora local (ticket_fec_ticket se guarda así, USE_TZ=False).
+    Si trae zona (Z, -05:00) se convierte a TIME_ZONE antes de quitarla.
+    """
+    try:
+        fecha = datetime.fromisoformat(valor.replace('Z', '+00:00'))
+    except (AttributeError, ValueError):
+        return None
+    if fecha.tzinfo is not None:
+        fecha = fecha.astimezone(ZoneInfo(settings.TIME_ZONE))
+    return fecha.replace(tzinfo=None)
+
+
+def usa_paginacion(params):
+    """
+    Con page/page_size se responde el sobre {results, count, facets}.
+    Sin ellos se mantiene la lista plana de siempre (solo filtrada).
+    """
+    return 'page' in params or 'page_size' in params
+
+
+def _valor_coincide(valor, seleccion):
+    if seleccion is None:
+        return True
+    if valor in (None, ''):
+        return SIN_ASIGNAR in seleccion
+    return valor in seleccion
+
+
+def filtrar_base(qs, params):
+    """Filtros que no son facetas: solicitante y rango de fechas."""
+    usuarios = _lista(params, 'usuario')
+    if usuarios:
+        qs = qs.filter(ticket_tusua_ticket__in=usuarios)
+
+    desde = _fecha(params.get('desde'))
+    if desde:
+        qs = qs.filter(ticket_fec_ticket__gte=desde)
+
+    hasta = _fecha(params.get('hasta'))
+    if hasta:
+        # 'hasta' con solo fecha incluye el día completo
+        if len(params.get('hasta', '')) <= 10:
+            hasta += timedelta(days=1)
+        qs = qs.filter(ticket_fec_ticket__lt=hasta)
+    return qs
+
+
+def filtrar_dimensiones(qs, selecciones):
+    """Aplica los filtros de faceta (estado, tipo, asignado_a) al queryset."""
+    for nombre, columna in DIMENSIONES.items():
+        seleccion = selecciones.get(nombre)
+        if seleccion is None:
+            continue
+        valores = [v for v in seleccion if v != SIN_ASIGNAR]
+        condicion = {f'{columna}__in': valores}
+        if SIN_ASIGNAR in seleccion:
+            qs = qs.filter(Q(**condicion) | Q(**{f'{columna}__isnull': True}) | Q(**{columna: ''}))
+        else:
+            qs = qs.filter(**condicion)
+    return qs
+
+
+def filtrar_tickets(qs, params):
+    """Todos los filtros, para la respuesta en lista plana."""
+    selecciones = {nombre: _lista(params, nombre) for nombre in DIMENSIONES}
+    return filtrar_dimensiones(filtrar_base(qs, params), selecciones)
+
+
+def calcular_facetas(qs_base, selecciones):
+    """
+    Una sola consulta GROUP BY (estado, tipo, asignado) sobre el queryset base.
+    Devuelve (facetas, total_filtrado).
+    """
+    filas = list(
+        qs_base.order_by()
+        .values_list(*DIMENSIONES.values())
+        .annotate(n=Count('ticket_cod_ticket'))
+    )
+    nombres = list(DIMENSIONES)
+    facetas = {nombre: defaultdict(int) for nombre in nombres}
+    total = 0
+
+    for fila in filas:
+        valores, n = fila[:-1], fila[-1]
+        coincide = [_valor_coincide(v, selecciones.get(nombre)) for nombre, v in zip(nombres, valores)]
+        if all(coincide):
+            total += n
+        for i, nombre in enumerate(nombres):
+            # La faceta ignora su propio filtro pero respeta los demás
+            if all(c for j, c in enumerate(coincide) if j != i):
+                facetas[nombre][valores[i] or SIN_ASIGNAR] += n
+
+    return {nombre: dict(conteos) for nombre, conteos in facetas.items()}, total
+
+
+def paginar_con_facetas(qs, params, serializar):
+    """
+    Aplica filtros, calcula facetas y devuelve el sobre JSON con una página.
+    `serializar` recibe el queryset de la página y devuelve la lista de dicts.
+    """
+    selecciones = {nombre: _lista(params, nombre) for nombre in DIMENSIONES}
+    qs_base = filtrar_base(qs, params)
+    facetas, total = calcular_facetas(qs_base, selecciones)
+
+    try:
+        page = max(int(params.get('page', 1)), 1)
+    except (TypeError, ValueError):
+        page = 1
+    try:
+        page_size = min(max(int(params.get('page_size', PAGE_SIZE_POR_DEFECTO)), 1), PAGE_SIZE_MAXIMO)
+    except (TypeError, ValueError):
+        page_size = PAGE_SIZE_POR_DEFECTO
+
+    inicio = (page - 1) * page_size
+    pagina = filtrar_dimensiones(qs_base, selecciones)[inicio:inicio + page_size]
+
+    return {
+        'count':     total,
+        'page':      page,
+        'page_size': page_size,
+        'pages':     (total + page_size - 1) // page_size,
+        'results':   serializar(pagina),
+        'facets':    facetas,
+    }
@@ -0,0 +1,35 @@
+"""
+Archivo: api/http_cache.py
+ETag / If-None-Match para respuestas JSON que el navegador puede revalidar
+(304 sin cuerpo). Sirve igual para Response de DRF y HttpResponse de Django.
+"""
+import hashlib
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+# El navegador guarda la respuesta pero revalida siempre con If-None-Match
+CACHE_PRIVADO = 'private, no-cache'
+
+
+def etag_de(datos):
+    """ETag fuerte a partir del contenido (igual en todos los workers)."""
+    serializado = json.dumps(datos, sort_keys=True, cls=DjangoJSONEncoder).encode()
+    return '"' + hashlib.sha1(serializado).hexdigest()[:20] + '"'
+
+
+def coincide_etag(if_none_match, etag):
+    if not if_none_match:
+        return False
+    candidatos = [e.strip().removeprefix('W/') for e in if_none_match.split(',')]
+    return '*' in candidatos or etag in candidatos
+
+
+def no_modificado(request, etag):
+    return coincide_etag(request.headers.get('If-None-Match'), etag)
+
+
+def con_etag(respuesta, etag, cache_control=CACHE_PRIVADO):
+    respuesta['ETag'] = etag
+    respuesta['Cache-Control'] = cache_control
+    return respuesta
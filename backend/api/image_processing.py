@@ -0,0 +1,43 @@
+"""
+Archivo: api/image_processing.py
+Decodificación y redimensionado de imágenes con Pillow.
+
+Corre dentro de los procesos del pool de api/thumbnails.py: NO importar nada
+de Django aquí (los procesos hijos arrancan con 'spawn' y solo importan este
+módulo).
+"""
+import io
+
+from PIL import Image, ImageOps
+
+# Fotos de 48 MP entran; una "bomba de descompresión" no
+Image.MAX_IMAGE_PIXELS = 64_000_000
+
+TAMANOS = {
+    'miniatura': (256, 256),
+    'preview': (1280, 1280),
+}
+CALIDAD_WEBP = {'miniatura': 70, 'preview': 80}
+
+
+def generar_derivados(datos):
+    """
+    bytes de la imagen original -> {'miniatura': bytes, 'preview': bytes,
+    'ancho': int, 'alto': int} en WebP. Lanza excepción si no es una imagen.
+    """
+    with Image.open(io.BytesIO(datos)) as original:
+        # Solo el primer frame de GIF/WebP animados
+        original.seek(0)
+        imagen = ImageOps.exif_transpose(original)  # Fotos de celular giradas
+        if imagen.mode not in ('RGB', 'RGBA'):
+            imagen = imagen.convert('RGBA' if 'A' in imagen.getbands() or 'transparency' in imagen.info else 'RGB')
+        ancho, alto = imagen.size
+
+        resultado = {'ancho': ancho, 'alto': alto}
+        for nombre, caja in TAMANOS.items():
+            copia = imagen.copy()
+            copia.thumbnail(caja, Image.LANCZOS)
+            salida = io.BytesIO()
+            copia.save(salida, 'WEBP', quality=CALIDAD_WEBP[nombre], method=4)
+            resultado[nombre] = salida.getvalue()
+        return resultado
@@ -0,0 +1,188 @@
+"""
+Archivo: api/instrumentation.py
+Medición por request: consultas SQL, tiempo en BD, S3, channel layer y
+serialización.
+
+- RequestTimingMiddleware abre una medición por request en un ContextVar.
+- Cada conexión de BD lleva un execute_wrapper fijo desde que se abre
+  (señal connection_created, ver apps.py) que solo mide si hay una medición
+  en el contexto. Bajo ASGI las consultas corren en el hilo de
+  sync_to_async, con sus propias conexiones; sync_to_async copia el
+  contexto, así que se cuentan igual que con WSGI.
+- El resto del código marca sus tramos con:
+      with medir('s3'):
+          s3_client.generate_presigned_url(...)
+  El tramo no incluye el SQL que se ejecute adentro (ya cuenta en 'db'): la
+  serialización de una lista no suma la consulta que la evalúa.
+- Al final se emite una línea de log estructurada (JSON) y, para usuarios
+  staff, el header Server-Timing que se ve en la pestaña Network del navegador.
+- Si un request supera INSTRUMENTACION_MAX_CONSULTAS se loguea un warning con
+  la consulta más repetida (típico N+1).
+"""
+import contextvars
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.functional import empty
+
+logger = logging.getLogger('api.timing')
+
+CATEGORIAS = ('db', 's3', 'canal', 'serializacion')
+
+_medicion_actual = contextvars.ContextVar('medicion_actual', default=None)
+
+_NUMEROS = re.compile(r"\b\d+\b|'[^']*'")
+
+
+class Medicion:
+    """Acumulador de tiempos (segundos) y conteos de un request."""
+
+    def __init__(self):
+        self.tiempos = dict.fromkeys(CATEGORIAS, 0.0)
+        self.conteos = dict.fromkeys(CATEGORIAS, 0)
+        self.plantillas_sql = Counter()
+
+    def agregar(self, categoria, segundos):
+        self.tiempos[categoria] = self.tiempos.get(categoria, 0.0) + segundos
+        self.conteos[categoria] = self.conteos.get(categoria, 0) + 1
+
+    def envoltorio_sql(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.agregar('db', time.perf_counter() - inicio)
+            # Normalizada (sin literales) para detectar repeticiones N+1
+            self.plantillas_sql[_NUMEROS.sub('?', sql)[:300]] += 1
+
+
+def medicion_actual():
+    return _medicion_actual.get()
+
+
+def envoltorio_sql(execute, sql, params, many, context):
+    """execute_wrapper de todas las conexiones: mide solo dentro de un request."""
+    medicion = _medicion_actual.get()
+    if medicion is None:
+        return execute(sql, params, many, context)
+    return medicion.envoltorio_sql(execute, sql, params, many, context)
+
+
+def al_crear_conexion(sender, connection, **kwargs):
+    """Receptor de connection_created (ver apps.py)."""
+    # execute_wrappers sobrevive a las reconexiones del mismo DatabaseWrapper
+    if envoltorio_sql not in connection.execute_wrappers:
+        connection.execute_wrappers.append(envoltorio_sql)
+
+
+@contextmanager
+def medir(categoria):
+    """
+    Suma la duración del bloque a `categoria` del request actual (si hay),
+    descontando el SQL que corra adentro.
+    """
+    medicion = _medicion_actual.get()
+    if medicion is None:
+        yield
+        return
+    inicio = time.perf_counter()
+    db_antes = medicion.tiempos['db']
+    try:
+        yield
+    finally:
+        sql = medicion.tiempos['db'] - db_antes
+        medicion.agregar(categoria, time.perf_counter() - inicio - sql)
+
+
+def _usuario_resuelto(request):
+    """
+    request.user solo si ya se resolvió: evaluar el SimpleLazyObject de
+    AuthenticationMiddleware consulta la BD (prohibido en el event loop).
+    """
+    user = getattr(request, 'user', None)
+    if getattr(user, '_wrapped', None) is empty:
+        return None
+    return user
+
+
+class RequestTimingMiddleware:
+    """Va justo después de AuthenticationMiddleware en settings.MIDDLEWARE. Sync y async."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self._acall(request)
+        medicion = Medicion()
+        token = _medicion_actual.set(medicion)
+        inicio = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _medicion_actual.reset(token)
+        return self._finalizar(request, response, medicion, time.perf_counter() - inicio)
+
+    async def _acall(self, request):
+        medicion = Medicion()
+        token = _medicion_actual.set(medicion)
+        inicio = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _medicion_actual.reset(token)
+        return self._finalizar(request, response, medicion, time.perf_counter() - inicio)
+
+    def _finalizar(self, request, response, medicion, total):
+        try:
+            self._reportar(request, response, medicion, total)
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo reportar la medición: {e}")
+        return response
+
+    def _reportar(self, request, response, medicion, total):
+        resolver = getattr(request, 'resolver_match', None)
+        ruta = resolver.route if resolver else request.path
+        user = _usuario_resuelto(request)
+        consultas = medicion.conteos['db']
+
+        logger.info(json.dumps({
+            'evento':       'request',
+            'metodo':       request.method,
+            'ruta':         ruta,
+            'status':       response.status_code,
+            'usuario':      getattr(user, 'username', None),
+            'total_ms':     round(total * 1000, 2),
+            'sql_consultas': consultas,
+            'sql_ms':       round(medicion.tiempos['db'] * 1000, 2),
+            's3_ms':        round(medicion.tiempos['s3'] * 1000, 2),
+            'canal_ms':     round(medicion.tiempos['canal'] * 1000, 2),
+            'serializacion_ms': round(medicion.tiempos['serializacion'] * 1000, 2),
+        }))
+
+        maximo = getattr(settings, 'INSTRUMENTACION_MAX_CONSULTAS', 50)
+        if consultas > maximo:
+            plantilla, veces = medicion.plantillas_sql.most_common(1)[0]
+            logger.warning(
+                f"🐢 {request.method} {ruta}: {consultas} consultas SQL (máximo {maximo}). "
+                f"Más repetida ({veces}x): {plantilla}"
+            )
+
+        if getattr(user, 'is_staff', False):
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={medicion.tiempos["db"] * 1000:.1f};desc="{consultas} consultas"',
+                f's3;dur={medicion.tiempos["s3"] * 1000:.1f}',
+                f'canal;dur={medicion.tiempos["canal"] * 1000:.1f}',
+                f'ser;dur={medicion.tiempos["serializacion"] * 1000:.1f}',
+                f'total;dur={total * 1000:.1f}',
+            ])
@@ -0,0 +1,48 @@
+"""
+Genera miniaturas/previews de los adjuntos de imagen que no los tienen
+(adjuntos anteriores al pipeline, o cola perdida en un reinicio).
+
+    python manage.py generar_miniaturas
+    python manage.py generar_miniaturas --ticket 8 --limite 100
+"""
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from api.models import Starchivos
+from api.thumbnails import TIPOS_IMAGEN, es_imagen, pipeline_miniaturas
+
+
+class Command(BaseCommand):
+    help = 'Genera miniaturas y previews WebP de los adjuntos de imagen pendientes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ticket', type=int, help='Solo los adjuntos de este ticket')
+        parser.add_argument('--limite', type=int, default=None, help='Máximo de archivos a procesar')
+
+    def handle(self, *args, **opciones):
+        filtro_tipo = Q(archivo_tip_archivo__in=TIPOS_IMAGEN)
+        for extension in TIPOS_IMAGEN:
+            filtro_tipo |= Q(archivo_nom_archivo__iendswith=f'.{extension}')
+
+        qs = (
+            Starchivos.objects
+            .filter(filtro_tipo, archivo_min_archivo__isnull=True, archivo_rut_archivo__isnull=False)
+            .order_by('-archivo_cod_archivo')
+        )
+        if opciones['ticket']:
+            qs = qs.filter(archivo_cod_ticket=opciones['ticket'])
+        if opciones['limite']:
+            qs = qs[:opciones['limite']]
+
+        hechos = fallidos = 0
+        for archivo in qs.iterator():
+            if not es_imagen(archivo):
+                continue
+            try:
+                pipeline_miniaturas.procesar(archivo.archivo_cod_archivo, archivo.archivo_rut_archivo)
+                hechos += 1
+            except Exception as e:
+                fallidos += 1
+                self.stderr.write(f"⚠️ {archivo.archivo_cod_archivo} ({archivo.archivo_rut_archivo}): {e}")
+
+        self.stdout.write(self.style.SUCCESS(f"✅ {hechos} archivo(s) con miniatura, {fallidos} con error"))
@@ -0,0 +1,29 @@
+"""
+Recalcula las referencias de stblob a partir de starchivos y borra los blobs
+que quedaron sin ninguna (ver api/blobs.py).
+
+    python manage.py recontar_blobs
+    python manage.py recontar_blobs --sin-borrar
+"""
+from django.core.management.base import BaseCommand
+
+from api import blobs
+from api.models import Stblob
+
+
+class Command(BaseCommand):
+    help = 'Corrige blob_refs y elimina de S3 los blobs sin referencias'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sin-borrar', action='store_true', help='Solo recalcular, no borrar blobs huérfanos')
+
+    def handle(self, *args, **opciones):
+        corregidos = blobs.recontar()
+        self.stdout.write(f"🔢 {corregidos} blob(s) con referencias corregidas")
+        if opciones['sin_borrar']:
+            return
+
+        huerfanos = list(Stblob.objects.filter(blob_refs=0).values_list('blob_sha256', flat=True))
+        # liberar() resta una referencia más: con 0 queda en 0 y se borra
+        borrados = blobs.liberar(huerfanos)
+        self.stdout.write(self.style.SUCCESS(f"✅ {len(borrados)} blob(s) huérfano(s) eliminados de S3"))
@@ -0,0 +1,27 @@
+"""
+Worker de SLA de tickets pendientes (ver api/sla.py). Debe correr UN
+proceso; si se levanta otro, queda de reserva hasta que el primero caiga.
+
+    python manage.py sla_worker
+    python manage.py sla_worker --una-vez     # Reconstruye, dispara lo vencido y sale
+"""
+from django.core.management.base import BaseCommand
+
+from api.sla import TrabajadorSLA
+
+
+class Command(BaseCommand):
+    help = 'Temporizadores de SLA de tickets pendientes y avisos de vencimiento por WebSocket'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--una-vez', action='store_true',
+                            help='Procesar lo vencido una sola vez (p. ej. desde cron) y salir')
+
+    def handle(self, *args, **opciones):
+        trabajador = TrabajadorSLA()
+        if opciones['una_vez']:
+            trabajador.ejecutar(una_vez=True)
+            self.stdout.write(self.style.SUCCESS("✅ SLA procesado"))
+            return
+        self.stdout.write("⏱️ Worker de SLA iniciado")
+        trabajador.ejecutar()
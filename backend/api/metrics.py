@@ -0,0 +1,150 @@
+"""
+Archivo: api/metrics.py
+Métricas Prometheus del backend, expuestas en /metrics.
+
+Con varios workers (gunicorn/daphne) cada proceso tiene sus propios
+contadores: hay que definir PROMETHEUS_MULTIPROC_DIR (un directorio vacío y
+escribible) ANTES de arrancar; prometheus_client escribe ahí un archivo por
+proceso y /metrics los agrega. gunicorn.conf.py limpia el directorio al
+arrancar y marca los procesos muertos.
+
+Sin PROMETHEUS_MULTIPROC_DIR se usa el registro en memoria del proceso
+(suficiente para desarrollo con un solo worker).
+
+/metrics no es público: con METRICS_TOKEN exige el Bearer; sin él solo
+responde a las redes de METRICS_REDES_PERMITIDAS (por defecto, loopback).
+Las etiquetas no llevan usuarios: cardinalidad acotada y nada personal.
+"""
+import hmac
+import ipaddress
+import os
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest,
+)
+
+BUCKETS_HTTP = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+BUCKETS_RAPIDOS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+
+HTTP_DURACION = Histogram(
+    'http_request_duration_seconds', 'Latencia de requests HTTP por ruta',
+    ['metodo', 'ruta', 'status'], buckets=BUCKETS_HTTP,
+)
+HTTP_EN_CURSO = Gauge(
+    'http_requests_in_flight', 'Requests HTTP en curso',
+    multiprocess_mode='livesum',
+)
+DB_CONEXIONES = Gauge(
+    'db_conexiones', 'Conexiones del pool propio de api/db_utils.py por estado',
+    ['alias', 'pool', 'estado'], multiprocess_mode='livesum',
+)
+WS_CONEXIONES = Gauge(
+    'ws_conexiones_abiertas', 'Conexiones NotificationConsumer abiertas',
+    multiprocess_mode='livesum',
+)
+CANAL_ENVIO = Histogram(
+    'channel_layer_send_seconds', 'Latencia de group_send al channel layer',
+    buckets=BUCKETS_RAPIDOS,
+)
+CANAL_ERRORES = Counter(
+    'channel_layer_send_errors_total', 'Errores enviando al channel layer',
+)
+ALMACEN_DURACION = Histogram(
+    'storage_operation_seconds', 'Latencia de operaciones del almacén de archivos (api/storage.py)',
+    ['backend', 'operacion', 'resultado'], buckets=BUCKETS_HTTP,
+)
+ALMACEN_REINTENTOS = Counter(
+    'storage_retries_total', 'Reintentos de botocore por operación de S3',
+    ['operacion'],
+)
+COLA_PENDIENTES = Gauge(
+    'cola_pendientes', 'Elementos pendientes en buffers/colas en segundo plano',
+    ['cola'], multiprocess_mode='livesum',
+)
+
+
+def registrar_profundidad_cola(nombre, pendientes):
+    """Para los workers en segundo plano: publicar cuántos elementos esperan."""
+    COLA_PENDIENTES.labels(cola=nombre).set(pendientes)
+
+
+class PrometheusMiddleware:
+    """
+    Latencia por ruta y requests en curso. Va primero en settings.MIDDLEWARE.
+    Sync y async: con vistas async (api/async_views.py) no fuerza un salto de hilo.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self._acall(request)
+        HTTP_EN_CURSO.inc()
+        inicio = time.perf_counter()
+        status = 500
+        try:
+            response = self.get_response(request)
+            status = response.status_code
+            return response
+        finally:
+            self._observar(request, status, inicio)
+
+    async def _acall(self, request):
+        HTTP_EN_CURSO.inc()
+        inicio = time.perf_counter()
+        status = 500
+        try:
+            response = await self.get_response(request)
+            status = response.status_code
+            return response
+        finally:
+            self._observar(request, status, inicio)
+
+    def _observar(self, request, status, inicio):
+        HTTP_EN_CURSO.dec()
+        resolver = getattr(request, 'resolver_match', None)
+        # La ruta (patrón) y no el path: /tickets/<int:pk>/ y no /tickets/8/
+        ruta = resolver.route if resolver else 'sin_ruta'
+        HTTP_DURACION.labels(metodo=request.method, ruta=ruta, status=str(status)).observe(
+            time.perf_counter() - inicio
+        )
+
+
+def _autorizado(request):
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if token:
+        recibido = request.headers.get('Authorization', '')
+        return hmac.compare_digest(recibido.encode(), f'Bearer {token}'.encode())
+    # REMOTE_ADDR y no X-Forwarded-For, que lo puede escribir cualquiera
+    try:
+        ip = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+    except ValueError:
+        return False
+    return any(ip in ipaddress.ip_network(red, strict=False) for red in settings.METRICS_REDES_PERMITIDAS)
+
+
+def metrics_view(request):
+    """
+    GET /metrics — formato de texto de Prometheus.
+    Con METRICS_TOKEN se exige 'Authorization: Bearer <token>'; sin él, que
+    el request venga de METRICS_REDES_PERMITIDAS.
+    """
+    if not _autorizado(request):
+        return HttpResponseForbidden('No autorizado')
+
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        registro = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registro)
+    else:
+        registro = REGISTRY
+    return HttpResponse(generate_latest(registro), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,60 @@
+"""
+Búsqueda de texto completo sobre soporte_ti.stticket.
+
+Las tablas de soporte_ti no las administra Django (managed = False), por eso
+los cambios van como SQL:
+- Columna tsvector en español, mantenida por un trigger en cada INSERT/UPDATE.
+- pg_trgm para coincidencias parciales y difusas (IDs "TKT-..." y asuntos).
+"""
+from django.db import migrations
+
+
+SQL_ADELANTE = r"""
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+ALTER TABLE soporte_ti.stticket ADD COLUMN IF NOT EXISTS ticket_tsv_ticket tsvector;
+
+CREATE OR REPLACE FUNCTION soporte_ti.stticket_tsv_actualizar() RETURNS trigger AS $$
+BEGIN
+    NEW.ticket_tsv_ticket :=
+        setweight(to_tsvector('spanish', coalesce(NEW.ticket_id_ticket, '')), 'A') ||
+        setweight(to_tsvector('spanish', coalesce(NEW.ticket_asu_ticket, '')), 'A') ||
+        setweight(to_tsvector('spanish', coalesce(NEW.ticket_des_ticket, '')), 'B') ||
+        setweight(to_tsvector('spanish', coalesce(NEW.ticket_obs_ticket, '')), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_stticket_tsv ON soporte_ti.stticket;
+CREATE TRIGGER trg_stticket_tsv
+    BEFORE INSERT OR UPDATE OF ticket_id_ticket, ticket_asu_ticket, ticket_des_ticket, ticket_obs_ticket
+    ON soporte_ti.stticket
+    FOR EACH ROW EXECUTE FUNCTION soporte_ti.stticket_tsv_actualizar();
+
+-- Rellenar los tickets existentes (dispara el trigger)
+UPDATE soporte_ti.stticket SET ticket_id_ticket = ticket_id_ticket;
+
+CREATE INDEX IF NOT EXISTS idx_ticket_tsv ON soporte_ti.stticket USING GIN (ticket_tsv_ticket);
+CREATE INDEX IF NOT EXISTS idx_ticket_id_trgm ON soporte_ti.stticket USING GIN (ticket_id_ticket gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_ticket_asu_trgm ON soporte_ti.stticket USING GIN (ticket_asu_ticket gin_trgm_ops);
+"""
+
+SQL_ATRAS = r"""
+DROP INDEX IF EXISTS soporte_ti.idx_ticket_asu_trgm;
+DROP INDEX IF EXISTS soporte_ti.idx_ticket_id_trgm;
+DROP INDEX IF EXISTS soporte_ti.idx_ticket_tsv;
+DROP TRIGGER IF EXISTS trg_stticket_tsv ON soporte_ti.stticket;
+DROP FUNCTION IF EXISTS soporte_ti.stticket_tsv_actualizar();
+ALTER TABLE soporte_ti.stticket DROP COLUMN IF EXISTS ticket_tsv_ticket;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunSQL(SQL_ADELANTE, SQL_ATRAS),
+    ]
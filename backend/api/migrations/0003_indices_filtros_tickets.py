@@ -0,0 +1,35 @@
+"""
+Índices compuestos para los filtros y facetas de las listas de tickets
+(ver api/filters.py). Todos terminan en la fecha para servir el ORDER BY.
+"""
+from django.db import migrations
+
+
+SQL_ADELANTE = r"""
+CREATE INDEX IF NOT EXISTS idx_ticket_est_fec
+    ON soporte_ti.stticket (ticket_est_ticket, ticket_fec_ticket DESC);
+CREATE INDEX IF NOT EXISTS idx_ticket_asig_est_fec
+    ON soporte_ti.stticket (ticket_asignado_a, ticket_est_ticket, ticket_fec_ticket DESC);
+CREATE INDEX IF NOT EXISTS idx_ticket_usua_fec
+    ON soporte_ti.stticket (ticket_tusua_ticket, ticket_fec_ticket DESC);
+CREATE INDEX IF NOT EXISTS idx_ticket_tip_est_fec
+    ON soporte_ti.stticket (ticket_tip_ticket, ticket_est_ticket, ticket_fec_ticket DESC);
+"""
+
+SQL_ATRAS = r"""
+DROP INDEX IF EXISTS soporte_ti.idx_ticket_tip_est_fec;
+DROP INDEX IF EXISTS soporte_ti.idx_ticket_usua_fec;
+DROP INDEX IF EXISTS soporte_ti.idx_ticket_asig_est_fec;
+DROP INDEX IF EXISTS soporte_ti.idx_ticket_est_fec;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_busqueda_tickets'),
+    ]
+
+    operations = [
+        migrations.RunSQL(SQL_ADELANTE, SQL_ATRAS),
+    ]
@@ -0,0 +1,27 @@
+"""
+Columnas para las claves S3 de la miniatura y el preview WebP de cada adjunto
+de imagen (ver api/thumbnails.py).
+"""
+from django.db import migrations
+
+
+SQL_ADELANTE = r"""
+ALTER TABLE soporte_ti.starchivos ADD COLUMN IF NOT EXISTS archivo_min_archivo varchar(500);
+ALTER TABLE soporte_ti.starchivos ADD COLUMN IF NOT EXISTS archivo_prev_archivo varchar(500);
+"""
+
+SQL_ATRAS = r"""
+ALTER TABLE soporte_ti.starchivos DROP COLUMN IF EXISTS archivo_prev_archivo;
+ALTER TABLE soporte_ti.starchivos DROP COLUMN IF EXISTS archivo_min_archivo;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_indices_filtros_tickets'),
+    ]
+
+    operations = [
+        migrations.RunSQL(SQL_ADELANTE, SQL_ATRAS),
+    ]
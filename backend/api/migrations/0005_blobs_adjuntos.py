@@ -0,0 +1,42 @@
+"""
+Almacén de adjuntos direccionado por contenido: tabla stblob (un objeto S3
+por SHA-256, con conteo de referencias) y el hash en cada fila de starchivos
+(ver api/blobs.py).
+"""
+from django.db import migrations
+
+
+SQL_ADELANTE = r"""
+CREATE TABLE IF NOT EXISTS soporte_ti.stblob (
+    blob_sha256   char(64) PRIMARY KEY,
+    blob_rut_blob varchar(500) NOT NULL,
+    blob_tam_blob bigint NOT NULL,
+    blob_tip_blob varchar(100),
+    blob_refs     integer NOT NULL DEFAULT 0 CHECK (blob_refs >= 0),
+    blob_fec_blob timestamp NOT NULL DEFAULT NOW()
+);
+
+ALTER TABLE soporte_ti.starchivos ADD COLUMN IF NOT EXISTS archivo_sha_archivo char(64);
+
+-- "¿este usuario ya subió este contenido?" en presign-batch
+CREATE INDEX IF NOT EXISTS idx_starchivos_sha_usuario
+    ON soporte_ti.starchivos (archivo_sha_archivo, archivo_usua_archivo)
+    WHERE archivo_sha_archivo IS NOT NULL;
+"""
+
+SQL_ATRAS = r"""
+DROP INDEX IF EXISTS soporte_ti.idx_starchivos_sha_usuario;
+ALTER TABLE soporte_ti.starchivos DROP COLUMN IF EXISTS archivo_sha_archivo;
+DROP TABLE IF EXISTS soporte_ti.stblob;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_miniaturas_archivos'),
+    ]
+
+    operations = [
+        migrations.RunSQL(SQL_ADELANTE, SQL_ATRAS),
+    ]
@@ -0,0 +1,32 @@
+"""
+Registro del sonido de notificación personalizado de cada usuario: clave
+real en el almacén, formato, tamaño y versión (ver api/sonidos.py).
+"""
+from django.db import migrations
+
+
+SQL_ADELANTE = r"""
+CREATE TABLE IF NOT EXISTS soporte_ti.stsonido (
+    sonido_usuario    varchar(100) PRIMARY KEY,
+    sonido_rut_sonido varchar(500) NOT NULL,
+    sonido_for_sonido varchar(10) NOT NULL,
+    sonido_tam_sonido bigint NOT NULL,
+    sonido_ver_sonido integer NOT NULL DEFAULT 1,
+    sonido_fec_sonido timestamp NOT NULL DEFAULT NOW()
+);
+"""
+
+SQL_ATRAS = r"""
+DROP TABLE IF EXISTS soporte_ti.stsonido;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_blobs_adjuntos'),
+    ]
+
+    operations = [
+        migrations.RunSQL(SQL_ADELANTE, SQL_ATRAS),
+    ]
@@ -0,0 +1,46 @@
+"""
+Versión de cada ticket para el control de concurrencia optimista del panel
+admin (ver api/ticket_edit.py): columna ticket_ver_ticket y un trigger que
+la sube en cualquier UPDATE que cambie la fila, venga de donde venga
+(vista de detalle, lote, reassign/assign, save() del ORM o SQL a mano).
+"""
+from django.db import migrations
+
+
+SQL_ADELANTE = r"""
+ALTER TABLE soporte_ti.stticket
+    ADD COLUMN IF NOT EXISTS ticket_ver_ticket integer NOT NULL DEFAULT 1;
+
+CREATE OR REPLACE FUNCTION soporte_ti.stticket_subir_version() RETURNS trigger AS $$
+BEGIN
+    -- La versión no la elige quien escribe (p. ej. un save() con el valor viejo)
+    NEW.ticket_ver_ticket := OLD.ticket_ver_ticket;
+    IF NEW IS DISTINCT FROM OLD THEN
+        NEW.ticket_ver_ticket := OLD.ticket_ver_ticket + 1;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS stticket_version ON soporte_ti.stticket;
+CREATE TRIGGER stticket_version
+    BEFORE UPDATE ON soporte_ti.stticket
+    FOR EACH ROW EXECUTE FUNCTION soporte_ti.stticket_subir_version();
+"""
+
+SQL_ATRAS = r"""
+DROP TRIGGER IF EXISTS stticket_version ON soporte_ti.stticket;
+DROP FUNCTION IF EXISTS soporte_ti.stticket_subir_version();
+ALTER TABLE soporte_ti.stticket DROP COLUMN IF EXISTS ticket_ver_ticket;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_sonidos_notificacion'),
+    ]
+
+    operations = [
+        migrations.RunSQL(SQL_ADELANTE, SQL_ATRAS),
+    ]
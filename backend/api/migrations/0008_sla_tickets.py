@@ -0,0 +1,52 @@
+"""
+SLA de tickets pendientes (ver api/sla.py):
+- soporte_ti.stsla: fases ya disparadas por ticket (aviso / incumplido),
+  para no repetir avisos al reiniciar el worker y para los reportes.
+- Trigger que avisa al worker (NOTIFY sla_tickets, <cod>) cuando se crea un
+  ticket o cambia su estado o tipo.
+"""
+from django.db import migrations
+
+
+SQL_ADELANTE = r"""
+CREATE TABLE IF NOT EXISTS soporte_ti.stsla (
+    sla_cod_ticket     integer PRIMARY KEY
+                       REFERENCES soporte_ti.stticket(ticket_cod_ticket) ON DELETE CASCADE,
+    sla_obj_minutos    integer NOT NULL,
+    sla_fec_aviso      timestamp,
+    sla_fec_incumplido timestamp
+);
+
+CREATE OR REPLACE FUNCTION soporte_ti.stticket_notificar_sla() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT'
+       OR NEW.ticket_est_ticket IS DISTINCT FROM OLD.ticket_est_ticket
+       OR NEW.ticket_tip_ticket IS DISTINCT FROM OLD.ticket_tip_ticket THEN
+        PERFORM pg_notify('sla_tickets', NEW.ticket_cod_ticket::text);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS stticket_sla ON soporte_ti.stticket;
+CREATE TRIGGER stticket_sla
+    AFTER INSERT OR UPDATE OF ticket_est_ticket, ticket_tip_ticket ON soporte_ti.stticket
+    FOR EACH ROW EXECUTE FUNCTION soporte_ti.stticket_notificar_sla();
+"""
+
+SQL_ATRAS = r"""
+DROP TRIGGER IF EXISTS stticket_sla ON soporte_ti.stticket;
+DROP FUNCTION IF EXISTS soporte_ti.stticket_notificar_sla();
+DROP TABLE IF EXISTS soporte_ti.stsla;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_version_tickets'),
+    ]
+
+    operations = [
+        migrations.RunSQL(SQL_ADELANTE, SQL_ATRAS),
+    ]
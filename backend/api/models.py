@@ -41,6 +41,8 @@ class Stticket(models.Model):
     ticket_treal_ticket = models.IntegerField(blank=True, null=True)
     ticket_obs_ticket = models.TextField(blank=True, null=True)
     ticket_calificacion = models.IntegerField(blank=True, null=True)
+    # La sube un trigger en cada UPDATE (migración 0007); es el ETag del detalle admin
+    ticket_ver_ticket = models.IntegerField(default=1, editable=False)
     class Meta:
         managed = False 
         db_table = 'soporte_ti"."stticket' 
@@ -58,6 +60,11 @@ class Starchivos(models.Model):
     archivo_rut_archivo = models.CharField(max_length=500, blank=True, null=True) 
     archivo_usua_archivo = models.CharField(max_length=100, blank=True, null=True)
     archivo_fec_archivo = models.DateTimeField(auto_now_add=True, blank=True, null=True)
+    # Derivados WebP de las imágenes (api/thumbnails.py), junto al original en S3
+    archivo_min_archivo = models.CharField(max_length=500, blank=True, null=True)
+    archivo_prev_archivo = models.CharField(max_length=500, blank=True, null=True)
+    # SHA-256 del contenido si está en el almacén de blobs (api/blobs.py)
+    archivo_sha_archivo = models.CharField(max_length=64, blank=True, null=True)
 
     class Meta:
         managed = False
@@ -67,6 +74,54 @@ class Starchivos(models.Model):
     def __str__(self):
         return self.archivo_nom_archivo
 
+class Stblob(models.Model):
+    """Contenido de adjunto deduplicado; blob_refs = filas de starchivos que lo usan."""
+    blob_sha256 = models.CharField(primary_key=True, max_length=64)
+    blob_rut_blob = models.CharField(max_length=500)
+    blob_tam_blob = models.BigIntegerField()
+    blob_tip_blob = models.CharField(max_length=100, blank=True, null=True)
+    blob_refs = models.IntegerField(default=0)
+    blob_fec_blob = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        managed = False
+        db_table = 'soporte_ti"."stblob'
+
+    def __str__(self):
+        return self.blob_sha256
+
+class Stsonido(models.Model):
+    """Sonido de notificación personalizado de un usuario (uno por usuario)."""
+    sonido_usuario = models.CharField(primary_key=True, max_length=100)
+    sonido_rut_sonido = models.CharField(max_length=500)
+    sonido_for_sonido = models.CharField(max_length=10)
+    sonido_tam_sonido = models.BigIntegerField()
+    sonido_ver_sonido = models.IntegerField(default=1)
+    sonido_fec_sonido = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        managed = False
+        db_table = 'soporte_ti"."stsonido'
+
+    def __str__(self):
+        return self.sonido_usuario
+
+
+class Stsla(models.Model):
+    """Fases de SLA ya disparadas por el worker para un ticket (ver api/sla.py)."""
+    sla_cod_ticket = models.OneToOneField(Stticket, models.DO_NOTHING, primary_key=True,
+                                          db_column='sla_cod_ticket', related_name='sla')
+    sla_obj_minutos = models.IntegerField()
+    sla_fec_aviso = models.DateTimeField(blank=True, null=True)
+    sla_fec_incumplido = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        managed = False
+        db_table = 'soporte_ti"."stsla'
+
+    def __str__(self):
+        return f"SLA ticket {self.sla_cod_ticket_id}"
+
 class Stlogchat(models.Model):
     log_cod_log = models.AutoField(primary_key=True)
     session_id = models.CharField(max_length=255, blank=True, null=True)
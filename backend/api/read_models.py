@@ -0,0 +1,120 @@
+"""
+Archivo: api/read_models.py
+Camino rápido de lectura para listas de tickets con ?fields=...
+
+En lugar de instanciar modelos y pasar cada fila por StticketSerializer,
+arma los dicts directo desde tuplas de .values_list(). Si se pide
+'archivos', se traen todos los adjuntos de la página en UNA consulta
+(sin el N+1 de StticketSerializer.get_archivos).
+
+afilas_tickets() es la misma lectura con el ORM async (api/async_views.py).
+"""
+from collections import defaultdict
+
+from .models import Stticket, Starchivos
+
+CAMPOS_TICKET = [f.name for f in Stticket._meta.concrete_fields]
+CAMPOS_PERMITIDOS = set(CAMPOS_TICKET) | {'archivos'}
+
+CAMPOS_ARCHIVO = (
+    'archivo_cod_archivo', 'archivo_cod_ticket', 'archivo_nom_archivo',
+    'archivo_tip_archivo', 'archivo_rut_archivo', 'archivo_tam_archivo',
+    'archivo_fec_archivo', 'archivo_usua_archivo', 'archivo_min_archivo', 'archivo_prev_archivo',
+)
+
+
+def parsear_campos(params):
+    """
+    Lista de campos pedidos en ?fields=a,b,c (en el orden del modelo),
+    o None si no se pidió sparse fieldset. Los nombres desconocidos se ignoran.
+    """
+    valor = params.get('fields')
+    if not valor:
+        return None
+    pedidos = {c.strip() for c in valor.split(',')} & CAMPOS_PERMITIDOS
+    if not pedidos:
+        return None
+    orden = CAMPOS_TICKET + ['archivos']
+    return [c for c in orden if c in pedidos]
+
+
+def _consulta_archivos(ids_tickets):
+    return (
+        Starchivos.objects
+        .filter(archivo_cod_ticket__in=ids_tickets)
+        .order_by('-archivo_fec_archivo')
+        .values_list(*CAMPOS_ARCHIVO)
+    )
+
+
+def _dict_archivo(serializer, fila):
+    datos = dict(zip(CAMPOS_ARCHIVO, fila))
+    tam = datos.pop('archivo_tam_archivo')
+    datos['archivo_tam_formateado'] = serializer.get_archivo_tam_formateado(_Fila(archivo_tam_archivo=tam))
+    datos['archivo_url_firmada'] = serializer.get_archivo_url_firmada(_Fila(archivo_rut_archivo=datos['archivo_rut_archivo']))
+    datos['archivo_url_miniatura'] = serializer.get_archivo_url_miniatura(_Fila(archivo_min_archivo=datos.pop('archivo_min_archivo')))
+    datos['archivo_url_preview'] = serializer.get_archivo_url_preview(_Fila(archivo_prev_archivo=datos.pop('archivo_prev_archivo')))
+    return datos
+
+
+def _archivos_por_ticket(ids_tickets):
+    from .serializers import ArchivoSerializer
+
+    archivos = defaultdict(list)
+    serializer = ArchivoSerializer()
+    for fila in _consulta_archivos(ids_tickets):
+        datos = _dict_archivo(serializer, fila)
+        archivos[datos['archivo_cod_ticket']].append(datos)
+    return archivos
+
+
+async def _aarchivos_por_ticket(ids_tickets):
+    from .serializers import ArchivoSerializer
+
+    archivos = defaultdict(list)
+    serializer = ArchivoSerializer()
+    async for fila in _consulta_archivos(ids_tickets):
+        datos = _dict_archivo(serializer, fila)
+        archivos[datos['archivo_cod_ticket']].append(datos)
+    return archivos
+
+
+class _Fila:
+    """Objeto mínimo para reutilizar los SerializerMethodField de ArchivoSerializer."""
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+def _columnas(campos):
+    columnas = [c for c in campos if c != 'archivos']
+    extra_pk = 'archivos' in campos and 'ticket_cod_ticket' not in columnas
+    return (columnas + ['ticket_cod_ticket'] if extra_pk else columnas), extra_pk
+
+
+def _adjuntar_archivos(filas, archivos, extra_pk):
+    for fila in filas:
+        fila['archivos'] = archivos.get(fila['ticket_cod_ticket'], [])
+        if extra_pk:
+            del fila['ticket_cod_ticket']
+
+
+def filas_tickets(qs, campos):
+    """Lista de dicts con solo `campos`, sin instanciar Stticket."""
+    consulta, extra_pk = _columnas(campos)
+    filas = [dict(zip(consulta, fila)) for fila in qs.values_list(*consulta)]
+
+    if 'archivos' in campos:
+        archivos = _archivos_por_ticket([f['ticket_cod_ticket'] for f in filas])
+        _adjuntar_archivos(filas, archivos, extra_pk)
+    return filas
+
+
+async def afilas_tickets(qs, campos):
+    """filas_tickets() con iteración async: no bloquea el event loop."""
+    consulta, extra_pk = _columnas(campos)
+    filas = [dict(zip(consulta, fila)) async for fila in qs.values_list(*consulta)]
+
+    if 'archivos' in campos:
+        archivos = await _aarchivos_por_ticket([f['ticket_cod_ticket'] for f in filas])
+        _adjuntar_archivos(filas, archivos, extra_pk)
+    return filas
@@ -0,0 +1,62 @@
+"""
+Archivo: api/renderers.py
+Renderers y parsers de DRF usados por defecto (ver REST_FRAMEWORK en settings.py).
+
+ORJSONRenderer / ORJSONParser usan orjson (en C, varias veces más rápido que
+json de la stdlib en listas grandes como /admin/tickets/). La salida es la
+misma que la del JSONRenderer de DRF:
+  - datetime en ISO 8601 y 'Z' para UTC; date, time y UUID nativos de orjson.
+  - Decimal, timedelta, lazy strings, QuerySet, etc. pasan por el
+    encoders.JSONEncoder de DRF (Decimal → float, como hoy).
+  - Con ?format=api / indent (Browsable API) se indenta a 2 espacios.
+"""
+import orjson
+from rest_framework import renderers
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+from .instrumentation import medir
+
+_encoder_drf = JSONEncoder()
+OPCIONES = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+def serializar_json(data, indentar=False):
+    """bytes JSON con las mismas reglas que el JSONRenderer de DRF."""
+    opciones = (OPCIONES | orjson.OPT_INDENT_2) if indentar else OPCIONES
+    return orjson.dumps(data, default=_encoder_drf.default, option=opciones)
+
+
+class JSONRendererMedido(renderers.JSONRenderer):
+    """JSONRenderer estándar (stdlib) que reporta su tiempo como 'serializacion'."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with medir('serializacion'):
+            return super().render(data, accepted_media_type, renderer_context)
+
+
+class ORJSONRenderer(renderers.BaseRenderer):
+    """Renderer JSON por defecto: orjson, medido como 'serializacion'."""
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        indent = renderers.JSONRenderer().get_indent(accepted_media_type or '', renderer_context or {})
+        with medir('serializacion'):
+            return serializar_json(data, indentar=bool(indent))
+
+
+class ORJSONParser(BaseParser):
+    """JSON del body con orjson (solo UTF-8, como exige RFC 8259)."""
+    media_type = 'application/json'
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
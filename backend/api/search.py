@@ -0,0 +1,126 @@
+"""
+Archivo: api/search.py
+Búsqueda de tickets: tsvector en español (columna ticket_tsv_ticket, la
+mantiene un trigger, ver migración 0002) + pg_trgm para IDs parciales como
+"TKT-2026" y errores de tipeo en el asunto.
+
+La paginación es por cursor (keyset) sobre (puntaje, ticket_cod_ticket), así
+que pedir la página 50 cuesta lo mismo que pedir la primera.
+"""
+import base64
+import json
+import math
+
+from django.db import connection
+
+LIMITE_POR_DEFECTO = 20
+LIMITE_MAXIMO = 100
+
+
+class CursorInvalido(ValueError):
+    """El cursor no salió de esta búsqueda (→ 400, no se vuelve a la primera página)."""
+
+SQL_BUSQUEDA = """
+WITH q AS (SELECT websearch_to_tsquery('spanish', %(q)s) AS tsq)
+SELECT * FROM (
+    SELECT
+        t.ticket_cod_ticket,
+        t.ticket_id_ticket,
+        t.ticket_asu_ticket,
+        left(t.ticket_des_ticket, 200),
+        t.ticket_est_ticket,
+        t.ticket_tip_ticket,
+        t.ticket_tusua_ticket,
+        t.ticket_asignado_a,
+        t.ticket_fec_ticket,
+        (
+            ts_rank_cd(t.ticket_tsv_ticket, q.tsq)
+            + greatest(
+                similarity(coalesce(t.ticket_id_ticket, ''), %(q)s),
+                word_similarity(%(q)s, coalesce(t.ticket_asu_ticket, ''))
+            )
+        )::float8 AS puntaje
+    FROM soporte_ti.stticket t, q
+    WHERE (
+        t.ticket_tsv_ticket @@ q.tsq
+        OR t.ticket_id_ticket ILIKE %(patron)s
+        OR t.ticket_id_ticket %% %(q)s
+        OR %(q)s <%% t.ticket_asu_ticket
+    )
+    {filtro_usuario}
+) r
+{filtro_cursor}
+ORDER BY r.puntaje DESC, r.ticket_cod_ticket DESC
+LIMIT %(limite)s
+"""
+
+
+def codificar_cursor(puntaje, cod):
+    return base64.urlsafe_b64encode(json.dumps([puntaje, cod]).encode()).decode()
+
+
+def decodificar_cursor(cursor):
+    """(puntaje, cod) o None si el cursor es inválido."""
+    try:
+        puntaje, cod = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        puntaje, cod = float(puntaje), int(cod)
+    except (ValueError, TypeError, json.JSONDecodeError):
+        return None
+    return (puntaje, cod) if math.isfinite(puntaje) else None
+
+
+def _escapar_like(texto):
+    return texto.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def buscar_tickets(texto, usuario=None, cursor=None, limite=LIMITE_POR_DEFECTO):
+    """
+    Devuelve (resultados, siguiente_cursor).
+    `usuario` restringe a los tickets creados por ese username (no staff).
+    Lanza CursorInvalido si `cursor` viene y no se puede leer.
+    """
+    limite = max(1, min(int(limite), LIMITE_MAXIMO))
+    params = {
+        'q': texto,
+        'patron': f"%{_escapar_like(texto)}%",
+        'limite': limite + 1,   # Uno extra para saber si hay otra página
+    }
+
+    filtro_usuario = ''
+    if usuario is not None:
+        filtro_usuario = 'AND t.ticket_tusua_ticket = %(usuario)s'
+        params['usuario'] = usuario
+
+    filtro_cursor = ''
+    if cursor:
+        posicion = decodificar_cursor(cursor)
+        if posicion is None:
+            raise CursorInvalido('Cursor inválido')
+        filtro_cursor = 'WHERE (r.puntaje, r.ticket_cod_ticket) < (%(c_puntaje)s, %(c_cod)s)'
+        params['c_puntaje'], params['c_cod'] = posicion
+
+    sql = SQL_BUSQUEDA.format(filtro_usuario=filtro_usuario, filtro_cursor=filtro_cursor)
+    with connection.cursor() as cur:
+        cur.execute(sql, params)
+        filas = cur.fetchall()
+
+    siguiente = None
+    if len(filas) > limite:
+        filas = filas[:limite]
+        ultima = filas[-1]
+        siguiente = codificar_cursor(ultima[-1], ultima[0])
+
+    resultados = [{
+        'ticket_cod_ticket':   cod,
+        'ticket_id_ticket':    id_ticket,
+        'ticket_asu_ticket':   asunto,
+        'ticket_des_ticket':   descripcion,
+        'ticket_est_ticket':   estado,
+        'ticket_tip_ticket':   tipo,
+        'ticket_tusua_ticket': creado_por,
+        'ticket_asignado_a':   asignado,
+        'ticket_fec_ticket':   fecha.isoformat() if fecha else None,
+        'puntaje':             round(puntaje, 4),
+    } for cod, id_ticket, asunto, descripcion, estado, tipo, creado_por, asignado, fecha, puntaje in filas]
+
+    return resultados, siguiente
@@ -1,21 +1,41 @@
 from rest_framework import serializers
 from .models import Stsugerencia, Stticket, Starchivos, Stlogchat
-import boto3
-from django.conf import settings
+from .storage import almacen
+
+
+def url_firmada(key, expira=3600):
+    """GET firmado del almacén (S3: solo firma, sin red)."""
+    if not key:
+        return None
+    try:
+        return almacen().url_descarga(key, expira)
+    except Exception:
+        return None
+
 
 # --- 1. ARCHIVOS ---
 class ArchivoSerializer(serializers.ModelSerializer):
     archivo_url_firmada = serializers.SerializerMethodField()
     archivo_tam_formateado = serializers.SerializerMethodField()
+    # Derivados WebP (null hasta que api/thumbnails.py los genera, o si no es imagen)
+    archivo_url_miniatura = serializers.SerializerMethodField()
+    archivo_url_preview = serializers.SerializerMethodField()
 
     class Meta:
         model = Starchivos
         fields = [
             'archivo_cod_archivo', 'archivo_cod_ticket', 'archivo_nom_archivo',
             'archivo_tip_archivo', 'archivo_rut_archivo', 'archivo_url_firmada', 
-            'archivo_tam_formateado', 'archivo_fec_archivo', 'archivo_usua_archivo'
+            'archivo_tam_formateado', 'archivo_fec_archivo', 'archivo_usua_archivo',
+            'archivo_url_miniatura', 'archivo_url_preview',
         ]
 
+    def get_archivo_url_miniatura(self, obj):
+        return url_firmada(obj.archivo_min_archivo)
+
+    def get_archivo_url_preview(self, obj):
+        return url_firmada(obj.archivo_prev_archivo)
+
     def get_archivo_tam_formateado(self, obj):
         if obj.archivo_tam_archivo:
             tam = obj.archivo_tam_archivo
@@ -26,22 +46,9 @@ class ArchivoSerializer(serializers.ModelSerializer):
 
     def get_archivo_url_firmada(self, obj):
         if not obj.archivo_rut_archivo: return None
-        try:
-            key = obj.archivo_rut_archivo
-            if key.startswith('http'): key = key.split('.com/')[-1]
-            
-            s3_client = boto3.client(
-                's3',
-                aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-                aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-                region_name=settings.AWS_S3_REGION_NAME
-            )
-            return s3_client.generate_presigned_url(
-                'get_object',
-                Params={'Bucket': settings.AWS_STORAGE_BUCKET_NAME, 'Key': key},
-                ExpiresIn=3600
-            )
-        except: return None
+        key = obj.archivo_rut_archivo
+        if key.startswith('http'): key = key.split('.com/')[-1]
+        return url_firmada(key)
 
 # --- 2. TICKETS ---
 class StticketSerializer(serializers.ModelSerializer):
@@ -51,6 +58,14 @@ class StticketSerializer(serializers.ModelSerializer):
         model = Stticket
         fields = '__all__'
 
+    def __init__(self, *args, **kwargs):
+        # Sparse fieldset: StticketSerializer(qs, many=True, fields=['ticket_id_ticket', ...])
+        campos = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if campos is not None:
+            for nombre in set(self.fields) - set(campos):
+                self.fields.pop(nombre)
+
     def get_archivos(self, obj):
         """
         obj: Es el objeto Ticket actual (ej. el ticket con ticket_cod_ticket=8)
@@ -0,0 +1,368 @@
+"""
+Archivo: api/sla.py
+SLA de tickets pendientes (PE): objetivo en minutos por ticket_tip_ticket
+(settings.SLA_OBJETIVOS_MINUTOS) con aviso previo al SLA_AVISO_PORCENTAJE
+del objetivo y alerta al vencer, por el mismo canal WebSocket de siempre
+(enviar_notificacion → grupo notifications_<usuario>).
+
+Corre en UN solo proceso: python manage.py sla_worker (advisory lock en
+PostgreSQL; si hay otro activo, queda de reserva).
+
+- Temporizadores: rueda con hash (RuedaTemporizadores). Programar, cancelar
+  y reprogramar son O(1) y cada ticket ocupa una entrada de tamaño fijo,
+  tenga el objetivo que tenga; avanzar solo recorre las ranuras de los
+  ticks que pasaron. 100k tickets abiertos son 100k entradas, sin colas
+  que crezcan con el tiempo.
+- Cambios: un trigger (migración 0008) hace pg_notify('sla_tickets', <cod>)
+  al crear un ticket o cambiarle estado/tipo; el worker hace LISTEN y
+  vuelve a leer solo esos tickets.
+- Reinicios: al arrancar (y cada SLA_RESINCRONIZAR_SEGUNDOS, por si se
+  perdió algún NOTIFY) se reconstruye la rueda desde la base. Las fases ya
+  disparadas quedan en soporte_ti.stsla, así que no se repiten avisos.
+- Reportes: estadisticas() arma el bloque 'sla' de /api/admin/reportes/.
+
+Las fechas de stticket son naive en hora local (USE_TZ=False), igual que
+datetime.now() en este proceso: todo se compara en ese reloj.
+"""
+import logging
+import select
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, InterfaceError, connection
+from django.db.models import Count, Q
+
+logger = logging.getLogger(__name__)
+
+CANAL = 'sla_tickets'
+CLAVE_LOCK = 4_915_001            # pg_advisory_lock: un solo worker de SLA
+MAX_TICKETS_NOTIFICACION = 50     # El resto va solo como total
+
+AVISO = 'aviso'
+INCUMPLIDO = 'incumplido'
+
+_EPOCA = datetime(1970, 1, 1)
+
+
+def segundos(fecha):
+    """datetime naive (hora local) → segundos, en el mismo reloj que datetime.now()."""
+    return (fecha - _EPOCA).total_seconds()
+
+
+def objetivo_minutos(tipo):
+    return settings.SLA_OBJETIVOS_MINUTOS.get(tipo, settings.SLA_MINUTOS_DEFECTO)
+
+
+# ============================================================
+# RUEDA DE TEMPORIZADORES
+# ============================================================
+class RuedaTemporizadores:
+    """
+    Rueda con hash (Varghese & Lauck): `ranuras` diccionarios; un
+    temporizador que vence en el tick t vive en la ranura t % ranuras junto
+    con t, así los que dan más de una vuelta se quedan hasta su vuelta.
+    """
+
+    def __init__(self, tick_segundos, ranuras=4096, ahora=0.0):
+        self.tick = tick_segundos
+        self._ranuras = [{} for _ in range(ranuras)]    # clave → (tick, dato)
+        self._ranura_de = {}                            # clave → índice de ranura
+        self._procesado = int(ahora // tick_segundos)   # último tick ya disparado
+
+    def __len__(self):
+        return len(self._ranura_de)
+
+    def __contains__(self, clave):
+        return clave in self._ranura_de
+
+    def programar(self, clave, instante, dato=None):
+        """(Re)programa `clave` para `instante`; si ya pasó, sale en el próximo avanzar()."""
+        self.cancelar(clave)
+        tick = max(-int(-instante // self.tick), self._procesado + 1)
+        indice = tick % len(self._ranuras)
+        self._ranuras[indice][clave] = (tick, dato)
+        self._ranura_de[clave] = indice
+
+    def cancelar(self, clave):
+        indice = self._ranura_de.pop(clave, None)
+        if indice is not None:
+            del self._ranuras[indice][clave]
+
+    def avanzar(self, ahora):
+        """[(clave, dato)] de los vencidos hasta `ahora`, en orden de vencimiento."""
+        objetivo = int(ahora // self.tick)
+        pasos = min(objetivo - self._procesado, len(self._ranuras))
+        vencidos = []
+        for t in range(self._procesado + 1, self._procesado + pasos + 1):
+            ranura = self._ranuras[t % len(self._ranuras)]
+            for clave, (tick, dato) in list(ranura.items()):
+                if tick <= objetivo:
+                    del ranura[clave]
+                    del self._ranura_de[clave]
+                    vencidos.append((tick, clave, dato))
+        self._procesado = max(self._procesado, objetivo)
+        vencidos.sort(key=lambda v: v[0])
+        return [(clave, dato) for _, clave, dato in vencidos]
+
+
+class MotorSLA:
+    """Qué fase le toca a cada ticket pendiente (sin base de datos)."""
+
+    def __init__(self, ahora=0.0):
+        self.rueda = RuedaTemporizadores(
+            settings.SLA_TICK_SEGUNDOS, settings.SLA_RANURAS, ahora=ahora,
+        )
+
+    def __len__(self):
+        return len(self.rueda)
+
+    def seguir(self, cod, tipo, creado, avisado=False, incumplido=False):
+        """Programa la próxima fase pendiente del ticket (o nada si ya venció)."""
+        if incumplido or creado is None:
+            self.rueda.cancelar(cod)
+            return
+        objetivo = objetivo_minutos(tipo) * 60
+        limite = segundos(creado) + objetivo
+        if not avisado and settings.SLA_AVISO_PORCENTAJE < 100:
+            aviso = segundos(creado) + objetivo * settings.SLA_AVISO_PORCENTAJE / 100
+            self.rueda.programar(cod, aviso, (AVISO, limite))
+        else:
+            self.rueda.programar(cod, limite, (INCUMPLIDO, limite))
+
+    def olvidar(self, cod):
+        self.rueda.cancelar(cod)
+
+    def vencidos(self, ahora):
+        """[(cod, fase)]; tras un aviso queda programado el vencimiento."""
+        disparados = []
+        for cod, (fase, limite) in self.rueda.avanzar(ahora):
+            if fase == AVISO:
+                self.rueda.programar(cod, limite, (INCUMPLIDO, limite))
+            disparados.append((cod, fase))
+        return disparados
+
+
+# ============================================================
+# WORKER (base de datos + notificaciones)
+# ============================================================
+_SQL_PENDIENTES = """
+    SELECT t.ticket_cod_ticket, t.ticket_tip_ticket, t.ticket_fec_ticket,
+           s.sla_fec_aviso IS NOT NULL, s.sla_fec_incumplido IS NOT NULL
+    FROM soporte_ti.stticket t
+    LEFT JOIN soporte_ti.stsla s ON s.sla_cod_ticket = t.ticket_cod_ticket
+    WHERE t.ticket_est_ticket = 'PE'
+"""
+
+
+class TrabajadorSLA:
+    """Bucle del management command sla_worker."""
+
+    def __init__(self):
+        self.motor = None
+        self._ultima_sincronizacion = 0.0
+
+    # ── Estado desde la base ──
+    def reconstruir(self):
+        """Rueda nueva con todos los tickets PE y las fases ya registradas."""
+        inicio = time.monotonic()
+        motor = MotorSLA(ahora=segundos(datetime.now()))
+        with connection.cursor() as cursor:
+            cursor.execute(_SQL_PENDIENTES)
+            while filas := cursor.fetchmany(5000):
+                for cod, tipo, creado, avisado, incumplido in filas:
+                    motor.seguir(cod, tipo, creado, avisado, incumplido)
+        self.motor = motor
+        self._ultima_sincronizacion = time.monotonic()
+        logger.info(f"⏱️ SLA: {len(motor)} temporizador(es) en {time.monotonic() - inicio:.2f}s")
+
+    def refrescar(self, ids):
+        """Vuelve a leer los tickets notificados por el trigger."""
+        for cod in ids:
+            self.motor.olvidar(cod)
+        with connection.cursor() as cursor:
+            cursor.execute(_SQL_PENDIENTES + " AND t.ticket_cod_ticket = ANY(%s)", [list(ids)])
+            for cod, tipo, creado, avisado, incumplido in cursor.fetchall():
+                self.motor.seguir(cod, tipo, creado, avisado, incumplido)
+
+    # ── Disparos ──
+    def procesar_vencidos(self):
+        ahora = datetime.now()
+        disparados = dict(self.motor.vencidos(segundos(ahora)))
+        if not disparados:
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT ticket_cod_ticket, ticket_id_ticket, ticket_asu_ticket,
+                       ticket_tip_ticket, ticket_fec_ticket, ticket_asignado_a
+                FROM soporte_ti.stticket
+                WHERE ticket_cod_ticket = ANY(%s) AND ticket_est_ticket = 'PE'
+            """, [list(disparados)])
+            vigentes = cursor.fetchall()
+
+        # Los que ya no están PE (NOTIFY perdido) salen de la rueda
+        for cod in set(disparados) - {fila[0] for fila in vigentes}:
+            self.motor.olvidar(cod)
+        if not vigentes:
+            return 0
+
+        self._registrar(vigentes, disparados, ahora)
+        self._notificar(vigentes, disparados, ahora)
+        return len(vigentes)
+
+    def _registrar(self, vigentes, disparados, ahora):
+        cods = [fila[0] for fila in vigentes]
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO soporte_ti.stsla AS s
+                    (sla_cod_ticket, sla_obj_minutos, sla_fec_aviso, sla_fec_incumplido)
+                SELECT * FROM unnest(%s::int[], %s::int[], %s::timestamp[], %s::timestamp[])
+                ON CONFLICT (sla_cod_ticket) DO UPDATE SET
+                    sla_obj_minutos    = EXCLUDED.sla_obj_minutos,
+                    sla_fec_aviso      = COALESCE(s.sla_fec_aviso, EXCLUDED.sla_fec_aviso),
+                    sla_fec_incumplido = COALESCE(s.sla_fec_incumplido, EXCLUDED.sla_fec_incumplido)
+            """, [
+                cods,
+                [objetivo_minutos(fila[3]) for fila in vigentes],
+                [ahora if disparados[cod] == AVISO else None for cod in cods],
+                [ahora if disparados[cod] == INCUMPLIDO else None for cod in cods],
+            ])
+
+    def _notificar(self, vigentes, disparados, ahora):
+        from .directory import directorio
+        from .views import enviar_notificacion
+
+        admins = None
+        grupos = defaultdict(lambda: defaultdict(list))    # admin → fase → tickets
+        for cod, id_ticket, asunto, tipo, creado, asignado in vigentes:
+            if asignado:
+                destinatarios = [asignado]
+            else:
+                # Sin técnico asignado: se entera todo el equipo
+                if admins is None:
+                    admins = [a['username'] for a in directorio.instantanea().admins]
+                destinatarios = admins
+            limite = creado + timedelta(minutes=objetivo_minutos(tipo))
+            ticket = {
+                'ticket_id':         cod,
+                'ticket_display_id': id_ticket,
+                'asunto':            asunto,
+                'tipo':              tipo,
+                'vence':             limite.isoformat(),
+                'minutos_restantes': int((limite - ahora).total_seconds() // 60),
+            }
+            for admin in destinatarios:
+                grupos[admin][disparados[cod]].append(ticket)
+
+        for admin, fases in grupos.items():
+            for fase, tickets in fases.items():
+                enviar_notificacion(admin, {
+                    'type':    'sla_por_vencer' if fase == AVISO else 'sla_incumplido',
+                    'title':   '⏰ SLA por vencer' if fase == AVISO else '🚨 SLA incumplido',
+                    'message': (f"{len(tickets)} ticket(s) pendientes están por vencer su SLA"
+                                if fase == AVISO else
+                                f"{len(tickets)} ticket(s) pendientes superaron su SLA"),
+                    'total':   len(tickets),
+                    'tickets': tickets[:MAX_TICKETS_NOTIFICACION],
+                })
+        avisos = sum(1 for cod, *_ in vigentes if disparados[cod] == AVISO)
+        logger.info(f"⏰ SLA: {avisos} aviso(s), {len(vigentes) - avisos} incumplido(s), "
+                    f"{len(grupos)} destinatario(s)")
+
+    # ── Bucle ──
+    def _tomar_lock(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_try_advisory_lock(%s)", [CLAVE_LOCK])
+            return cursor.fetchone()[0]
+
+    def ejecutar(self, una_vez=False):
+        if 'InMemoryChannelLayer' in settings.CHANNEL_LAYERS['default']['BACKEND']:
+            logger.warning("⚠️ SLA: sin REDIS_URL las notificaciones no salen de este proceso")
+        while True:
+            try:
+                if not self._tomar_lock():
+                    if una_vez:
+                        logger.warning("⚠️ SLA: hay otro worker activo, no se hace nada")
+                        return
+                    logger.info("⏸️ SLA: hay otro worker activo, quedo de reserva")
+                    time.sleep(settings.SLA_RESINCRONIZAR_SEGUNDOS / 10)
+                    continue
+                with connection.cursor() as cursor:
+                    cursor.execute(f"LISTEN {CANAL}")
+                self.reconstruir()
+                self.procesar_vencidos()
+                if una_vez:
+                    return
+                self._escuchar()
+            except (DatabaseError, InterfaceError) as e:
+                # Conexión caída: se reconecta y se reconstruye todo
+                logger.error(f"❌ SLA: error de base de datos, reconectando: {e}")
+                connection.close()
+                time.sleep(5)
+
+    def _escuchar(self):
+        pg = connection.connection
+        while True:
+            listo, _, _ = select.select([pg], [], [], settings.SLA_TICK_SEGUNDOS)
+            if listo:
+                pg.poll()
+                ids = {int(n.payload) for n in pg.notifies if n.payload.isdigit()}
+                pg.notifies.clear()
+                if ids:
+                    self.refrescar(ids)
+            if time.monotonic() - self._ultima_sincronizacion >= settings.SLA_RESINCRONIZAR_SEGUNDOS:
+                self.reconstruir()
+            self.procesar_vencidos()
+
+
+# ============================================================
+# REPORTES
+# ============================================================
+def _vencidos_q(ahora, porcentaje=100):
+    """Q de los tickets cuyo tiempo transcurrido supera `porcentaje` del objetivo de su tipo."""
+    def antes_de(minutos):
+        return ahora - timedelta(minutes=minutos * porcentaje / 100)
+
+    objetivos = settings.SLA_OBJETIVOS_MINUTOS
+    q = ~Q(ticket_tip_ticket__in=list(objetivos)) & Q(
+        ticket_fec_ticket__lt=antes_de(settings.SLA_MINUTOS_DEFECTO))
+    for tipo, minutos in objetivos.items():
+        q |= Q(ticket_tip_ticket=tipo, ticket_fec_ticket__lt=antes_de(minutos))
+    return q
+
+
+def estadisticas(all_qs, period_qs):
+    """Bloque 'sla' de ReportesView."""
+    ahora = datetime.now()
+    vencido = _vencidos_q(ahora)
+    abiertos = all_qs.filter(ticket_est_ticket='PE').aggregate(
+        vencidos=Count('ticket_cod_ticket', filter=vencido),
+        por_vencer=Count('ticket_cod_ticket', filter=_vencidos_q(ahora, settings.SLA_AVISO_PORCENTAJE) & ~vencido),
+    )
+    incumplido = Q(sla__sla_fec_incumplido__isnull=False)
+    por_tipo = [
+        {
+            'tipo':        fila['ticket_tip_ticket'] or 'Sin tipo',
+            'objetivo_min': objetivo_minutos(fila['ticket_tip_ticket']),
+            'total':       fila['total'],
+            'incumplidos': fila['incumplidos'],
+        }
+        for fila in (
+            period_qs.order_by()
+            .values('ticket_tip_ticket')
+            .annotate(total=Count('ticket_cod_ticket'), incumplidos=Count('ticket_cod_ticket', filter=incumplido))
+            .order_by('ticket_tip_ticket')
+        )
+    ]
+    total = sum(t['total'] for t in por_tipo)
+    incumplidos = sum(t['incumplidos'] for t in por_tipo)
+    return {
+        'objetivos_min':     dict(settings.SLA_OBJETIVOS_MINUTOS),
+        'aviso_porcentaje':  settings.SLA_AVISO_PORCENTAJE,
+        'incumplidos':       incumplidos,
+        'cumplimiento_pct':  round((total - incumplidos) / total * 100, 1) if total else None,
+        'vencidos_abiertos': abiertos['vencidos'],
+        'por_vencer':        abiertos['por_vencer'],
+        'por_tipo':          por_tipo,
+    }
@@ -0,0 +1,120 @@
+"""
+Archivo: api/sonidos.py
+Sonido de notificación personalizado: registro por usuario en stsonido.
+
+- upload/ devuelve una URL de subida a una clave NUEVA en cada subida
+  (notification_sounds/<usuario>/custom_notification-<token>.<ext>): la URL de
+  descarga cambia con el archivo, así que el navegador puede cachearla sin
+  quedarse con un sonido viejo.
+- confirm/ comprueba el objeto (un HEAD), guarda clave/formato/tamaño y sube la
+  versión. Borra la subida anterior en la misma pasada.
+- check/ lee solo la BD: una URL (o ninguna) + ETag. No adivina formatos ni
+  hace que el navegador pruebe cuatro URLs.
+- delete/ borra el registro y todas las claves conocidas con UNA llamada
+  borrar_varios (también las fijas de antes del registro).
+"""
+import re
+import uuid
+
+from django.db import transaction
+
+from .http_cache import etag_de
+from .storage import almacen
+
+PREFIJO_SONIDOS = 'notification_sounds/'
+FORMATOS = ('mp3', 'wav', 'ogg', 'm4a')
+TAMANO_MAXIMO = 2 * 1024 * 1024
+
+
+class ErrorSonido(Exception):
+    """Error de validación (→ 400)."""
+
+
+def prefijo(username):
+    return f"{PREFIJO_SONIDOS}{username}/"
+
+
+def formato(filename):
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else 'mp3'
+    if extension not in FORMATOS:
+        raise ErrorSonido(f"Formato no permitido: {extension} (usa {', '.join(FORMATOS)})")
+    return extension
+
+
+def clave_nueva(username, extension):
+    return f"{prefijo(username)}custom_notification-{uuid.uuid4().hex[:12]}.{extension}"
+
+
+def claves_antiguas(username):
+    """Claves fijas que se usaban antes del registro (una por formato)."""
+    return [f"{prefijo(username)}custom_notification.{ext}" for ext in FORMATOS]
+
+
+def validar_clave(username, s3_key):
+    patron = rf'^{re.escape(prefijo(username))}custom_notification(-[0-9a-f]{{12}})?\.({"|".join(FORMATOS)})$'
+    if not isinstance(s3_key, str) or not re.match(patron, s3_key):
+        raise ErrorSonido('s3_key no válido')
+    return s3_key.rsplit('.', 1)[-1]
+
+
+def registrar(username, s3_key):
+    """
+    Confirma la subida de `s3_key` y la deja como sonido del usuario.
+    Devuelve el registro (Stsonido). Lanza ErrorSonido si el objeto no está
+    o es demasiado grande.
+    """
+    from .models import Stsonido
+
+    extension = validar_clave(username, s3_key)
+    objeto = almacen().info(s3_key)
+    if objeto is None:
+        raise ErrorSonido('El archivo no se subió al almacén')
+    if objeto['size'] > TAMANO_MAXIMO:
+        almacen().borrar(s3_key)
+        raise ErrorSonido('El archivo debe ser menor a 2MB')
+
+    with transaction.atomic():
+        anterior = Stsonido.objects.select_for_update().filter(sonido_usuario=username).first()
+        version = (anterior.sonido_ver_sonido + 1) if anterior else 1
+        clave_anterior = anterior.sonido_rut_sonido if anterior else None
+        registro, _ = Stsonido.objects.update_or_create(
+            sonido_usuario=username,
+            defaults={
+                'sonido_rut_sonido': s3_key,
+                'sonido_for_sonido': extension,
+                'sonido_tam_sonido': objeto['size'],
+                'sonido_ver_sonido': version,
+            },
+        )
+
+    sobrantes = [c for c in [clave_anterior, *claves_antiguas(username)] if c and c != s3_key]
+    almacen().borrar_varios(sobrantes)
+    return registro
+
+
+def eliminar(username):
+    """Borra el registro y todas las claves del usuario en una sola llamada al almacén."""
+    from .models import Stsonido
+
+    registro = Stsonido.objects.filter(sonido_usuario=username).first()
+    claves = claves_antiguas(username)
+    if registro:
+        claves.append(registro.sonido_rut_sonido)
+        registro.delete()
+    return almacen().borrar_varios(claves)
+
+
+def respuesta_check(username, registro):
+    """(cuerpo, etag) de check/ para el registro dado (o None)."""
+    sonido = None
+    if registro is not None:
+        sonido = {
+            'url': almacen().url_publica(registro.sonido_rut_sonido),
+            's3_key': registro.sonido_rut_sonido,
+            'format': registro.sonido_for_sonido,
+            'size': registro.sonido_tam_sonido,
+            'version': registro.sonido_ver_sonido,
+        }
+    cuerpo = {'success': True, 'username': username, 'sound': sonido}
+    # La URL entra al hash: en el almacén local cambia una vez al día
+    return cuerpo, etag_de(cuerpo)
@@ -0,0 +1,596 @@
+"""
+Archivo: api/storage.py
+Almacenamiento de adjuntos y sonidos: S3 o disco local, con la misma interfaz.
+
+    from .storage import almacen
+    almacen().url_subida(clave, 'image/png', metadata={...})   # PUT directo del navegador
+    almacen().url_descarga(clave)                               # GET firmado y con vencimiento
+    almacen().info(clave) / abrir(clave) / guardar(...) / borrar_varios([...])
+
+- settings.ALMACEN = 's3' (por defecto si hay credenciales AWS) o 'local'
+  (on-prem / sin internet), con los archivos bajo ALMACEN_LOCAL_RAIZ.
+- Local: las URLs apuntan a vista_almacen_local (/api/almacen/<clave>) y
+  llevan un token HMAC-SHA256 con vencimiento, igual que una URL prefirmada
+  de S3. La firma del PUT cubre también tipo, metadata y sha256, así que el
+  navegador no puede cambiarlos. Las descargas salen por FileResponse
+  (sendfile bajo gunicorn), con Range e If-Modified-Since.
+- Multipart solo existe en S3: con almacén local todo va en un PUT.
+- Todas las operaciones se miden en storage_operation_seconds{backend,
+  operacion, resultado}; los reintentos de botocore en storage_retries_total.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import wraps
+from urllib.parse import quote, urlencode
+
+import boto3
+from asgiref.sync import sync_to_async
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseForbidden, HttpResponseNotAllowed,
+    HttpResponseNotModified, StreamingHttpResponse,
+)
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.csrf import csrf_exempt
+from django.views.static import was_modified_since
+
+from .instrumentation import medir
+from .metrics import ALMACEN_DURACION, ALMACEN_REINTENTOS
+
+EXPIRACION_URLS = 3600
+BLOQUE = 1024 * 1024
+DIA = 24 * 3600
+
+_cliente = None
+_almacen = None
+_lock = threading.Lock()
+
+
+def _config_s3():
+    """
+    Timeouts cortos y reintentos adaptativos: un S3 lento falla rápido (y se
+    reintenta con backoff) en vez de colgar el worker hasta el WORKER TIMEOUT.
+    El pool de conexiones alcanza para los HEAD/ZIP en paralelo.
+    """
+    return Config(
+        connect_timeout=settings.S3_TIMEOUT_CONEXION,
+        read_timeout=settings.S3_TIMEOUT_LECTURA,
+        max_pool_connections=settings.S3_MAX_CONEXIONES,
+        retries={'mode': 'adaptive', 'max_attempts': settings.S3_MAX_INTENTOS},
+        tcp_keepalive=True,
+        signature_version='s3v4',
+    )
+
+
+def _contar_reintentos(parsed=None, model=None, **kwargs):
+    intentos = ((parsed or {}).get('ResponseMetadata') or {}).get('RetryAttempts') or 0
+    if intentos and model is not None:
+        ALMACEN_REINTENTOS.labels(operacion=model.name).inc(intentos)
+
+
+def cliente_s3():
+    """
+    Cliente boto3 compartido (los clientes son thread-safe). Uso interno:
+    el resto del código pasa por almacen().
+    """
+    global _cliente
+    if _cliente is None:
+        with _lock:
+            if _cliente is None:
+                with medir('s3'):
+                    cliente = boto3.client(
+                        's3',
+                        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+                        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+                        region_name=settings.AWS_S3_REGION_NAME,
+                        config=_config_s3(),
+                    )
+                cliente.meta.events.register('after-call.s3', _contar_reintentos)
+                _cliente = cliente
+    return _cliente
+
+
+@contextmanager
+def medir_operacion(backend, operacion):
+    """Latencia por operación (storage_operation_seconds) + tiempo 's3' del request."""
+    inicio = time.perf_counter()
+    resultado = 'error'
+    try:
+        with medir('s3'):
+            yield
+        resultado = 'ok'
+    finally:
+        ALMACEN_DURACION.labels(backend=backend, operacion=operacion, resultado=resultado).observe(
+            time.perf_counter() - inicio
+        )
+
+
+def _operacion(nombre):
+    """Decorador para los métodos de los almacenes: mide con medir_operacion()."""
+    def decorador(metodo):
+        @wraps(metodo)
+        def envoltura(self, *args, **kwargs):
+            with medir_operacion(self.nombre, nombre):
+                return metodo(self, *args, **kwargs)
+        return envoltura
+    return decorador
+
+
+def almacen():
+    """El backend configurado en settings.ALMACEN (uno por proceso)."""
+    global _almacen
+    if _almacen is None:
+        with _lock:
+            if _almacen is None:
+                if settings.ALMACEN == 'local':
+                    _almacen = AlmacenLocal(settings.ALMACEN_LOCAL_RAIZ, settings.ALMACEN_LOCAL_URL)
+                else:
+                    _almacen = AlmacenS3()
+    return _almacen
+
+
+def iterar_async(iterable):
+    """
+    Iterador async sobre uno síncrono, pidiendo cada elemento desde un hilo.
+    Bajo ASGI Django carga ENTERO en memoria un StreamingHttpResponse (o
+    FileResponse) con iterador síncrono; con esto se sirve por partes.
+    """
+    iterador = iter(iterable)
+    siguiente = sync_to_async(next, thread_sensitive=False)
+
+    async def generador():
+        try:
+            while True:
+                datos = await siguiente(iterador, None)
+                if datos is None:
+                    return
+                yield datos
+        finally:
+            cerrar = getattr(iterador, 'close', None)
+            if cerrar:
+                await sync_to_async(cerrar, thread_sensitive=False)()
+
+    return generador()
+
+
+# ============================================================
+# S3
+# ============================================================
+class AlmacenS3:
+    nombre = 's3'
+    soporta_multipart = True
+
+    @property
+    def bucket(self):
+        return settings.AWS_STORAGE_BUCKET_NAME
+
+    # ── URLs prefirmadas (solo firma, sin red) ──
+    @_operacion('presign_put')
+    def url_subida(self, clave, content_type, metadata=None, sha256_b64=None, expira=EXPIRACION_URLS):
+        """{upload_url, headers}: headers son los que el PUT debe mandar tal cual."""
+        params = {'Bucket': self.bucket, 'Key': clave, 'ContentType': content_type}
+        headers = {}
+        if metadata:
+            # Los x-amz-meta-* quedan en SignedHeaders: sin ellos S3 rechaza la firma
+            params['Metadata'] = metadata
+            headers.update({f'x-amz-meta-{k}': v for k, v in metadata.items()})
+        if sha256_b64:
+            params['ChecksumSHA256'] = sha256_b64
+            headers['x-amz-checksum-sha256'] = sha256_b64
+        url = cliente_s3().generate_presigned_url('put_object', Params=params, ExpiresIn=expira)
+        return {'upload_url': url, 'headers': headers}
+
+    @_operacion('presign_get')
+    def url_descarga(self, clave, expira=EXPIRACION_URLS):
+        return cliente_s3().generate_presigned_url(
+            'get_object', Params={'Bucket': self.bucket, 'Key': clave}, ExpiresIn=expira,
+        )
+
+    def url_publica(self, clave):
+        """URL estable (sin firma); solo sirve para prefijos con lectura pública en el bucket."""
+        return f"https://{settings.AWS_S3_CUSTOM_DOMAIN}/{clave}"
+
+    # ── Objetos ──
+    @_operacion('head')
+    def info(self, clave, checksum=False):
+        """{size, content_type, modificado, metadata, sha256_b64} o None si no existe."""
+        extra = {'ChecksumMode': 'ENABLED'} if checksum else {}
+        try:
+            respuesta = cliente_s3().head_object(Bucket=self.bucket, Key=clave, **extra)
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            raise
+        return {
+            'size': respuesta['ContentLength'],
+            'content_type': respuesta.get('ContentType') or 'application/octet-stream',
+            'modificado': respuesta.get('LastModified'),
+            'metadata': respuesta.get('Metadata') or {},
+            'sha256_b64': respuesta.get('ChecksumSHA256'),
+        }
+
+    @_operacion('get')
+    def abrir(self, clave):
+        """Objeto con read(n) y close(). Se mide hasta el primer byte."""
+        return cliente_s3().get_object(Bucket=self.bucket, Key=clave)['Body']
+
+    @_operacion('put')
+    def guardar(self, clave, datos, content_type, cache_control=None):
+        extra = {'CacheControl': cache_control} if cache_control else {}
+        cliente_s3().put_object(Bucket=self.bucket, Key=clave, Body=datos, ContentType=content_type, **extra)
+
+    @_operacion('delete')
+    def borrar(self, clave):
+        cliente_s3().delete_object(Bucket=self.bucket, Key=clave)
+
+    @_operacion('delete_batch')
+    def borrar_varios(self, claves):
+        """Una llamada por cada 1000 claves (límite de delete_objects). Devuelve las que fallaron."""
+        claves = list(claves)
+        fallidas = []
+        for i in range(0, len(claves), 1000):
+            respuesta = cliente_s3().delete_objects(
+                Bucket=self.bucket,
+                Delete={'Objects': [{'Key': k} for k in claves[i:i + 1000]], 'Quiet': True},
+            )
+            fallidas.extend(e['Key'] for e in respuesta.get('Errors', []))
+        return fallidas
+
+    # ── Multipart ──
+    @_operacion('multipart_iniciar')
+    def iniciar_multipart(self, clave, content_type, metadata=None):
+        return cliente_s3().create_multipart_upload(
+            Bucket=self.bucket, Key=clave, ContentType=content_type, Metadata=metadata or {},
+        )['UploadId']
+
+    def url_parte(self, clave, upload_id, numero, expira=EXPIRACION_URLS):
+        # Sin métrica propia: se llama cientos de veces dentro de presign_partes
+        return cliente_s3().generate_presigned_url(
+            'upload_part',
+            Params={'Bucket': self.bucket, 'Key': clave, 'UploadId': upload_id, 'PartNumber': numero},
+            ExpiresIn=expira,
+        )
+
+    @_operacion('presign_partes')
+    def urls_partes(self, clave, upload_id, numeros):
+        return [{'part_number': n, 'url': self.url_parte(clave, upload_id, n)} for n in numeros]
+
+    @_operacion('multipart_listar')
+    def partes(self, clave, upload_id):
+        """[{part_number, etag, size}] que S3 ya recibió (paginado de a 1000)."""
+        partes, marcador = [], 0
+        while True:
+            respuesta = cliente_s3().list_parts(
+                Bucket=self.bucket, Key=clave, UploadId=upload_id, PartNumberMarker=marcador,
+            )
+            partes.extend(
+                {'part_number': p['PartNumber'], 'etag': p['ETag'], 'size': p['Size']}
+                for p in respuesta.get('Parts', [])
+            )
+            if not respuesta.get('IsTruncated'):
+                return partes
+            marcador = respuesta['NextPartNumberMarker']
+
+    @_operacion('multipart_completar')
+    def completar_multipart(self, clave, upload_id, partes):
+        """partes: [{'PartNumber', 'ETag'}] ya ordenadas."""
+        cliente_s3().complete_multipart_upload(
+            Bucket=self.bucket, Key=clave, UploadId=upload_id, MultipartUpload={'Parts': partes},
+        )
+
+    @_operacion('multipart_abortar')
+    def abortar_multipart(self, clave, upload_id):
+        cliente_s3().abort_multipart_upload(Bucket=self.bucket, Key=clave, UploadId=upload_id)
+
+
+# ============================================================
+# DISCO LOCAL
+# ============================================================
+class AlmacenLocal:
+    nombre = 'local'
+    soporta_multipart = False
+
+    def __init__(self, raiz, url_base, clave_firma=None):
+        self.raiz = os.path.abspath(raiz)
+        self.url_base = url_base.rstrip('/') + '/'
+        self._clave_firma = (clave_firma or settings.SECRET_KEY).encode()
+
+    # ── Rutas ──
+    def ruta(self, clave):
+        """Ruta absoluta de la clave; nunca fuera de la raíz."""
+        if not clave or clave.startswith('/') or '\\' in clave or '..' in clave.split('/') or clave.startswith('.meta/'):
+            raise Http404('Clave inválida')
+        return os.path.join(self.raiz, *clave.split('/'))
+
+    def _ruta_meta(self, clave):
+        return os.path.join(self.raiz, '.meta', *clave.split('/')) + '.json'
+
+    def _leer_meta(self, clave):
+        try:
+            with open(self._ruta_meta(clave), encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _escribir(self, destino, fuente):
+        """Copia `fuente` (iterable de bytes) a un temporal junto a `destino`. Devuelve (tamaño, digest, temporal)."""
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        digest, tam = hashlib.sha256(), 0
+        descriptor, temporal = tempfile.mkstemp(dir=os.path.dirname(destino), prefix='.subida-')
+        try:
+            with os.fdopen(descriptor, 'wb') as f:
+                for bloque in fuente:
+                    f.write(bloque)
+                    digest.update(bloque)
+                    tam += len(bloque)
+            return tam, digest, temporal
+        except BaseException:
+            os.unlink(temporal)
+            raise
+
+    def _guardar_meta(self, clave, meta):
+        ruta = self._ruta_meta(clave)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        with open(ruta, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+
+    # ── Firmas ──
+    def firmar(self, metodo, clave, expira, extra=''):
+        mensaje = f"{metodo}\n{clave}\n{expira}\n{extra}".encode()
+        return hmac.new(self._clave_firma, mensaje, hashlib.sha256).hexdigest()
+
+    def _url(self, clave, params):
+        return f"{self.url_base}{quote(clave)}?{urlencode(params)}"
+
+    @staticmethod
+    def _extra_subida(content_type, meta, sha256_b64):
+        return f"{content_type}\n{meta}\n{sha256_b64 or ''}"
+
+    # ── Interfaz ──
+    def url_subida(self, clave, content_type, metadata=None, sha256_b64=None, expira=EXPIRACION_URLS):
+        self.ruta(clave)
+        vence = int(time.time()) + expira
+        meta = json.dumps(metadata or {}, sort_keys=True, separators=(',', ':'))
+        params = {'expira': vence, 'tipo': content_type, 'meta': meta}
+        if sha256_b64:
+            params['sha256'] = sha256_b64
+        params['firma'] = self.firmar('PUT', clave, vence, self._extra_subida(content_type, meta, sha256_b64))
+        return {'upload_url': self._url(clave, params), 'headers': {}}
+
+    def url_descarga(self, clave, expira=EXPIRACION_URLS, vence=None):
+        self.ruta(clave)
+        vence = vence or int(time.time()) + expira
+        return self._url(clave, {'expira': vence, 'firma': self.firmar('GET', clave, vence)})
+
+    def url_publica(self, clave):
+        # Vence al final del 8º día siguiente: la URL no cambia en todo el día (cacheable)
+        return self.url_descarga(clave, vence=(int(time.time()) // DIA + 8) * DIA)
+
+    @_operacion('head')
+    def info(self, clave, checksum=False):
+        try:
+            estado = os.stat(self.ruta(clave))
+        except FileNotFoundError:
+            return None
+        meta = self._leer_meta(clave)
+        return {
+            'size': estado.st_size,
+            'content_type': meta.get('content_type') or 'application/octet-stream',
+            'modificado': datetime.fromtimestamp(estado.st_mtime, tz=timezone.utc),
+            'metadata': meta.get('metadata') or {},
+            'sha256_b64': meta.get('sha256_b64'),
+        }
+
+    @_operacion('get')
+    def abrir(self, clave):
+        return open(self.ruta(clave), 'rb')
+
+    def guardar(self, clave, datos, content_type, cache_control=None):
+        self.recibir(clave, [datos], content_type)
+
+    @_operacion('put')
+    def recibir(self, clave, bloques, content_type, metadata=None, sha256_b64=None):
+        """
+        Escribe el archivo desde `bloques` y su metadata. Si viene sha256_b64,
+        rechaza (ValueError) el contenido que no coincide, como S3 con
+        x-amz-checksum-sha256. Devuelve el tamaño.
+        """
+        destino = self.ruta(clave)
+        tam, digest, temporal = self._escribir(destino, bloques)
+        calculado = base64.b64encode(digest.digest()).decode()
+        if sha256_b64 and calculado != sha256_b64:
+            os.unlink(temporal)
+            raise ValueError('El contenido no coincide con x-amz-checksum-sha256')
+        self._guardar_meta(clave, {
+            'content_type': content_type, 'metadata': metadata or {}, 'sha256_b64': calculado,
+        })
+        os.replace(temporal, destino)
+        return tam
+
+    @_operacion('delete')
+    def borrar(self, clave):
+        for ruta in (self.ruta(clave), self._ruta_meta(clave)):
+            try:
+                os.remove(ruta)
+            except FileNotFoundError:
+                pass
+
+    @_operacion('delete_batch')
+    def borrar_varios(self, claves):
+        for clave in claves:
+            self.borrar(clave)
+        return []
+
+
+# ============================================================
+# VISTA DEL ALMACÉN LOCAL: /api/almacen/<clave>?expira=..&firma=..
+# ============================================================
+_RANGO = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class _Tramo:
+    """Lectura acotada a [inicio, inicio + largo) de un archivo abierto."""
+
+    def __init__(self, archivo, inicio, largo):
+        archivo.seek(inicio)
+        self._archivo = archivo
+        self._resto = largo
+
+    def read(self, n=-1):
+        if self._resto <= 0:
+            return b''
+        n = self._resto if n is None or n < 0 else min(n, self._resto)
+        datos = self._archivo.read(n)
+        self._resto -= len(datos)
+        return datos
+
+    def close(self):
+        self._archivo.close()
+
+
+def _rango(request, tam, modificado):
+    """
+    (inicio, largo) pedido en Range, None para responder entero (sin Range,
+    varios rangos o If-Range que no coincide) o False si no es satisfacible.
+    """
+    cabecera = request.META.get('HTTP_RANGE', '').strip()
+    coincidencia = _RANGO.match(cabecera)
+    if not coincidencia:
+        return None
+    si_rango = request.META.get('HTTP_IF_RANGE')
+    if si_rango and parse_http_date_safe(si_rango) != modificado:
+        return None
+    desde, hasta = coincidencia.groups()
+    if not desde:
+        if not hasta or int(hasta) == 0:
+            return False
+        largo = min(int(hasta), tam)          # bytes=-500: los últimos 500
+        return (tam - largo, largo)
+    inicio = int(desde)
+    if inicio >= tam:
+        return False
+    fin = min(int(hasta), tam - 1) if hasta else tam - 1
+    if fin < inicio:
+        return False
+    return (inicio, fin - inicio + 1)
+
+
+def _bloques(archivo):
+    try:
+        for datos in iter(lambda: archivo.read(BLOQUE), b''):
+            yield datos
+    finally:
+        archivo.close()
+
+
+def _respuesta_archivo(request, archivo, largo, status, tipo):
+    if isinstance(request, ASGIRequest):
+        respuesta = StreamingHttpResponse(iterar_async(_bloques(archivo)), status=status, content_type=tipo)
+    else:
+        # Bajo WSGI FileResponse usa wsgi.file_wrapper (sendfile en gunicorn para el archivo completo)
+        respuesta = FileResponse(archivo, status=status, content_type=tipo)
+    respuesta['Content-Length'] = str(largo)
+    return respuesta
+
+
+def _servir(request, local, clave):
+    ruta = local.ruta(clave)
+    try:
+        estado = os.stat(ruta)
+    except FileNotFoundError:
+        raise Http404('No existe')
+    modificado = int(estado.st_mtime)
+    tam = estado.st_size
+    tipo = local._leer_meta(clave).get('content_type') or 'application/octet-stream'
+
+    if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'), modificado):
+        respuesta = HttpResponseNotModified()
+        respuesta['Last-Modified'] = http_date(modificado)
+        return respuesta
+
+    rango = _rango(request, tam, modificado)
+    if rango is False:
+        respuesta = HttpResponse(status=416)
+        respuesta['Content-Range'] = f'bytes */{tam}'
+        return respuesta
+
+    if request.method == 'HEAD':
+        respuesta = HttpResponse(content_type=tipo)
+        respuesta['Content-Length'] = str(tam)
+    elif rango is None:
+        respuesta = _respuesta_archivo(request, open(ruta, 'rb'), tam, 200, tipo)
+    else:
+        inicio, largo = rango
+        respuesta = _respuesta_archivo(request, _Tramo(open(ruta, 'rb'), inicio, largo), largo, 206, tipo)
+        respuesta['Content-Range'] = f'bytes {inicio}-{inicio + largo - 1}/{tam}'
+    respuesta['Last-Modified'] = http_date(modificado)
+    respuesta['Accept-Ranges'] = 'bytes'
+    respuesta['Cache-Control'] = 'private, max-age=3600'
+    return respuesta
+
+
+def _recibir(request, local, clave, params):
+    bloques = iter(lambda: request.read(BLOQUE), b'')
+
+    def limitados():
+        total = 0
+        for datos in bloques:
+            total += len(datos)
+            if total > settings.UPLOAD_MAX_TAMANO:
+                raise OverflowError()
+            yield datos
+
+    try:
+        local.recibir(
+            clave, limitados(), params['tipo'],
+            metadata=json.loads(params['meta']), sha256_b64=params.get('sha256'),
+        )
+    except OverflowError:
+        return HttpResponse('Archivo demasiado grande', status=413)
+    except ValueError as e:
+        return HttpResponse(str(e), status=400)
+    return HttpResponse(status=200)
+
+
+@csrf_exempt
+def vista_almacen_local(request, clave):
+    """GET/HEAD (descarga) y PUT (subida) con URL firmada por AlmacenLocal."""
+    local = almacen()
+    if not isinstance(local, AlmacenLocal):
+        raise Http404('Almacén local desactivado')
+    if request.method not in ('GET', 'HEAD', 'PUT'):
+        return HttpResponseNotAllowed(['GET', 'HEAD', 'PUT'])
+
+    params = request.GET
+    try:
+        expira = int(params.get('expira', ''))
+    except ValueError:
+        return HttpResponseForbidden('URL sin firma')
+    if expira < time.time():
+        return HttpResponseForbidden('URL vencida')
+
+    if request.method == 'PUT':
+        if 'tipo' not in params or 'meta' not in params:
+            return HttpResponseForbidden('URL de subida incompleta')
+        extra = local._extra_subida(params['tipo'], params['meta'], params.get('sha256'))
+        firma = local.firmar('PUT', clave, expira, extra)
+    else:
+        firma = local.firmar('GET', clave, expira)
+    if not hmac.compare_digest(firma, params.get('firma', '')):
+        return HttpResponseForbidden('Firma inválida')
+
+    if request.method == 'PUT':
+        return _recibir(request, local, clave, params)
+    return _servir(request, local, clave)
@@ -1,3 +1,1402 @@
-from django.test import TestCase
+"""
+Tests de api/. S3 se reemplaza por moto (en memoria, sin red ni credenciales)
+y el almacén local usa un directorio temporal:
+    pip install -r requirements-test.txt
+    python manage.py test api
+Sin moto se saltean solo los tests de S3 (SubidaAdjuntosTests).
+"""
+import base64
+import gzip
+import hashlib
+import io
+import json
+import shutil
+import tempfile
+import time
+import threading
+import unittest
+import zipfile
+from datetime import datetime
+from unittest import mock
+from urllib.parse import urlsplit
 
-# Create your tests here.
+import boto3
+import requests
+from botocore.exceptions import ClientError
+from django.db.models import Q
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.utils.http import http_date
+from prometheus_client import REGISTRY
+
+from . import (assignment, blobs, bulk_tickets, compression, db_router, duplicates, filters, http_cache,
+               image_processing, instrumentation, search, sla, sonidos, storage, ticket_edit, uploads, user_cache)
+from .directory import Instantanea
+from .models import Starchivos, Stticket
+from .renderers import ORJSONParser, ORJSONRenderer
+from .zip_stream import generar_zip
+
+try:
+    from moto import mock_aws
+except ImportError:                 # Está en requirements-test.txt, no en requirements.txt
+    mock_aws = None
+
+BUCKET = 'test-adjuntos'
+MB = 1024 * 1024
+
+
+def _ticket(cod, asunto, descripcion, estado='PE'):
+    return Stticket(ticket_cod_ticket=cod, ticket_id_ticket=f'TK-{cod}', ticket_asu_ticket=asunto,
+                    ticket_des_ticket=descripcion, ticket_tusua_ticket='ana', ticket_est_ticket=estado)
+
+
+CORREO = 'No puedo ingresar al correo institucional desde Outlook, pide la contraseña una y otra vez'
+IMPRESORA = 'La impresora del segundo piso atasca el papel en la bandeja dos y no imprime nada'
+
+
+@override_settings(DUPLICADOS_UMBRAL=0.6, DUPLICADOS_TTL_SEGUNDOS=300)
+class DuplicadosTests(SimpleTestCase):
+
+    def setUp(self):
+        self.filas = [
+            (1, 'TK-1', 'Correo', CORREO, 'ana', None),
+            (2, 'TK-2', 'Correo', CORREO.replace('una y otra vez', 'todo el tiempo'), 'beto', None),
+            (3, 'TK-3', 'Impresora', IMPRESORA, 'carla', None),
+            (4, 'TK-4', 'Impresora', IMPRESORA + ' desde ayer', 'dani', None),
+            (5, 'TK-5', 'Correo', 'Solicito una cuenta de correo para el practicante nuevo', 'eva', None),
+        ]
+        self.indice = duplicates.IndiceDuplicados()
+        self.indice._filas_abiertas = self._filas
+        self.indice.sincronizar()
+
+    def _filas(self, desde_cod=0):
+        entradas = (duplicates._entrada(*fila) for fila in self.filas if fila[0] > desde_cod)
+        return [e for e in entradas if e is not None]
+
+    def test_firma_y_similitud(self):
+        self.assertIsNone(duplicates.calcular_firma(''))
+        self.assertIsNone(duplicates.calcular_firma('--- Opciones Finales Intentadas: reinicio'))
+        firma = duplicates.calcular_firma(CORREO)
+        self.assertEqual(len(firma), duplicates.NUM_CUBETAS)
+        # Tildes, mayúsculas y las opciones finales no cambian la firma
+        self.assertEqual(duplicates.calcular_firma(CORREO.upper().replace('contraseña', 'CONTRASENA')
+                                                   + '\n--- Opciones Finales Intentadas: reinicio'),
+                         duplicates.calcular_firma(CORREO.replace('contraseña', 'contrasena')))
+        self.assertEqual(duplicates.similitud(firma, firma), 1.0)
+        self.assertLess(duplicates.similitud(firma, duplicates.calcular_firma(IMPRESORA)), 0.3)
+        # Texto más corto que un shingle también tiene firma
+        self.assertIsNotNone(duplicates.calcular_firma('vpn'))
+
+    def test_buscar_por_asunto_y_umbral(self):
+        encontrados = self.indice.buscar('Correo', CORREO, excluir=1)
+        self.assertEqual([d['ticket_cod'] for d in encontrados], [2])
+        self.assertGreaterEqual(encontrados[0]['similitud'], 0.6)
+        self.assertEqual(encontrados[0]['creado_por'], 'beto')
+        # Mismo texto con otro asunto no cae en las mismas cubetas
+        self.assertEqual(self.indice.buscar('Impresora', CORREO), [])
+        self.assertEqual(self.indice.buscar('Correo', CORREO, umbral=1.01), [])
+
+    def test_clusters(self):
+        clusters = self.indice.clusters()
+        self.assertEqual(sorted(sorted(t['ticket_cod'] for t in c['tickets']) for c in clusters), [[1, 2], [3, 4]])
+        self.assertTrue(all(c['cantidad'] == 2 for c in clusters))
+
+    def test_registrar_cierre_e_incremental(self):
+        self.indice.registrar(_ticket(2, 'Correo', CORREO, estado='FN'))
+        self.assertEqual(self.indice.buscar('Correo', CORREO, excluir=1), [])
+        self.filas.append((9, 'TK-9', 'Correo', CORREO + ' ayuda', 'fer', None))
+        self.indice.sincronizar()
+        self.assertEqual([d['ticket_cod'] for d in self.indice.buscar('Correo', CORREO, excluir=1)], [9])
+
+    def test_vigentes_retira_cerrados_en_otro_worker(self):
+        self.indice._abiertos_en_base = lambda cods: cods - {2}
+        self.assertEqual(self.indice.vigentes([1, 2]), {1})
+        self.assertEqual(self.indice.buscar('Correo', CORREO, excluir=1), [])
+        self.assertEqual(sorted(sorted(t['ticket_cod'] for t in c['tickets'])
+                                for c in self.indice.clusters_vigentes()), [[3, 4]])
+
+    def test_reconstruccion_en_segundo_plano(self):
+        leyendo, seguir = threading.Event(), threading.Event()
+
+        def filas_lentas(desde_cod=0):
+            if desde_cod == 0:
+                leyendo.set()
+                seguir.wait(5)
+            return self._filas(desde_cod)
+
+        self.indice._filas_abiertas = filas_lentas
+        self.indice._reconstruido_en -= 301
+        self.indice.sincronizar()                     # No espera la recarga
+        self.assertTrue(leyendo.wait(5))
+        # Mientras tanto se busca con las tablas viejas y los cambios no se pierden
+        self.assertEqual(len(self.indice.buscar('Correo', CORREO, excluir=1)), 1)
+        self.indice.retirar(2)
+        seguir.set()
+        for _ in range(500):
+            if not self.indice._reconstruyendo:
+                break
+            time.sleep(0.01)
+        self.assertFalse(self.indice._reconstruyendo)
+        self.assertEqual(self.indice.buscar('Correo', CORREO, excluir=1), [])
+        self.assertEqual(len(self.indice.buscar('Impresora', IMPRESORA, excluir=3)), 1)
+
+
+class _CargaFalsa:
+    def __init__(self, falla=False):
+        self.llamadas = []
+        self.falla = falla
+
+    def ajustar(self, username, delta, minutos=None):
+        if self.falla:
+            raise ConnectionError('redis caído')
+        self.llamadas.append((username, delta, minutos))
+
+
+class AsignacionTests(SimpleTestCase):
+
+    def _local(self, cargas):
+        carga = assignment.CargaLocal()
+        with mock.patch.object(assignment, '_cargar_desde_bd', return_value=cargas):
+            carga.reconstruir()
+        return carga
+
+    def test_heap_local_elige_el_de_menor_carga(self):
+        carga = self._local({'ana': (2, 0.0), 'beto': (1, 90.0), 'carla': (1, 30.0)})
+        # Empate en abiertos: gana el de menor promedio de resolución
+        self.assertEqual([carga.elegir() for _ in range(4)], ['carla', 'beto', 'ana', 'carla'])
+        self.assertEqual([u for u, _ in carga.snapshot()], ['beto', 'ana', 'carla'])
+
+    def test_heap_local_ajustar(self):
+        carga = self._local({'ana': (1, 0.0), 'beto': (1, 40.0)})
+        carga.ajustar('ana', -1, minutos=50)            # Primer promedio: el valor tal cual
+        carga.ajustar('beto', -1, minutos=90)           # Promedio móvil: 40 + 0.2 * (90 - 40)
+        carga.ajustar('beto', -5)                       # Nunca baja de 0
+        carga.ajustar('nadie', +1)                      # Admin desconocido: se ignora
+        self.assertEqual(carga._cargas, {'ana': [0, 50], 'beto': [0, 50.0]})
+        carga.ajustar('beto', +1)
+        self.assertEqual(carga.elegir(), 'ana')
+        # Muchas entradas obsoletas: el heap se compacta
+        for _ in range(20):
+            carga.ajustar('ana', 0)
+        self.assertLessEqual(len(carga._heap), 4 * 2)
+        self.assertEqual(carga.elegir(), 'ana')
+
+    def test_heap_local_vacio(self):
+        self.assertIsNone(self._local({}).elegir())
+
+    def test_registrar_cambio(self):
+        motor = assignment.MotorAsignacion()
+        motor._backend = _CargaFalsa()
+        casos = [
+            ((None, None, 'ana', 'PE', None), [('ana', 1, None)]),                   # Creado y asignado
+            (('ana', 'PE', 'beto', 'PE', None), [('ana', -1, None), ('beto', 1, None)]),
+            (('ana', 'PE', 'ana', 'PR', None), []),                                 # Sigue abierto
+            (('ana', 'PR', 'ana', 'FN', 30), [('ana', -1, 30)]),                     # Resuelto: suma al promedio
+            (('ana', 'PE', 'beto', 'FN', 30), [('ana', -1, None)]),                  # Lo cerró otro
+            (('ana', 'FN', 'ana', 'PE', None), [('ana', 1, None)]),                  # Reabierto
+            (('ana', 'PE', None, 'PE', None), [('ana', -1, None)]),                  # Desasignado
+        ]
+        for argumentos, esperado in casos:
+            motor._backend.llamadas = []
+            motor.registrar_cambio(*argumentos[:4], minutos=argumentos[4])
+            self.assertEqual(motor._backend.llamadas, esperado, argumentos)
+
+        motor._backend = _CargaFalsa(falla=True)
+        motor.registrar_cambio(None, None, 'ana', 'PE')   # No lanza
+
+
+class _ConexionFalsa:
+    """Reemplaza a django.db.connection: guarda el SQL y devuelve `filas`."""
+
+    def __init__(self, filas=()):
+        self.filas = list(filas)
+        self.ejecutadas = []
+
+    def cursor(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.ejecutadas.append((sql, params))
+
+    def fetchall(self):
+        return self.filas
+
+    def fetchone(self):
+        return self.filas[0] if self.filas else None
+
+
+class BusquedaTests(SimpleTestCase):
+
+    def _buscar(self, filas=(), **kwargs):
+        conexion = _ConexionFalsa(filas)
+        with mock.patch.object(search, 'connection', conexion):
+            resultado = search.buscar_tickets(kwargs.pop('texto', 'impresora'), **kwargs)
+        (sql, params), = conexion.ejecutadas
+        return resultado, sql, params
+
+    @staticmethod
+    def _fila(cod, puntaje):
+        return (cod, f'TKT-{cod}', 'Impresora', 'No imprime', 'PE', 'Hardware', 'ana', None,
+                datetime(2025, 1, 2, 3, 4), puntaje)
+
+    def test_cursor_ida_y_vuelta(self):
+        cursor = search.codificar_cursor(0.4375, 120)
+        self.assertEqual(search.decodificar_cursor(cursor), (0.4375, 120))
+
+    def test_cursor_malformado(self):
+        def b64(texto):
+            return base64.urlsafe_b64encode(texto.encode()).decode()
+
+        for cursor in ('no-es-base64!', b64('{"a": 1}'), b64('[1]'), b64('[1, 2, 3]'), b64('["x", 2]'),
+                       b64('[0.5, "y"]'), b64('[NaN, 2]'), b64('no json')):
+            self.assertIsNone(search.decodificar_cursor(cursor), cursor)
+            with self.assertRaises(search.CursorInvalido):
+                self._buscar(cursor=cursor)
+
+    def test_primera_pagina(self):
+        (resultados, siguiente), sql, params = self._buscar(
+            [self._fila(9, 0.9), self._fila(7, 0.5), self._fila(3, 0.5)], texto='100%_x', limite=2,
+        )
+        self.assertEqual(params['limite'], 3)                 # Uno extra para saber si hay otra página
+        self.assertEqual(params['patron'], '%100\\%\\_x%')
+        self.assertNotIn('c_puntaje', params)
+        self.assertNotIn('ticket_tusua_ticket = %(usuario)s', sql)
+        self.assertEqual([r['ticket_cod_ticket'] for r in resultados], [9, 7])
+        self.assertEqual(resultados[0]['ticket_fec_ticket'], '2025-01-02T03:04:00')
+        self.assertEqual(search.decodificar_cursor(siguiente), (0.5, 7))
+
+    def test_pagina_siguiente_y_usuario(self):
+        (resultados, siguiente), sql, params = self._buscar(
+            [self._fila(3, 0.5)], usuario='ana', cursor=search.codificar_cursor(0.5, 7), limite=500,
+        )
+        self.assertEqual(params['limite'], search.LIMITE_MAXIMO + 1)
+        self.assertIn('(r.puntaje, r.ticket_cod_ticket) < (%(c_puntaje)s, %(c_cod)s)', sql)
+        self.assertEqual((params['c_puntaje'], params['c_cod']), (0.5, 7))
+        self.assertEqual(params['usuario'], 'ana')
+        self.assertEqual(len(resultados), 1)
+        self.assertIsNone(siguiente)
+
+
+class _QuerysetFalso:
+    """Lo justo de un QuerySet para filters.py: filas agrupadas y filtros aplicados."""
+
+    def __init__(self, filas=()):
+        self.filas = list(filas)
+        self.filtros = []
+
+    def order_by(self, *campos):
+        return self
+
+    def values_list(self, *campos):
+        self.agrupado_por = campos
+        return self
+
+    def annotate(self, **kwargs):
+        return self
+
+    def __iter__(self):
+        return iter(self.filas)
+
+    def filter(self, *args, **kwargs):
+        self.filtros.append((args, kwargs))
+        return self
+
+
+class FacetasTests(SimpleTestCase):
+    # (estado, tipo, asignado_a, n)
+    FILAS = [
+        ('PE', 'Software', 'kevin', 3),
+        ('PE', 'Hardware', None,    2),
+        ('PR', 'Software', 'kevin', 4),
+        ('FN', 'Software', '',      5),
+        ('FN', 'Hardware', 'luis',  1),
+    ]
+
+    def _facetas(self, **selecciones):
+        return filters.calcular_facetas(_QuerysetFalso(self.FILAS), selecciones)
+
+    def test_sin_filtros(self):
+        facetas, total = self._facetas()
+        self.assertEqual(total, 15)
+        self.assertEqual(facetas['estado'], {'PE': 5, 'PR': 4, 'FN': 6})
+        self.assertEqual(facetas['tipo'], {'Software': 12, 'Hardware': 3})
+        self.assertEqual(facetas['asignado_a'], {'kevin': 7, filters.SIN_ASIGNAR: 7, 'luis': 1})
+
+    def test_cada_faceta_ignora_su_filtro(self):
+        facetas, total = self._facetas(estado=['PE'], tipo=['Software'])
+        self.assertEqual(total, 3)
+        # estado respeta tipo=Software pero no estado=PE: siguen todas las pestañas
+        self.assertEqual(facetas['estado'], {'PE': 3, 'PR': 4, 'FN': 5})
+        # tipo respeta estado=PE pero no tipo=Software
+        self.assertEqual(facetas['tipo'], {'Software': 3, 'Hardware': 2})
+        self.assertEqual(facetas['asignado_a'], {'kevin': 3})
+
+    def test_sin_asignar(self):
+        # None y '' cuentan como sin asignar, tanto en el filtro como en la faceta
+        facetas, total = self._facetas(asignado_a=[filters.SIN_ASIGNAR, 'luis'])
+        self.assertEqual(total, 8)
+        self.assertEqual(facetas['estado'], {'PE': 2, 'FN': 6})
+        self.assertEqual(facetas['asignado_a'], {'kevin': 7, filters.SIN_ASIGNAR: 7, 'luis': 1})
+
+    def test_una_sola_consulta_agrupada(self):
+        qs = _QuerysetFalso(self.FILAS)
+        filters.calcular_facetas(qs, {})
+        self.assertEqual(qs.agrupado_por, tuple(filters.DIMENSIONES.values()))
+        self.assertEqual(qs.filtros, [])
+
+    def test_filtrar_dimensiones(self):
+        qs = filters.filtrar_dimensiones(_QuerysetFalso(), {
+            'estado': ['PE', 'PR'], 'tipo': None, 'asignado_a': ['kevin', filters.SIN_ASIGNAR],
+        })
+        self.assertEqual(qs.filtros, [
+            ((), {'ticket_est_ticket__in': ['PE', 'PR']}),
+            ((Q(ticket_asignado_a__in=['kevin']) | Q(ticket_asignado_a__isnull=True) | Q(ticket_asignado_a=''),),
+             {}),
+        ])
+
+    @override_settings(TIME_ZONE='America/Guayaquil')
+    def test_fechas_con_zona_pasan_a_hora_local(self):
+        def desde(valor):
+            (_, filtro), = filters.filtrar_base(_QuerysetFalso(), {'desde': valor}).filtros
+            return filtro['ticket_fec_ticket__gte']
+
+        self.assertEqual(desde('2025-01-01T10:00:00Z'), datetime(2025, 1, 1, 5, 0))
+        self.assertEqual(desde('2025-01-01T10:00:00+02:00'), datetime(2025, 1, 1, 3, 0))
+        self.assertEqual(desde('2025-01-01T10:00:00-05:00'), datetime(2025, 1, 1, 10, 0))
+        self.assertEqual(desde('2025-01-01T10:00:00'), datetime(2025, 1, 1, 10, 0))     # Naive: ya es local
+        self.assertEqual(desde('2025-01-01'), datetime(2025, 1, 1))
+        self.assertEqual(filters.filtrar_base(_QuerysetFalso(), {'desde': 'ayer'}).filtros, [])
+
+    def test_filtrar_dimensiones_sin_selecciones(self):
+        qs = filters.filtrar_dimensiones(_QuerysetFalso(), {})
+        self.assertEqual(qs.filtros, [])
+
+
+class _FilasFalsas:
+    """values_list() de un queryset sobre `instancias`, iterable sync y async."""
+
+    def __init__(self, instancias):
+        self.instancias = instancias
+        self.filtros = []
+
+    def filter(self, *args, **kwargs):
+        self.filtros.append(kwargs)
+        return self
+
+    def all(self):
+        return self
+
+    def order_by(self, *campos):
+        return self
+
+    def values_list(self, *campos):
+        self.filas = [tuple(getattr(i, i._meta.get_field(c).attname) for c in campos) for i in self.instancias]
+        return self
+
+    def __iter__(self):
+        return iter(self.filas)
+
+    async def __aiter__(self):
+        for fila in self.filas:
+            yield fila
+
+
+class LecturaRapidaTests(SimpleTestCase):
+    """filas_tickets / afilas_tickets tienen que dar el mismo JSON que StticketSerializer."""
+
+    def setUp(self):
+        fecha = datetime(2025, 3, 4, 5, 6, 7, 890000)
+        self.tickets = [
+            Stticket(ticket_cod_ticket=7, ticket_id_ticket='TK-7', ticket_asu_ticket='Impresora',
+                     ticket_est_ticket='PE', ticket_fec_ticket=fecha, ticket_tusua_ticket='ana',
+                     ticket_calificacion=4, ticket_ver_ticket=3),
+            Stticket(ticket_cod_ticket=9, ticket_id_ticket='TK-9', ticket_est_ticket='FN',
+                     ticket_fec_ticket=None, ticket_tusua_ticket='luis'),
+        ]
+        self.archivos = [
+            Starchivos(archivo_cod_archivo=1, archivo_cod_ticket_id=7, archivo_nom_archivo='a.png',
+                       archivo_tip_archivo='image/png', archivo_rut_archivo='tickets/7/a.png',
+                       archivo_tam_archivo=2048, archivo_fec_archivo=fecha, archivo_usua_archivo='ana',
+                       archivo_min_archivo='tickets/7/a.min.webp', archivo_prev_archivo=None),
+            Starchivos(archivo_cod_archivo=2, archivo_cod_ticket_id=7, archivo_nom_archivo='b.txt',
+                       archivo_rut_archivo='https://bucket.s3.amazonaws.com/tickets/7/b.txt',
+                       archivo_tam_archivo=None, archivo_fec_archivo=fecha),
+        ]
+        firmada = mock.patch('api.serializers.url_firmada', lambda key, expira=3600: key and f'https://firmada/{key}')
+        firmada.start()
+        self.addCleanup(firmada.stop)
+
+    def _serializer(self, campos):
+        from . import serializers
+
+        def filtrar(archivo_cod_ticket):
+            qs = mock.Mock()
+            qs.order_by.return_value = [a for a in self.archivos if a.archivo_cod_ticket_id == archivo_cod_ticket]
+            return qs
+
+        with mock.patch.object(serializers.Starchivos.objects, 'filter', side_effect=filtrar):
+            datos = serializers.StticketSerializer(self.tickets, many=True, fields=campos).data
+        return json.loads(ORJSONRenderer().render(datos))
+
+    def _rapido(self, campos, asincrono=False):
+        from asgiref.sync import async_to_sync
+        from . import read_models
+
+        with mock.patch.object(read_models, '_consulta_archivos', return_value=_FilasFalsas(self.archivos)
+                               .values_list(*read_models.CAMPOS_ARCHIVO)):
+            if asincrono:
+                filas = async_to_sync(read_models.afilas_tickets)(_FilasFalsas(self.tickets), campos)
+            else:
+                filas = read_models.filas_tickets(_FilasFalsas(self.tickets), campos)
+        return json.loads(ORJSONRenderer().render(filas))
+
+    def test_mismo_json_que_el_serializer(self):
+        from . import read_models
+
+        for fields in ('ticket_id_ticket,ticket_est_ticket', 'ticket_fec_ticket,ticket_calificacion',
+                       'ticket_id_ticket,archivos', 'archivos', ','.join(read_models.CAMPOS_PERMITIDOS)):
+            campos = read_models.parsear_campos({'fields': fields})
+            esperado = self._serializer(campos)
+            self.assertEqual(self._rapido(campos), esperado, fields)
+            self.assertEqual(self._rapido(campos, asincrono=True), esperado, fields)
+
+
+class InstrumentacionTests(SimpleTestCase):
+
+    @staticmethod
+    def _consulta(sql='SELECT 1', segundos=0.0):
+        """Una consulta como la vería el execute_wrapper de una conexión."""
+        def execute(sql, params, many, context):
+            time.sleep(segundos)
+        instrumentation.envoltorio_sql(execute, sql, None, False, {})
+
+    def _request(self, staff=True):
+        request = RequestFactory().get('/api/tickets/')
+        request.user = mock.Mock(username='kevin', is_staff=staff)
+        return request
+
+    def _middleware(self, vista):
+        return instrumentation.RequestTimingMiddleware(vista)
+
+    def test_envoltorio_instalado_una_vez_por_conexion(self):
+        conexion = mock.Mock(execute_wrappers=[])
+        instrumentation.al_crear_conexion(None, conexion)
+        instrumentation.al_crear_conexion(None, conexion)      # Reconexión
+        self.assertEqual(conexion.execute_wrappers, [instrumentation.envoltorio_sql])
+
+    def test_fuera_de_un_request_no_mide(self):
+        self.assertIsNone(instrumentation.medicion_actual())
+        self._consulta()                                         # No falla sin medición
+
+    def test_server_timing_para_staff(self):
+        def vista(request):
+            self._consulta()
+            self._consulta()
+            from django.http import HttpResponse
+            return HttpResponse('ok')
+
+        response = self._middleware(vista)(self._request())
+        self.assertIn('desc="2 consultas"', response['Server-Timing'])
+        self.assertIn('total;dur=', response['Server-Timing'])
+        self.assertFalse(self._middleware(vista)(self._request(staff=False)).has_header('Server-Timing'))
+
+    def test_asgi_cuenta_las_consultas_del_hilo_de_sync_to_async(self):
+        from asgiref.sync import async_to_sync, sync_to_async
+        from django.http import HttpResponse
+
+        hilos = set()
+
+        def consultas():
+            hilos.add(threading.get_ident())
+            self._consulta()
+            self._consulta()
+            self._consulta()
+
+        async def vista(request):
+            await sync_to_async(consultas, thread_sensitive=False)()
+            return HttpResponse('ok')
+
+        response = async_to_sync(self._middleware(vista))(self._request())
+        self.assertNotIn(threading.get_ident(), hilos)
+        self.assertIn('desc="3 consultas"', response['Server-Timing'])
+
+    @override_settings(INSTRUMENTACION_MAX_CONSULTAS=3)
+    def test_warning_n_mas_uno(self):
+        def vista(request):
+            from django.http import HttpResponse
+            self._consulta('SELECT * FROM ticket')
+            for cod in range(5):
+                self._consulta(f'SELECT * FROM starchivos WHERE archivo_cod_ticket = {cod}')
+            return HttpResponse('ok')
+
+        with self.assertLogs('api.timing', 'WARNING') as logs:
+            self._middleware(vista)(self._request(staff=False))
+        self.assertIn('6 consultas SQL (máximo 3)', logs.output[0])
+        self.assertIn('(5x): SELECT * FROM starchivos WHERE archivo_cod_ticket = ?', logs.output[0])
+
+    def test_medir_descuenta_el_sql(self):
+        def vista(request):
+            from django.http import HttpResponse
+            with instrumentation.medir('serializacion'):
+                self._consulta(segundos=0.05)
+            medicion = instrumentation.medicion_actual()
+            self.assertGreaterEqual(medicion.tiempos['db'], 0.05)
+            self.assertLess(medicion.tiempos['serializacion'], 0.04)
+            self.assertEqual(medicion.conteos['serializacion'], 1)
+            return HttpResponse('ok')
+
+        self._middleware(vista)(self._request())
+
+
+class MetricasTests(SimpleTestCase):
+
+    def _metrics(self, ip='127.0.0.1', **headers):
+        from .metrics import metrics_view
+        return metrics_view(RequestFactory().get('/metrics', REMOTE_ADDR=ip, **headers))
+
+    @override_settings(METRICS_TOKEN=None, METRICS_REDES_PERMITIDAS=['127.0.0.1/32', '::1/128', '10.0.0.0/8'])
+    def test_sin_token_solo_redes_permitidas(self):
+        self.assertEqual(self._metrics().status_code, 200)
+        self.assertEqual(self._metrics('::1').status_code, 200)
+        self.assertEqual(self._metrics('10.1.2.3').status_code, 200)
+        self.assertEqual(self._metrics('203.0.113.5').status_code, 403)
+        # X-Forwarded-For no cuenta: lo escribe el cliente
+        self.assertEqual(self._metrics('203.0.113.5', HTTP_X_FORWARDED_FOR='127.0.0.1').status_code, 403)
+        self.assertEqual(self._metrics('no-es-ip').status_code, 403)
+
+    @override_settings(METRICS_TOKEN='secreto', METRICS_REDES_PERMITIDAS=['127.0.0.1/32'])
+    def test_con_token_se_exige_siempre(self):
+        self.assertEqual(self._metrics().status_code, 403)
+        self.assertEqual(self._metrics(HTTP_AUTHORIZATION='Bearer otro').status_code, 403)
+        response = self._metrics('203.0.113.5', HTTP_AUTHORIZATION='Bearer secreto')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'http_request_duration_seconds', response.content)
+
+    def test_conexiones_ws_sin_etiqueta_de_usuario(self):
+        from .metrics import WS_CONEXIONES
+
+        antes = REGISTRY.get_sample_value('ws_conexiones_abiertas') or 0
+        WS_CONEXIONES.inc()
+        self.addCleanup(WS_CONEXIONES.dec)
+        self.assertEqual(REGISTRY.get_sample_value('ws_conexiones_abiertas'), antes + 1)
+        self.assertEqual(WS_CONEXIONES._labelnames, ())
+
+
+@override_settings(REPLICA_VENTANA_SEGUNDOS=10)
+class ReplicaTests(SimpleTestCase):
+
+    def setUp(self):
+        con_replica = mock.patch.object(db_router, 'hay_replica', return_value=True)
+        con_replica.start()
+        self.addCleanup(con_replica.stop)
+        self.router = db_router.ReplicaRouter()
+
+    def _lectura(self):
+        return self.router.db_for_read(Stticket)
+
+    def test_lecturas_a_la_replica_solo_en_vistas_marcadas(self):
+        self.assertIsNone(self._lectura())
+        with db_router.en_replica():
+            self.assertEqual(self._lectura(), db_router.ALIAS_REPLICA)
+        self.assertEqual(db_router.lectura_replica(self._lectura)(), db_router.ALIAS_REPLICA)
+
+    def test_sin_replica_configurada(self):
+        with mock.patch.object(db_router, 'hay_replica', return_value=False), db_router.en_replica():
+            self.assertIsNone(self._lectura())
+
+    def test_escrituras_siempre_a_la_primaria(self):
+        with db_router.en_replica():
+            self.assertEqual(self.router.db_for_write(Stticket), 'default')
+        self.assertTrue(self.router.allow_migrate('default', 'api'))
+        self.assertFalse(self.router.allow_migrate(db_router.ALIAS_REPLICA, 'api'))
+
+    def test_transaccion_fija_la_primaria(self):
+        from django.db import connections
+
+        with db_router.en_replica(), mock.patch.object(connections['default'], 'in_atomic_block', True):
+            self.assertEqual(self._lectura(), 'default')
+
+    def _pasar(self, request, status=200, asincrono=False):
+        """Request por ReplicaMiddleware; devuelve (response, base de una lectura de la vista)."""
+        from asgiref.sync import async_to_sync
+        from django.http import HttpResponse
+
+        leida = []
+
+        def vista(request):
+            with db_router.en_replica():
+                leida.append(self._lectura())
+            return HttpResponse(status=status)
+
+        async def avista(request):
+            return vista(request)
+
+        if asincrono:
+            response = async_to_sync(db_router.ReplicaMiddleware(avista))(request)
+        else:
+            response = db_router.ReplicaMiddleware(vista)(request)
+        return response, leida[0]
+
+    def test_escritura_exitosa_deja_la_cookie(self):
+        for asincrono in (False, True):
+            response, _ = self._pasar(RequestFactory().post('/api/tickets/'), status=201, asincrono=asincrono)
+            cookie = response.cookies[db_router.COOKIE_ESCRITURA]
+            self.assertAlmostEqual(float(cookie.value), time.time(), delta=5)
+            self.assertEqual(cookie['max-age'], 10)
+            self.assertTrue(cookie['httponly'])
+
+            response, _ = self._pasar(RequestFactory().post('/api/tickets/'), status=400, asincrono=asincrono)
+            self.assertNotIn(db_router.COOKIE_ESCRITURA, response.cookies)
+            response, _ = self._pasar(RequestFactory().get('/api/tickets/'), asincrono=asincrono)
+            self.assertNotIn(db_router.COOKIE_ESCRITURA, response.cookies)
+
+    def test_lee_sus_escrituras(self):
+        def get(ultima):
+            request = RequestFactory().get('/api/admin/tickets/')
+            request.COOKIES[db_router.COOKIE_ESCRITURA] = ultima
+            return request
+
+        for asincrono in (False, True):
+            self.assertEqual(self._pasar(get(f'{time.time() - 2:.3f}'), asincrono=asincrono)[1], 'default')
+            self.assertEqual(self._pasar(get(f'{time.time() - 60:.3f}'), asincrono=asincrono)[1],
+                             db_router.ALIAS_REPLICA)
+            self.assertEqual(self._pasar(get('basura'), asincrono=asincrono)[1], db_router.ALIAS_REPLICA)
+        # Fuera del request ya no queda fijado
+        with db_router.en_replica():
+            self.assertEqual(self._lectura(), db_router.ALIAS_REPLICA)
+
+
+class VistasAsyncTests(SimpleTestCase):
+    """Las vistas async responden lo mismo que las DRF y caen a ellas fuera del caso común."""
+
+    def _usuario(self, rol='SISTEMAS_ADMIN'):
+        from .authentication import VirtualUser
+        return VirtualUser({'username': 'kevin', 'rol_nombre': rol})
+
+    @staticmethod
+    def _cookie(rol='SISTEMAS_ADMIN'):
+        import jwt
+        from django.conf import settings
+        return jwt.encode({'username': 'kevin', 'rol_nombre': rol}, settings.SECRET_KEY, algorithm='HS256')
+
+    def _async(self, vista, ruta, rol='SISTEMAS_ADMIN', **extra):
+        from asgiref.sync import async_to_sync
+
+        request = RequestFactory().get(ruta, **extra)
+        request.COOKIES['chatbot-auth'] = self._cookie(rol)
+        return async_to_sync(vista)(request)
+
+    def _sync(self, vista, ruta, rol='SISTEMAS_ADMIN', **extra):
+        from rest_framework.test import APIRequestFactory, force_authenticate
+
+        request = APIRequestFactory().get(ruta, **extra)
+        force_authenticate(request, user=self._usuario(rol))
+        response = vista(request)
+        response.render()
+        return response
+
+    def _comparar(self, vista_async, vista_sync, ruta, **kwargs):
+        a, s = self._async(vista_async, ruta, **kwargs), self._sync(vista_sync, ruta, **kwargs)
+        self.assertEqual(a.status_code, s.status_code, ruta)
+        self.assertEqual(a.content, s.content, ruta)
+        self.assertEqual(a.get('ETag'), s.get('ETag'), ruta)
+        return a
+
+    def test_admins_igual_que_drf(self):
+        from . import async_views, views
+
+        inst = Instantanea(1, [{'username': 'kevin', 'nombreCompleto': 'Kevin Santana'}], [])
+        with mock.patch.object(views.directorio, 'instantanea', return_value=inst):
+            self._comparar(async_views.admin_list, views.AdminListView.as_view(), '/api/admins/')
+            response = self._comparar(async_views.admin_list, views.AdminListView.as_view(), '/api/admins/',
+                                      HTTP_IF_NONE_MATCH=inst.etag_admins)
+        self.assertEqual(response.status_code, 304)
+
+    def test_sonido_igual_que_drf(self):
+        from . import async_views, views
+        from .models import Stsonido
+
+        registro = Stsonido(sonido_usuario='kevin', sonido_rut_sonido='sonidos/kevin.mp3', sonido_for_sonido='mp3',
+                            sonido_tam_sonido=1234, sonido_ver_sonido=2)
+        for valor in (None, registro):
+            objetos = mock.Mock()
+            objetos.filter.return_value.first.return_value = valor
+            objetos.filter.return_value.afirst = mock.AsyncMock(return_value=valor)
+            with mock.patch.object(Stsonido, 'objects', objetos), \
+                    mock.patch.object(sonidos, 'almacen', return_value=mock.Mock(url_publica=lambda k: f'/s/{k}')):
+                self._comparar(async_views.check_notification_sound, views.CheckNotificationSoundView.as_view(),
+                               '/api/notifications/sounds/check/')
+
+    def test_listas_de_tickets_igual_que_drf(self):
+        from . import async_views, views
+
+        tickets = [_ticket(7, 'Impresora', 'No imprime'), _ticket(9, 'Correo', 'No llega', estado='FN')]
+        lista_sync = views.TicketViewSet.as_view({'get': 'list', 'post': 'create'})
+        casos = [
+            (async_views.admin_ticket_list, views.AdminTicketListView.as_view(), 'SISTEMAS_ADMIN'),
+            (async_views.admin_ticket_list, views.AdminTicketListView.as_view(), 'USUARIO'),     # 403
+            (async_views.ticket_list, lista_sync, 'SISTEMAS_ADMIN'),
+            (async_views.ticket_list, lista_sync, 'USUARIO'),
+        ]
+        for vista_async, vista_sync, rol in casos:
+            filtros = []
+            for vista in (vista_async, vista_sync):
+                qs = _FilasFalsas(tickets)
+                with mock.patch.object(Stticket, 'objects', qs):
+                    (self._async if vista is vista_async else self._sync)(
+                        vista, '/api/tickets/?fields=ticket_id_ticket,ticket_est_ticket', rol=rol)
+                filtros.append(qs.filtros)
+            self.assertEqual(filtros[0], filtros[1], rol)
+            with mock.patch.object(Stticket, 'objects', _FilasFalsas(tickets)):
+                self._comparar(vista_async, vista_sync, '/api/tickets/?fields=ticket_id_ticket,ticket_est_ticket',
+                               rol=rol)
+
+    def test_respaldo_a_la_vista_sync(self):
+        from asgiref.sync import async_to_sync
+        from django.http import HttpResponse
+        from . import async_views
+
+        vista_sync = mock.Mock(return_value=HttpResponse('sync'))
+        vista_async = mock.AsyncMock(return_value=HttpResponse('async'))
+        vista = async_views.vista_async(vista_sync, respaldar_si=async_views._con_paginacion)(vista_async)
+
+        self.assertEqual(self._async(vista, '/api/tickets/').content, b'async')
+        self.assertEqual(self._async(vista, '/api/tickets/?fields=ticket_id_ticket').content, b'async')
+
+        factory = RequestFactory()
+        sin_cookie = factory.get('/api/tickets/')
+        cookie_invalida = factory.get('/api/tickets/')
+        cookie_invalida.COOKIES['chatbot-auth'] = 'no-es-un-jwt'
+        post = factory.post('/api/tickets/')
+        post.COOKIES['chatbot-auth'] = self._cookie()          # POST /api/tickets/ crea: siempre DRF
+        for request in (sin_cookie, cookie_invalida, post):
+            self.assertEqual(async_to_sync(vista)(request).content, b'sync')
+        for ruta in ('/api/tickets/?page=2', '/api/tickets/?page_size=20'):
+            self.assertEqual(self._async(vista, ruta).content, b'sync', ruta)
+        self.assertEqual(vista_async.await_count, 2)
+        self.assertEqual(vista_sync.call_count, 5)
+
+
+@override_settings(
+    AWS_ACCESS_KEY_ID='testing',
+    AWS_SECRET_ACCESS_KEY='testing',
+    AWS_STORAGE_BUCKET_NAME=BUCKET,
+    AWS_S3_REGION_NAME='us-east-1',
+    AWS_S3_CUSTOM_DOMAIN=f'{BUCKET}.s3.amazonaws.com',
+    ALMACEN='s3',
+    UPLOAD_MULTIPART_UMBRAL=6 * MB,
+    UPLOAD_PARTE_TAMANO=5 * MB,
+    UPLOAD_MAX_TAMANO=50 * MB,
+)
+@unittest.skipUnless(mock_aws, 'falta moto (pip install -r requirements-test.txt)')
+class SubidaAdjuntosTests(SimpleTestCase):
+
+    def setUp(self):
+        self.mock = mock_aws()
+        self.mock.start()
+        storage._cliente = storage._almacen = None
+        self.s3 = boto3.client('s3', region_name='us-east-1')
+        self.s3.create_bucket(Bucket=BUCKET)
+
+    def tearDown(self):
+        storage._cliente = storage._almacen = None
+        self.mock.stop()
+
+    def _lote(self, *archivos):
+        normalizados = [uploads.normalizar_archivo(a) for a in archivos]
+        return uploads.presignar_lote(7, normalizados, 'maria.lopez')
+
+    def _subir_parte(self, parte, datos):
+        respuesta = requests.put(parte['url'], data=datos)
+        self.assertEqual(respuesta.status_code, 200)
+        return {'part_number': parte['part_number'], 'etag': respuesta.headers['ETag']}
+
+    def test_lote_separa_simple_y_multipart(self):
+        chico, grande = self._lote(
+            {'filename': 'captura.png', 'filetype': 'image/png', 'filesize': 2048},
+            {'filename': 'grabacion.mp4', 'filetype': 'video/mp4', 'filesize': 11 * MB},
+        )
+        self.assertEqual(chico['modo'], 'simple')
+        self.assertIn('upload_url', chico)
+        self.assertEqual(grande['modo'], 'multipart')
+        self.assertEqual(grande['part_size'], 5 * MB)
+        self.assertEqual([p['part_number'] for p in grande['parts']], [1, 2, 3])
+        for entrada in (chico, grande):
+            self.assertTrue(entrada['s3_key'].startswith('chatbot-uploads/tickets/7/'))
+
+    def test_put_simple_prefirmado(self):
+        (entrada,) = self._lote({'filename': 'log.txt', 'filetype': 'text/plain', 'filesize': 5})
+        self.assertEqual(entrada['headers']['x-amz-meta-uploaded-by'], 'maria.lopez')
+        respuesta = requests.put(entrada['upload_url'], data=b'hola!',
+                                 headers={'Content-Type': 'text/plain', **entrada['headers']})
+        self.assertEqual(respuesta.status_code, 200)
+        objeto = self.s3.get_object(Bucket=BUCKET, Key=entrada['s3_key'])
+        self.assertEqual(objeto['Body'].read(), b'hola!')
+        self.assertEqual(objeto['Metadata']['uploaded-by'], 'maria.lopez')
+
+    def test_nombre_con_acentos(self):
+        from urllib.parse import unquote
+
+        tam = 11 * MB
+        simple, multipart = self._lote(
+            {'filename': 'acción ñandú.png', 'filetype': 'image/png', 'filesize': 5},
+            {'filename': 'grabación.mp4', 'filetype': 'video/mp4', 'filesize': tam},
+        )
+        self.assertEqual(simple['filename'], 'acción ñandú.png')
+        self.assertEqual(simple['headers']['x-amz-meta-original-filename'], 'acci%C3%B3n%20%C3%B1and%C3%BA.png')
+        respuesta = requests.put(simple['upload_url'], data=b'hola!',
+                                 headers={'Content-Type': 'image/png', **simple['headers']})
+        self.assertEqual(respuesta.status_code, 200)
+        objeto = self.s3.head_object(Bucket=BUCKET, Key=simple['s3_key'])
+        self.assertEqual(unquote(objeto['Metadata']['original-filename']), 'acción ñandú.png')
+        self.assertEqual(multipart['modo'], 'multipart')
+
+    def test_error_de_botocore_es_de_la_solicitud(self):
+        # Un valor que botocore no puede firmar (header no ASCII) es un 400 con el nombre, no un 500
+        with self.assertRaisesRegex(uploads.ErrorSubida, 'captura.png'):
+            uploads.presignar_lote(7, [uploads.normalizar_archivo(
+                {'filename': 'captura.png', 'filetype': 'image/png', 'filesize': 5}
+            )], 'josé.pérez')
+
+    def test_multipart_reanudar_y_completar(self):
+        tam = 11 * MB
+        contenido = bytes(range(256)) * (tam // 256) + b'x' * (tam % 256)
+        (entrada,) = self._lote({'filename': 'logs.zip', 'filetype': 'application/zip', 'filesize': tam})
+        parte = entrada['part_size']
+
+        # Se "corta" la subida: solo llegan las partes 1 y 3
+        self._subir_parte(entrada['parts'][0], contenido[:parte])
+        self._subir_parte(entrada['parts'][2], contenido[2 * parte:])
+
+        estado = uploads.partes_pendientes(entrada['s3_key'], entrada['upload_id'], tam)
+        self.assertEqual(sorted(p['part_number'] for p in estado['uploaded']), [1, 3])
+        self.assertEqual([p['part_number'] for p in estado['parts']], [2])
+
+        self._subir_parte(estado['parts'][0], contenido[parte:2 * parte])
+        subidas = uploads.partes_subidas(entrada['s3_key'], entrada['upload_id'])
+        uploads.completar_multipart(entrada['s3_key'], entrada['upload_id'], list(reversed(subidas)))
+
+        objeto = self.s3.get_object(Bucket=BUCKET, Key=entrada['s3_key'])
+        self.assertEqual(objeto['ContentLength'], tam)
+        self.assertEqual(objeto['Body'].read(), contenido)
+
+    def test_abortar_multipart(self):
+        (entrada,) = self._lote({'filename': 'video.mp4', 'filetype': 'video/mp4', 'filesize': 7 * MB})
+        uploads.abortar_multipart(entrada['s3_key'], entrada['upload_id'])
+        self.assertEqual(self.s3.list_multipart_uploads(Bucket=BUCKET).get('Uploads', []), [])
+        # Reanudar una subida abortada: S3 responde NoSuchUpload
+        with self.assertRaises(ClientError):
+            uploads.partes_pendientes(entrada['s3_key'], entrada['upload_id'], 7 * MB)
+
+    def test_validaciones(self):
+        with self.assertRaises(uploads.ErrorSubida):
+            uploads.validar_clave(7, 'chatbot-uploads/tickets/8/otro.zip')
+        with self.assertRaises(uploads.ErrorSubida):
+            uploads.validar_clave(7, 'chatbot-uploads/tickets/7/../8/otro.zip')
+        with self.assertRaises(uploads.ErrorSubida):
+            uploads.normalizar_archivo({'filename': 'enorme.iso', 'filesize': 51 * MB})
+        with self.assertRaises(uploads.ErrorSubida):
+            uploads.normalizar_archivo({'filename': 'vacio.txt', 'filesize': 0})
+
+    def test_tamano_parte_respeta_limite_de_partes(self):
+        self.assertEqual(uploads.tamano_parte(20 * MB), 5 * MB)
+        enorme = 100 * 1024 * MB
+        self.assertLessEqual(-(-enorme // uploads.tamano_parte(enorme)), uploads.PARTES_MAXIMAS)
+
+    def test_verificar_objetos_usa_datos_reales_de_s3(self):
+        self.s3.put_object(Bucket=BUCKET, Key='chatbot-uploads/tickets/7/a.png', Body=b'x' * 300,
+                           ContentType='image/png')
+        objetos = uploads.verificar_objetos([
+            'chatbot-uploads/tickets/7/a.png',
+            'chatbot-uploads/tickets/7/no-existe.png',
+        ])
+        self.assertEqual(objetos['chatbot-uploads/tickets/7/a.png'], {'size': 300, 'content_type': 'image/png'})
+        self.assertIsNone(objetos['chatbot-uploads/tickets/7/no-existe.png'])
+
+    def test_lote_con_sha256_usa_clave_de_blob(self):
+        contenido = b'captura repetida'
+        sha = hashlib.sha256(contenido).hexdigest()
+        nuevo, existente = [
+            uploads.presignar_lote(7, [uploads.normalizar_archivo(
+                {'filename': 'captura.png', 'filetype': 'image/png', 'filesize': len(contenido), 'sha256': sha}
+            )], 'maria.lopez', reutilizables)[0]
+            for reutilizables in (set(), {sha})
+        ]
+        self.assertEqual(nuevo['s3_key'], blobs.clave_blob(sha))
+        self.assertEqual(nuevo['headers']['x-amz-checksum-sha256'], blobs.sha_base64(sha))
+        self.assertEqual(existente['modo'], 'existente')
+        self.assertNotIn('upload_url', existente)
+
+        respuesta = requests.put(nuevo['upload_url'], data=contenido,
+                                 headers={'Content-Type': 'image/png', **nuevo['headers']})
+        self.assertEqual(respuesta.status_code, 200)
+        objeto = blobs.verificar_blob(sha)
+        self.assertEqual((objeto['size'], objeto['uploaded_by']), (len(contenido), 'maria.lopez'))
+
+    def test_verificar_blob_rechaza_contenido_distinto(self):
+        sha = hashlib.sha256(b'original').hexdigest()
+        self.assertIsNone(blobs.verificar_blob(sha))
+        self.s3.put_object(Bucket=BUCKET, Key=blobs.clave_blob(sha), Body=b'otra cosa')
+        with self.assertRaises(uploads.ErrorSubida):
+            blobs.verificar_blob(sha)
+
+    def test_sha256_solo_en_subidas_simples(self):
+        sha = 'ab' * 32
+        grande = uploads.normalizar_archivo({'filename': 'logs.zip', 'filesize': 7 * MB, 'sha256': sha})
+        self.assertIsNone(grande['sha256'])
+        with self.assertRaises(uploads.ErrorSubida):
+            uploads.normalizar_archivo({'filename': 'a.png', 'filesize': 10, 'sha256': 'no-es-hex'})
+
+    def test_zip_en_streaming(self):
+        grande = bytes(range(256)) * (3 * MB // 256)
+        self.s3.put_object(Bucket=BUCKET, Key='chatbot-uploads/tickets/7/a.log', Body=grande)
+        self.s3.put_object(Bucket=BUCKET, Key='chatbot-uploads/tickets/7/b.log', Body=b'segundo')
+        archivos = [
+            Starchivos(archivo_cod_archivo=1, archivo_nom_archivo='error.log', archivo_rut_archivo='chatbot-uploads/tickets/7/a.log'),
+            Starchivos(archivo_cod_archivo=2, archivo_nom_archivo='error.log', archivo_rut_archivo='chatbot-uploads/tickets/7/b.log'),
+            Starchivos(archivo_cod_archivo=3, archivo_nom_archivo='borrado.png', archivo_rut_archivo='chatbot-uploads/tickets/7/no-existe.png'),
+        ]
+        partes = list(generar_zip(archivos))
+        # Sale en varios pedazos, no en un solo bloque al final
+        self.assertGreater(len(partes), 3)
+
+        zf = zipfile.ZipFile(io.BytesIO(b''.join(partes)))
+        self.assertIsNone(zf.testzip())
+        self.assertEqual(zf.namelist(), ['error.log', 'error (2).log', 'borrado.png', '_ERRORES.txt'])
+        self.assertEqual(zf.read('error.log'), grande)
+        self.assertEqual(zf.read('error (2).log'), b'segundo')
+        self.assertIn('borrado.png', zf.read('_ERRORES.txt').decode())
+
+    def test_borrado_por_lote_y_metricas_por_operacion(self):
+        claves = [f'notification_sounds/ana/custom_notification.{e}' for e in ('mp3', 'wav')]
+        for clave in claves:
+            self.s3.put_object(Bucket=BUCKET, Key=clave, Body=b'x')
+        etiquetas = {'backend': 's3', 'operacion': 'delete_batch', 'resultado': 'ok'}
+        antes = REGISTRY.get_sample_value('storage_operation_seconds_count', etiquetas) or 0
+
+        self.assertEqual(storage.almacen().borrar_varios(claves + ['no/existe.mp3']), [])
+        self.assertEqual(self.s3.list_objects_v2(Bucket=BUCKET).get('KeyCount'), 0)
+        self.assertEqual(REGISTRY.get_sample_value('storage_operation_seconds_count', etiquetas), antes + 1)
+
+    def test_cliente_configurado(self):
+        config = storage.cliente_s3().meta.config
+        self.assertEqual(config.retries['mode'], 'adaptive')
+        self.assertIsNotNone(config.connect_timeout)
+
+    def test_sonido_clave_y_etag(self):
+        clave = sonidos.clave_nueva('ana', sonidos.formato('alerta.OGG'))
+        self.assertEqual(sonidos.validar_clave('ana', clave), 'ogg')
+        for invalida in ('notification_sounds/otro/custom_notification.mp3',
+                         'notification_sounds/ana/../x/custom_notification.mp3',
+                         'notification_sounds/ana/custom_notification.exe'):
+            with self.assertRaises(sonidos.ErrorSonido):
+                sonidos.validar_clave('ana', invalida)
+
+        cuerpo, etag = sonidos.respuesta_check('ana', None)
+        self.assertIsNone(cuerpo['sound'])
+        self.assertEqual(sonidos.respuesta_check('ana', None)[1], etag)
+        self.assertTrue(http_cache.coincide_etag(f'W/"otro", {etag}', etag))
+        self.assertFalse(http_cache.coincide_etag(None, etag))
+
+
+class DerivadosImagenTests(SimpleTestCase):
+
+    @staticmethod
+    def _bytes(imagen, formato, **kwargs):
+        salida = io.BytesIO()
+        imagen.save(salida, formato, **kwargs)
+        return salida.getvalue()
+
+    @staticmethod
+    def _abrir(datos):
+        from PIL import Image
+        imagen = Image.open(io.BytesIO(datos))
+        imagen.load()
+        return imagen
+
+    def test_tamanos_y_webp(self):
+        from PIL import Image
+
+        derivados = image_processing.generar_derivados(self._bytes(Image.new('RGB', (2000, 1000), 'red'), 'PNG'))
+        self.assertEqual((derivados['ancho'], derivados['alto']), (2000, 1000))
+        miniatura, preview = self._abrir(derivados['miniatura']), self._abrir(derivados['preview'])
+        self.assertEqual((miniatura.format, miniatura.size), ('WEBP', (256, 128)))
+        self.assertEqual((preview.format, preview.size), ('WEBP', (1280, 640)))
+        # Una imagen chica no se agranda
+        chica = image_processing.generar_derivados(self._bytes(Image.new('RGB', (40, 30)), 'PNG'))
+        self.assertEqual(self._abrir(chica['preview']).size, (40, 30))
+
+    def test_rotacion_exif(self):
+        from PIL import Image
+
+        exif = Image.Exif()
+        exif[0x0112] = 6                       # Orientation: girar 90° (foto de celular en vertical)
+        datos = self._bytes(Image.new('RGB', (400, 200), 'white'), 'JPEG', exif=exif)
+        derivados = image_processing.generar_derivados(datos)
+        self.assertEqual((derivados['ancho'], derivados['alto']), (200, 400))
+        self.assertEqual(self._abrir(derivados['miniatura']).size, (128, 256))
+
+    def test_modos_de_color(self):
+        from PIL import Image
+
+        paleta = Image.new('P', (20, 20), 1)
+        paleta.putpalette([0, 0, 0, 255, 0, 0] + [0] * 762)
+        paleta.paste(0, (0, 0, 10, 20))        # Mitad con el índice 0 (transparente si se marca)
+        casos = [
+            (Image.new('RGBA', (20, 20), (255, 0, 0, 0)), 'PNG', {}, 'RGBA'),
+            (paleta, 'PNG', {'transparency': 0}, 'RGBA'),
+            (paleta, 'PNG', {}, 'RGB'),
+            (Image.new('L', (20, 20), 128), 'PNG', {}, 'RGB'),
+            (Image.new('CMYK', (20, 20), (0, 255, 255, 0)), 'JPEG', {}, 'RGB'),
+        ]
+        for imagen, formato, opciones, modo in casos:
+            derivados = image_processing.generar_derivados(self._bytes(imagen, formato, **opciones))
+            self.assertEqual(self._abrir(derivados['miniatura']).mode, modo, (imagen.mode, opciones))
+
+    def test_primer_frame_de_gif(self):
+        from PIL import Image
+
+        rojo, azul = Image.new('RGB', (30, 30), (255, 0, 0)), Image.new('RGB', (30, 30), (0, 0, 255))
+        datos = self._bytes(rojo, 'GIF', save_all=True, append_images=[azul], duration=100, loop=0)
+        r, g, b = self._abrir(image_processing.generar_derivados(datos)['miniatura']).convert('RGB').getpixel((15, 15))
+        self.assertGreater(r, 200)
+        self.assertLess(b, 50)
+
+    def test_no_es_imagen(self):
+        with self.assertRaises(Exception):
+            image_processing.generar_derivados(b'%PDF-1.4 no es una imagen')
+
+    def test_es_imagen(self):
+        from . import thumbnails
+
+        def archivo(tipo=None, nombre=None, ruta=None):
+            return Starchivos(archivo_tip_archivo=tipo, archivo_nom_archivo=nombre, archivo_rut_archivo=ruta)
+
+        for adjunto in (archivo('png'), archivo('JPEG'), archivo(nombre='Foto.JPG'),
+                        archivo(ruta='chatbot-uploads/tickets/8/x.webp'), archivo('octet-stream', 'scan.tiff')):
+            self.assertTrue(thumbnails.es_imagen(adjunto), vars(adjunto))
+        for adjunto in (archivo('pdf', 'informe.pdf'), archivo(nombre='README'), archivo('svg+xml', 'logo.svg'),
+                        archivo()):
+            self.assertFalse(thumbnails.es_imagen(adjunto), vars(adjunto))
+
+
+@override_settings(ALMACEN='local', ALMACEN_LOCAL_URL='/api/almacen/', UPLOAD_MAX_TAMANO=1 * MB)
+class AlmacenLocalTests(SimpleTestCase):
+
+    def setUp(self):
+        self.raiz = tempfile.mkdtemp()
+        storage._almacen = None
+        self.override = override_settings(ALMACEN_LOCAL_RAIZ=self.raiz)
+        self.override.enable()
+        self.local = storage.almacen()
+        self.factory = RequestFactory()
+
+    def tearDown(self):
+        self.override.disable()
+        storage._almacen = None
+        shutil.rmtree(self.raiz, ignore_errors=True)
+
+    def _llamar(self, metodo, url, **extra):
+        partes = urlsplit(url)
+        clave = partes.path[len('/api/almacen/'):]
+        request = getattr(self.factory, metodo)(f'{partes.path}?{partes.query}', **extra)
+        return storage.vista_almacen_local(request, clave=clave)
+
+    def _subir(self, clave, contenido, **kwargs):
+        subida = self.local.url_subida(clave, 'text/plain', metadata={'uploaded-by': 'maria.lopez'}, **kwargs)
+        return self._llamar('put', subida['upload_url'], data=contenido, content_type='text/plain')
+
+    def test_subir_y_descargar(self):
+        self.assertEqual(self._subir('chatbot-uploads/tickets/7/log.txt', b'0123456789').status_code, 200)
+        info = self.local.info('chatbot-uploads/tickets/7/log.txt')
+        self.assertEqual((info['size'], info['content_type']), (10, 'text/plain'))
+        self.assertEqual(info['metadata'], {'uploaded-by': 'maria.lopez'})
+
+        respuesta = self._llamar('get', self.local.url_descarga('chatbot-uploads/tickets/7/log.txt'))
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(b''.join(respuesta.streaming_content), b'0123456789')
+        self.assertEqual(respuesta['Accept-Ranges'], 'bytes')
+
+    def test_range_e_if_modified_since(self):
+        self._subir('a/b.txt', b'0123456789')
+        url = self.local.url_descarga('a/b.txt')
+
+        parcial = self._llamar('get', url, HTTP_RANGE='bytes=2-5')
+        self.assertEqual(parcial.status_code, 206)
+        self.assertEqual(parcial['Content-Range'], 'bytes 2-5/10')
+        self.assertEqual(b''.join(parcial.streaming_content), b'2345')
+
+        final = self._llamar('get', url, HTTP_RANGE='bytes=-3')
+        self.assertEqual(b''.join(final.streaming_content), b'789')
+        self.assertEqual(self._llamar('get', url, HTTP_RANGE='bytes=50-').status_code, 416)
+
+        no_cambio = self._llamar('get', url, HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60))
+        self.assertEqual(no_cambio.status_code, 304)
+
+    def test_firma_y_vencimiento(self):
+        self._subir('a/b.txt', b'hola')
+        url = self.local.url_descarga('a/b.txt')
+        self.assertEqual(self._llamar('get', url.replace('a/b.txt', 'a/c.txt')).status_code, 403)
+        self.assertEqual(self._llamar('get', self.local.url_descarga('a/b.txt', vence=int(time.time()) - 1)).status_code, 403)
+
+        # El tipo va firmado: cambiarlo en la URL invalida el PUT
+        subida = self.local.url_subida('a/d.txt', 'text/plain')['upload_url']
+        self.assertEqual(self._llamar('put', subida.replace('text%2Fplain', 'text%2Fhtml'), data=b'x',
+                                      content_type='text/html').status_code, 403)
+        with self.assertRaises(Exception):
+            self.local.ruta('../fuera.txt')
+
+    def test_checksum_y_tamano_maximo(self):
+        sha = hashlib.sha256(b'contenido').hexdigest()
+        self.assertEqual(self._subir('blobs/x', b'otra cosa', sha256_b64=blobs.sha_base64(sha)).status_code, 400)
+        self.assertIsNone(self.local.info('blobs/x'))
+        self.assertEqual(self._subir('blobs/x', b'contenido', sha256_b64=blobs.sha_base64(sha)).status_code, 200)
+        self.assertEqual(self.local.info('blobs/x')['sha256_b64'], blobs.sha_base64(sha))
+        self.assertEqual(self._subir('grande.bin', b'x' * (MB + 1)).status_code, 413)
+
+
+class DirectorioTests(SimpleTestCase):
+    def setUp(self):
+        self.inst = Instantanea(1, [
+            {'username': 'admin01', 'email': None, 'nombreCompleto': 'Ana Pérez', 'rol': 'admin'},
+        ], [
+            {'username': 'jperez', 'email': None, 'nombreCompleto': 'Juan Carlos Pérez', 'rol': 'usuario'},
+            {'username': 'ana.m', 'email': None, 'nombreCompleto': 'Ánä María', 'rol': 'usuario'},
+        ])
+
+    def _buscar(self, *args, **kwargs):
+        return [e['username'] for e in self.inst.buscar(*args, **kwargs)]
+
+    def test_prefijo_sin_tildes_en_username_y_nombre(self):
+        self.assertEqual(self._buscar('PER'), ['admin01', 'jperez'])
+        self.assertEqual(self._buscar('carlos p', tipo='usuarios'), ['jperez'])
+        self.assertEqual(self._buscar('ana'), ['ana.m', 'admin01'])
+        self.assertEqual(self._buscar('ana', tipo='admins'), ['admin01'])
+        self.assertEqual(self._buscar('ana', limite=1), ['ana.m'])
+        self.assertEqual(self._buscar('  '), [])
+
+    def test_etag_por_contenido(self):
+        otra = Instantanea(2, self.inst.admins, self.inst.usuarios)
+        self.assertEqual(otra.etag_usuarios, self.inst.etag_usuarios)
+        self.assertNotEqual(self.inst.etag_admins, self.inst.etag_usuarios)
+
+
+@override_settings(COMPRESION_MIN_BYTES=100, COMPRESION_NIVEL_GZIP=6, COMPRESION_CALIDAD_BR=5)
+class RespuestasTests(SimpleTestCase):
+    def test_orjson_igual_que_drf(self):
+        from datetime import datetime, timezone
+        from decimal import Decimal
+
+        from rest_framework.renderers import JSONRenderer
+
+        data = {'fecha': datetime(2025, 1, 2, 3, 4, 5, 120000, tzinfo=timezone.utc), 'monto': Decimal('1.50'),
+                'lista': [1, 'ñ', None], 'naive': datetime(2025, 1, 2)}
+        self.assertEqual(json.loads(ORJSONRenderer().render(data)), json.loads(JSONRenderer().render(data)))
+        self.assertEqual(ORJSONParser().parse(io.BytesIO(b'{"a": [1, 2]}')), {'a': [1, 2]})
+
+    def _middleware(self, respuesta, accept_encoding='gzip'):
+        mw = compression.CompresionMiddleware(lambda request: respuesta)
+        return mw(RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept_encoding))
+
+    def test_gzip_con_umbral_y_tipos(self):
+        from django.http import HttpResponse
+
+        cuerpo = b'{"x": "' + b'a' * 5000 + b'"}'
+        r = self._middleware(HttpResponse(cuerpo, content_type='application/json'))
+        self.assertEqual(r['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(r.content), cuerpo)
+        self.assertIn('Accept-Encoding', r['Vary'])
+
+        chica = self._middleware(HttpResponse(b'{"x": 1}', content_type='application/json'))
+        self.assertFalse(chica.has_header('Content-Encoding'))
+        png = self._middleware(HttpResponse(b'0' * 5000, content_type='image/png'))
+        self.assertFalse(png.has_header('Content-Encoding'))
+        sin_gzip = self._middleware(HttpResponse(cuerpo, content_type='application/json'), 'gzip;q=0')
+        self.assertFalse(sin_gzip.has_header('Content-Encoding'))
+
+    def test_archivos_sin_comprimir(self):
+        from django.http import FileResponse
+
+        contenido = b'fecha;ticket;estado\n' * 500
+        r = self._middleware(FileResponse(io.BytesIO(contenido), content_type='text/csv'))
+        self.assertFalse(r.has_header('Content-Encoding'))
+        self.assertEqual(r['Content-Length'], str(len(contenido)))
+        self.assertEqual(b''.join(r.streaming_content), contenido)
+
+    def test_streaming_por_bloques(self):
+        from django.http import StreamingHttpResponse
+
+        bloques = [b'linea %d\n' % i * 50 for i in range(20)]
+        r = self._middleware(StreamingHttpResponse(iter(bloques), content_type='text/plain'))
+        self.assertEqual(r['Content-Encoding'], 'gzip')
+        self.assertFalse(r.has_header('Content-Length'))
+        partes = list(r.streaming_content)
+        self.assertGreater(len(partes), 1)
+        self.assertEqual(gzip.decompress(b''.join(partes)), b''.join(bloques))
+
+    def test_breach_relleno_gzip_y_html_sin_brotli(self):
+        from django.http import HttpResponse
+
+        cuerpo = b'<input name="csrfmiddlewaretoken" value="secreto">' + b'x' * 2000
+        tamanos = set()
+        for _ in range(20):
+            r = self._middleware(HttpResponse(cuerpo, content_type='text/html; charset=utf-8'), 'br, gzip')
+            self.assertEqual(r['Content-Encoding'], 'gzip')
+            self.assertEqual(gzip.decompress(r.content), cuerpo)
+            tamanos.add(len(r.content))
+        self.assertGreater(len(tamanos), 1)
+
+        if compression.brotli is not None:
+            json_br = self._middleware(HttpResponse(b'{"x": "' + b'a' * 5000 + b'"}',
+                                                    content_type='application/json'), 'br, gzip')
+            self.assertEqual(json_br['Content-Encoding'], 'br')
+
+
+class LoteTicketsTests(SimpleTestCase):
+    def test_validar(self):
+        ids, columnas = bulk_tickets.validar(['3', 1, 3], {'status': 'FN', 'ticket_treal_ticket': '15'}, set())
+        self.assertEqual(ids, [3, 1])
+        self.assertEqual(columnas, {'ticket_est_ticket': 'FN', 'ticket_treal_ticket': 15})
+        for ids, cambios in (([], {'status': 'FN'}), ([1], {'status': 'XX'}), ([1], {'ticket_des_ticket': 'x'}),
+                             ([1], {'ticket_asignado_a': 'desconocido'}), (list(range(501)), {'status': 'PE'})):
+            with self.assertRaises(bulk_tickets.ErrorLote):
+                bulk_tickets.validar(ids, cambios, {'admin01'})
+
+    def test_una_notificacion_por_admin(self):
+        def fila(cod, nuevo, anterior):
+            return Stticket(ticket_cod_ticket=cod, ticket_asignado_a=nuevo), anterior, 'PE'
+
+        grupos = bulk_tickets.agrupar_por_admin([
+            fila(1, 'ana', 'beto'), fila(2, 'ana', None), fila(3, 'beto', 'beto'), fila(4, 'yo', 'ana'),
+        ], autor='yo')
+        self.assertEqual(set(grupos), {'ana', 'beto'})
+        self.assertEqual([t.ticket_cod_ticket for t in grupos['ana']['asignados']], [1, 2])
+        self.assertEqual([t.ticket_cod_ticket for t in grupos['ana']['retirados']], [4])
+        self.assertEqual([t.ticket_cod_ticket for t in grupos['beto']['retirados']], [1])
+        self.assertEqual([t.ticket_cod_ticket for t in grupos['beto']['actualizados']], [3])
+
+    def test_actualizar_devuelve_la_fila_guardada(self):
+        # Cada fila trae su observación real aunque el lote no la toque
+        filas = [(1, 'TK-1', 'Asunto', 'Desc', 'ana', None, 'FN', 'beto', 15, 'Reinicié el equipo', 4, 'beto', 'PR'),
+                 (2, 'TK-2', 'Asunto', 'Desc', 'luis', None, 'FN', None, 15, None, 2, None, 'PE')]
+        conexion = _ConexionFalsa(filas)
+        with mock.patch.object(bulk_tickets, 'connection', conexion), \
+                mock.patch.object(bulk_tickets, 'invalidar_tickets') as invalidar:
+            resultado = bulk_tickets.actualizar([1, 2], {'ticket_est_ticket': 'FN', 'ticket_treal_ticket': 15})
+        (sql, params), = conexion.ejecutadas
+        self.assertIn('t.ticket_obs_ticket', sql)
+        self.assertEqual(params, ['FN', 15, [1, 2]])
+        self.assertEqual([(t.ticket_obs_ticket, t.ticket_ver_ticket, anterior, estado) for t, anterior, estado in resultado],
+                         [('Reinicié el equipo', 4, 'beto', 'PR'), (None, 2, None, 'PE')])
+        self.assertEqual(sorted(invalidar.call_args.args), ['ana', 'luis'])
+
+
+class EdicionTicketTests(SimpleTestCase):
+    def test_etag_e_if_match(self):
+        ticket = Stticket(ticket_cod_ticket=8, ticket_ver_ticket=3)
+        self.assertEqual(ticket_edit.etag(ticket), '"8-3"')
+        self.assertIsNone(ticket_edit.version_pedida(None, 8))
+        self.assertIsNone(ticket_edit.version_pedida('*', 8))
+        self.assertEqual(ticket_edit.version_pedida('"8-3"', 8), 3)
+        self.assertEqual(ticket_edit.version_pedida('W/"8-3"', 8), 3)      # Débil tras la compresión
+        self.assertEqual(ticket_edit.version_pedida('"9-3"', 8), -1)       # Otro ticket: nunca coincide
+        self.assertEqual(ticket_edit.version_pedida('"abc"', 8), -1)
+
+    def test_solo_columnas_pedidas(self):
+        self.assertEqual(ticket_edit.columnas_de({'status': 'PR', 'observation': ''}), {'ticket_est_ticket': 'PR'})
+        self.assertEqual(
+            ticket_edit.columnas_de({'ticket_asignado_a': '', 'ticket_treal_ticket': '30', 'ticket_calificacion': None}),
+            {'ticket_asignado_a': None, 'ticket_treal_ticket': 30},
+        )
+        with self.assertRaises(ticket_edit.ErrorEdicion):
+            ticket_edit.columnas_de({'ticket_treal_ticket': 'media hora'})
+
+    def test_solo_escribe_las_columnas_que_cambian(self):
+        columnas = {'ticket_est_ticket': 'PR', 'ticket_asignado_a': None}
+        conexion = _ConexionFalsa()
+        with mock.patch.object(ticket_edit, 'connection', conexion), \
+                mock.patch.object(ticket_edit, 'obtener', return_value=Stticket(ticket_cod_ticket=8, ticket_ver_ticket=3)):
+            resultado, *_ = ticket_edit.actualizar(8, columnas, version=3)
+        self.assertEqual(resultado, ticket_edit.SIN_CAMBIOS)
+        (sql, params), = conexion.ejecutadas
+        for col in columnas:
+            self.assertIn(f'{col} = CASE WHEN t.{col} IS DISTINCT FROM %s THEN %s ELSE t.{col} END', sql)
+        self.assertIn('t.ticket_est_ticket IS DISTINCT FROM %s OR t.ticket_asignado_a IS DISTINCT FROM %s', sql)
+        self.assertEqual(params, ['PR', 'PR', None, None, 8, 3, 'PR', None])
+        self.assertEqual(sql.count('%s'), len(params))
+
+    def test_cors_permite_if_match_y_expone_etag(self):
+        origen = 'http://localhost:5173'
+        response = self.client.options('/api/admin/tickets/8/', HTTP_ORIGIN=origen,
+                                       HTTP_ACCESS_CONTROL_REQUEST_METHOD='PATCH',
+                                       HTTP_ACCESS_CONTROL_REQUEST_HEADERS='if-match, content-type')
+        self.assertEqual(response['Access-Control-Allow-Origin'], origen)
+        self.assertIn('if-match', response['Access-Control-Allow-Headers'])
+        response = self.client.get('/api/no-existe/', HTTP_ORIGIN=origen)
+        self.assertEqual(response['Access-Control-Expose-Headers'], 'ETag')
+
+
+class SLATests(SimpleTestCase):
+    def test_rueda_temporizadores(self):
+        rueda = sla.RuedaTemporizadores(tick_segundos=1, ranuras=8, ahora=0)
+        rueda.programar('a', 3, 'A')
+        rueda.programar('b', 20, 'B')      # Más de una vuelta: comparte ranura con t=4 y t=12
+        rueda.programar('c', 4, 'C')
+        rueda.programar('d', 5, 'D')
+        rueda.cancelar('d')
+        rueda.programar('a', 2, 'A2')      # Reprogramar no duplica
+        self.assertEqual(len(rueda), 3)
+        self.assertEqual(rueda.avanzar(1), [])
+        self.assertEqual(rueda.avanzar(4), [('a', 'A2'), ('c', 'C')])
+        self.assertEqual(rueda.avanzar(12), [])
+        self.assertEqual(rueda.avanzar(100), [('b', 'B')])    # Salto de varias vueltas
+        self.assertEqual(len(rueda), 0)
+        rueda.programar('tarde', 50, 'T')                     # Ya pasó: sale en el próximo avance
+        self.assertEqual(rueda.avanzar(101), [('tarde', 'T')])
+
+    @override_settings(SLA_TICK_SEGUNDOS=1, SLA_RANURAS=64, SLA_OBJETIVOS_MINUTOS={'Software': 10},
+                       SLA_MINUTOS_DEFECTO=20, SLA_AVISO_PORCENTAJE=80)
+    def test_fases_por_tipo(self):
+        creado = datetime(2025, 1, 1, 8, 0)
+        base = sla.segundos(creado)
+        motor = sla.MotorSLA(ahora=base)
+        motor.seguir(1, 'Software', creado)
+        motor.seguir(2, 'Hardware', creado)                   # Sin objetivo propio: 20 min
+        motor.seguir(3, 'Software', creado, avisado=True)
+        motor.seguir(4, 'Software', creado, avisado=True, incumplido=True)
+        self.assertEqual(len(motor), 3)
+        self.assertEqual(motor.vencidos(base + 8 * 60), [(1, sla.AVISO)])
+        self.assertEqual(sorted(motor.vencidos(base + 10 * 60)), [(1, sla.INCUMPLIDO), (3, sla.INCUMPLIDO)])
+        motor.olvidar(2)                                      # Pasó a PR antes de vencer
+        self.assertEqual(motor.vencidos(base + 60 * 60), [])
+        self.assertEqual(len(motor), 0)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                                       'LOCATION': 'tests-user-cache'}})
+class CacheUsuarioTests(SimpleTestCase):
+    def test_version_invalida_solo_al_usuario(self):
+        llamadas = []
+
+        def calcular(valor):
+            llamadas.append(valor)
+            return valor
+
+        self.assertEqual(user_cache.cacheado('t', 'ana', {'b': 2, 'a': 1}, lambda: calcular('v1'), 60), 'v1')
+        self.assertEqual(user_cache.cacheado('t', 'ana', {'a': 1, 'b': 2}, lambda: calcular('x'), 60), 'v1')
+        self.assertEqual(user_cache.cacheado('t', 'beto', {'a': 1, 'b': 2}, lambda: calcular('b1'), 60), 'b1')
+
+        user_cache._subir_version('t', {'ana'})
+        self.assertEqual(user_cache.cacheado('t', 'ana', {'a': 1, 'b': 2}, lambda: calcular('v2'), 60), 'v2')
+        self.assertEqual(user_cache.cacheado('t', 'beto', {'a': 1, 'b': 2}, lambda: calcular('x'), 60), 'b1')
+        self.assertEqual(llamadas, ['v1', 'b1', 'v2'])
+
+    def test_timeout_cero_no_cachea(self):
+        valores = iter(['a', 'b'])
+        self.assertEqual(user_cache.cacheado('t0', 'ana', '', lambda: next(valores), 0), 'a')
+        self.assertEqual(user_cache.cacheado('t0', 'ana', '', lambda: next(valores), 0), 'b')
@@ -0,0 +1,149 @@
+"""
+Archivo: api/thumbnails.py
+Miniaturas (256px) y previews (1280px) WebP de los adjuntos de imagen.
+
+- Al confirmar una subida, las vistas llaman pipeline_miniaturas.encolar().
+  Hilos en segundo plano descargan el original del almacén, lo decodifican en un
+  pool de PROCESOS (Pillow consume CPU y no suelta el GIL en todo el trabajo)
+  y suben los derivados junto al original:
+      chatbot-uploads/tickets/8/<uuid>.jpg
+      chatbot-uploads/tickets/8/<uuid>.jpg.thumb.webp
+      chatbot-uploads/tickets/8/<uuid>.jpg.preview.webp
+- Las claves quedan en starchivos.archivo_min_archivo / archivo_prev_archivo
+  y ArchivoSerializer expone sus URLs firmadas.
+- La cola vive en memoria: si el proceso se reinicia, lo pendiente se
+  recupera con `python manage.py generar_miniaturas`.
+"""
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Q
+
+from .image_processing import generar_derivados
+from .metrics import registrar_profundidad_cola
+from .storage import almacen
+from .user_cache import invalidar_tickets_de
+
+logger = logging.getLogger(__name__)
+
+TIPOS_IMAGEN = {'png', 'jpg', 'jpeg', 'webp', 'gif', 'bmp', 'tif', 'tiff'}
+SUFIJOS = {'miniatura': '.thumb.webp', 'preview': '.preview.webp'}
+TIMEOUT_DECODIFICACION = 60
+
+
+def es_imagen(archivo):
+    tipo = (archivo.archivo_tip_archivo or '').lower()
+    nombre = (archivo.archivo_nom_archivo or archivo.archivo_rut_archivo or '').lower()
+    extension = nombre.rsplit('.', 1)[-1] if '.' in nombre else ''
+    return tipo in TIPOS_IMAGEN or extension in TIPOS_IMAGEN
+
+
+def clave_derivado(s3_key, nombre):
+    return s3_key + SUFIJOS[nombre]
+
+
+class PipelineMiniaturas:
+
+    def __init__(self):
+        self._cola = queue.Queue()
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pid = None
+
+    # ── Arranque perezoso (después del fork de gunicorn) ──
+    def _arrancar(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._pool = None
+            for i in range(settings.MINIATURAS_PROCESOS):
+                threading.Thread(target=self._trabajar, name=f'miniaturas-{i}', daemon=True).start()
+
+    def _pool_procesos(self):
+        with self._lock:
+            if self._pool is None:
+                # 'spawn': los hijos no heredan conexiones de BD ni hilos del worker
+                self._pool = ProcessPoolExecutor(
+                    max_workers=settings.MINIATURAS_PROCESOS,
+                    mp_context=multiprocessing.get_context('spawn'),
+                )
+            return self._pool
+
+    def _decodificar(self, datos):
+        try:
+            return self._pool_procesos().submit(generar_derivados, datos).result(timeout=TIMEOUT_DECODIFICACION)
+        except BrokenProcessPool:
+            # Un hijo murió (p. ej. OOM con una imagen gigante): pool nuevo para los siguientes
+            with self._lock:
+                self._pool = None
+            raise
+
+    def encolar(self, archivos):
+        """Encola las imágenes de `archivos` (Starchivos ya guardados). Devuelve cuántas."""
+        if not settings.MINIATURAS_ACTIVAS:
+            return 0
+        pendientes = [
+            (a.archivo_cod_archivo, a.archivo_rut_archivo) for a in archivos
+            if a.archivo_rut_archivo and es_imagen(a)
+            and (a.archivo_tam_archivo or 0) <= settings.MINIATURAS_MAX_BYTES
+        ]
+        if not pendientes:
+            return 0
+        self._arrancar()
+        for pendiente in pendientes:
+            self._cola.put(pendiente)
+        registrar_profundidad_cola('miniaturas', self._cola.qsize())
+        return len(pendientes)
+
+    def _trabajar(self):
+        while True:
+            archivo_cod, s3_key = self._cola.get()
+            try:
+                self.procesar(archivo_cod, s3_key)
+            except Exception as e:
+                logger.warning(f"⚠️ Sin miniatura para archivo {archivo_cod} ({s3_key}): {e}")
+            finally:
+                close_old_connections()
+                registrar_profundidad_cola('miniaturas', self._cola.qsize())
+
+    def procesar(self, archivo_cod, s3_key):
+        """Genera, sube y registra los derivados de un archivo (síncrono)."""
+        from .models import Starchivos
+
+        original = almacen().abrir(s3_key)
+        try:
+            datos = original.read()
+        finally:
+            original.close()
+        derivados = self._decodificar(datos)
+
+        claves = {}
+        for nombre in SUFIJOS:
+            claves[nombre] = clave_derivado(s3_key, nombre)
+            almacen().guardar(
+                claves[nombre], derivados[nombre], 'image/webp',
+                cache_control='max-age=31536000, immutable',
+            )
+
+        # Los adjuntos deduplicados (api/blobs.py) comparten clave: todos reciben los derivados
+        afectados = Starchivos.objects.filter(Q(pk=archivo_cod) | Q(archivo_rut_archivo=s3_key))
+        afectados.update(
+            archivo_min_archivo=claves['miniatura'],
+            archivo_prev_archivo=claves['preview'],
+        )
+        invalidar_tickets_de(set(afectados.values_list('archivo_cod_ticket', flat=True)))
+        logger.info(
+            f"🖼️ Derivados de {s3_key}: {derivados['ancho']}x{derivados['alto']} -> "
+            f"{len(derivados['miniatura'])} B / {len(derivados['preview'])} B"
+        )
+
+
+pipeline_miniaturas = PipelineMiniaturas()
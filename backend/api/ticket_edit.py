@@ -0,0 +1,156 @@
+"""
+Archivo: api/ticket_edit.py
+Edición de un ticket desde el panel admin con control de concurrencia
+optimista (PUT/PATCH /api/admin/tickets/<pk>/).
+
+- Cada ticket tiene una versión (ticket_ver_ticket, migración 0007). La sube
+  un trigger en cada UPDATE que cambia algo, así que también la suben el
+  lote (bulk_tickets), reassign/assign y cualquier save() del ORM.
+- GET y PUT devuelven la versión como ETag ("<pk>-<versión>"). Si el cliente
+  manda If-Match, el UPDATE lleva "AND ticket_ver_ticket = <versión>": si
+  otro admin lo editó antes, no se toca nada y la vista responde 412.
+- Solo se tocan las columnas que vinieron en el request, y de ellas solo las
+  que cambian de verdad (CASE WHEN ... IS DISTINCT FROM): las demás se
+  quedan con su valor. Si ninguna cambia no hay UPDATE ni sube la versión.
+- Todo en UNA sentencia (UPDATE ... FROM (SELECT ... FOR UPDATE) ...
+  RETURNING), que además devuelve el técnico/estado anteriores para la carga
+  de admins y la notificación. Solo si no se actualizó ninguna fila se hace
+  un SELECT para distinguir 404 / 412 / sin cambios.
+"""
+from django.db import connection
+
+from .models import Stticket
+from .user_cache import invalidar_tickets
+
+_COLUMNAS = [f.column for f in Stticket._meta.concrete_fields]
+_ATRIBUTOS = [f.attname for f in Stticket._meta.concrete_fields]
+
+# Resultado de actualizar()
+ACTUALIZADO = 'actualizado'
+SIN_CAMBIOS = 'sin_cambios'
+CONFLICTO = 'conflicto'
+NO_EXISTE = 'no_existe'
+
+
+class ErrorEdicion(Exception):
+    """Valor inválido en el request (→ 400)."""
+
+
+def etag(ticket):
+    return f'"{ticket.ticket_cod_ticket}-{ticket.ticket_ver_ticket}"'
+
+
+def version_pedida(if_match, pk):
+    """
+    Versión que el cliente dice tener según If-Match, o None si no condiciona
+    (sin header o '*'). Un ETag de otro ticket o mal formado devuelve -1, que
+    nunca coincide (→ 412).
+    """
+    if not if_match or if_match.strip() == '*':
+        return None
+    # El middleware de compresión lo pasa a débil (W/"..."): se acepta igual
+    for candidato in if_match.split(','):
+        valor = candidato.strip().removeprefix('W/').strip('"')
+        clave, _, version = valor.partition('-')
+        if clave == str(pk) and version.isdigit():
+            return int(version)
+    return -1
+
+
+def columnas_de(data):
+    """
+    {columna: valor} con lo que pide el request, con las mismas reglas que
+    tenía la vista: estado, usuario y observación solo si vienen con valor;
+    técnico si la clave está (null desasigna); minutos y calificación si no
+    son null.
+    """
+    columnas = {}
+    estado = data.get('status') or data.get('ticket_est_ticket')
+    if estado:
+        columnas['ticket_est_ticket'] = estado
+    if data.get('ticket_tusua_ticket'):
+        columnas['ticket_tusua_ticket'] = data['ticket_tusua_ticket']
+    if 'ticket_asignado_a' in data:
+        columnas['ticket_asignado_a'] = data['ticket_asignado_a'] or None
+    obs = data.get('observation') or data.get('ticket_obs_ticket')
+    if obs:
+        columnas['ticket_obs_ticket'] = obs
+    for campo in ('ticket_treal_ticket', 'ticket_calificacion'):
+        if data.get(campo) is not None:
+            try:
+                columnas[campo] = int(data[campo])
+            except (TypeError, ValueError):
+                raise ErrorEdicion(f'{campo} debe ser un entero')
+    return columnas
+
+
+def _instancia(valores):
+    return Stticket(**dict(zip(_ATRIBUTOS, valores)))
+
+
+def obtener(pk):
+    """El ticket como instancia de solo lectura, o None."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT {', '.join(_COLUMNAS)} FROM soporte_ti.stticket WHERE ticket_cod_ticket = %s", [pk]
+        )
+        fila = cursor.fetchone()
+    return _instancia(fila) if fila else None
+
+
+def actualizar(pk, columnas, version=None):
+    """
+    (resultado, ticket, admin_anterior, estado_anterior). `ticket` es el
+    actual (None si NO_EXISTE); admin/estado anteriores solo con ACTUALIZADO.
+    Con `version` None no se condiciona a la versión.
+    """
+    if not columnas:
+        return _sin_actualizar(pk, version)
+
+    asignaciones = ', '.join(
+        f"{col} = CASE WHEN t.{col} IS DISTINCT FROM %s THEN %s ELSE t.{col} END" for col in columnas
+    )
+    distintas = ' OR '.join(f"t.{col} IS DISTINCT FROM %s" for col in columnas)
+    devueltas = ', '.join(f"t.{col}" for col in _COLUMNAS)
+    condicion_version = 'AND previo.ticket_ver_ticket = %s' if version is not None else ''
+    parametros = [
+        *(v for valor in columnas.values() for v in (valor, valor)),
+        pk, *([version] if version is not None else []), *columnas.values(),
+    ]
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            UPDATE soporte_ti.stticket AS t SET {asignaciones}
+            FROM (
+                SELECT ticket_cod_ticket, ticket_asignado_a, ticket_est_ticket, ticket_ver_ticket,
+                       ticket_tusua_ticket
+                FROM soporte_ti.stticket
+                WHERE ticket_cod_ticket = %s
+                FOR UPDATE
+            ) AS previo
+            WHERE t.ticket_cod_ticket = previo.ticket_cod_ticket
+              {condicion_version}
+              AND ({distintas})
+            RETURNING {devueltas}, previo.ticket_asignado_a, previo.ticket_est_ticket,
+                      previo.ticket_tusua_ticket
+        """, parametros)
+        fila = cursor.fetchone()
+
+    if fila is not None:
+        n = len(_COLUMNAS)
+        ticket = _instancia(fila[:n])
+        # Lista cacheada del dueño (y del anterior, si se le reasignó a otro usuario)
+        invalidar_tickets(ticket.ticket_tusua_ticket, fila[n + 2])
+        return ACTUALIZADO, ticket, fila[n], fila[n + 1]
+
+    return _sin_actualizar(pk, version)
+
+
+def _sin_actualizar(pk, version):
+    # Ninguna fila: no existe, otra versión, o ya tenía esos valores
+    ticket = obtener(pk)
+    if ticket is None:
+        return NO_EXISTE, None, None, None
+    if version is not None and ticket.ticket_ver_ticket != version:
+        return CONFLICTO, ticket, None, None
+    return SIN_CAMBIOS, ticket, None, None
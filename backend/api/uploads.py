@@ -0,0 +1,207 @@
+"""
+Archivo: api/uploads.py
+Subida directa de adjuntos al almacén (api/storage.py): URLs prefirmadas por
+lote y, en S3, multipart.
+
+- Hasta UPLOAD_MULTIPART_UMBRAL bytes: un PUT prefirmado, como siempre.
+- Por encima: multipart upload. Se devuelven las URLs de TODAS las partes
+  para que el navegador las suba en paralelo; al terminar el cliente llama a
+  completar_multipart() con los ETag de cada parte.
+- Con sha256 (calculado en el navegador): la clave es la del blob de ese
+  contenido y, si el usuario ya lo tiene, no hay nada que subir (api/blobs.py).
+- Reanudar: partes_pendientes() lista las partes que S3 ya tiene y prefirma
+  de nuevo solo las que faltan (p. ej. si la pestaña se cerró o las URLs
+  vencieron).
+
+El bucket necesita CORS con ExposeHeaders: ["ETag"] para que el navegador
+pueda leer el ETag de cada parte.
+"""
+import math
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+from botocore.exceptions import BotoCoreError
+from django.conf import settings
+
+from .instrumentation import medir
+from .storage import EXPIRACION_URLS, almacen
+
+PARTES_MAXIMAS = 10000           # Límite de S3 por multipart upload
+PARTE_MINIMA = 5 * 1024 * 1024   # Límite de S3 (salvo la última parte)
+HEAD_EN_PARALELO = 16
+
+
+class ErrorSubida(Exception):
+    """Error de validación de la solicitud de subida (responde 400)."""
+
+
+def _exigir_multipart():
+    if not almacen().soporta_multipart:
+        raise ErrorSubida('El almacenamiento configurado no usa multipart')
+
+
+def prefijo_ticket(ticket_id):
+    return f"chatbot-uploads/tickets/{ticket_id}/"
+
+
+def clave_adjunto(ticket_id, filename):
+    file_extension = filename.split('.')[-1] if '.' in filename else ''
+    unique_filename = f"{uuid.uuid4()}.{file_extension}" if file_extension else str(uuid.uuid4())
+    return prefijo_ticket(ticket_id) + unique_filename
+
+
+def metadata_subida(username, filename, ticket_id):
+    """
+    Metadata del objeto subido. Los headers x-amz-meta-* solo admiten ASCII:
+    el nombre original va con percent-encoding (leerlo con unquote()).
+    """
+    return {
+        'uploaded-by': username,
+        'original-filename': quote(filename),
+        'ticket-id': str(ticket_id),
+    }
+
+
+def validar_clave(ticket_id, s3_key):
+    """Las operaciones multipart solo se aceptan sobre claves de ese ticket."""
+    if not s3_key or not s3_key.startswith(prefijo_ticket(ticket_id)) or '..' in s3_key:
+        raise ErrorSubida('s3_key no corresponde al ticket')
+
+
+def tamano_parte(filesize):
+    """Partes de UPLOAD_PARTE_TAMANO, agrandadas si no alcanzan 10000 partes."""
+    return max(settings.UPLOAD_PARTE_TAMANO, PARTE_MINIMA, math.ceil(filesize / PARTES_MAXIMAS))
+
+
+def _presignar_simple(s3_key, archivo, metadata):
+    return {'modo': 'simple', **almacen().url_subida(s3_key, archivo['filetype'], metadata=metadata)}
+
+
+def _presignar_multipart(s3_key, archivo, metadata):
+    tam = tamano_parte(archivo['filesize'])
+    total = math.ceil(archivo['filesize'] / tam)
+    upload_id = almacen().iniciar_multipart(s3_key, archivo['filetype'], metadata)
+    partes = almacen().urls_partes(s3_key, upload_id, range(1, total + 1))
+    return {'modo': 'multipart', 'upload_id': upload_id, 'part_size': tam, 'parts': partes}
+
+
+def normalizar_archivo(datos):
+    """Valida un {filename, filetype, filesize} del request."""
+    if not isinstance(datos, dict):
+        raise ErrorSubida('Cada archivo debe ser {filename, filetype, filesize}')
+    filename = (datos.get('filename') or '').strip()
+    if not filename:
+        raise ErrorSubida('filename es requerido')
+    try:
+        filesize = int(datos.get('filesize', 0))
+    except (TypeError, ValueError):
+        raise ErrorSubida(f'filesize inválido para {filename}')
+    if filesize <= 0:
+        raise ErrorSubida(f'filesize inválido para {filename}')
+    if filesize > settings.UPLOAD_MAX_TAMANO:
+        maximo_mb = settings.UPLOAD_MAX_TAMANO / 1024 / 1024
+        raise ErrorSubida(f'{filename}: archivo demasiado grande. Máximo {maximo_mb:.0f}MB')
+    sha256 = None
+    if datos.get('sha256'):
+        from .blobs import normalizar_sha
+        sha256 = normalizar_sha(datos['sha256'])
+        if sha256 is None:
+            raise ErrorSubida(f'sha256 inválido para {filename}')
+        # Deduplicación solo para subidas de un PUT (ver api/blobs.py)
+        if filesize > settings.UPLOAD_MULTIPART_UMBRAL:
+            sha256 = None
+    return {
+        'filename': filename,
+        'filetype': datos.get('filetype') or 'application/octet-stream',
+        'filesize': filesize,
+        'sha256': sha256,
+    }
+
+
+def presignar_lote(ticket_id, archivos, username, reutilizables=frozenset()):
+    """
+    archivos: [{filename, filetype, filesize, sha256}] ya normalizados.
+    reutilizables: sha256 que el usuario puede adjuntar sin subir (blobs.reutilizables).
+    Devuelve una entrada por archivo, en el mismo orden.
+    """
+    from .blobs import presignar_blob
+
+    resultado = []
+    for archivo in archivos:
+        s3_key = clave_adjunto(ticket_id, archivo['filename'])
+        metadata = metadata_subida(username, archivo['filename'], ticket_id)
+        try:
+            if archivo.get('sha256'):
+                entrada = presignar_blob(archivo, metadata, archivo['sha256'] in reutilizables)
+                s3_key = entrada['s3_key']
+            elif archivo['filesize'] > settings.UPLOAD_MULTIPART_UMBRAL and almacen().soporta_multipart:
+                entrada = _presignar_multipart(s3_key, archivo, metadata)
+            else:
+                entrada = _presignar_simple(s3_key, archivo, metadata)
+        except BotoCoreError as e:
+            # Validación local de botocore (p. ej. un parámetro que S3 no acepta), no un error de S3
+            raise ErrorSubida(f"No se pudo prefirmar {archivo['filename']}: {e}")
+        entrada.update({
+            'filename': archivo['filename'],
+            's3_key': s3_key,
+            'download_url': almacen().url_descarga(s3_key),
+            'expires_in': EXPIRACION_URLS,
+        })
+        resultado.append(entrada)
+    return resultado
+
+
+def partes_subidas(s3_key, upload_id):
+    """[{part_number, etag, size}] que S3 ya recibió."""
+    _exigir_multipart()
+    return almacen().partes(s3_key, upload_id)
+
+
+def partes_pendientes(s3_key, upload_id, filesize):
+    """Para reanudar: partes ya subidas y URLs nuevas para las que faltan."""
+    tam = tamano_parte(filesize)
+    total = math.ceil(filesize / tam)
+    subidas = partes_subidas(s3_key, upload_id)
+    listas = {p['part_number'] for p in subidas}
+    faltan = almacen().urls_partes(s3_key, upload_id, [n for n in range(1, total + 1) if n not in listas])
+    return {'upload_id': upload_id, 'part_size': tam, 'uploaded': subidas, 'parts': faltan}
+
+
+def completar_multipart(s3_key, upload_id, partes):
+    """partes: [{part_number, etag}] en cualquier orden."""
+    _exigir_multipart()
+    try:
+        ordenadas = sorted(
+            ({'PartNumber': int(p['part_number']), 'ETag': p['etag']} for p in partes),
+            key=lambda p: p['PartNumber']
+        )
+    except (KeyError, TypeError, ValueError):
+        raise ErrorSubida('parts debe ser [{part_number, etag}]')
+    if not ordenadas:
+        raise ErrorSubida('parts está vacío')
+    almacen().completar_multipart(s3_key, upload_id, ordenadas)
+
+
+def abortar_multipart(s3_key, upload_id):
+    _exigir_multipart()
+    almacen().abortar_multipart(s3_key, upload_id)
+
+
+def _head(s3_key):
+    objeto = almacen().info(s3_key)
+    if objeto is None:
+        return None
+    return {'size': objeto['size'], 'content_type': objeto['content_type']}
+
+
+def verificar_objetos(claves):
+    """
+    HEAD concurrente de cada clave: tamaño y tipo REALES de lo que quedó en S3.
+    Devuelve {s3_key: {size, content_type}}, con None si el objeto no existe.
+    """
+    if not claves:
+        return {}
+    almacen()  # crear el cliente antes de repartirlo entre hilos
+    with medir('s3'), ThreadPoolExecutor(max_workers=min(HEAD_EN_PARALELO, len(claves))) as pool:
+        return dict(zip(claves, pool.map(_head, claves)))
@@ -1,7 +1,9 @@
 # api/urls.py
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from . import views
+from .storage import vista_almacen_local
 
 router = DefaultRouter()
 router.register(r'tickets', views.TicketViewSet, basename='ticket') 
@@ -16,16 +18,24 @@ urlpatterns = [
     path('admin/reportes/',              views.ReportesView.as_view(),          name='admin-reportes'),
     # ── Tickets de usuario ──
     path('tickets/log-solved/', views.LogSolvedTicketView.as_view(), name='log-solved-ticket'),
+    path('tickets/buscar/', views.TicketSearchView.as_view(), name='ticket-search'),
     path('tickets/<int:ticket_id>/generate-presigned-url/', views.GeneratePresignedUrlView.as_view(), name='generate-presigned-url'),
     path('tickets/<int:ticket_id>/confirm-upload/', views.ConfirmUploadView.as_view(), name='confirm-upload'),
+    path('tickets/<int:ticket_id>/confirm-batch/', views.BatchConfirmUploadView.as_view(), name='confirm-batch'),
+    path('tickets/<int:ticket_id>/presign-batch/', views.BatchPresignView.as_view(), name='presign-batch'),
+    path('tickets/<int:ticket_id>/multipart/<str:accion>/', views.MultipartUploadView.as_view(), name='multipart-upload'),
 
     # ── Admins y usuarios ──
     path('admins/', views.AdminListView.as_view(), name='admin-list'),
     path('users/active/', views.ActiveUsersListView.as_view(), name='active-users'),
+    path('directory/search/', views.DirectorySearchView.as_view(), name='directory-search'),
+    path('admin/carga/', views.AdminWorkloadView.as_view(), name='admin-workload'),
 
     # ── Admin Panel ──
     path('admin/tickets/', views.AdminTicketListView.as_view(), name='admin-tickets'),
     path('admin/tickets/new/', views.NewTicketsPollingView.as_view(), name='new-tickets-polling'),
+    path('admin/tickets/duplicados/', views.DuplicateClustersView.as_view(), name='duplicate-clusters'),
+    path('admin/tickets/bulk/', views.BulkTicketUpdateView.as_view(), name='admin-tickets-bulk'),
     path('admin/tickets/<int:pk>/', views.AdminTicketDetailView.as_view(), name='admin-ticket-detail'),
     path('admin/tickets/<int:pk>/reassign/', views.ReassignTicketView.as_view(), name='reassign-ticket'),
     path('admin/tickets/<int:pk>/assign/', views.AssignAdminView.as_view(), name='assign-admin'),
@@ -41,9 +51,27 @@ urlpatterns = [
     path('get-notification-sound/', views.CheckNotificationSoundView.as_view(), name='get-notification-sound'),
     # Rutas nuevas (las que usa NotificationSettings.jsx)
     path('notifications/sounds/upload/', views.NotificationSoundUploadView.as_view(), name='notifications-sound-upload'),
+    path('notifications/sounds/confirm/', views.NotificationSoundConfirmView.as_view(), name='notifications-sound-confirm'),
     path('notifications/sounds/delete/', views.NotificationSoundDeleteView.as_view(), name='notifications-sound-delete'),
     path('notifications/sounds/check/',  views.CheckNotificationSoundView.as_view(), name='notifications-sound-check'),
 
+    # ── Almacén local (ALMACEN=local): URLs firmadas de subida/descarga ──
+    path('almacen/<path:clave>', vista_almacen_local, name='almacen-local'),
+
     # ── Router (al final siempre) ──
     path('', include(router.urls)),
-]
\ No newline at end of file
+]
+
+# ── Vistas async (VISTAS_ASYNC=True, ver api/async_views.py) ──
+# Mismos nombres de ruta; van primero para ganarle a las síncronas.
+if settings.VISTAS_ASYNC:
+    from . import async_views
+
+    urlpatterns = [
+        path('admin/tickets/new/', async_views.nuevos_tickets_polling, name='new-tickets-polling'),
+        path('admin/tickets/', async_views.admin_ticket_list, name='admin-tickets'),
+        path('admins/', async_views.admin_list, name='admin-list'),
+        path('get-notification-sound/', async_views.check_notification_sound, name='get-notification-sound'),
+        path('notifications/sounds/check/', async_views.check_notification_sound, name='notifications-sound-check'),
+        path('tickets/', async_views.ticket_list, name='ticket-list'),
+    ] + urlpatterns
\ No newline at end of file
@@ -0,0 +1,165 @@
+"""
+Archivo: api/user_cache.py
+Claves de caché versionadas por usuario sobre settings.CACHES (Redis con
+REDIS_URL, memoria local sin él).
+
+Cada (espacio, usuario) tiene un número de versión en la caché y todas sus
+claves lo llevan: "tickets:juan:v7:<hash de los parámetros>". Invalidar es
+subir la versión (un INCR), sin buscar ni borrar claves; lo viejo expira
+solo por TTL.
+
+- La versión se lee ANTES de ir a la base: si una escritura la sube en el
+  medio, lo calculado queda guardado bajo la versión vieja y nadie lo lee.
+- Si la versión se pierde (LRU de LocMem, maxmemory de Redis) se vuelve a
+  crear con el reloj en microsegundos, nunca con 1: no puede coincidir con
+  una versión anterior que todavía tenga entradas.
+- Si la caché falla se sigue sin ella (warning en el log).
+- Sin REDIS_URL cada worker tiene su LocMem y no ve las invalidaciones de
+  los otros: por eso CACHE_TICKETS_USUARIO_SEGUNDOS vale 0 por defecto
+  (no se cachea) salvo que haya Redis.
+
+Uso actual: la lista de tickets de un usuario (TicketViewSet.list y su
+versión async), invalidada al escribir tickets o adjuntos.
+"""
+import hashlib
+import logging
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+TICKETS = 'tickets'
+
+
+def _clave_version(espacio, username):
+    return f"{espacio}:ver:{username}"
+
+
+def _huella(partes):
+    if hasattr(partes, 'lists'):        # QueryDict (request.GET)
+        partes = urlencode(sorted((k, v) for k, vs in partes.lists() for v in vs))
+    elif isinstance(partes, dict):
+        partes = urlencode(sorted(partes.items()))
+    return hashlib.sha1(str(partes).encode()).hexdigest()[:16]
+
+
+def _version_nueva():
+    return time.time_ns() // 1000
+
+
+def version(espacio, username):
+    k = _clave_version(espacio, username)
+    actual = cache.get(k)
+    if actual is None:
+        cache.add(k, _version_nueva(), timeout=None)
+        actual = cache.get(k)
+    return actual
+
+
+def clave(espacio, username, partes=''):
+    """Clave de `partes` (str, dict o QueryDict) en la versión actual del usuario."""
+    return f"{espacio}:{username}:v{version(espacio, username)}:{_huella(partes)}"
+
+
+def cacheado(espacio, username, partes, calcular, timeout):
+    """
+    Valor cacheado o `calcular()` (que se guarda `timeout` segundos). Con
+    timeout 0 o sin caché disponible, solo calcula.
+    """
+    if timeout <= 0:
+        return calcular()
+    try:
+        k = clave(espacio, username, partes)
+        valor = cache.get(k)
+    except Exception as e:
+        logger.warning(f"⚠️ Caché {espacio}: no disponible, se calcula sin ella: {e}")
+        return calcular()
+    if valor is not None:
+        return valor
+    valor = calcular()
+    try:
+        cache.set(k, valor, timeout)
+    except Exception as e:
+        logger.warning(f"⚠️ Caché {espacio}: no se pudo guardar: {e}")
+    return valor
+
+
+async def acacheado(espacio, username, partes, acalcular, timeout):
+    """Igual que cacheado() para vistas async; `acalcular` devuelve una corrutina."""
+    from asgiref.sync import sync_to_async
+
+    if timeout <= 0:
+        return await acalcular()
+    try:
+        k = await sync_to_async(clave)(espacio, username, partes)
+        valor = await cache.aget(k)
+    except Exception as e:
+        logger.warning(f"⚠️ Caché {espacio}: no disponible, se calcula sin ella: {e}")
+        return await acalcular()
+    if valor is not None:
+        return valor
+    valor = await acalcular()
+    try:
+        await cache.aset(k, valor, timeout)
+    except Exception as e:
+        logger.warning(f"⚠️ Caché {espacio}: no se pudo guardar: {e}")
+    return valor
+
+
+def _subir_version(espacio, usernames):
+    for username in usernames:
+        k = _clave_version(espacio, username)
+        try:
+            try:
+                cache.incr(k)
+            except ValueError:
+                # No existía: cualquier versión nueva invalida lo anterior
+                cache.set(k, _version_nueva(), timeout=None)
+        except Exception as e:
+            logger.warning(f"⚠️ Caché {espacio}: no se pudo invalidar a {username}: {e}")
+
+
+def invalidar(espacio, *usernames):
+    """Sube la versión de los usuarios después del COMMIT (ya, si no hay transacción)."""
+    usernames = {u for u in usernames if u}
+    if usernames:
+        transaction.on_commit(lambda: _subir_version(espacio, usernames))
+
+
+# ============================================================
+# TICKETS DEL USUARIO
+# ============================================================
+def tickets_cacheados(username, params, calcular):
+    return cacheado(TICKETS, username, params, calcular, settings.CACHE_TICKETS_USUARIO_SEGUNDOS)
+
+
+async def atickets_cacheados(username, params, acalcular):
+    return await acacheado(TICKETS, username, params, acalcular, settings.CACHE_TICKETS_USUARIO_SEGUNDOS)
+
+
+def invalidar_tickets(*usernames):
+    invalidar(TICKETS, *usernames)
+
+
+def invalidar_tickets_de(ids_tickets):
+    """Invalida a los dueños de esos tickets (escrituras de adjuntos sin el ticket a mano)."""
+    from .models import Stticket
+
+    ids = [i for i in ids_tickets if i is not None]
+    if ids:
+        invalidar_tickets(*Stticket.objects.filter(pk__in=ids)
+                          .values_list('ticket_tusua_ticket', flat=True).distinct())
+
+
+def al_cambiar_ticket(sender, instance, **kwargs):
+    """Receptor de post_save/post_delete de Stticket (ver apps.py)."""
+    invalidar_tickets(instance.ticket_tusua_ticket)
+
+
+def al_cambiar_archivo(sender, instance, **kwargs):
+    """Receptor de post_save/post_delete de Starchivos (ver apps.py)."""
+    invalidar_tickets_de([instance.archivo_cod_ticket_id])
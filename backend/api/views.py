@@ -3,7 +3,8 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny 
-from django.http import FileResponse, Http404
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, Http404, StreamingHttpResponse
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.shortcuts import redirect
@@ -15,16 +16,29 @@ from rest_framework.exceptions import APIException
 import os
 import uuid
 from datetime import datetime, timedelta
-import boto3
 import logging 
-from botocore.exceptions import ClientError
+from botocore.exceptions import BotoCoreError, ClientError
 from rest_framework.authentication import BasicAuthentication
 from django.utils import timezone
-from .storage_backends import MediaStorage, NotificationSoundStorage
-from .models import Stsugerencia, Stticket, Starchivos, Stlogchat, Stadmin
+from .models import Stsugerencia, Stticket, Starchivos, Stlogchat, Stadmin, Stblob, Stsonido
 from .serializers import StticketSerializer, ArchivoSerializer, LogChatSerializer
+from .duplicates import indice_duplicados
+from .assignment import motor_asignacion
+from .search import buscar_tickets, CursorInvalido, LIMITE_POR_DEFECTO
+from .filters import filtrar_tickets, paginar_con_facetas, usa_paginacion
+from .read_models import filas_tickets, parsear_campos
+from .instrumentation import medir
+from .metrics import CANAL_ENVIO, CANAL_ERRORES
+from .db_router import lectura_replica
+from .directory import LIMITE_BUSQUEDA, MAX_LIMITE_BUSQUEDA, directorio
+from .http_cache import con_etag, no_modificado
+from . import blobs, bulk_tickets, sla, sonidos, ticket_edit, uploads, user_cache
+from .storage import almacen
+from .thumbnails import pipeline_miniaturas
+from .zip_stream import generar_zip, generar_zip_async
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
+from django.db import transaction
 from django.db.models import Count, Avg, Q
 from django.db.models.functions import TruncDate, TruncWeek
 import pytz
@@ -37,6 +51,25 @@ logger = logging.getLogger(__name__)
 # ============================================================
 # HELPER: ENVIAR NOTIFICACIÓN WEBSOCKET
 # ============================================================
+def enviar_notificacion(username, data):
+    """Envía `data` al grupo WebSocket del usuario. Devuelve True si se pudo."""
+    try:
+        channel_layer = get_channel_layer()
+        with medir('canal'), CANAL_ENVIO.time():
+            async_to_sync(channel_layer.group_send)(
+                f"notifications_{username}",
+                {
+                    "type": "send_notification",  # Mapea a NotificationConsumer.send_notification()
+                    "data": data,
+                }
+            )
+        return True
+    except Exception as e:
+        CANAL_ERRORES.inc()
+        logger.warning(f"⚠️ No se pudo enviar notificación WebSocket: {e}")
+        return False
+
+
 def send_ticket_notification(admin_username, ticket):
     """
     Envía una notificación WebSocket al admin asignado.
@@ -44,24 +77,63 @@ def send_ticket_notification(admin_username, ticket):
     """
     if not admin_username:
         return
-    try:
-        channel_layer = get_channel_layer()
-        async_to_sync(channel_layer.group_send)(
-            f"notifications_{admin_username}",
-            {
-                "type": "send_notification",  # Mapea a NotificationConsumer.send_notification()
-                "data": {
-                    "type": "ticket_assigned",
-                    "title": "🎫 Nuevo ticket asignado",
-                    "message": f"Se te asignó el ticket #{ticket.ticket_id_ticket}: {ticket.ticket_asu_ticket}",
-                    "ticket_id": ticket.ticket_cod_ticket,
-                    "ticket_display_id": ticket.ticket_id_ticket,
-                }
-            }
-        )
+    enviado = enviar_notificacion(admin_username, {
+        "type": "ticket_assigned",
+        "title": "🎫 Nuevo ticket asignado",
+        "message": f"Se te asignó el ticket #{ticket.ticket_id_ticket}: {ticket.ticket_asu_ticket}",
+        "ticket_id": ticket.ticket_cod_ticket,
+        "ticket_display_id": ticket.ticket_id_ticket,
+    })
+    if enviado:
         logger.info(f"✅ Notificación enviada a {admin_username} para ticket {ticket.ticket_id_ticket}")
-    except Exception as e:
-        logger.warning(f"⚠️ No se pudo enviar notificación WebSocket: {e}")
+
+
+def send_attachments_notification(ticket, archivos, autor):
+    """UN evento por lote de adjuntos confirmados, para el admin asignado."""
+    destino = ticket.ticket_asignado_a
+    if not destino or destino == autor or not archivos:
+        return
+    enviar_notificacion(destino, {
+        "type": "attachments_added",
+        "title": "📎 Nuevos adjuntos",
+        "message": f"{autor} adjuntó {len(archivos)} archivo(s) al ticket #{ticket.ticket_id_ticket}",
+        "ticket_id": ticket.ticket_cod_ticket,
+        "ticket_display_id": ticket.ticket_id_ticket,
+        "archivos": [a.archivo_nom_archivo for a in archivos],
+    })
+
+
+def send_bulk_notification(admin_username, grupo, autor):
+    """UN evento por técnico afectado por un cambio masivo (ver api/bulk_tickets.py)."""
+    partes = []
+    if grupo['asignados']:
+        partes.append(f"se te asignaron {len(grupo['asignados'])}")
+    if grupo['retirados']:
+        partes.append(f"se reasignaron {len(grupo['retirados'])} a otro técnico")
+    if grupo['actualizados']:
+        partes.append(f"se actualizaron {len(grupo['actualizados'])}")
+    enviar_notificacion(admin_username, {
+        "type": "tickets_bulk_updated",
+        "title": "🗂️ Cambio masivo de tickets",
+        "message": f"{autor}: " + ", ".join(partes) + " ticket(s)",
+        **{
+            clave: [{"ticket_id": t.ticket_cod_ticket, "ticket_display_id": t.ticket_id_ticket,
+                     "estado": t.ticket_est_ticket} for t in tickets]
+            for clave, tickets in grupo.items()
+        },
+    })
+
+
+def serializar_tickets(qs, campos=None):
+    """
+    Con ?fields= usa el camino rápido de .values_list() (api/read_models.py);
+    sin él, el StticketSerializer completo de siempre. 'serializacion' no
+    incluye el SQL (evaluar `qs`, adjuntos): medir() lo descuenta.
+    """
+    with medir('serializacion'):
+        if campos:
+            return filas_tickets(qs, campos)
+        return StticketSerializer(qs, many=True).data
 
 
 # ============================================================
@@ -211,13 +283,6 @@ class GeneratePresignedUrlView(views.APIView):
     
     def post(self, request, ticket_id):
         try:
-            s3_client = boto3.client(
-                's3',
-                aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-                aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-                region_name=settings.AWS_S3_REGION_NAME
-            )
-            
             filename = request.data.get('filename')
             filetype = request.data.get('filetype')
             filesize = int(request.data.get('filesize', 0))
@@ -226,30 +291,15 @@ class GeneratePresignedUrlView(views.APIView):
             if filesize > MAX_SIZE:
                 return Response({'error': f'Archivo demasiado grande. Máximo {MAX_SIZE/1024/1024}MB'}, status=status.HTTP_400_BAD_REQUEST)
             
-            file_extension = filename.split('.')[-1] if '.' in filename else ''
-            unique_filename = f"{uuid.uuid4()}.{file_extension}" if file_extension else str(uuid.uuid4())
-            s3_key = f"chatbot-uploads/tickets/{ticket_id}/{unique_filename}"
-            
-            presigned_url = s3_client.generate_presigned_url(
-                'put_object',
-                Params={
-                    'Bucket': settings.AWS_STORAGE_BUCKET_NAME,
-                    'Key': s3_key,
-                    'ContentType': filetype,
-                    'Metadata': {
-                        'uploaded-by': request.user.username,
-                        'original-filename': filename,
-                        'ticket-id': str(ticket_id)
-                    }
-                },
-                ExpiresIn=3600
+            s3_key = uploads.clave_adjunto(ticket_id, filename)
+            subida = almacen().url_subida(
+                s3_key, filetype, metadata=uploads.metadata_subida(request.user.username, filename, ticket_id),
             )
             
-            download_url = f"https://{settings.AWS_S3_CUSTOM_DOMAIN}/{s3_key}"
-            
             return Response({
-                'upload_url': presigned_url,
-                'download_url': download_url,
+                'upload_url': subida['upload_url'],
+                'headers': subida['headers'],
+                'download_url': almacen().url_descarga(s3_key),
                 's3_key': s3_key,
                 'filename': filename,
                 'expires_in': 3600
@@ -257,10 +307,244 @@ class GeneratePresignedUrlView(views.APIView):
             
         except ClientError as e:
             return Response({'error': f'Error de S3: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        except BotoCoreError as e:
+            return Response({'error': f'No se pudo prefirmar {filename}: {e}'}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+# ============================================================
+# SUBIDA POR LOTES Y MULTIPART (api/uploads.py)
+# ============================================================
+def _ticket_del_usuario(user, ticket_id):
+    """El solicitante del ticket o un admin pueden adjuntarle archivos."""
+    qs = Stticket.objects.filter(pk=ticket_id)
+    if not user.is_staff:
+        qs = qs.filter(ticket_tusua_ticket=user.username)
+    return qs.exists()
+
+
+class BatchPresignView(views.APIView):
+    """
+    POST /api/tickets/<id>/presign-batch/
+    {"files": [{"filename": "logs.zip", "filetype": "application/zip", "filesize": 73400320,
+                "sha256": "9f86d0..."}, ...]}
+
+    Una sola llamada para todos los adjuntos. Cada entrada de la respuesta trae
+    s3_key y, según el tamaño:
+      modo=simple:    upload_url (un PUT; con sha256 también "headers" a enviar)
+      modo=multipart: upload_id, part_size y parts=[{part_number, url}]
+      modo=existente: el usuario ya subió ese contenido, no hay PUT
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, ticket_id):
+        archivos = request.data.get('files')
+        if not isinstance(archivos, list) or not archivos:
+            return Response({'error': 'files debe ser una lista no vacía'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(archivos) > settings.UPLOAD_MAX_ARCHIVOS_LOTE:
+            return Response({'error': f'Máximo {settings.UPLOAD_MAX_ARCHIVOS_LOTE} archivos por lote'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            archivos = [uploads.normalizar_archivo(a) for a in archivos]
+        except uploads.ErrorSubida as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not _ticket_del_usuario(request.user, ticket_id):
+            return Response({'error': 'Ticket no encontrado'}, status=status.HTTP_404_NOT_FOUND)
+
+        reutilizables = blobs.reutilizables(
+            {a['sha256'] for a in archivos if a['sha256']}, request.user.username, request.user.is_staff,
+        )
+        try:
+            return Response({'files': uploads.presignar_lote(
+                ticket_id, archivos, request.user.username, reutilizables,
+            )})
+        except (uploads.ErrorSubida, BotoCoreError) as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except ClientError as e:
+            logger.error(f"❌ Error prefirmando lote para ticket {ticket_id}: {e}")
+            return Response({'error': f'Error de S3: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class MultipartUploadView(views.APIView):
+    """
+    POST /api/tickets/<id>/multipart/complete/  {s3_key, upload_id, parts: [{part_number, etag}]}
+    POST /api/tickets/<id>/multipart/abort/     {s3_key, upload_id}
+    POST /api/tickets/<id>/multipart/resume/    {s3_key, upload_id, filesize}
+         → partes ya subidas + URLs nuevas para las que faltan
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    ACCIONES = ('complete', 'abort', 'resume')
+
+    def post(self, request, ticket_id, accion):
+        if accion not in self.ACCIONES:
+            return Response({'error': f'Acción no válida: {accion}'}, status=status.HTTP_404_NOT_FOUND)
+
+        s3_key = request.data.get('s3_key')
+        upload_id = request.data.get('upload_id')
+        try:
+            uploads.validar_clave(ticket_id, s3_key)
+            if not upload_id:
+                raise uploads.ErrorSubida('upload_id es requerido')
+            if not _ticket_del_usuario(request.user, ticket_id):
+                return Response({'error': 'Ticket no encontrado'}, status=status.HTTP_404_NOT_FOUND)
+
+            if accion == 'complete':
+                uploads.completar_multipart(s3_key, upload_id, request.data.get('parts') or [])
+                return Response({'success': True, 's3_key': s3_key})
+            if accion == 'abort':
+                uploads.abortar_multipart(s3_key, upload_id)
+                return Response({'success': True})
+
+            try:
+                filesize = int(request.data.get('filesize', 0))
+            except (TypeError, ValueError):
+                filesize = 0
+            if filesize <= 0:
+                raise uploads.ErrorSubida('filesize es requerido para reanudar')
+            return Response(uploads.partes_pendientes(s3_key, upload_id, filesize))
+
+        except uploads.ErrorSubida as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') == 'NoSuchUpload':
+                return Response({'error': 'Upload no encontrado o ya finalizado'}, status=status.HTTP_404_NOT_FOUND)
+            if e.response.get('Error', {}).get('Code') in ('InvalidPart', 'InvalidPartOrder', 'EntityTooSmall'):
+                return Response({'error': f'Partes inválidas: {str(e)}'}, status=status.HTTP_400_BAD_REQUEST)
+            logger.error(f"❌ Error multipart ({accion}) en ticket {ticket_id}: {e}")
+            return Response({'error': f'Error de S3: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class BatchConfirmUploadView(views.APIView):
+    """
+    POST /api/tickets/<id>/confirm-batch/
+    {"files": [{"s3_key": "...", "filename": "captura.png", "sha256": "..."}, ...]}
+
+    Verifica cada objeto con HEAD (en paralelo) y guarda el tamaño y tipo que
+    tiene S3, no los que manda el cliente. Inserta todas las filas con un solo
+    bulk_create y avisa al admin asignado con UN evento "attachments_added".
+    Los que no están en S3 vuelven en "missing" y no se guardan.
+
+    Con sha256 la clave es la del blob: se comprueba el hash en S3 (salvo que
+    el usuario ya tuviera ese contenido) y se suma una referencia en stblob.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, ticket_id):
+        archivos = request.data.get('files')
+        if not isinstance(archivos, list) or not archivos:
+            return Response({'error': 'files debe ser una lista no vacía'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(archivos) > settings.UPLOAD_MAX_ARCHIVOS_LOTE:
+            return Response({'error': f'Máximo {settings.UPLOAD_MAX_ARCHIVOS_LOTE} archivos por lote'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        nombres, shas = {}, {}
+        try:
+            for a in archivos:
+                if not isinstance(a, dict):
+                    raise uploads.ErrorSubida('Cada archivo debe ser {s3_key, filename}')
+                sha = blobs.normalizar_sha(a.get('sha256'))
+                if a.get('sha256') and sha is None:
+                    raise uploads.ErrorSubida('sha256 inválido')
+                if sha:
+                    if a.get('s3_key') != blobs.clave_blob(sha):
+                        raise uploads.ErrorSubida('s3_key no corresponde al sha256')
+                    shas[a['s3_key']] = sha
+                else:
+                    uploads.validar_clave(ticket_id, a.get('s3_key'))
+                nombres[a['s3_key']] = (a.get('filename') or a['s3_key'].rsplit('/', 1)[-1])[:255]
+        except uploads.ErrorSubida as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        qs = Stticket.objects.filter(pk=ticket_id)
+        if not request.user.is_staff:
+            qs = qs.filter(ticket_tusua_ticket=request.user.username)
+        ticket = qs.only('ticket_cod_ticket', 'ticket_id_ticket', 'ticket_asignado_a', 'ticket_tusua_ticket').first()
+        if ticket is None:
+            return Response({'error': 'Ticket no encontrado'}, status=status.HTTP_404_NOT_FOUND)
+
+        # Claves ya confirmadas en ESTE ticket (reintento del cliente): no duplicar filas.
+        # Un blob sí puede estar en varios tickets.
+        ya_guardadas = set(
+            Starchivos.objects.filter(archivo_cod_ticket=ticket, archivo_rut_archivo__in=list(nombres))
+            .values_list('archivo_rut_archivo', flat=True)
+        )
+        pendientes = [k for k in nombres if k not in ya_guardadas]
+
+        username = request.user.username
+        shas_pendientes = {shas[k] for k in pendientes if k in shas}
+        propios = blobs.reutilizables(shas_pendientes, username, request.user.is_staff)
+        try:
+            objetos = uploads.verificar_objetos([k for k in pendientes if k not in shas])
+            # Contenido que el usuario ya tenía: los datos salen de stblob, sin tocar S3
+            for blob in Stblob.objects.filter(blob_sha256__in=propios):
+                objetos[blob.blob_rut_blob] = {'size': blob.blob_tam_blob, 'content_type': blob.blob_tip_blob or ''}
+            for sha, objeto in blobs.verificar_blobs(sorted(shas_pendientes - propios)).items():
+                # Sobre un blob que ya existía solo cuenta el PUT de quien confirma
+                if objeto is not None and objeto['uploaded_by'] != username:
+                    objeto = None
+                objetos[blobs.clave_blob(sha)] = objeto
+        except uploads.ErrorSubida as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except ClientError as e:
+            logger.error(f"❌ Error verificando adjuntos del ticket {ticket_id}: {e}")
+            return Response({'error': f'Error de S3: {str(e)}'}, status=status.HTTP_502_BAD_GATEWAY)
+
+        # Derivados ya generados para el mismo contenido en otro ticket
+        derivados = {}
+        if shas_pendientes:
+            derivados = {
+                sha: (minimo, preview) for sha, minimo, preview in
+                Starchivos.objects.filter(archivo_sha_archivo__in=shas_pendientes, archivo_min_archivo__isnull=False)
+                .values_list('archivo_sha_archivo', 'archivo_min_archivo', 'archivo_prev_archivo')
+            }
+
+        nuevos, referencias = [], {}
+        for s3_key in pendientes:
+            objeto = objetos[s3_key]
+            if objeto is None:
+                continue
+            tipo = objeto['content_type']
+            sha = shas.get(s3_key)
+            minimo, preview = derivados.get(sha, (None, None))
+            nuevos.append(Starchivos(
+                archivo_cod_ticket=ticket,
+                archivo_nom_archivo=nombres[s3_key],
+                archivo_tip_archivo=(tipo.split('/')[-1] if '/' in tipo else tipo)[:50],
+                archivo_tam_archivo=objeto['size'],
+                archivo_rut_archivo=s3_key,
+                archivo_usua_archivo=username,
+                archivo_sha_archivo=sha,
+                archivo_min_archivo=minimo,
+                archivo_prev_archivo=preview,
+            ))
+            if sha:
+                referencias[sha] = (referencias.get(sha, (0,))[0] + 1, objeto['size'], tipo)
+        with transaction.atomic():
+            nuevos = Starchivos.objects.bulk_create(nuevos)
+            blobs.sumar_referencias(referencias)
+            # bulk_create no dispara post_save: la lista cacheada del dueño se invalida a mano
+            user_cache.invalidar_tickets(ticket.ticket_tusua_ticket)
+        send_attachments_notification(ticket, nuevos, username)
+        pipeline_miniaturas.encolar([a for a in nuevos if not a.archivo_min_archivo])
+
+        faltantes = [k for k in pendientes if objetos[k] is None]
+        logger.info(f"📎 Ticket {ticket_id}: {len(nuevos)} adjunto(s) confirmados, {len(faltantes)} faltantes")
+        return Response({
+            'success': not faltantes,
+            'files': [{
+                'file_id': a.archivo_cod_archivo,
+                'filename': a.archivo_nom_archivo,
+                's3_key': a.archivo_rut_archivo,
+                'size': a.archivo_tam_archivo,
+                'file_url': almacen().url_descarga(a.archivo_rut_archivo),
+            } for a in nuevos],
+            'already_confirmed': sorted(ya_guardadas),
+            'missing': faltantes,
+        }, status=status.HTTP_201_CREATED if nuevos else status.HTTP_200_OK)
+
+
 # ============================================================
 # CONFIRMAR UPLOAD A S3
 # ============================================================
@@ -300,12 +584,13 @@ class ConfirmUploadView(views.APIView):
             )
             
             print(f"✅ ¡ARCHIVO GUARDADO EN BDD! ID: {archivo.archivo_cod_archivo}")
+            pipeline_miniaturas.encolar([archivo])
             
             return Response({
                 'success': True,
                 'file_id': archivo.archivo_cod_archivo,
                 'filename': filename,
-                'file_url': f"https://{settings.AWS_S3_CUSTOM_DOMAIN}/{s3_key}",
+                'file_url': almacen().url_descarga(s3_key),
             })
             
         except Exception as e:
@@ -335,8 +620,39 @@ class TicketViewSet(viewsets.ModelViewSet):
         
         return Stticket.objects.all().order_by('-ticket_fec_ticket')
 
+    def list(self, request, *args, **kwargs):
+        """
+        Filtros: estado, tipo, asignado_a, usuario, desde, hasta.
+        Con ?page= devuelve una página con conteos por faceta.
+        Con ?fields=a,b,c devuelve solo esas columnas (camino rápido).
+        Para usuarios no staff la respuesta sale de la caché por usuario
+        (api/user_cache.py), invalidada al escribir sus tickets o adjuntos.
+        """
+        params = request.query_params
+        if request.user.is_staff:
+            return Response(self._listar(params))
+        return Response(user_cache.tickets_cacheados(
+            request.user.username, params, lambda: self._listar(params)
+        ))
+
+    def _listar(self, params):
+        qs = self.get_queryset()
+        campos = parsear_campos(params)
+        if usa_paginacion(params):
+            return paginar_con_facetas(qs, params, lambda pagina: serializar_tickets(pagina, campos))
+        return serializar_tickets(filtrar_tickets(qs, params), campos)
+
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        # Posibles duplicados detectados en perform_create (solo informativo)
+        response.data['posibles_duplicados'] = getattr(self, 'posibles_duplicados', [])
+        return response
+
     def perform_create(self, serializer):
         print("\n=== 🛠️ INICIO DEBUG CREACIÓN TICKET ===")
+        assigned_to = None
+        auto_asignado = False
+        instance = None
         try:
             data = self.request.data
             context_data = data.get('context', {})
@@ -348,10 +664,13 @@ class TicketViewSet(viewsets.ModelViewSet):
             user_code_from_token = user.id
 
             preferred_admin = data.get('preferred_admin')
-            assigned_to = None
 
             if preferred_admin and preferred_admin != 'none':
                 assigned_to = preferred_admin
+            else:
+                # Sin preferencia: el admin activo con menos carga
+                assigned_to = motor_asignacion.asignar_automatico()
+                auto_asignado = assigned_to is not None
 
             problem_description = context_data.get('problemDescription', 'N/A')
             final_options_tried = context_data.get('finalOptionsTried', [])
@@ -388,10 +707,36 @@ class TicketViewSet(viewsets.ModelViewSet):
             )
             print("✅ ¡TICKET GUARDADO EXITOSAMENTE EN BDD!")
 
+            if assigned_to and not auto_asignado:
+                motor_asignacion.registrar_cambio(None, None, assigned_to, 'PE')
+
+            # Detección de casi-duplicados: nunca debe bloquear la creación
+            self.posibles_duplicados = []
+            try:
+                indice_duplicados.sincronizar()
+                parecidos = indice_duplicados.buscar(
+                    instance.ticket_asu_ticket,
+                    instance.ticket_des_ticket,
+                    excluir=instance.ticket_cod_ticket,
+                )
+                abiertos = indice_duplicados.vigentes(d['ticket_cod'] for d in parecidos)
+                self.posibles_duplicados = [d for d in parecidos if d['ticket_cod'] in abiertos]
+                indice_duplicados.registrar(instance)
+                if self.posibles_duplicados:
+                    logger.info(
+                        f"🧬 Ticket {instance.ticket_id_ticket} parecido a "
+                        f"{[d['ticket_id'] for d in self.posibles_duplicados]}"
+                    )
+            except Exception as e:
+                logger.warning(f"⚠️ No se pudo revisar duplicados: {e}")
+
             if assigned_to:
                 send_ticket_notification(assigned_to, instance)
 
         except Exception as e:
+            if auto_asignado and instance is None:
+                # Devolver el ticket que se le sumó al admin elegido
+                motor_asignacion.registrar_cambio(assigned_to, 'PE', None, None)
             print("\n" + "="*40)
             print("🔥 ERROR FATAL EN BDD AL CREAR TICKET 🔥")
             print(f"❌ Tipo: {type(e).__name__}")
@@ -407,6 +752,32 @@ class TicketViewSet(viewsets.ModelViewSet):
         serializer = ArchivoSerializer(archivos, many=True)
         return Response(serializer.data)
 
+    @action(detail=True, methods=['get'], url_path='download-zip')
+    def download_zip(self, request, pk=None):
+        """
+        GET /api/tickets/<id>/download-zip/
+        Todos los adjuntos del ticket en un ZIP que se arma mientras se
+        descarga (api/zip_stream.py): nada se guarda entero en memoria ni disco.
+        """
+        ticket = self.get_object()
+        archivos = list(
+            Starchivos.objects.filter(archivo_cod_ticket=ticket).order_by('archivo_fec_archivo', 'archivo_cod_archivo')
+        )
+        if not archivos:
+            return Response({'error': 'El ticket no tiene adjuntos'}, status=status.HTTP_404_NOT_FOUND)
+
+        # Bajo ASGI Django cargaría entero un iterador síncrono
+        bajo_asgi = isinstance(request._request, ASGIRequest)
+        response = StreamingHttpResponse(
+            generar_zip_async(archivos) if bajo_asgi else generar_zip(archivos),
+            content_type='application/zip',
+        )
+        nombre = f"{ticket.ticket_id_ticket or ticket.ticket_cod_ticket}-adjuntos.zip"
+        response['Content-Disposition'] = f'attachment; filename="{nombre}"'
+        response['X-Accel-Buffering'] = 'no'  # que un proxy nginx no lo acumule
+        logger.info(f"📦 ZIP de {len(archivos)} adjunto(s) del ticket {ticket.ticket_cod_ticket} para {request.user.username}")
+        return response
+
     @action(detail=True, methods=['post'])
     def rate(self, request, pk=None):
         # ← FIX: eliminado el código muerto después del return
@@ -417,6 +788,47 @@ class TicketViewSet(viewsets.ModelViewSet):
         return Response({"success": True, "message": "Calificación guardada"})
 
 
+# ============================================================
+# BÚSQUEDA DE TICKETS
+# ============================================================
+class TicketSearchView(views.APIView):
+    """
+    GET /api/tickets/buscar/?q=impresora&limit=20&cursor=<next_cursor>
+    Búsqueda rankeada (tsvector + trigramas). Los usuarios normales solo
+    ven sus propios tickets.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        texto = (request.query_params.get('q') or '').strip()
+        if len(texto) < 2:
+            return Response({'error': 'La búsqueda requiere al menos 2 caracteres'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limite = int(request.query_params.get('limit', LIMITE_POR_DEFECTO))
+        except (TypeError, ValueError):
+            limite = LIMITE_POR_DEFECTO
+
+        usuario = None if request.user.is_staff else request.user.username
+        try:
+            resultados, siguiente = buscar_tickets(
+                texto,
+                usuario=usuario,
+                cursor=request.query_params.get('cursor'),
+                limite=limite,
+            )
+        except CursorInvalido as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.error(f"Error en búsqueda de tickets: {e}")
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        return Response({
+            'results':     resultados,
+            'count':       len(resultados),
+            'next_cursor': siguiente,
+        })
+
+
 # ============================================================
 # VIEWSET DE ARCHIVOS
 # ============================================================
@@ -430,9 +842,7 @@ class ArchivoViewSet(viewsets.ReadOnlyModelViewSet):
     def download(self, request, archivo_cod_archivo=None):
         archivo = self.get_object()
         try:
-            storage = MediaStorage()
-            file_url = storage.url(archivo.archivo_rut_archivo)
-            return redirect(file_url)
+            return redirect(almacen().url_descarga(archivo.archivo_rut_archivo))
         except Exception as e:
             return Response({"error": f"Error al acceder al archivo: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -449,6 +859,10 @@ class LogChatViewSet(viewsets.ModelViewSet):
     serializer_class = LogChatSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    @lectura_replica
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
     def perform_create(self, serializer):
         serializer.save(username=self.request.user.username)
 
@@ -488,74 +902,89 @@ class LogSolvedTicketView(views.APIView):
 # LISTA DE ADMINS Y USUARIOS
 # ============================================================
 class AdminListView(views.APIView):
-    """Devuelve SOLO técnicos/admins"""
+    """Devuelve SOLO técnicos/admins (directorio en memoria, con ETag)"""
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request, *args, **kwargs):
         try:
-            admins_db = Stadmin.objects.filter(
-                admin_activo=True,
-                admin_rol__in=['SISTEMAS_ADMIN', 'admin']
-            )
-            admins = []
-            for admin in admins_db:
-                nombre_completo = admin.admin_username
-                if admin.admin_nombres or admin.admin_apellidos:
-                    nombre_completo = f"{admin.admin_nombres or ''} {admin.admin_apellidos or ''}".strip()
-                admins.append({
-                    'username': admin.admin_username,
-                    'email': admin.admin_correo,
-                    'nombreCompleto': nombre_completo,
-                    'rol': admin.admin_rol
-                })
-            return Response(admins)
+            inst = directorio.instantanea()
+            if no_modificado(request, inst.etag_admins):
+                return con_etag(Response(status=304), inst.etag_admins)
+            return con_etag(Response(inst.admins), inst.etag_admins)
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
 class ActiveUsersListView(views.APIView):
-    """Devuelve usuarios regulares (todos los que NO son admin)"""
+    """
+    Devuelve usuarios regulares (todos los que NO son admin), con ETag.
+    Para listas grandes usar directory/search/ (typeahead).
+    """
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request, *args, **kwargs):
         try:
-            users_db = Stadmin.objects.filter(
-                admin_activo=True
-            ).exclude(
-                admin_rol__in=['SISTEMAS_ADMIN', 'admin']
-            )
-            users = []
-            for u in users_db:
-                nombre_completo = u.admin_username
-                if u.admin_nombres or u.admin_apellidos:
-                    nombre_completo = f"{u.admin_nombres or ''} {u.admin_apellidos or ''}".strip()
-                users.append({
-                    'username': u.admin_username,
-                    'email': u.admin_correo,
-                    'nombreCompleto': nombre_completo,
-                    'rol': u.admin_rol
-                })
-            return Response(users)
+            inst = directorio.instantanea()
+            if no_modificado(request, inst.etag_usuarios):
+                return con_etag(Response(status=304), inst.etag_usuarios)
+            return con_etag(Response(inst.usuarios), inst.etag_usuarios)
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+class DirectorySearchView(views.APIView):
+    """
+    GET /api/directory/search/?q=jua&tipo=usuarios&limit=20
+    Typeahead por prefijo sobre username y nombre completo (sin tildes ni
+    mayúsculas). tipo: admins | usuarios | todos.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        tipo = request.query_params.get('tipo', 'todos')
+        if tipo not in ('admins', 'usuarios', 'todos'):
+            return Response({"error": "tipo debe ser admins, usuarios o todos"}, status=400)
+        try:
+            limite = int(request.query_params.get('limit', LIMITE_BUSQUEDA))
+        except (TypeError, ValueError):
+            limite = LIMITE_BUSQUEDA
+        limite = max(1, min(limite, MAX_LIMITE_BUSQUEDA))
+
+        q = request.query_params.get('q', '')
+        return Response({
+            'query':      q,
+            'resultados': directorio.instantanea().buscar(q, tipo=tipo, limite=limite),
+        })
+
+
 # ============================================================
 # ADMIN TICKET VIEWS
 # ============================================================
 class AdminTicketListView(views.APIView):
     permission_classes = [permissions.IsAuthenticated]
 
+    @lectura_replica
     def get(self, request):
         if not request.user.is_staff:
             return Response({"error": "No autorizado"}, status=status.HTTP_403_FORBIDDEN)
         
         tickets = Stticket.objects.all().order_by('-ticket_fec_ticket')
-        serializer = StticketSerializer(tickets, many=True)
-        return Response(serializer.data)
+        params = request.query_params
+        campos = parsear_campos(params)
+        if usa_paginacion(params):
+            return Response(paginar_con_facetas(
+                tickets, params, lambda pagina: serializar_tickets(pagina, campos)
+            ))
+        return Response(serializar_tickets(filtrar_tickets(tickets, params), campos))
 
 
 class AdminTicketDetailView(views.APIView):
+    """
+    GET/PUT/PATCH /api/admin/tickets/<pk>/
+    El ETag es la versión del ticket. Con If-Match el cambio solo se aplica
+    si nadie lo editó desde entonces; si no, 412 con el ticket actual (ver
+    api/ticket_edit.py).
+    """
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request, pk):
@@ -564,7 +993,7 @@ class AdminTicketDetailView(views.APIView):
         try:
             ticket = Stticket.objects.get(pk=pk)
             serializer = StticketSerializer(ticket)
-            return Response(serializer.data)
+            return con_etag(Response(serializer.data), ticket_edit.etag(ticket))
         except Stticket.DoesNotExist:
             return Response({"error": "Ticket no encontrado"}, status=status.HTTP_404_NOT_FOUND)
 
@@ -574,71 +1003,147 @@ class AdminTicketDetailView(views.APIView):
     def put(self, request, pk):
         if not request.user.is_staff:
             return Response({"error": "No autorizado"}, status=status.HTTP_403_FORBIDDEN)
-    
+
         try:
-            ticket = Stticket.objects.get(pk=pk)
-            data = request.data
-            
-            print(f"🔧 ACTUALIZANDO TICKET {pk}: {data}")
+            columnas = ticket_edit.columnas_de(request.data)
+        except ticket_edit.ErrorEdicion as e:
+            return Response({"error": str(e)}, status=400)
+        version = ticket_edit.version_pedida(request.headers.get('If-Match'), pk)
+        if version is None and settings.TICKETS_EXIGIR_IF_MATCH:
+            return Response({"error": "Falta el header If-Match con el ETag del ticket"}, status=428)
 
-            # ← FIX: guardar admin_anterior ANTES de modificar el ticket
-            admin_anterior = ticket.ticket_asignado_a
+        try:
+            resultado, ticket, admin_anterior, estado_anterior = ticket_edit.actualizar(pk, columnas, version)
+        except Exception as e:
+            logger.error(f"❌ Error update ticket {pk}: {e}")
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-            # 1. Estado
-            status_val = data.get('status') or data.get('ticket_est_ticket')
-            if status_val:
-                ticket.ticket_est_ticket = status_val
-
-            # 2. Usuario Asignado
-            usuario = data.get('ticket_tusua_ticket')
-            if usuario:
-                ticket.ticket_tusua_ticket = usuario
-
-            # 3. Técnico Asignado
-            if 'ticket_asignado_a' in data:
-                ticket.ticket_asignado_a = data['ticket_asignado_a']
-
-            # 4. Observaciones
-            obs = data.get('observation') or data.get('ticket_obs_ticket')
-            if obs:
-                ticket.ticket_obs_ticket = obs
-
-            # 5. Tiempo real de resolución
-            treal = data.get('ticket_treal_ticket')
-            if treal is not None:
-                ticket.ticket_treal_ticket = int(treal)
-
-            # 6. Calificación
-            calificacion = data.get('ticket_calificacion')
-            if calificacion is not None:
-                ticket.ticket_calificacion = calificacion
-
-            ticket.save(update_fields=[
-                'ticket_est_ticket',
-                'ticket_tusua_ticket',
-                'ticket_asignado_a',
-                'ticket_obs_ticket',
-                'ticket_treal_ticket',
-                'ticket_calificacion'
-            ])
-
-            # ← FIX: notificación ANTES del return, solo si cambió el técnico
+        if resultado == ticket_edit.NO_EXISTE:
+            return Response({"error": "Ticket no encontrado"}, status=status.HTTP_404_NOT_FOUND)
+        if resultado == ticket_edit.CONFLICTO:
+            logger.info(f"⚠️ Ticket {pk}: edición de {request.user.username} rechazada (versión {version}, actual {ticket.ticket_ver_ticket})")
+            return con_etag(Response({
+                "error": "Otro usuario modificó el ticket. Revisa los datos actuales y vuelve a intentar.",
+                "ticket": StticketSerializer(ticket).data,
+            }, status=status.HTTP_412_PRECONDITION_FAILED), ticket_edit.etag(ticket))
+
+        if resultado == ticket_edit.ACTUALIZADO:
+            logger.info(f"🔧 Ticket {pk} actualizado por {request.user.username}: {sorted(columnas)} (v{ticket.ticket_ver_ticket})")
+            # Al cerrar (FN) el ticket sale del índice de duplicados
+            indice_duplicados.registrar(ticket)
+            motor_asignacion.registrar_cambio(
+                admin_anterior, estado_anterior,
+                ticket.ticket_asignado_a, ticket.ticket_est_ticket,
+                minutos=ticket.ticket_treal_ticket,
+            )
+            # Notificar solo si cambió el técnico
             nuevo_admin = ticket.ticket_asignado_a
             if nuevo_admin and nuevo_admin != admin_anterior:
                 send_ticket_notification(nuevo_admin, ticket)
-            
-            return Response({
-                "success": True,
-                "message": "Ticket actualizado",
-                "ticket": StticketSerializer(ticket).data
-            })
 
-        except Stticket.DoesNotExist:
-            return Response({"error": "Ticket no encontrado"}, status=status.HTTP_404_NOT_FOUND)
+        return con_etag(Response({
+            "success": True,
+            "message": "Ticket actualizado" if resultado == ticket_edit.ACTUALIZADO else "Sin cambios",
+            "ticket": StticketSerializer(ticket).data
+        }), ticket_edit.etag(ticket))
+
+
+class BulkTicketUpdateView(views.APIView):
+    """
+    POST /api/admin/tickets/bulk/
+        {ids: [1, 2, ...], cambios: {ticket_est_ticket?, ticket_asignado_a?, ticket_obs_ticket?, ticket_treal_ticket?}}
+    Mismo cambio a muchos tickets en UN UPDATE ... RETURNING (ver
+    api/bulk_tickets.py) y una notificación por técnico afectado.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        if not request.user.is_staff:
+            return Response({"error": "No autorizado"}, status=status.HTTP_403_FORBIDDEN)
+        try:
+            admins_validos = {a['username'] for a in directorio.instantanea().admins}
+            ids, columnas = bulk_tickets.validar(request.data.get('ids'), request.data.get('cambios'), admins_validos)
+        except bulk_tickets.ErrorLote as e:
+            return Response({"error": str(e)}, status=400)
+
+        autor = request.user.username
+        try:
+            with transaction.atomic():
+                resultado = bulk_tickets.actualizar(ids, columnas)
+                grupos = bulk_tickets.agrupar_por_admin(resultado, autor=autor)
+
+                def notificar():
+                    for admin, grupo in grupos.items():
+                        send_bulk_notification(admin, grupo, autor)
+                transaction.on_commit(notificar)
         except Exception as e:
-            print(f"❌ Error update: {e}")
+            logger.error(f"❌ Error en actualización masiva: {e}")
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+        for ticket, admin_anterior, estado_anterior in resultado:
+            indice_duplicados.registrar(ticket)
+            motor_asignacion.registrar_cambio(
+                admin_anterior, estado_anterior,
+                ticket.ticket_asignado_a, ticket.ticket_est_ticket,
+                minutos=ticket.ticket_treal_ticket,
+            )
+
+        encontrados = {t.ticket_cod_ticket for t, _, _ in resultado}
+        logger.info(f"🗂️ {autor} actualizó {len(encontrados)} ticket(s) en lote: {sorted(columnas)}")
+        return Response({
+            "success":        True,
+            "actualizados":   len(encontrados),
+            "no_encontrados": [i for i in ids if i not in encontrados],
+            "tickets": [
+                {
+                    "ticket_cod_ticket": t.ticket_cod_ticket,
+                    "ticket_id_ticket":  t.ticket_id_ticket,
+                    "ticket_est_ticket": t.ticket_est_ticket,
+                    "ticket_asignado_a": t.ticket_asignado_a,
+                    "ticket_obs_ticket": t.ticket_obs_ticket,
+                    "ticket_ver_ticket": t.ticket_ver_ticket,
+                }
+                for t, _, _ in resultado
+            ],
+            "notificados": sorted(grupos),
+        })
+
+
+class AdminWorkloadView(views.APIView):
+    """GET /api/admin/carga/ — carga actual por admin, de menor a mayor"""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        if not request.user.is_staff:
+            return Response({"error": "No autorizado"}, status=status.HTTP_403_FORBIDDEN)
+        return Response([
+            {'username': username, 'abiertos': int(puntaje), 'puntaje': round(puntaje, 5)}
+            for username, puntaje in motor_asignacion.snapshot()
+        ])
+
+
+class DuplicateClustersView(views.APIView):
+    """
+    GET /api/admin/tickets/duplicados/?umbral=0.6
+    Grupos de tickets abiertos casi-duplicados, del más grande al más chico.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        if not request.user.is_staff:
+            return Response({"error": "No autorizado"}, status=status.HTTP_403_FORBIDDEN)
+        try:
+            umbral = float(request.query_params.get('umbral', settings.DUPLICADOS_UMBRAL))
+        except (TypeError, ValueError):
+            umbral = settings.DUPLICADOS_UMBRAL
+
+        indice_duplicados.sincronizar()
+        clusters = indice_duplicados.clusters_vigentes(umbral=umbral)
+        return Response({
+            'clusters': clusters,
+            'count':    len(clusters),
+        })
+
 
 # ============================================================
 # REASIGNAR Y ASIGNAR ADMIN
@@ -657,6 +1162,8 @@ class ReassignTicketView(views.APIView):
             if not new_username:
                 return Response({"error": "Username requerido"}, status=status.HTTP_400_BAD_REQUEST)
             
+            # El nuevo dueño se invalida con post_save; el anterior, acá
+            user_cache.invalidar_tickets(ticket.ticket_tusua_ticket)
             ticket.ticket_tusua_ticket = new_username
             ticket.save()
             
@@ -680,9 +1187,14 @@ class AssignAdminView(views.APIView):
         try:
             ticket = Stticket.objects.get(pk=pk)
             admin_username = request.data.get('admin_username')
+            admin_anterior = ticket.ticket_asignado_a
             
             ticket.ticket_asignado_a = admin_username or None
             ticket.save()
+            motor_asignacion.registrar_cambio(
+                admin_anterior, ticket.ticket_est_ticket,
+                ticket.ticket_asignado_a, ticket.ticket_est_ticket,
+            )
             
             return Response({
                 "success": True, 
@@ -699,7 +1211,8 @@ class AssignAdminView(views.APIView):
 class NotificationSoundUploadView(views.APIView):
     """
     PASO 1: Genera presigned URL para subir el sonido.
-    El frontend sube directo a S3, igual que los adjuntos del chat.
+    El frontend sube directo a S3, igual que los adjuntos del chat, y después
+    llama a notifications/sounds/confirm/ (ver api/sonidos.py).
     """
     permission_classes = [permissions.IsAuthenticated]
 
@@ -711,76 +1224,54 @@ class NotificationSoundUploadView(views.APIView):
             if not filename or not filetype:
                 return Response({"error": "filename y filetype son requeridos"}, status=400)
 
-            username = request.user.username
-            file_extension = filename.split('.')[-1].lower() if '.' in filename else 'mp3'
-            s3_key = f"notification_sounds/{username}/custom_notification.{file_extension}"
-
-            s3_client = boto3.client(
-                's3',
-                aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-                aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-                region_name=settings.AWS_S3_REGION_NAME
-            )
-
-            # Generar presigned URL para PUT — igual que generate-presigned-url del chat
-            presigned_url = s3_client.generate_presigned_url(
-                'put_object',
-                Params={
-                    'Bucket': settings.AWS_STORAGE_BUCKET_NAME,
-                    'Key': s3_key,
-                    'ContentType': filetype,
-                },
-                ExpiresIn=3600
-            )
-
-            download_url = f"https://{settings.AWS_S3_CUSTOM_DOMAIN}/{s3_key}"
+            # Clave nueva en cada subida: la URL de descarga cambia con el archivo
+            s3_key = sonidos.clave_nueva(request.user.username, sonidos.formato(filename))
+            subida = almacen().url_subida(s3_key, filetype)
 
             return Response({
-                'upload_url': presigned_url,
-                'download_url': download_url,
+                'upload_url': subida['upload_url'],
+                'download_url': almacen().url_publica(s3_key),
                 's3_key': s3_key,
             })
 
+        except sonidos.ErrorSonido as e:
+            return Response({"error": str(e)}, status=400)
         except Exception as e:
             logger.error(f"Error generando presigned URL para sonido: {e}")
             return Response({"error": str(e)}, status=500)
 
-class NotificationSoundDeleteView(views.APIView):
+class NotificationSoundConfirmView(views.APIView):
     """
-    Elimina el sonido personalizado de S3.
-    delete_object es instantáneo — no hay timeout.
+    PASO 2: POST {s3_key} después del PUT. Un HEAD al almacén y el sonido
+    queda registrado (clave, formato, tamaño, versión) en stsonido.
     """
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request):
+        username = request.user.username
         try:
-            username = request.user.username
-            s3_key = request.data.get('s3_key')
+            registro = sonidos.registrar(username, request.data.get('s3_key'))
+        except sonidos.ErrorSonido as e:
+            return Response({"error": str(e)}, status=400)
+        except Exception as e:
+            logger.error(f"Error confirmando sonido: {e}")
+            return Response({"error": str(e)}, status=500)
 
-            s3_client = boto3.client(
-                's3',
-                aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-                aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-                region_name=settings.AWS_S3_REGION_NAME
-            )
+        cuerpo, etag = sonidos.respuesta_check(username, registro)
+        return con_etag(Response(cuerpo), etag)
 
-            if s3_key:
-                # Eliminar key específico recibido del frontend
-                s3_client.delete_object(
-                    Bucket=settings.AWS_STORAGE_BUCKET_NAME,
-                    Key=s3_key
-                )
-            else:
-                # Eliminar todos los formatos posibles
-                for ext in ['mp3', 'wav', 'ogg', 'm4a']:
-                    try:
-                        s3_client.delete_object(
-                            Bucket=settings.AWS_STORAGE_BUCKET_NAME,
-                            Key=f"notification_sounds/{username}/custom_notification.{ext}"
-                        )
-                    except Exception:
-                        pass
+class NotificationSoundDeleteView(views.APIView):
+    """
+    Elimina el sonido personalizado: el registro y todas las claves del
+    usuario en UNA llamada borrar_varios (delete_objects en S3).
+    """
+    permission_classes = [permissions.IsAuthenticated]
 
+    def post(self, request):
+        try:
+            fallidas = sonidos.eliminar(request.user.username)
+            if fallidas:
+                logger.warning(f"⚠️ No se pudieron borrar: {fallidas}")
             return Response({"success": True})
 
         except Exception as e:
@@ -789,29 +1280,20 @@ class NotificationSoundDeleteView(views.APIView):
 
 class CheckNotificationSoundView(views.APIView):
     """
-    NO llama a S3 — eso causaba el WORKER TIMEOUT.
-    Solo devuelve las URLs posibles; el frontend verifica si cargan.
-    La fuente de verdad es localStorage del frontend.
+    Sonido registrado del usuario: una sola URL (o sound=null) y un ETag.
+    Solo lee stsonido — NO llama a S3 (eso causaba el WORKER TIMEOUT).
+    Con If-None-Match igual al ETag responde 304 sin cuerpo.
     """
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
         try:
             username = request.user.username
-            base_url = f"https://{settings.AWS_S3_CUSTOM_DOMAIN}"
-
-            # Devolver URLs para todos los formatos — el frontend prueba cuál carga
-            possible_urls = {
-                ext: f"{base_url}/notification_sounds/{username}/custom_notification.{ext}"
-                for ext in ['mp3', 'wav', 'ogg', 'm4a']
-            }
-
-            return Response({
-                "success": True,
-                "username": username,
-                "possibleUrls": possible_urls,
-                # El frontend sabe si hay sonido porque lo guardó en localStorage al subir
-            })
+            registro = Stsonido.objects.filter(sonido_usuario=username).first()
+            cuerpo, etag = sonidos.respuesta_check(username, registro)
+            if no_modificado(request, etag):
+                return con_etag(Response(status=304), etag)
+            return con_etag(Response(cuerpo), etag)
 
         except Exception as e:
             logger.error(f"Error en check sound: {e}")
@@ -849,6 +1331,7 @@ class SugerenciaListView(views.APIView):
     """GET /api/admin/sugerencias/ — lista para el admin"""
     permission_classes = [permissions.IsAuthenticated]
 
+    @lectura_replica
     def get(self, request):
         if not request.user.is_staff:
             return Response({'error': 'No autorizado'}, status=403)
@@ -861,6 +1344,7 @@ class SugerenciaListView(views.APIView):
 class ReportesView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @lectura_replica
     def get(self, request):
         days = int(request.GET.get('days', 30))
         fecha_ini = datetime.now() - timedelta(days=days)
@@ -1002,6 +1486,7 @@ class ReportesView(APIView):
             },
             'por_dia': por_dia,
             'admins':  admins_data,
+            'sla':     sla.estadisticas(all_qs, period_qs),
             'meta': {
                 'days':             days,
                 'dias_laborables':  dias_laborables,
@@ -1016,6 +1501,7 @@ class SugerenciasAdminView(views.APIView):
     """
     permission_classes = [permissions.IsAuthenticated]
 
+    @lectura_replica
     def get(self, request):
         if not request.user.is_staff:
             return Response({'error': 'No autorizado'}, status=403)
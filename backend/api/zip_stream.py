@@ -0,0 +1,193 @@
+"""
+Archivo: api/zip_stream.py
+ZIP de todos los adjuntos de un ticket, generado mientras se descarga.
+
+- zipfile escribe sobre un buffer que no se puede rebobinar (_SalidaZip):
+  cada entrada lleva "data descriptor" con CRC/tamaños al final, así que no
+  hace falta saber nada de antemano ni volver atrás.
+- Cada adjunto se lee del almacén en bloques de BLOQUE bytes desde un hilo propio.
+  Hasta ZIP_DESCARGAS_EN_PARALELO archivos se descargan a la vez, y cada uno
+  adelanta como máximo ZIP_BLOQUES_POR_ARCHIVO bloques: la memoria queda
+  acotada (≈ paralelo × bloques × BLOQUE) sin importar el tamaño del ZIP, y
+  el primer byte sale apenas llega el primer bloque del primer archivo.
+- Si el cliente corta la descarga, los hilos lo notan y se detienen.
+- Un archivo que falla no corta el ZIP: se anota en _ERRORES.txt al final.
+"""
+import logging
+import queue
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+from .storage import BLOQUE, almacen, iterar_async
+
+logger = logging.getLogger(__name__)
+
+# Ya vienen comprimidos: deflate solo gastaría CPU
+SIN_COMPRIMIR = {
+    'png', 'jpg', 'jpeg', 'gif', 'webp', 'zip', 'gz', 'tgz', '7z', 'rar', 'mp4', 'mov',
+    'mp3', 'ogg', 'pdf', 'docx', 'xlsx', 'pptx',
+}
+_FIN = object()
+
+
+class _Cancelado(Exception):
+    pass
+
+
+class _SalidaZip:
+    """Destino de zipfile: acumula lo escrito hasta que el generador lo entrega."""
+
+    def __init__(self):
+        self._partes = []
+        self._posicion = 0
+
+    def write(self, datos):
+        self._partes.append(bytes(datos))
+        self._posicion += len(datos)
+        return len(datos)
+
+    def tell(self):
+        return self._posicion
+
+    def flush(self):
+        pass
+
+    def vaciar(self):
+        datos = b''.join(self._partes)
+        self._partes.clear()
+        return datos
+
+
+def nombres_unicos(archivos):
+    """Nombre dentro del ZIP por archivo: 'captura.png', 'captura (2).png', ..."""
+    usados, nombres = set(), []
+    for archivo in archivos:
+        base = (archivo.archivo_nom_archivo or archivo.archivo_rut_archivo.rsplit('/', 1)[-1])
+        base = base.replace('\\', '/').rsplit('/', 1)[-1] or f'archivo-{archivo.archivo_cod_archivo}'
+        raiz, punto, extension = base.rpartition('.')
+        if not punto:
+            raiz, extension = base, ''
+        nombre, n = base, 1
+        while nombre.lower() in usados:
+            n += 1
+            nombre = f"{raiz} ({n}).{extension}" if punto else f"{raiz} ({n})"
+        usados.add(nombre.lower())
+        nombres.append(nombre)
+    return nombres
+
+
+class _Lector:
+    """Descarga un objeto del almacén hacia una cola acotada (el read-ahead)."""
+
+    def __init__(self, s3_key, cancelado):
+        self.s3_key = s3_key
+        self.cola = queue.Queue(maxsize=settings.ZIP_BLOQUES_POR_ARCHIVO)
+        self._cancelado = cancelado
+
+    def _poner(self, elemento):
+        while not self._cancelado.is_set():
+            try:
+                self.cola.put(elemento, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+        raise _Cancelado()
+
+    def __call__(self):
+        try:
+            cuerpo = almacen().abrir(self.s3_key)
+            try:
+                for bloque in iter(lambda: cuerpo.read(BLOQUE), b''):
+                    self._poner(bloque)
+            finally:
+                cuerpo.close()
+            self._poner(_FIN)
+        except _Cancelado:
+            pass
+        except Exception as e:
+            try:
+                self._poner(e)
+            except _Cancelado:
+                pass
+
+    def bloques(self):
+        while True:
+            elemento = self.cola.get()
+            if elemento is _FIN:
+                return
+            if isinstance(elemento, Exception):
+                raise elemento
+            yield elemento
+
+
+def generar_zip(archivos):
+    """
+    Generador de bytes del ZIP con los Starchivos dados (en ese orden).
+    Síncrono: bajo ASGI usar generar_zip_async().
+    """
+    partes = _partes_zip(archivos)
+    try:
+        for datos in partes:
+            if datos:
+                yield datos
+    finally:
+        partes.close()
+
+
+def _partes_zip(archivos):
+    archivos = [a for a in archivos if a.archivo_rut_archivo]
+    nombres = nombres_unicos(archivos)
+    cancelado = threading.Event()
+    salida = _SalidaZip()
+    errores = []
+    paralelo = max(1, settings.ZIP_DESCARGAS_EN_PARALELO)
+    almacen()  # crear el cliente antes de repartirlo entre hilos
+
+    pool = ThreadPoolExecutor(max_workers=paralelo, thread_name_prefix='zip')
+    try:
+        lectores = [_Lector(a.archivo_rut_archivo, cancelado) for a in archivos]
+        # Las descargas se lanzan con `paralelo` de ventaja sobre lo que se escribe
+        for lector in lectores[:paralelo]:
+            pool.submit(lector)
+
+        with zipfile.ZipFile(salida, mode='w', allowZip64=True) as zf:
+            for i, (archivo, nombre, lector) in enumerate(zip(archivos, nombres, lectores)):
+                if i + paralelo < len(lectores):
+                    pool.submit(lectores[i + paralelo])
+
+                info = zipfile.ZipInfo(nombre, date_time=_fecha(archivo))
+                extension = nombre.rsplit('.', 1)[-1].lower() if '.' in nombre else ''
+                info.compress_type = zipfile.ZIP_STORED if extension in SIN_COMPRIMIR else zipfile.ZIP_DEFLATED
+                try:
+                    with zf.open(info, mode='w', force_zip64=True) as destino:
+                        for bloque in lector.bloques():
+                            destino.write(bloque)
+                            yield salida.vaciar()
+                except Exception as e:
+                    # Lo ya escrito queda (archivo truncado); se deja constancia
+                    logger.warning(f"⚠️ ZIP: no se pudo leer {archivo.archivo_rut_archivo}: {e}")
+                    errores.append(f"{nombre}: {e}")
+                yield salida.vaciar()
+
+            if errores:
+                zf.writestr('_ERRORES.txt', 'No se pudieron incluir completos:\n' + '\n'.join(errores) + '\n')
+        yield salida.vaciar()
+    finally:
+        # GeneratorExit si el cliente cortó: liberar los hilos que esperan cola
+        cancelado.set()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _fecha(archivo):
+    fecha = archivo.archivo_fec_archivo
+    if fecha is None or fecha.year < 1980:
+        return (1980, 1, 1, 0, 0, 0)
+    return fecha.timetuple()[:6]
+
+
+def generar_zip_async(archivos):
+    """Versión para ASGI (ver storage.iterar_async)."""
+    return iterar_async(generar_zip(archivos))
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark: costo de conexión por request, antes y después del pool.
+
+Simula N "requests" que hacen una consulta trivial y compara:
+  1. psycopg2.connect() nuevo por request (db_utils.get_postgres_connection)
+  2. db_utils.conexion_pool()
+  3. ORM con CONN_MAX_AGE=0 (una conexión por request, comportamiento anterior)
+  4. ORM con conexiones persistentes (CONN_MAX_AGE + health checks)
+
+Los casos 3 y 4 disparan request_started/request_finished igual que el handler
+de Django, que es donde se cierran o reciclan las conexiones.
+
+Contra el Postgres local la diferencia es menor que contra RDS (sin TLS ni red);
+para medir el caso real usar --database-url con la URL de RDS.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_conexiones --requests 500
+"""
+import argparse
+import os
+import statistics
+import time
+
+from benchmarks.entorno import DATABASE_URL_BENCH
+
+
+def cronometrar(nombre, fn, n):
+    tiempos = []
+    for _ in range(n):
+        inicio = time.perf_counter()
+        fn()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    tiempos.sort()
+    print(f"{nombre:<38} media {statistics.mean(tiempos):7.2f} ms  "
+          f"p50 {tiempos[len(tiempos) // 2]:7.2f} ms  p99 {tiempos[int(len(tiempos) * 0.99) - 1]:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--database-url', default=os.getenv('DATABASE_URL', DATABASE_URL_BENCH))
+    args = parser.parse_args()
+    os.environ['DATABASE_URL'] = args.database_url
+
+    from benchmarks.entorno import configurar
+    configurar(con_s3_local=False)
+
+    from django.core.signals import request_finished, request_started
+    from django.db import connection
+
+    from api.db_utils import conexion_pool, get_postgres_connection
+
+    n = args.requests
+    print("=" * 80)
+    print(f"BENCHMARK DE CONEXIONES — {n} requests simulados")
+    print("=" * 80)
+
+    def sin_pool():
+        conn = get_postgres_connection()
+        with conn.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        conn.close()
+
+    def con_pool():
+        with conexion_pool() as conn, conn.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            conn.rollback()
+
+    def request_orm():
+        request_started.send(sender=None)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        request_finished.send(sender=None)
+
+    cronometrar("psycopg2.connect por request", sin_pool, n)
+    cronometrar("db_utils.conexion_pool()", con_pool, n)
+
+    max_age_original = connection.settings_dict['CONN_MAX_AGE']
+    connection.close()
+    connection.settings_dict['CONN_MAX_AGE'] = 0
+    cronometrar("ORM CONN_MAX_AGE=0", request_orm, n)
+
+    connection.settings_dict['CONN_MAX_AGE'] = max_age_original or 60
+    cronometrar(f"ORM CONN_MAX_AGE={connection.settings_dict['CONN_MAX_AGE']} + health checks",
+                request_orm, n)
+    connection.close()
+
+
+if __name__ == '__main__':
+    main()
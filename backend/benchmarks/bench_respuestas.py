@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark: serialización JSON (stdlib vs orjson) y bytes en la red (sin
+comprimir / gzip / brotli) de los endpoints más pesados.
+
+Pide cada endpoint una vez con el test Client (contra la base de benchmark),
+toma `response.data` de DRF y mide render() con JSONRendererMedido (json de
+la stdlib) y con ORJSONRenderer (mejor de --repeticiones). Después comprime
+el cuerpo como lo haría api/compression.py y, como control, vuelve a pedir
+el endpoint con Accept-Encoding para ver lo que sale de verdad del middleware.
+
+Uso (desde backend/, después de python -m benchmarks.datos):
+    python -m benchmarks.bench_respuestas
+    python -m benchmarks.bench_respuestas --repeticiones 10
+"""
+import argparse
+import time
+
+from benchmarks.entorno import configurar, detener
+from benchmarks.suite import token_bench
+
+ENDPOINTS = [
+    '/api/admin/tickets/',
+    '/api/tickets/',
+    '/api/files/',
+    '/api/logs/',
+    '/api/admin/reportes/',
+    '/api/users/active/',
+]
+
+
+def mejor_tiempo(fn, repeticiones):
+    mejor, resultado = float('inf'), None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = fn()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor, resultado
+
+
+def kb(n):
+    return f"{n / 1024:10,.1f} KB" if n is not None else f"{'-':>13}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--endpoints', nargs='*', default=ENDPOINTS)
+    args = parser.parse_args()
+
+    configurar(con_s3_local=True)
+    from django.conf import settings
+    from django.test import Client
+
+    from api import compression
+    from api.renderers import JSONRendererMedido, ORJSONRenderer
+
+    cliente = Client()
+    cliente.cookies[getattr(settings, 'JWT_AUTH_COOKIE', 'chatbot-auth')] = token_bench()
+    stdlib, rapido = JSONRendererMedido(), ORJSONRenderer()
+
+    print(f"{'endpoint':<26} {'json stdlib':>12} {'orjson':>10} {'x':>6} "
+          f"{'sin comprimir':>13} {'gzip':>13} {'brotli':>13} {'middleware':>13}")
+    for url in args.endpoints:
+        respuesta = cliente.get(url)
+        data = getattr(respuesta, 'data', None)
+        if respuesta.status_code != 200 or data is None:
+            print(f"{url:<26} ⚠️  status {respuesta.status_code} (o no es una vista DRF), se omite")
+            continue
+
+        t_stdlib, _ = mejor_tiempo(lambda: stdlib.render(data), args.repeticiones)
+        t_orjson, cuerpo = mejor_tiempo(lambda: rapido.render(data), args.repeticiones)
+        gzip = len(compression.comprimir(cuerpo, 'gzip'))
+        br = len(compression.comprimir(cuerpo, 'br')) if compression.brotli else None
+
+        en_red = cliente.get(url, HTTP_ACCEPT_ENCODING='br, gzip')
+        codificacion = en_red.get('Content-Encoding', 'identity')
+
+        print(f"{url:<26} {t_stdlib * 1000:10.1f}ms {t_orjson * 1000:8.1f}ms {t_stdlib / t_orjson:5.1f}x "
+              f"{kb(len(cuerpo))} {kb(gzip)} {kb(br)} {kb(len(en_red.content))} ({codificacion})")
+
+    detener()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark: StticketSerializer vs camino rápido .values_list() (api/read_models.py)
+
+Inserta N tickets sintéticos (10k por defecto) con 0-2 adjuntos cada uno
+dentro de una transacción, mide filas/segundo para cada camino y al final
+hace ROLLBACK: la base queda igual que antes.
+
+Uso (desde backend/, con DATABASE_URL apuntando a un Postgres con soporte_ti):
+    python benchmarks/bench_serializers.py --tickets 10000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection, transaction  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+
+from api.models import Stticket, Starchivos  # noqa: E402
+from api.read_models import filas_tickets  # noqa: E402
+from api.serializers import StticketSerializer  # noqa: E402
+
+CAMPOS_LISTA = ['ticket_cod_ticket', 'ticket_id_ticket', 'ticket_asu_ticket',
+                'ticket_est_ticket', 'ticket_asignado_a', 'ticket_fec_ticket']
+
+
+class Rollback(Exception):
+    pass
+
+
+def generar(n):
+    tickets = [
+        Stticket(
+            ticket_id_ticket=f"BENCH-{i:07d}",
+            ticket_des_ticket=f"Descripción sintética del ticket {i} " * 4,
+            ticket_tip_ticket='Software' if i % 2 else 'Hardware',
+            ticket_est_ticket=('PE', 'PR', 'FN')[i % 3],
+            ticket_asu_ticket=f"Asunto {i % 40}",
+            ticket_tusua_ticket=f"usuario{i % 500}",
+            ticket_asignado_a=f"admin{i % 25}",
+        )
+        for i in range(n)
+    ]
+    tickets = Stticket.objects.bulk_create(tickets, batch_size=2000)
+    archivos = [
+        Starchivos(
+            archivo_cod_ticket=t,
+            archivo_nom_archivo=f"captura_{j}.png",
+            archivo_tip_archivo='png',
+            archivo_tam_archivo=123456,
+            archivo_rut_archivo=f"chatbot-uploads/tickets/{t.ticket_cod_ticket}/bench-{j}.png",
+            archivo_usua_archivo=t.ticket_tusua_ticket,
+        )
+        for i, t in enumerate(tickets) for j in range(i % 3)
+    ]
+    Starchivos.objects.bulk_create(archivos, batch_size=2000)
+    return [t.ticket_cod_ticket for t in tickets]
+
+
+def medir(nombre, fn, n):
+    with CaptureQueriesContext(connection) as ctx:
+        inicio = time.perf_counter()
+        filas = fn()
+        segundos = time.perf_counter() - inicio
+    assert len(filas) == n, f"{nombre}: {len(filas)} filas, se esperaban {n}"
+    print(f"{nombre:<42} {segundos:8.3f}s  {n / segundos:12,.0f} filas/s  {len(ctx.captured_queries):6d} queries")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--tickets', type=int, default=10000)
+    args = parser.parse_args()
+    n = args.tickets
+
+    print("=" * 80)
+    print(f"BENCHMARK DE SERIALIZACIÓN — {n} tickets")
+    print("=" * 80)
+
+    try:
+        with transaction.atomic():
+            ids = generar(n)
+            qs = Stticket.objects.filter(ticket_cod_ticket__in=ids).order_by('-ticket_fec_ticket')
+
+            medir("StticketSerializer (completo + archivos)",
+                  lambda: StticketSerializer(qs, many=True).data, n)
+            medir("StticketSerializer (fields=lista)",
+                  lambda: StticketSerializer(qs, many=True, fields=CAMPOS_LISTA).data, n)
+            medir("values_list (fields=lista)",
+                  lambda: filas_tickets(qs, CAMPOS_LISTA), n)
+            medir("values_list (fields=lista + archivos)",
+                  lambda: filas_tickets(qs, CAMPOS_LISTA + ['archivos']), n)
+            raise Rollback()
+    except Rollback:
+        print("\n↩️  Datos sintéticos descartados (ROLLBACK)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Compara dos resultados de benchmarks/suite.py.
+
+Uso (desde backend/):
+    python -m benchmarks.comparar resultados/abc123-....json resultados/def456-....json
+    python -m benchmarks.comparar base.json nuevo.json --umbral 15
+
+Sale con código 1 si alguna ruta empeoró más que --umbral (% en p50) o si
+aumentó la cantidad de consultas SQL.
+"""
+import argparse
+import json
+import sys
+
+
+def cargar(ruta):
+    with open(ruta, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def delta_pct(antes, despues):
+    if not antes:
+        return None
+    return (despues - antes) / antes * 100
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compara dos corridas de la suite de benchmarks')
+    parser.add_argument('base')
+    parser.add_argument('nuevo')
+    parser.add_argument('--umbral', type=float, default=10.0, help='% de empeoramiento de p50 tolerado')
+    args = parser.parse_args()
+
+    base, nuevo = cargar(args.base), cargar(args.nuevo)
+    print(f"Base:  {base['commit']} ({base['fecha']})")
+    print(f"Nuevo: {nuevo['commit']} ({nuevo['fecha']})\n")
+    print(f"{'ruta':<42} {'p50 base':>10} {'p50 nuevo':>10} {'Δ%':>8} {'SQL base':>9} {'SQL nuevo':>9}")
+
+    regresiones = []
+    for clave in sorted(set(base['resultados']) | set(nuevo['resultados'])):
+        a = base['resultados'].get(clave)
+        b = nuevo['resultados'].get(clave)
+        if not a or not b or 'error' in a or 'error' in b:
+            estado = 'solo en base' if not b else 'solo en nuevo' if not a else 'error'
+            print(f"{clave:<42} {estado}")
+            continue
+        d = delta_pct(a['p50_ms'], b['p50_ms'])
+        marca = ''
+        if d is not None and d > args.umbral:
+            marca = ' ⚠️'
+            regresiones.append(clave)
+        if b['consultas_sql'] > a['consultas_sql']:
+            marca += ' +SQL'
+            if clave not in regresiones:
+                regresiones.append(clave)
+        print(f"{clave:<42} {a['p50_ms']:>10.2f} {b['p50_ms']:>10.2f} "
+              f"{(d if d is not None else 0):>+8.1f} {a['consultas_sql']:>9.1f} {b['consultas_sql']:>9.1f}{marca}")
+
+    if regresiones:
+        print(f"\n❌ {len(regresiones)} regresiones: {', '.join(regresiones)}")
+        return 1
+    print("\n✅ Sin regresiones")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Generador determinístico de datos sintéticos para benchmarks.
+
+Crea el esquema soporte_ti (si no existe), aplica las migraciones y carga
+con COPY (en streaming, sin armar todo en memoria):
+    100k Stticket, 300k Starchivos, 2M Stlogchat, 500 Stadmin, 200 Stsugerencia
+
+Misma semilla => mismos datos, así los resultados son comparables entre commits.
+Los IDs son explícitos (1..N) para que los escenarios de suite.py puedan
+apuntar a tickets/archivos concretos.
+
+Uso (desde backend/):
+    docker compose -f benchmarks/docker-compose.bench.yml up -d
+    python -m benchmarks.datos --seed 42
+    python -m benchmarks.datos --tickets 1000 --archivos 3000 --logs 20000   # rápido
+"""
+import argparse
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from benchmarks.entorno import configurar
+
+# Fecha fija: los datos no dependen del día en que se generan
+FECHA_BASE = datetime(2026, 1, 1, 8, 0, 0)
+DIAS_HISTORIA = 365
+
+NUM_ADMINS_TI = 50   # De los Stadmin, cuántos tienen rol de admin
+
+ASUNTOS = [
+    'Impresora no imprime', 'Sin acceso a internet', 'Correo no sincroniza', 'Olvidé mi contraseña',
+    'VPN no conecta', 'Outlook se cierra', 'Pantalla azul', 'Equipo lento', 'Teclado dañado',
+    'Mouse no funciona', 'No abre Excel', 'Error en SAP', 'Instalar software', 'Carpeta compartida',
+    'Escáner no detecta', 'Teams sin audio', 'Cámara no funciona', 'Licencia de Office',
+    'Actualización de Windows', 'Disco lleno', 'Proyector sala', 'Wifi intermitente',
+    'Telefonía IP', 'Acceso a sistema contable', 'Virus detectado', 'Reinstalar equipo',
+    'Monitor parpadea', 'Batería no carga', 'Cable de red', 'Permisos de usuario',
+    'Backup de archivos', 'Firma de correo', 'Calendario compartido', 'Drivers de impresora',
+    'Navegador no abre', 'Certificado SSL', 'Token de banco', 'Usuario bloqueado',
+    'Sonido no funciona', 'Configurar celular',
+]
+PALABRAS = (
+    'no funciona desde esta mañana el equipo de la oficina muestra un error al abrir '
+    'el sistema ya reinicié y sigue igual urgente por favor revisar piso planta '
+    'bodega gerencia contabilidad ventas mensaje pantalla conexión lenta archivo'
+).split()
+ACCIONES = ['select_category', 'select_subcategory', 'option_tried', 'create_ticket',
+            'solved', 'feedback', 'open_chat', 'close_chat']
+EXTENSIONES = [('png', 'png'), ('jpg', 'jpeg'), ('pdf', 'pdf'), ('log', 'plain'), ('zip', 'zip')]
+
+DDL = r"""
+CREATE SCHEMA IF NOT EXISTS soporte_ti;
+
+CREATE TABLE IF NOT EXISTS soporte_ti.stadmin (
+    admin_id SERIAL PRIMARY KEY,
+    admin_username VARCHAR(150) UNIQUE NOT NULL,
+    admin_correo VARCHAR(254),
+    admin_nombres VARCHAR(150),
+    admin_apellidos VARCHAR(150),
+    admin_rol VARCHAR(50),
+    admin_activo BOOLEAN DEFAULT TRUE,
+    admin_fec_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS soporte_ti.stticket (
+    ticket_cod_ticket SERIAL PRIMARY KEY,
+    ticket_id_ticket VARCHAR(50) UNIQUE,
+    ticket_des_ticket TEXT,
+    ticket_tip_ticket VARCHAR(50),
+    ticket_est_ticket VARCHAR(2),
+    ticket_asu_ticket VARCHAR(255),
+    ticket_fec_ticket TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    ticket_tusua_ticket VARCHAR(100),
+    ticket_cie_ticket VARCHAR(255),
+    ticket_asignado_a VARCHAR(100),
+    ticket_preferencia_usuario VARCHAR(100),
+    ticket_calificacion INTEGER,
+    ticket_treal_ticket INTEGER,
+    ticket_obs_ticket TEXT
+);
+
+CREATE TABLE IF NOT EXISTS soporte_ti.starchivos (
+    archivo_cod_archivo SERIAL PRIMARY KEY,
+    archivo_cod_ticket INTEGER REFERENCES soporte_ti.stticket(ticket_cod_ticket),
+    archivo_nom_archivo VARCHAR(255),
+    archivo_tip_archivo VARCHAR(50),
+    archivo_tam_archivo BIGINT,
+    archivo_rut_archivo VARCHAR(500),
+    archivo_usua_archivo VARCHAR(100),
+    archivo_fec_archivo TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_archivo_ticket ON soporte_ti.starchivos(archivo_cod_ticket);
+
+CREATE TABLE IF NOT EXISTS soporte_ti.stlogchat (
+    log_cod_log SERIAL PRIMARY KEY,
+    session_id VARCHAR(255),
+    username VARCHAR(100),
+    action_type VARCHAR(100),
+    action_value TEXT,
+    bot_response TEXT,
+    log_fec_log TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS "Stsugerencia" (
+    sug_cod SERIAL PRIMARY KEY,
+    sug_tipo VARCHAR(10) NOT NULL,
+    sug_descripcion TEXT NOT NULL,
+    sug_usuario VARCHAR(100) NOT NULL,
+    sug_fecha TIMESTAMP NOT NULL,
+    sug_leida BOOLEAN NOT NULL,
+    sug_estado VARCHAR(20) NOT NULL,
+    sug_comentario_admin TEXT
+);
+"""
+
+TABLAS = ['soporte_ti.starchivos', 'soporte_ti.stlogchat', 'soporte_ti.stticket',
+          'soporte_ti.stadmin', '"Stsugerencia"']
+
+
+class FuenteCopy:
+    """Adapta un generador de líneas a la interfaz read() que pide COPY."""
+
+    def __init__(self, lineas):
+        self._lineas = lineas
+        self._buffer = ''
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            try:
+                self._buffer += next(self._lineas)
+            except StopIteration:
+                break
+        if size < 0:
+            size = len(self._buffer)
+        trozo, self._buffer = self._buffer[:size], self._buffer[size:]
+        return trozo
+
+    def readline(self):
+        return self.read(65536)
+
+
+def _campo(valor):
+    """Formato de texto de COPY: \\N para NULL y escapes mínimos."""
+    if valor is None:
+        return r'\N'
+    if isinstance(valor, bool):
+        return 't' if valor else 'f'
+    if isinstance(valor, datetime):
+        return valor.isoformat(sep=' ')
+    return str(valor).replace('\\', '\\\\').replace('\t', ' ').replace('\n', '\\n').replace('\r', ' ')
+
+
+def _linea(*valores):
+    return '\t'.join(_campo(v) for v in valores) + '\n'
+
+
+def _fecha(rng):
+    return FECHA_BASE - timedelta(seconds=rng.randrange(DIAS_HISTORIA * 86400))
+
+
+def nombre_admin(i):
+    return f"admin{i:04d}"
+
+
+def filas_admins(rng, n):
+    for i in range(1, n + 1):
+        rol = 'SISTEMAS_ADMIN' if i <= NUM_ADMINS_TI else 'USUARIO'
+        yield _linea(i, nombre_admin(i), f"{nombre_admin(i)}@bench.local", f"Nombre{i}",
+                     f"Apellido{i}", rol, rng.random() > 0.02, _fecha(rng))
+
+
+def filas_tickets(rng, n, num_usuarios):
+    num_admins = min(NUM_ADMINS_TI, num_usuarios)
+    for i in range(1, n + 1):
+        fecha = _fecha(rng)
+        estado = rng.choices(['PE', 'PR', 'FN'], weights=[15, 10, 75])[0]
+        asunto = rng.choice(ASUNTOS)
+        descripcion = f"{asunto}. " + ' '.join(rng.choice(PALABRAS) for _ in range(rng.randint(8, 40)))
+        asignado = nombre_admin(rng.randint(1, num_admins)) if rng.random() > 0.05 else None
+        creador = nombre_admin(rng.randint(num_admins + 1, max(num_usuarios, num_admins + 1)))
+        treal = rng.randint(5, 480) if estado == 'FN' else None
+        calificacion = rng.randint(1, 5) if estado == 'FN' and rng.random() < 0.6 else None
+        yield _linea(
+            i, f"TKT-{fecha:%Y%m%d}-{i:07d}", descripcion, rng.choice(['Software', 'Hardware']),
+            estado, asunto, fecha, creador, str(i % 1000), asignado, asignado if rng.random() < 0.3 else None,
+            calificacion, treal, 'Resuelto en sitio' if estado == 'FN' else None,
+        )
+
+
+def filas_archivos(rng, n, num_tickets):
+    for i in range(1, n + 1):
+        ticket = rng.randint(1, num_tickets)
+        ext, tipo = rng.choice(EXTENSIONES)
+        clave = uuid.UUID(int=rng.getrandbits(128))
+        yield _linea(i, ticket, f"adjunto_{i}.{ext}", tipo, rng.randint(1_000, 8_000_000),
+                     f"chatbot-uploads/tickets/{ticket}/{clave}.{ext}", nombre_admin(rng.randint(1, 500)),
+                     _fecha(rng))
+
+
+def filas_logs(rng, n, num_usuarios):
+    for i in range(1, n + 1):
+        usuario = nombre_admin(rng.randint(1, num_usuarios))
+        yield _linea(i, f"sess-{i // 12:08d}", usuario, rng.choice(ACCIONES),
+                     rng.choice(ASUNTOS), 'Respuesta del asistente', _fecha(rng))
+
+
+def filas_sugerencias(rng, n, num_usuarios):
+    for i in range(1, n + 1):
+        yield _linea(i, rng.choice(['BUG', 'MEJORA', 'OTRO']), f"Sugerencia sintética {i}",
+                     nombre_admin(rng.randint(1, num_usuarios)), _fecha(rng), rng.random() < 0.5,
+                     'PENDIENTE', None)
+
+
+def copiar(cursor, tabla, columnas, lineas):
+    inicio = time.perf_counter()
+    cursor.copy_expert(f"COPY {tabla} ({', '.join(columnas)}) FROM STDIN", FuenteCopy(lineas))
+    print(f"   {tabla:<26} {cursor.rowcount:>10,} filas  {time.perf_counter() - inicio:6.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Carga datos sintéticos para benchmarks')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--tickets', type=int, default=100_000)
+    parser.add_argument('--archivos', type=int, default=300_000)
+    parser.add_argument('--logs', type=int, default=2_000_000)
+    parser.add_argument('--admins', type=int, default=500)
+    parser.add_argument('--sugerencias', type=int, default=200)
+    args = parser.parse_args()
+
+    configurar(con_s3_local=False)
+    from django.core.management import call_command
+    from django.db import connection, transaction
+
+    print("🏗️  Creando esquema y aplicando migraciones...")
+    with connection.cursor() as cur:
+        cur.execute(DDL)
+    call_command('migrate', interactive=False, verbosity=0)
+
+    rng = random.Random(args.seed)
+    print(f"🎲 Generando datos (seed={args.seed})...")
+    with transaction.atomic(), connection.cursor() as cur:
+        cur.execute(f"TRUNCATE {', '.join(TABLAS)} RESTART IDENTITY CASCADE")
+        copiar(cur, 'soporte_ti.stadmin',
+               ['admin_id', 'admin_username', 'admin_correo', 'admin_nombres', 'admin_apellidos',
+                'admin_rol', 'admin_activo', 'admin_fec_registro'],
+               filas_admins(rng, args.admins))
+        copiar(cur, 'soporte_ti.stticket',
+               ['ticket_cod_ticket', 'ticket_id_ticket', 'ticket_des_ticket', 'ticket_tip_ticket',
+                'ticket_est_ticket', 'ticket_asu_ticket', 'ticket_fec_ticket', 'ticket_tusua_ticket',
+                'ticket_cie_ticket', 'ticket_asignado_a', 'ticket_preferencia_usuario',
+                'ticket_calificacion', 'ticket_treal_ticket', 'ticket_obs_ticket'],
+               filas_tickets(rng, args.tickets, args.admins))
+        copiar(cur, 'soporte_ti.starchivos',
+               ['archivo_cod_archivo', 'archivo_cod_ticket', 'archivo_nom_archivo', 'archivo_tip_archivo',
+                'archivo_tam_archivo', 'archivo_rut_archivo', 'archivo_usua_archivo', 'archivo_fec_archivo'],
+               filas_archivos(rng, args.archivos, args.tickets))
+        copiar(cur, 'soporte_ti.stlogchat',
+               ['log_cod_log', 'session_id', 'username', 'action_type', 'action_value',
+                'bot_response', 'log_fec_log'],
+               filas_logs(rng, args.logs, args.admins))
+        copiar(cur, '"Stsugerencia"',
+               ['sug_cod', 'sug_tipo', 'sug_descripcion', 'sug_usuario', 'sug_fecha',
+                'sug_leida', 'sug_estado', 'sug_comentario_admin'],
+               filas_sugerencias(rng, args.sugerencias, args.admins))
+
+        # Las secuencias deben continuar después de los IDs explícitos
+        for tabla, pk in [('soporte_ti.stadmin', 'admin_id'), ('soporte_ti.stticket', 'ticket_cod_ticket'),
+                          ('soporte_ti.starchivos', 'archivo_cod_archivo'), ('soporte_ti.stlogchat', 'log_cod_log'),
+                          ('"Stsugerencia"', 'sug_cod')]:
+            cur.execute(f"SELECT setval(pg_get_serial_sequence('{tabla}', '{pk}'), "
+                        f"GREATEST((SELECT max({pk}) FROM {tabla}), 1))")
+
+    with connection.cursor() as cur:
+        cur.execute("ANALYZE")
+    print("✅ Datos listos")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Suite de benchmarks de endpoints.
+
+Recorre TODAS las rutas de api/urls.py, ejecuta uno o más escenarios por
+ruta con el test Client de Django (en proceso, sin red) contra la base de
+benchmark y un S3 local (moto), y mide:
+    - latencia p50 / p95 / p99 / media (ms)
+    - throughput secuencial (req/s)
+    - consultas SQL por request
+
+Guarda un JSON en benchmarks/resultados/<commit>-<fecha>.json que se compara
+con benchmarks/comparar.py. Las rutas sin escenario se reportan como
+"sin_escenario" para que nadie agregue un endpoint sin medirlo.
+
+Uso (desde backend/, después de python -m benchmarks.datos):
+    python -m benchmarks.suite
+    python -m benchmarks.suite --solo admin-tickets ticket-list --iteraciones 50
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.entorno import BACKEND_DIR, BUCKET_BENCH, configurar, detener
+
+USUARIO_BENCH = 'admin0001'   # Admin (SISTEMAS_ADMIN) creado por benchmarks.datos
+TICKET = 1
+ARCHIVO = 1
+SUGERENCIA = 1
+
+
+# Escenarios por nombre de ruta. Cada escenario:
+#   metodo, kwargs (de la URL), query, data, headers (META del test Client),
+#   iteraciones (opcional, para los pesados)
+ESCENARIOS = {
+    'sugerencias-create':       [{'metodo': 'post', 'data': {'tipo': 'MEJORA', 'descripcion': 'Benchmark'}}],
+    'sugerencias-admin':        [{'metodo': 'get'}],
+    'sugerencias-admin-detail': [{'metodo': 'patch', 'kwargs': {'pk': SUGERENCIA}, 'data': {'estado': 'EN_PROCESO'}}],
+    'admin-reportes':           [{'metodo': 'get', 'query': {'days': 30}, 'iteraciones': 5}],
+    'log-solved-ticket':        [{'metodo': 'post', 'data': {'context': {'categoryKey': 'software', 'subcategoryKey': 'Bench'}}}],
+    'ticket-search':            [{'metodo': 'get', 'query': {'q': 'impresora'}},
+                                 {'metodo': 'get', 'query': {'q': 'TKT-2025'}, 'nombre': 'id-parcial'}],
+    'generate-presigned-url':   [{'metodo': 'post', 'kwargs': {'ticket_id': TICKET},
+                                  'data': {'filename': 'bench.png', 'filetype': 'image/png', 'filesize': 1024}}],
+    'confirm-upload':           [{'metodo': 'post', 'kwargs': {'ticket_id': TICKET},
+                                  'data': {'s3_key': f'chatbot-uploads/tickets/{TICKET}/bench.png',
+                                           'filename': 'bench.png', 'filetype': 'image/png', 'filesize': 1024}}],
+    'presign-batch':            [{'metodo': 'post', 'kwargs': {'ticket_id': TICKET},
+                                  'data': {'files': [{'filename': f'bench{i}.png', 'filetype': 'image/png',
+                                                      'filesize': 1024} for i in range(5)]
+                                           + [{'filename': 'grabacion.mp4', 'filetype': 'video/mp4',
+                                               'filesize': 200 * 1024 * 1024}]}}],
+    'confirm-batch':            [{'metodo': 'post', 'kwargs': {'ticket_id': TICKET},
+                                  'data': {'files': [{'s3_key': f'chatbot-uploads/tickets/{TICKET}/bench{i}.png',
+                                                      'filename': f'bench{i}.png'} for i in range(5)]}}],
+    'multipart-upload':         [{'metodo': 'post', 'kwargs': {'ticket_id': TICKET, 'accion': 'resume'},
+                                  'data': {'s3_key': f'chatbot-uploads/tickets/{TICKET}/inexistente.mp4',
+                                           'upload_id': 'inexistente', 'filesize': 200 * 1024 * 1024}}],
+    'admin-list':               [{'metodo': 'get'}],
+    'active-users':             [{'metodo': 'get'}],
+    'directory-search':         [{'metodo': 'get', 'query': {'q': 'adm', 'tipo': 'todos'}}],
+    'admin-workload':           [{'metodo': 'get'}],
+    'admin-tickets':            [{'metodo': 'get', 'iteraciones': 1, 'nombre': 'completo'},
+                                 {'metodo': 'get', 'query': {'page': 1, 'page_size': 50}, 'nombre': 'pagina'},
+                                 {'metodo': 'get', 'query': {'page': 1, 'page_size': 50, 'estado': 'PE',
+                                                             'fields': 'ticket_cod_ticket,ticket_id_ticket,'
+                                                                       'ticket_asu_ticket,ticket_est_ticket'},
+                                  'nombre': 'pagina-sparse'}],
+    'new-tickets-polling':      [{'metodo': 'get', 'query': {'since': '2025-12-01T00:00:00Z'}}],
+    'duplicate-clusters':       [{'metodo': 'get', 'iteraciones': 3}],
+    'admin-tickets-bulk':       [{'metodo': 'post', 'data': {'ids': list(range(1, 51)),
+                                                          'cambios': {'ticket_obs_ticket': 'bench'}}}],
+    'admin-ticket-detail':      [{'metodo': 'get', 'kwargs': {'pk': TICKET}},
+                                 {'metodo': 'patch', 'kwargs': {'pk': TICKET}, 'data': {'ticket_obs_ticket': 'bench'},
+                                  'nombre': 'patch'},
+                                 {'metodo': 'patch', 'kwargs': {'pk': TICKET}, 'data': {'ticket_obs_ticket': 'bench2'},
+                                  'headers': {'HTTP_IF_MATCH': f'"{TICKET}-0"'}, 'nombre': 'if-match-viejo'}],
+    'reassign-ticket':          [{'metodo': 'post', 'kwargs': {'pk': TICKET}, 'data': {'username': 'admin0100'}}],
+    'assign-admin':             [{'metodo': 'post', 'kwargs': {'pk': TICKET}, 'data': {'admin_username': 'admin0002'}}],
+    'set-auth-cookie':          [{'metodo': 'post', 'data': {'token': '__TOKEN__'}}],
+    'debug-token':              [{'metodo': 'get'}],
+    'upload-notification-sound':  [{'metodo': 'post', 'data': {'filename': 'a.mp3', 'filetype': 'audio/mpeg'}}],
+    'delete-notification-sound':  [{'metodo': 'post', 'data': {}}],
+    'get-notification-sound':     [{'metodo': 'get'}],
+    'notifications-sound-upload': [{'metodo': 'post', 'data': {'filename': 'a.mp3', 'filetype': 'audio/mpeg'}}],
+    'notifications-sound-confirm': [{'metodo': 'post', 'data': {'s3_key': f'notification_sounds/{USUARIO_BENCH}/'
+                                                                 'custom_notification-000000000000.mp3'}}],
+    'notifications-sound-delete': [{'metodo': 'post', 'data': {}}],
+    'notifications-sound-check':  [{'metodo': 'get'}],
+    'almacen-local':            [{'metodo': 'get', 'kwargs': {'clave': f'chatbot-uploads/tickets/{TICKET}/bench.png'},
+                                  'query': {'expira': 0, 'firma': 'x'}}],
+    'api-root':                 [{'metodo': 'get'}],
+    'ticket-list':              [{'metodo': 'get', 'iteraciones': 1, 'nombre': 'completo'},
+                                 {'metodo': 'get', 'query': {'page': 1, 'page_size': 50}, 'nombre': 'pagina'}],
+    'ticket-detail':            [{'metodo': 'get', 'kwargs': {'pk': TICKET}}],
+    'ticket-files':             [{'metodo': 'get', 'kwargs': {'pk': TICKET}}],
+    'ticket-download-zip':      [{'metodo': 'get', 'kwargs': {'pk': TICKET}, 'iteraciones': 5}],
+    'ticket-rate':              [{'metodo': 'post', 'kwargs': {'pk': TICKET}, 'data': {'rating': 5}}],
+    'archivo-list':             [{'metodo': 'get', 'iteraciones': 1}],
+    'archivo-detail':           [{'metodo': 'get', 'kwargs': {'archivo_cod_archivo': ARCHIVO}}],
+    'archivo-download':         [{'metodo': 'get', 'kwargs': {'archivo_cod_archivo': ARCHIVO}}],
+    'archivo-view':             [{'metodo': 'get', 'kwargs': {'archivo_cod_archivo': ARCHIVO}}],
+    'logchat-list':             [{'metodo': 'get', 'iteraciones': 1}],
+    'logchat-detail':           [{'metodo': 'get', 'kwargs': {'pk': 1}}],
+}
+
+
+def token_bench():
+    import jwt
+    from django.conf import settings
+    payload = {
+        'username': USUARIO_BENCH,
+        'rol_nombre': 'SISTEMAS_ADMIN',
+        'email': f'{USUARIO_BENCH}@bench.local',
+        'nombre_completo': 'Nombre1 Apellido1',
+        'exp': datetime.utcnow() + timedelta(hours=12),
+    }
+    return jwt.encode(payload, settings.SECRET_KEY, algorithm='HS256')
+
+
+def rutas_api():
+    """[(nombre, patrón)] de todas las rutas con nombre bajo api/urls.py."""
+    from django.urls import URLPattern, URLResolver
+    import api.urls
+
+    rutas = []
+
+    def recorrer(patrones, prefijo=''):
+        for p in patrones:
+            if isinstance(p, URLResolver):
+                recorrer(p.url_patterns, prefijo + str(p.pattern))
+            elif isinstance(p, URLPattern) and p.name:
+                rutas.append((p.name, prefijo + str(p.pattern)))
+
+    recorrer(api.urls.urlpatterns)
+    # El router genera variantes con sufijo de formato; se mide solo una
+    vistas, unicas = set(), []
+    for nombre, patron in rutas:
+        if nombre not in vistas:
+            vistas.add(nombre)
+            unicas.append((nombre, patron))
+    return unicas
+
+
+def percentil(valores, p):
+    orden = sorted(valores)
+    k = (len(orden) - 1) * p / 100
+    i = int(k)
+    return orden[i] if i + 1 >= len(orden) else orden[i] + (orden[i + 1] - orden[i]) * (k - i)
+
+
+def ejecutar(cliente, escenario, token, iteraciones, calentamiento, max_segundos):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from django.urls import reverse
+
+    url = '/api' + reverse(escenario['ruta'], urlconf='api.urls', kwargs=escenario.get('kwargs'))
+    metodo = getattr(cliente, escenario['metodo'])
+    data = escenario.get('data')
+    if data and data.get('token') == '__TOKEN__':
+        data = {**data, 'token': token}
+
+    headers = escenario.get('headers') or {}
+
+    def llamar():
+        if escenario['metodo'] == 'get':
+            return metodo(url, escenario.get('query') or {}, **headers)
+        return metodo(url, data=json.dumps(data or {}), content_type='application/json', **headers)
+
+    iteraciones = escenario.get('iteraciones', iteraciones)
+    for _ in range(min(calentamiento, iteraciones)):
+        llamar()
+
+    latencias, consultas, bytes_resp, estados = [], [], [], set()
+    inicio_total = time.perf_counter()
+    for _ in range(iteraciones):
+        with CaptureQueriesContext(connection) as ctx:
+            inicio = time.perf_counter()
+            respuesta = llamar()
+            contenido = b''.join(respuesta) if respuesta.streaming else respuesta.content
+            latencias.append((time.perf_counter() - inicio) * 1000)
+        consultas.append(len(ctx.captured_queries))
+        bytes_resp.append(len(contenido))
+        estados.add(respuesta.status_code)
+        if time.perf_counter() - inicio_total > max_segundos:
+            break
+    total = time.perf_counter() - inicio_total
+
+    return {
+        'url':              url,
+        'metodo':           escenario['metodo'].upper(),
+        'iteraciones':      len(latencias),
+        'status':           sorted(estados),
+        'p50_ms':           round(percentil(latencias, 50), 3),
+        'p95_ms':           round(percentil(latencias, 95), 3),
+        'p99_ms':           round(percentil(latencias, 99), 3),
+        'media_ms':         round(statistics.fmean(latencias), 3),
+        'throughput_rps':   round(len(latencias) / total, 2) if total else None,
+        'consultas_sql':    round(statistics.fmean(consultas), 1),
+        'bytes_respuesta':  int(statistics.fmean(bytes_resp)),
+    }
+
+
+def commit_actual():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR, text=True).strip()
+    except Exception:
+        return 'desconocido'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks de todos los endpoints de api/urls.py')
+    parser.add_argument('--iteraciones', type=int, default=30)
+    parser.add_argument('--calentamiento', type=int, default=3)
+    parser.add_argument('--max-segundos', type=float, default=60.0, help='Tope de tiempo por escenario')
+    parser.add_argument('--solo', nargs='*', help='Nombres de ruta a medir (por defecto todas)')
+    parser.add_argument('--salida', help='Archivo JSON de salida')
+    args = parser.parse_args()
+
+    configurar(con_s3_local=True)
+    import django
+    import boto3
+    from django.conf import settings
+    from django.test import Client
+
+    # Un objeto real para las rutas que leen S3
+    boto3.client('s3', region_name='us-east-1').put_object(
+        Bucket=BUCKET_BENCH, Key=f'chatbot-uploads/tickets/{TICKET}/bench.png', Body=b'\x89PNG' + b'0' * 1020,
+    )
+
+    token = token_bench()
+    cliente = Client()
+    cliente.cookies[getattr(settings, 'JWT_AUTH_COOKIE', 'chatbot-auth')] = token
+
+    resultados = {}
+    sin_escenario = []
+    for nombre, patron in rutas_api():
+        if args.solo and nombre not in args.solo:
+            continue
+        escenarios = ESCENARIOS.get(nombre)
+        if not escenarios:
+            sin_escenario.append(nombre)
+            print(f"⚠️  {nombre:<30} sin escenario ({patron})")
+            continue
+        for escenario in escenarios:
+            clave = nombre + (f"[{escenario['nombre']}]" if 'nombre' in escenario else '')
+            try:
+                r = ejecutar(cliente, {**escenario, 'ruta': nombre}, token,
+                             args.iteraciones, args.calentamiento, args.max_segundos)
+            except Exception as e:
+                r = {'error': f"{type(e).__name__}: {e}"}
+                print(f"❌ {clave:<40} {r['error']}")
+            else:
+                print(f"{clave:<42} {r['metodo']:<6} p50={r['p50_ms']:>9.2f}ms  p95={r['p95_ms']:>9.2f}ms  "
+                      f"{r['throughput_rps'] or 0:>8.1f} req/s  {r['consultas_sql']:>7.1f} SQL  {r['status']}")
+            resultados[clave] = r
+
+    salida = {
+        'commit':        commit_actual(),
+        'fecha':         datetime.now().isoformat(timespec='seconds'),
+        'python':        platform.python_version(),
+        'django':        django.get_version(),
+        'parametros':    vars(args),
+        'sin_escenario': sin_escenario,
+        'resultados':    resultados,
+    }
+    ruta = args.salida or os.path.join(
+        BACKEND_DIR, 'benchmarks', 'resultados', f"{salida['commit']}-{datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    with open(ruta, 'w', encoding='utf-8') as f:
+        json.dump(salida, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 Resultados guardados en {ruta}")
+
+    detener()
+    return 1 if sin_escenario else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
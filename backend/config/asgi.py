@@ -4,6 +4,8 @@ from channels.routing import ProtocolTypeRouter, URLRouter
 from channels.security.websocket import AllowedHostsOriginValidator
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# Sin conexiones persistentes bajo ASGI salvo que se pida explícitamente (ver DB_CONN_MAX_AGE en settings.py)
+os.environ.setdefault('DB_CONN_MAX_AGE', '0')
 
 # Inicializar Django primero
 django_asgi_app = get_asgi_application()
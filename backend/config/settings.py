@@ -47,6 +47,8 @@ INSTALLED_APPS = [
 SITE_ID = 1
 
 MIDDLEWARE = [
+    'api.metrics.PrometheusMiddleware',      # 0. Mide todo, incluido CORS
+    'api.compression.CompresionMiddleware',  # 0b. gzip/brotli del cuerpo final (ver api/compression.py)
     'corsheaders.middleware.CorsMiddleware', # 1. CORS siempre primero
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware', # 2. Archivos estáticos
@@ -54,6 +56,8 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'api.instrumentation.RequestTimingMiddleware',  # SQL/S3/canal por request + Server-Timing
+    'api.db_router.ReplicaMiddleware',              # Read-your-writes para la réplica
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'allauth.account.middleware.AccountMiddleware',
@@ -77,10 +81,41 @@ TEMPLATES = [
     },
 ]
 
+# Conexiones persistentes (WSGI): evita TCP + TLS + auth contra RDS en cada request.
+# Bajo ASGI el default es 0 (config/asgi.py): cada request corre su código
+# síncrono en un hilo nuevo de asgiref, las conexiones persistentes quedan
+# atadas a hilos que no vuelven y nadie las cierra. Para reutilizar conexiones
+# con ASGI, un pooler externo (PgBouncer / RDS Proxy) y DB_CONN_MAX_AGE=0.
+# Los hilos propios (ThreadPoolExecutor, workers) deben llamar
+# django.db.close_old_connections() al terminar.
+DB_CONN_MAX_AGE = int(os.getenv('DB_CONN_MAX_AGE', '60'))
+
 DATABASES = {
-    'default': dj_database_url.config(default=os.getenv('DATABASE_URL'))
+    'default': dj_database_url.config(
+        default=os.getenv('DATABASE_URL'),
+        conn_max_age=DB_CONN_MAX_AGE,
+        conn_health_checks=True,
+    )
 }
 
+# --- RÉPLICA DE LECTURA (opcional, ver api/db_router.py) ---
+if os.getenv('DATABASE_REPLICA_URL'):
+    DATABASES['replica'] = dj_database_url.config(
+        env='DATABASE_REPLICA_URL',
+        conn_max_age=DB_CONN_MAX_AGE,
+        conn_health_checks=True,
+    )
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+DATABASE_ROUTERS = ['api.db_router.ReplicaRouter']
+# Segundos que un usuario sigue leyendo de la primaria después de escribir
+REPLICA_VENTANA_SEGUNDOS = int(os.getenv('REPLICA_VENTANA_SEGUNDOS', '10'))
+
+# --- POOL DE SQL CRUDO (api/db_utils.conexion_pool) ---
+DB_POOL_MAX = int(os.getenv('DB_POOL_MAX', '10'))                        # Conexiones por proceso
+DB_POOL_VIDA_MAXIMA = int(os.getenv('DB_POOL_VIDA_MAXIMA', '300'))       # Segundos antes de reciclar
+DB_POOL_CHEQUEO_OCIOSO = int(os.getenv('DB_POOL_CHEQUEO_OCIOSO', '30'))  # SELECT 1 si estuvo ociosa más
+DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', '10'))                # Espera máxima por una conexión
+
 # --- SEGURIDAD HTTPS Y COOKIES (VITAL PARA APP RUNNER) ---
 # Como usas JWT en Cookies, esto es obligatorio para que funcione en Chrome/HTTPS
 # Configurar cookies para cross-domain
@@ -109,7 +144,10 @@ from corsheaders.defaults import default_headers
 CORS_ALLOW_HEADERS = list(default_headers) + [
     'authorization',
     'x-csrftoken',
+    'if-match',         # Edición admin con concurrencia optimista (api/ticket_edit.py)
 ]
+# Sin esto el navegador no deja leer el ETag (versión nueva) de otro origen
+CORS_EXPOSE_HEADERS = ['ETag']
 
 CSRF_TRUSTED_ORIGINS = [
     "https://eipaj4pzfp.us-east-1.awsapprunner.com",
@@ -125,7 +163,16 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
-    ]
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 REST_AUTH = {
     'USE_JWT': True,
@@ -144,18 +191,45 @@ SIMPLE_JWT = {
 WSGI_APPLICATION = 'config.wsgi.application'
 ASGI_APPLICATION = 'config.asgi.application'
 
-if os.getenv("REDIS_URL"):
+REDIS_URL = os.getenv("REDIS_URL")
+
+if REDIS_URL:
     CHANNEL_LAYERS = {
         "default": {
             "BACKEND": "channels_redis.core.RedisChannelLayer",
             "CONFIG": {
-                "hosts": [os.getenv("REDIS_URL")],
+                "hosts": [REDIS_URL],
             },
         },
     }
 else:
     CHANNEL_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
 
+# --- CACHÉ (api/user_cache.py) ---
+# Redis compartido entre workers con REDIS_URL; si no, memoria local del proceso (desarrollo)
+CACHE_TIMEOUT_SEGUNDOS = int(os.getenv('CACHE_TIMEOUT_SEGUNDOS', '300'))
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+            "KEY_PREFIX": "soporte",
+            "TIMEOUT": CACHE_TIMEOUT_SEGUNDOS,
+            "OPTIONS": {"socket_timeout": 1, "socket_connect_timeout": 1},
+        },
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "soporte-ti",
+            "TIMEOUT": CACHE_TIMEOUT_SEGUNDOS,
+            "OPTIONS": {"MAX_ENTRIES": int(os.getenv('CACHE_LOCAL_MAX_ENTRADAS', '5000'))},
+        },
+    }
+# Lista /tickets/ de no staff. Sin Redis la invalidación no llega a los otros workers: 0 = sin caché
+CACHE_TICKETS_USUARIO_SEGUNDOS = int(os.getenv('CACHE_TICKETS_USUARIO_SEGUNDOS', '300' if REDIS_URL else '0'))
+
 # --- CONFIGURACIÓN GENERAL ---
 LANGUAGE_CODE = 'es-ec'
 TIME_ZONE = 'America/Guayaquil'
@@ -191,6 +265,78 @@ else:
     MEDIA_ROOT = os.path.join(BASE_DIR, 'uploads')
 
 MAX_FILE_SIZE = 16 * 1024 * 1024
+
+# --- ALMACENAMIENTO DE ADJUNTOS Y SONIDOS (api/storage.py) ---
+# 's3' o 'local' (on-prem / sin internet: disco + URLs firmadas con HMAC)
+ALMACEN = os.getenv('ALMACEN', 's3' if AWS_ACCESS_KEY_ID and AWS_STORAGE_BUCKET_NAME else 'local')
+ALMACEN_LOCAL_RAIZ = os.getenv('ALMACEN_LOCAL_RAIZ', os.path.join(BASE_DIR, 'uploads'))
+ALMACEN_LOCAL_URL = os.getenv('ALMACEN_LOCAL_URL', '/api/almacen/')     # Prefijo público de vista_almacen_local
+# Cliente S3 compartido: fallar rápido y reintentar con backoff en vez de colgar el worker
+S3_TIMEOUT_CONEXION = float(os.getenv('S3_TIMEOUT_CONEXION', '3'))       # Segundos
+S3_TIMEOUT_LECTURA = float(os.getenv('S3_TIMEOUT_LECTURA', '10'))        # Segundos por lectura del socket
+S3_MAX_CONEXIONES = int(os.getenv('S3_MAX_CONEXIONES', '50'))            # Pool urllib3 (HEAD en paralelo, ZIP)
+S3_MAX_INTENTOS = int(os.getenv('S3_MAX_INTENTOS', '4'))                 # Reintentos 'adaptive' de botocore
+
+# --- SUBIDA DE ADJUNTOS POR LOTES / MULTIPART (api/uploads.py) ---
+UPLOAD_MULTIPART_UMBRAL = int(os.getenv('UPLOAD_MULTIPART_UMBRAL', str(MAX_FILE_SIZE)))    # Más grande -> multipart
+UPLOAD_PARTE_TAMANO = int(os.getenv('UPLOAD_PARTE_TAMANO', str(8 * 1024 * 1024)))         # Tamaño de cada parte
+UPLOAD_MAX_TAMANO = int(os.getenv('UPLOAD_MAX_TAMANO', str(2 * 1024 * 1024 * 1024)))      # Tope por archivo
+UPLOAD_MAX_ARCHIVOS_LOTE = int(os.getenv('UPLOAD_MAX_ARCHIVOS_LOTE', '20'))
+
+# --- DESCARGA ZIP DE ADJUNTOS (api/zip_stream.py) ---
+ZIP_DESCARGAS_EN_PARALELO = int(os.getenv('ZIP_DESCARGAS_EN_PARALELO', '4'))   # Archivos leyéndose de S3 a la vez
+ZIP_BLOQUES_POR_ARCHIVO = int(os.getenv('ZIP_BLOQUES_POR_ARCHIVO', '4'))       # Bloques de 1 MB adelantados por archivo
+
+# --- MINIATURAS DE ADJUNTOS (api/thumbnails.py) ---
+MINIATURAS_ACTIVAS = os.getenv('MINIATURAS_ACTIVAS', 'True') == 'True'
+MINIATURAS_PROCESOS = int(os.getenv('MINIATURAS_PROCESOS', '2'))                           # Procesos Pillow por worker
+MINIATURAS_MAX_BYTES = int(os.getenv('MINIATURAS_MAX_BYTES', str(40 * 1024 * 1024)))       # Originales más grandes se omiten
+
+# --- DETECCIÓN DE TICKETS DUPLICADOS ---
+DUPLICADOS_UMBRAL = float(os.getenv('DUPLICADOS_UMBRAL', '0.6'))             # Jaccard estimado mínimo
+DUPLICADOS_TTL_SEGUNDOS = int(os.getenv('DUPLICADOS_TTL_SEGUNDOS', '300'))   # Reconstrucción completa del índice
+
+# --- DIRECTORIO DE USUARIOS/ADMINS EN MEMORIA (api/directory.py) ---
+DIRECTORIO_TTL_SEGUNDOS = int(os.getenv('DIRECTORIO_TTL_SEGUNDOS', '300'))   # Recarga aunque no haya cambios vistos
+
+# --- COMPRESIÓN DE RESPUESTAS (api/compression.py) ---
+COMPRESION_MIN_BYTES = int(os.getenv('COMPRESION_MIN_BYTES', '1024'))       # Más chicas van sin comprimir
+COMPRESION_NIVEL_GZIP = int(os.getenv('COMPRESION_NIVEL_GZIP', '6'))        # 1-9
+COMPRESION_CALIDAD_BR = int(os.getenv('COMPRESION_CALIDAD_BR', '5'))        # 0-11; >6 es caro para respuestas dinámicas
+COMPRESION_RELLENO_MAX_BYTES = int(os.getenv('COMPRESION_RELLENO_MAX_BYTES', '100'))  # BREACH: como max_random_bytes de GZipMiddleware
+
+# --- EDICIÓN DE TICKETS CON CONCURRENCIA OPTIMISTA (api/ticket_edit.py) ---
+# True: PUT/PATCH /admin/tickets/<pk>/ sin If-Match → 428 (cuando todos los clientes lo manden)
+TICKETS_EXIGIR_IF_MATCH = os.getenv('TICKETS_EXIGIR_IF_MATCH', 'False') == 'True'
+
+# --- SLA DE TICKETS PENDIENTES (api/sla.py, worker: python manage.py sla_worker) ---
+SLA_OBJETIVOS_MINUTOS = {                                                   # Por ticket_tip_ticket
+    'Software': int(os.getenv('SLA_MINUTOS_SOFTWARE', '240')),
+    'Hardware': int(os.getenv('SLA_MINUTOS_HARDWARE', '480')),
+}
+SLA_MINUTOS_DEFECTO = int(os.getenv('SLA_MINUTOS_DEFECTO', '480'))           # Tipos sin objetivo propio
+SLA_AVISO_PORCENTAJE = int(os.getenv('SLA_AVISO_PORCENTAJE', '80'))         # Aviso previo; 100 = solo al vencer
+SLA_TICK_SEGUNDOS = int(os.getenv('SLA_TICK_SEGUNDOS', '5'))                # Resolución de la rueda
+SLA_RANURAS = int(os.getenv('SLA_RANURAS', '4096'))                         # Ranuras de la rueda (vuelta = ranuras × tick)
+SLA_RESINCRONIZAR_SEGUNDOS = int(os.getenv('SLA_RESINCRONIZAR_SEGUNDOS', '600'))  # Reconstrucción completa desde la base
+
+# --- INSTRUMENTACIÓN POR REQUEST ---
+# Warning en logs cuando un request hace más consultas que esto (N+1)
+INSTRUMENTACION_MAX_CONSULTAS = int(os.getenv('INSTRUMENTACION_MAX_CONSULTAS', '50'))
+
+# --- VISTAS ASYNC (api/async_views.py, solo tiene sentido bajo ASGI) ---
+VISTAS_ASYNC = os.getenv('VISTAS_ASYNC', 'False') == 'True'
+
+# --- MÉTRICAS PROMETHEUS (/metrics) ---
+# Con varios workers definir PROMETHEUS_MULTIPROC_DIR (ver api/metrics.py)
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')  # Si está, exige 'Authorization: Bearer <token>' desde cualquier red
+# Sin METRICS_TOKEN solo se responde a estas redes (CIDR separados por coma)
+METRICS_REDES_PERMITIDAS = [r.strip() for r in os.getenv('METRICS_REDES_PERMITIDAS', '127.0.0.1/32,::1/128').split(',')
+                            if r.strip()]
+
+# --- ASIGNACIÓN AUTOMÁTICA DE TICKETS ---
+ASIGNACION_TTL_SEGUNDOS = int(os.getenv('ASIGNACION_TTL_SEGUNDOS', '600'))   # Recalcular cargas desde la BD
+ASIGNACION_DIAS_PROMEDIO = int(os.getenv('ASIGNACION_DIAS_PROMEDIO', '30'))  # Ventana del tiempo promedio de resolución
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
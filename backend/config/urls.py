@@ -15,9 +15,10 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from api.metrics import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -25,6 +26,9 @@ urlpatterns = [
     # Conecta tus rutas de 'api' bajo el prefijo '/api/'
     # Cualquier URL que empiece con /api/ será manejada por 'api.urls'
     path('api/', include('api.urls')),
+
+    # Métricas Prometheus (fuera de /api/: sin auth de DRF ni sesiones)
+    re_path(r'^metrics/?$', metrics_view, name='metrics'),
 ]
 
 # Servir archivos de 'uploads/' (MEDIA_ROOT) en MODO DEBUG
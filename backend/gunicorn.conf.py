@@ -0,0 +1,22 @@
+"""
+Configuración de gunicorn (se carga sola desde el directorio de trabajo).
+Solo agrega los hooks que necesitan las métricas multiproceso de Prometheus;
+bind/workers siguen viniendo de la línea de comandos.
+"""
+import glob
+import os
+
+
+def on_starting(server):
+    # Archivos de métricas de una corrida anterior darían contadores fantasma
+    directorio = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+        for archivo in glob.glob(os.path.join(directorio, '*.db')):
+            os.remove(archivo)
+
+
+def child_exit(server, worker):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
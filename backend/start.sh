@@ -1,2 +1,6 @@
 #!/bin/bash
-python3 -m gunicorn --bind 0.0.0.0:8000 --workers 3 backend.config.wsgi:application
\ No newline at end of file
+# Métricas de los 3 workers agregadas en /metrics; los hooks de gunicorn.conf.py
+# limpian el directorio (se pasa con -c porque se arranca desde la raíz)
+export PROMETHEUS_MULTIPROC_DIR="${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus_multiproc}"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+python3 -m gunicorn -c backend/gunicorn.conf.py --bind 0.0.0.0:8000 --workers 3 backend.config.wsgi:application
\ No newline at end of file
@@ -1,13 +1,13 @@
 import React from 'react';
+import { conteosDeFacetas } from '../UI/StatsCards';
 
-const StatsCards = ({ tickets }) => {
-  const assignedTickets = tickets.length;
-  const pendingTickets = tickets.filter(t => t.ticket_est_ticket === 'PE').length;
-  const finishedTickets = tickets.filter(t => t.ticket_est_ticket === 'FN').length;
-  
-  const totalFiles = tickets.reduce((total, ticket) => {
-    return total + (ticket.files ? ticket.files.length : 0);
-  }, 0);
+// Los conteos vienen del servidor (facets); el navegador no recorre la lista
+const StatsCards = ({ facets }) => {
+  const counts = conteosDeFacetas(facets);
+  const assignedTickets = counts.all;
+  const pendingTickets = counts.PE;
+  const inProcessTickets = counts.PR;
+  const finishedTickets = counts.FN;
 
   return (
     <div className="stats-grid">
@@ -41,14 +41,14 @@ const StatsCards = ({ tickets }) => {
         <div className="stat-label">Finalizados</div>
       </div>
 
-      <div className="stat-card files">
+      <div className="stat-card inprocess">
         <div className="stat-header">
           <div className="stat-icon">
-            <i className="fas fa-paperclip"></i>
+            <i className="fas fa-tools"></i>
           </div>
         </div>
-        <div className="stat-value">{totalFiles}</div>
-        <div className="stat-label">Archivos Totales</div>
+        <div className="stat-value">{inProcessTickets}</div>
+        <div className="stat-label">En Proceso</div>
       </div>
     </div>
   );
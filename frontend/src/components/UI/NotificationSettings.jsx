@@ -28,6 +28,14 @@ const NotificationSettings = ({ onClose }) => {
     if ('Notification' in window) {
       setDesktopPermission(Notification.permission);
     }
+    // El servidor es la fuente de verdad (stsonido); 304 si no cambió nada
+    api.get('/notifications/sounds/check/')
+      .then(res => {
+        const sound = res.data?.sound;
+        setCustomSoundUrl(sound?.url ?? null);
+        setCustomSoundKey(sound?.s3_key ?? null);
+      })
+      .catch(() => { /* sin red: se queda lo de localStorage */ });
   }, []);
 
   // ── UPLOAD usando presigned URL ──
@@ -53,7 +61,7 @@ const NotificationSettings = ({ onClose }) => {
         filename: file.name,
         filetype: file.type,
       });
-      const { upload_url, download_url, s3_key } = presignedRes.data;
+      const { upload_url, s3_key } = presignedRes.data;
 
       const uploadRes = await fetch(upload_url, {
         method: 'PUT',
@@ -63,8 +71,12 @@ const NotificationSettings = ({ onClose }) => {
 
       if (!uploadRes.ok) throw new Error('Error subiendo a S3');
 
-      setCustomSoundUrl(download_url);
-      setCustomSoundKey(s3_key);
+      // Registrar el sonido (clave, formato, tamaño, versión) en el backend
+      const confirmRes = await api.post('/notifications/sounds/confirm/', { s3_key });
+      const { sound } = confirmRes.data;
+
+      setCustomSoundUrl(sound.url);
+      setCustomSoundKey(sound.s3_key);
       setSoundType('custom');
 
     } catch (err) {
@@ -80,9 +92,7 @@ const NotificationSettings = ({ onClose }) => {
   const handleDeleteCustomSound = async () => {
     setDeleting(true);
     try {
-      await api.post('/notifications/sounds/delete/', {
-        s3_key: customSoundKey || null,
-      });
+      await api.post('/notifications/sounds/delete/');
       setCustomSoundUrl(null);
       setCustomSoundKey(null);
       setSoundType('default');
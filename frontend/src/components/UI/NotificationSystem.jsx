@@ -50,6 +50,9 @@ export default function NotificationSystem() {
   const getIcon = (type) => {
     switch (type) {
       case 'ticket_assigned': return '🎫';
+      case 'tickets_bulk_updated': return '🗂️';
+      case 'sla_por_vencer':  return '⏰';
+      case 'sla_incumplido':  return '🚨';
       case 'ticket_updated':  return '✏️';
       case 'ticket_closed':   return '✅';
       default: return '🔔';
@@ -1,9 +1,23 @@
 import React from 'react';
 
-const StatsCards = ({ tickets }) => {
-  const totalTickets = tickets.length;
-  const pendingTickets = tickets.filter(t => t.ticket_est_ticket === 'PE').length;
-  const finishedTickets = tickets.filter(t => t.ticket_est_ticket === 'FN').length;
+// Conteos por estado desde `facets` de las listas paginadas (/tickets/ y
+// /admin/tickets/ con ?page=). facets.estado ignora el filtro de estado, así
+// que sirve para las pestañas aunque se esté viendo un solo estado.
+export const conteosDeFacetas = (facets) => {
+  const estado = facets?.estado || {};
+  return {
+    all: Object.values(estado).reduce((total, n) => total + n, 0),
+    PE:  estado.PE || 0,
+    PR:  estado.PR || 0,
+    FN:  estado.FN || 0,
+  };
+};
+
+const StatsCards = ({ facets }) => {
+  const counts = conteosDeFacetas(facets);
+  const totalTickets = counts.all;
+  const pendingTickets = counts.PE;
+  const finishedTickets = counts.FN;
 
   return (
     <div className="stats-grid">
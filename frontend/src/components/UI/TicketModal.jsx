@@ -106,6 +106,12 @@ const TicketModal = ({ ticket, onClose, onFinishTicket }) => {
           >
             <i className="fas fa-external-link-alt"></i> Ver Archivos
           </button>
+          {ticket.files?.length > 0 && (
+            // Navegación directa: el navegador guarda el ZIP a disco mientras se genera
+            <a className="btn btn-primary" href={`/api/tickets/${ticket.ticket_cod_ticket}/download-zip/`}>
+              <i className="fas fa-file-archive"></i> Descargar todo (ZIP)
+            </a>
+          )}
         </div>
       </div>
     </div>
@@ -0,0 +1,60 @@
+import { useState, useEffect, useRef, useId } from 'react';
+import api from '../../config/axios';
+
+// Typeahead sobre /directory/search/ (prefijo sin tildes en username y nombre).
+// Reemplaza a los <select> con toda la base de usuarios.
+const UserTypeahead = ({ value, onSelect, tipo = 'usuarios', placeholder = 'Sin usuario', style }) => {
+  const [texto, setTexto] = useState(value || '');
+  const [opciones, setOpciones] = useState([]);
+  const timerRef = useRef(null);
+  const listId = useId();
+
+  useEffect(() => { setTexto(value || ''); }, [value]);
+  useEffect(() => () => clearTimeout(timerRef.current), []);
+
+  const buscar = (q) => {
+    clearTimeout(timerRef.current);
+    if (!q.trim()) { setOpciones([]); return; }
+    timerRef.current = setTimeout(async () => {
+      try {
+        const res = await api.get('/directory/search/', { params: { q, tipo, limit: 20 } });
+        setOpciones(res.data.resultados || []);
+      } catch {
+        setOpciones([]);
+      }
+    }, 150);
+  };
+
+  const confirmar = () => {
+    const elegido = texto.trim();
+    if (elegido === (value || '')) return;
+    if (elegido === '' || opciones.some(o => o.username === elegido)) {
+      onSelect(elegido);
+    } else {
+      setTexto(value || '');  // Texto que no es un usuario: se descarta
+    }
+  };
+
+  return (
+    <>
+      <input
+        list={listId}
+        value={texto}
+        placeholder={placeholder}
+        onChange={e => { setTexto(e.target.value); buscar(e.target.value); }}
+        onBlur={confirmar}
+        onKeyDown={e => {
+          if (e.key === 'Enter') e.currentTarget.blur();
+          if (e.key === 'Escape') { setTexto(value || ''); e.currentTarget.blur(); }
+        }}
+        className="table-select"
+        style={style}
+      />
+      <datalist id={listId}>
+        {opciones.map(o => <option key={o.username} value={o.username}>{o.nombreCompleto}</option>)}
+      </datalist>
+    </>
+  );
+};
+
+export default UserTypeahead;
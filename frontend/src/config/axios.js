@@ -41,4 +41,14 @@ api.interceptors.response.use(
   }
 );
 
+// PATCH del panel admin con If-Match (versión del ticket). Si otro usuario lo
+// editó desde que se cargó, el backend responde 412 con el ticket actual
+// en error.response.data.ticket y no aplica nada.
+export const patchTicketAdmin = (ticket, cambios) =>
+  api.patch(`/admin/tickets/${ticket.ticket_cod_ticket}/`, cambios, {
+    headers: ticket.ticket_ver_ticket
+      ? { 'If-Match': `"${ticket.ticket_cod_ticket}-${ticket.ticket_ver_ticket}"` }
+      : {},
+  });
+
 export default api;
\ No newline at end of file
@@ -53,6 +53,16 @@ export const useNotifications = () => {
     if (s)  setSettings(JSON.parse(s));
     if (n)  setNotifications(JSON.parse(n));
     if (lc) lastCheckRef.current = lc;
+
+    // La URL del sonido personalizado puede vencer: pedir la vigente al backend
+    if (s && JSON.parse(s).sound === 'custom') {
+      api.get('/notifications/sounds/check/')
+        .then(res => {
+          const url = res.data?.sound?.url ?? null;
+          if (mountedRef.current) setSettings(prev => ({ ...prev, customSoundUrl: url }));
+        })
+        .catch(() => { /* silencioso */ });
+    }
     return () => { mountedRef.current = false; };
   }, []);
 
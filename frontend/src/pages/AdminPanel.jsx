@@ -3,7 +3,9 @@ import { useNavigate } from 'react-router-dom';
 import { useAuth } from '../context/AuthContext';
 import Sidebar from '../components/Layout/Sidebar';
 import NotificationSystem from '../components/UI/NotificationSystem';
-import api from '../config/axios';
+import UserTypeahead from '../components/UI/UserTypeahead';
+import { conteosDeFacetas } from '../components/UI/StatsCards';
+import api, { patchTicketAdmin } from '../config/axios';
 import '../styles/Admin.css';
 
 const formatDate = (dateString) => {
@@ -35,12 +37,13 @@ const AdminPanel = () => {
   const navigate = useNavigate();
   const { user, logout } = useAuth();
 
+  // Solo la página actual: filtro, orden, página y conteos los resuelve el servidor
   const [tickets,         setTickets]         = useState([]);
-  const [users,           setUsers]           = useState([]);
+  const [facetas,         setFacetas]         = useState({});
+  const [totalPages,      setTotalPages]      = useState(0);
   const [admins,          setAdmins]          = useState([]);
   const [loading,         setLoading]         = useState(true);
   const [activeFilter,    setActiveFilter]    = useState('PE');
-  const [filteredTickets, setFilteredTickets] = useState([]);
   const [currentPage,     setCurrentPage]     = useState(1);
   const itemsPerPage = 10;
 
@@ -48,70 +51,113 @@ const AdminPanel = () => {
   const [closeTicketModal, setCloseTicketModal] = useState(null);
   const [tiempoReal,       setTiempoReal]       = useState('');
   const [observacion,      setObservacion]      = useState('');
+  const [seleccionados,    setSeleccionados]    = useState(() => new Set());
+  const [bulkSaving,       setBulkSaving]       = useState(false);
+
+  const isAdmin = !!user && (user.rol === 'SISTEMAS_ADMIN' || user.rol === 'admin' || user.is_staff);
 
   useEffect(() => {
     if (!user) { navigate('/'); return; }
-    const isAdmin = user.rol === 'SISTEMAS_ADMIN' || user.rol === 'admin' || user.is_staff;
     if (!isAdmin) { navigate('/chat'); return; }
-    loadInitialData();
-  }, [user, navigate]);
-
-  const loadInitialData = async () => {
+    // Los usuarios ya no se cargan todos: UserTypeahead busca en /directory/search/
+    api.get('/admins/')
+      .then(res => setAdmins(res.data))
+      .catch(error => console.error('Error cargando técnicos:', error));
+  }, [user, isAdmin, navigate]);
+
+  // Una página del filtro activo + conteos por estado (facets) en un solo request
+  const loadTickets = useCallback(async () => {
     try {
       setLoading(true);
-      const [usersRes, adminsRes, ticketsRes] = await Promise.all([
-        api.get('/users/active'),
-        api.get('/admins/'),
-        api.get('/admin/tickets/')
-      ]);
-      setUsers(usersRes.data);
-      setAdmins(adminsRes.data);
-      const sorted = sortTickets(ticketsRes.data);
-      setTickets(sorted);
-      applyFilter('PE', sorted);
+      const params = { page: currentPage, page_size: itemsPerPage };
+      if (activeFilter !== 'all') params.estado = activeFilter;
+      const res = await api.get('/admin/tickets/', { params });
+      setTickets(res.data.results);
+      setFacetas(res.data.facets);
+      setTotalPages(res.data.pages);
     } catch (error) {
-      console.error('Error cargando datos:', error);
+      console.error('Error cargando tickets:', error);
     } finally {
       setLoading(false);
     }
-  };
+  }, [activeFilter, currentPage]);
 
-  const sortTickets = (list) => [...list].sort((a, b) => {
-    const order = { PE: 0, PR: 1, FN: 2 };
-    const diff = (order[a.ticket_est_ticket] ?? 3) - (order[b.ticket_est_ticket] ?? 3);
-    if (diff !== 0) return diff;
-    return new Date(b.ticket_fec_ticket) - new Date(a.ticket_fec_ticket);
-  });
+  useEffect(() => {
+    if (isAdmin) loadTickets();
+  }, [isAdmin, loadTickets]);
 
-  const applyFilter = useCallback((filter, ticketsData = tickets) => {
+  const applyFilter = (filter) => {
     setActiveFilter(filter);
-    setFilteredTickets(filter === 'all' ? ticketsData : ticketsData.filter(t => t.ticket_est_ticket === filter));
     setCurrentPage(1);
-  }, [tickets]);
+  };
 
   const updateTicketLocal = (ticketId, updates) => {
-    setTickets(prev => {
-      const updated = sortTickets(prev.map(t => t.ticket_cod_ticket === ticketId ? { ...t, ...updates } : t));
-      applyFilter(activeFilter, updated);
-      return updated;
-    });
+    setTickets(prev => prev.map(t => t.ticket_cod_ticket === ticketId ? { ...t, ...updates } : t));
     if (selectedTicket?.ticket_cod_ticket === ticketId) {
       setSelectedTicket(prev => ({ ...prev, ...updates }));
     }
   };
 
+  // ── Edición con If-Match: true si se aplicó, false si otro usuario lo cambió antes ──
+  const editarTicket = async (ticketId, cambios) => {
+    const actual = tickets.find(t => t.ticket_cod_ticket === ticketId) || { ticket_cod_ticket: ticketId };
+    try {
+      const res = await patchTicketAdmin(actual, cambios);
+      updateTicketLocal(ticketId, { ...cambios, ticket_ver_ticket: res.data.ticket?.ticket_ver_ticket });
+      // Un cambio de estado mueve el ticket de pestaña y cambia los conteos
+      if ('ticket_est_ticket' in cambios) loadTickets();
+      return true;
+    } catch (error) {
+      if (error.response?.status !== 412) throw error;
+      if (error.response.data?.ticket) updateTicketLocal(ticketId, error.response.data.ticket);
+      alert('Otro usuario modificó este ticket. Se cargaron los datos actuales; revisa y vuelve a intentar.');
+      return false;
+    }
+  };
+
+  // ── Acciones masivas: UN request para todos los seleccionados ──
+  const toggleSeleccion = (ticketId) => {
+    setSeleccionados(prev => {
+      const nuevo = new Set(prev);
+      if (nuevo.has(ticketId)) nuevo.delete(ticketId); else nuevo.add(ticketId);
+      return nuevo;
+    });
+  };
+
+  const aplicarBulk = async (cambios) => {
+    if (seleccionados.size === 0) return;
+    setBulkSaving(true);
+    try {
+      await api.post('/admin/tickets/bulk/', { ids: [...seleccionados], cambios });
+      setSeleccionados(new Set());
+      loadTickets();
+    } catch (error) {
+      alert(error.response?.data?.error || 'Error en la actualización masiva');
+    } finally {
+      setBulkSaving(false);
+    }
+  };
+
+  const handleBulkFinalizar = () => {
+    const minutos = window.prompt(`Tiempo de resolución (minutos) para ${seleccionados.size} ticket(s):`);
+    if (minutos === null) return;
+    if (!minutos || isNaN(minutos) || Number(minutos) <= 0) {
+      alert('Por favor ingresa un tiempo de resolución válido (en minutos).');
+      return;
+    }
+    aplicarBulk({ ticket_est_ticket: 'FN', ticket_treal_ticket: Number(minutos) });
+  };
+
   const handleReassignUser = async (ticketId, newUsername) => {
     try {
-      await api.patch(`/admin/tickets/${ticketId}/`, { ticket_tusua_ticket: newUsername });
-      updateTicketLocal(ticketId, { ticket_tusua_ticket: newUsername });
+      await editarTicket(ticketId, { ticket_tusua_ticket: newUsername });
     } catch (error) { console.error(error); }
   };
 
   const handleAssignAdmin = async (ticketId, adminUsername) => {
     const valor = adminUsername === '' ? null : adminUsername;
     try {
-      await api.patch(`/admin/tickets/${ticketId}/`, { ticket_asignado_a: valor });
-      updateTicketLocal(ticketId, { ticket_asignado_a: valor });
+      await editarTicket(ticketId, { ticket_asignado_a: valor });
     } catch (error) { alert('Error al asignar técnico'); }
   };
 
@@ -122,13 +168,12 @@ const AdminPanel = () => {
     }
     const { ticketId } = closeTicketModal;
     try {
-      await api.patch(`/admin/tickets/${ticketId}/`, {
+      const aplicado = await editarTicket(ticketId, {
         ticket_est_ticket: 'FN',
         ticket_treal_ticket: Number(tiempoReal),
         ticket_obs_ticket: observacion
       });
-      updateTicketLocal(ticketId, { ticket_est_ticket: 'FN', ticket_treal_ticket: Number(tiempoReal), ticket_obs_ticket: observacion });
-      setCloseTicketModal(null);
+      if (aplicado) setCloseTicketModal(null);
     } catch (error) { alert('Error al finalizar ticket'); }
   };
 
@@ -185,9 +230,7 @@ const AdminPanel = () => {
     const handleTomar = async () => {
       setSaving(true);
       try {
-        await api.patch(`/admin/tickets/${ticket.ticket_cod_ticket}/`, { ticket_est_ticket: 'PR' });
-        updateTicketLocal(ticket.ticket_cod_ticket, { ticket_est_ticket: 'PR' });
-        onClose();
+        if (await editarTicket(ticket.ticket_cod_ticket, { ticket_est_ticket: 'PR' })) onClose();
       } catch { alert('Error al actualizar estado'); }
       finally { setSaving(false); }
     };
@@ -200,17 +243,12 @@ const AdminPanel = () => {
       }
       setSaving(true);
       try {
-        await api.patch(`/admin/tickets/${ticket.ticket_cod_ticket}/`, {
-          ticket_est_ticket: 'FN',
-          ticket_treal_ticket: Number(tiempoModal),
-          ticket_obs_ticket: obsModal
-        });
-        updateTicketLocal(ticket.ticket_cod_ticket, {
+        const aplicado = await editarTicket(ticket.ticket_cod_ticket, {
           ticket_est_ticket: 'FN',
           ticket_treal_ticket: Number(tiempoModal),
           ticket_obs_ticket: obsModal
         });
-        onClose();
+        if (aplicado) onClose();
       } catch { alert('Error al finalizar ticket'); }
       finally { setSaving(false); }
     };
@@ -311,16 +349,9 @@ const AdminPanel = () => {
     );
   };
 
-  const totalPages = Math.ceil(filteredTickets.length / itemsPerPage);
-  const paginatedTickets = filteredTickets.slice((currentPage - 1) * itemsPerPage, currentPage * itemsPerPage);
   if (!user) return null;
 
-  const counts = {
-    all: tickets.length,
-    PE:  tickets.filter(t => t.ticket_est_ticket === 'PE').length,
-    PR:  tickets.filter(t => t.ticket_est_ticket === 'PR').length,
-    FN:  tickets.filter(t => t.ticket_est_ticket === 'FN').length,
-  };
+  const counts = conteosDeFacetas(facetas);
 
   return (
     <div className="admin-container">
@@ -334,7 +365,7 @@ const AdminPanel = () => {
           </div>
           <div style={{ display: 'flex', alignItems: 'center', gap: 10 }}>
             <NotificationSystem />
-            <button className="btn-refresh" onClick={loadInitialData} disabled={loading}>
+            <button className="btn-refresh" onClick={loadTickets} disabled={loading}>
               <i className={`fas fa-sync ${loading ? 'fa-spin' : ''}`}></i>
             </button>
           </div>
@@ -370,10 +401,44 @@ const AdminPanel = () => {
             <button className={`filter-tab ${activeFilter === 'FN'  ? 'active' : ''}`} onClick={() => applyFilter('FN')}>Finalizados</button>
           </div>
 
+          {seleccionados.size > 0 && (
+            <div className="bulk-bar" style={{
+              display: 'flex', alignItems: 'center', gap: 10, flexWrap: 'wrap',
+              padding: '10px 14px', margin: '8px 0', borderRadius: 10,
+              background: '#eef2ff', border: '1px solid #c7d2fe', fontSize: '0.85rem'
+            }}>
+              <strong>{seleccionados.size} seleccionado(s)</strong>
+              <select className="table-select admin-select" defaultValue="" disabled={bulkSaving}
+                onChange={e => { if (e.target.value) aplicarBulk({ ticket_asignado_a: e.target.value }); e.target.value = ''; }}>
+                <option value="">Asignar técnico…</option>
+                {admins.map(a => <option key={a.username} value={a.username}>{a.username}</option>)}
+              </select>
+              <button className="filter-tab" disabled={bulkSaving} onClick={() => aplicarBulk({ ticket_est_ticket: 'PR' })}>
+                <i className="fas fa-play"></i> En proceso
+              </button>
+              <button className="filter-tab" disabled={bulkSaving} onClick={handleBulkFinalizar}>
+                <i className="fas fa-check"></i> Finalizar
+              </button>
+              <button className="filter-tab" disabled={bulkSaving} onClick={() => setSeleccionados(new Set())}>
+                Limpiar
+              </button>
+              {bulkSaving && <i className="fas fa-spinner fa-spin"></i>}
+            </div>
+          )}
+
           <div className="table-responsive desktop-only">
             <table className="tickets-table">
               <thead>
                 <tr>
+                  <th style={{ width: 32 }}>
+                    <input type="checkbox"
+                      checked={tickets.length > 0 && tickets.every(t => seleccionados.has(t.ticket_cod_ticket))}
+                      onChange={e => setSeleccionados(prev => {
+                        const nuevo = new Set(prev);
+                        tickets.forEach(t => e.target.checked ? nuevo.add(t.ticket_cod_ticket) : nuevo.delete(t.ticket_cod_ticket));
+                        return nuevo;
+                      })} />
+                  </th>
                   <th style={{ width: 80 }}>ID</th>
                   <th>Asunto</th>
                   <th style={{ width: 160 }}>Usuario</th>
@@ -383,17 +448,19 @@ const AdminPanel = () => {
                 </tr>
               </thead>
               <tbody>
-                {paginatedTickets.map(ticket => (
+                {tickets.map(ticket => (
                   <tr key={ticket.ticket_cod_ticket}
                     style={{ background: ticket.ticket_est_ticket === 'PE' ? '#fffbf0' : ticket.ticket_est_ticket === 'PR' ? '#f0f7ff' : 'inherit' }}>
+                    <td>
+                      <input type="checkbox" checked={seleccionados.has(ticket.ticket_cod_ticket)}
+                        onChange={() => toggleSeleccion(ticket.ticket_cod_ticket)} />
+                    </td>
                     <td><span className="ticket-id">#{ticket.ticket_cod_ticket}</span></td>
                     <td className="truncate-text" title={ticket.ticket_asu_ticket}>{ticket.ticket_asu_ticket}</td>
                     <td>
-                      <select value={ticket.ticket_tusua_ticket || ''} onChange={e => handleReassignUser(ticket.ticket_cod_ticket, e.target.value)}
-                        className="table-select" style={{ maxWidth: 140, fontSize: '0.8rem' }}>
-                        <option value="">Sin usuario</option>
-                        {users.map(u => <option key={u.username} value={u.username}>{u.username}</option>)}
-                      </select>
+                      <UserTypeahead value={ticket.ticket_tusua_ticket}
+                        onSelect={username => handleReassignUser(ticket.ticket_cod_ticket, username)}
+                        style={{ maxWidth: 140, fontSize: '0.8rem' }} />
                     </td>
                     <td>
                       <select value={ticket.ticket_asignado_a || ''} onChange={e => handleAssignAdmin(ticket.ticket_cod_ticket, e.target.value)}
@@ -416,7 +483,7 @@ const AdminPanel = () => {
 
           {/* Vista móvil */}
           <div className="mobile-only tickets-grid-mobile">
-            {paginatedTickets.map(ticket => (
+            {tickets.map(ticket => (
               <div key={ticket.ticket_cod_ticket} className="mobile-ticket-card">
                 <div className="mobile-card-header">
                   <span className="ticket-id">#{ticket.ticket_id_ticket}</span>
@@ -70,20 +70,88 @@ const getButtonsLayout = (buttons) => {
     return 'layout-options';
 };
 
-const uploadToS3 = async (ticketId, file) => {
-    const presignedResponse = await api.post(`/tickets/${ticketId}/generate-presigned-url/`, {
-        filename: file.name, filetype: file.type, filesize: file.size
-    });
-    const presignedData = presignedResponse.data;
-    const uploadResponse = await fetch(presignedData.upload_url, {
-        method: 'PUT', headers: { 'Content-Type': file.type }, body: file
-    });
-    if (!uploadResponse.ok) throw new Error('Error subiendo archivo a S3');
-    const confirmResponse = await api.post(`/tickets/${ticketId}/confirm-upload/`, {
-        s3_key: presignedData.s3_key, filename: file.name,
-        filetype: file.type, filesize: file.size
+// Subida de adjuntos: una sola llamada de presign para todos los archivos;
+// los grandes van por multipart (partes en paralelo, reanudables).
+const PARTES_EN_PARALELO = 4;
+// Hasta este tamaño se manda el SHA-256: el backend deduplica y, si ya
+// tenemos ese contenido, responde modo "existente" y no hay PUT.
+// (= UPLOAD_MULTIPART_UMBRAL del backend)
+const HASH_MAX_BYTES = 16 * 1024 * 1024;
+
+const sha256Hex = async (file) => {
+    if (file.size > HASH_MAX_BYTES || !window.crypto?.subtle) return undefined;
+    const digest = await crypto.subtle.digest('SHA-256', await file.arrayBuffer());
+    return Array.from(new Uint8Array(digest), b => b.toString(16).padStart(2, '0')).join('');
+};
+
+const subirMultipart = async (ticketId, entrada, file) => {
+    const base = `/tickets/${ticketId}/multipart`;
+    const ids = { s3_key: entrada.s3_key, upload_id: entrada.upload_id };
+    const listas = [];
+    let pendientes = entrada.parts;
+
+    for (let intento = 0; intento < 3 && pendientes.length > 0; intento++) {
+        if (intento > 0) {
+            // Reanudar: URLs nuevas solo para las partes que faltan
+            const { data } = await api.post(`${base}/resume/`, { ...ids, filesize: file.size });
+            pendientes = data.parts;
+        }
+        const cola = [...pendientes];
+        const fallidas = [];
+        const subirPartes = async () => {
+            while (cola.length > 0) {
+                const parte = cola.shift();
+                const inicio = (parte.part_number - 1) * entrada.part_size;
+                try {
+                    const resp = await fetch(parte.url, {
+                        method: 'PUT', body: file.slice(inicio, inicio + entrada.part_size)
+                    });
+                    if (!resp.ok) throw new Error(`Parte ${parte.part_number}: HTTP ${resp.status}`);
+                    listas.push({ part_number: parte.part_number, etag: resp.headers.get('ETag') });
+                } catch {
+                    fallidas.push(parte);
+                }
+            }
+        };
+        await Promise.all(Array.from({ length: PARTES_EN_PARALELO }, subirPartes));
+        pendientes = fallidas;
+    }
+
+    if (pendientes.length > 0) {
+        await api.post(`${base}/abort/`, ids).catch(() => {});
+        throw new Error(`No se pudo subir ${file.name}`);
+    }
+    await api.post(`${base}/complete/`, { ...ids, parts: listas });
+};
+
+const subirArchivo = async (ticketId, entrada, file, sha256) => {
+    if (entrada.modo === 'multipart') {
+        await subirMultipart(ticketId, entrada, file);
+    } else if (entrada.modo !== 'existente') {
+        const uploadResponse = await fetch(entrada.upload_url, {
+            method: 'PUT', headers: { 'Content-Type': file.type, ...entrada.headers }, body: file
+        });
+        if (!uploadResponse.ok) throw new Error('Error subiendo archivo a S3');
+    }
+    // El backend solo usa la clave del blob si aceptó el hash
+    const esBlob = entrada.s3_key.startsWith('chatbot-uploads/blobs/');
+    return { s3_key: entrada.s3_key, filename: file.name, sha256: esBlob ? sha256 : undefined };
+};
+
+const subirAdjuntos = async (ticketId, files) => {
+    const hashes = await Promise.all(files.map(f => sha256Hex(f).catch(() => undefined)));
+    const { data } = await api.post(`/tickets/${ticketId}/presign-batch/`, {
+        files: files.map((f, i) => ({ filename: f.name, filetype: f.type, filesize: f.size, sha256: hashes[i] }))
     });
-    return confirmResponse.data;
+    const resultados = await Promise.allSettled(
+        data.files.map((entrada, i) => subirArchivo(ticketId, entrada, files[i], hashes[i]))
+    );
+    const subidos = resultados.filter(r => r.status === 'fulfilled').map(r => r.value);
+    if (subidos.length === 0) return { uploaded: 0, failed: files.length };
+    // Una sola confirmación para todo el lote (el backend verifica cada objeto en S3)
+    const confirmacion = await api.post(`/tickets/${ticketId}/confirm-batch/`, { files: subidos });
+    const uploaded = confirmacion.data.files.length + confirmacion.data.already_confirmed.length;
+    return { uploaded, failed: files.length - uploaded };
 };
 
 // ============================================================
@@ -445,11 +513,10 @@ const Chat = () => {
             });
             const result   = response.data;
             let uploaded = 0, failed = 0;
-            if (chatState.context.attachedFiles.length > 0) {
-                await Promise.all(chatState.context.attachedFiles.map(async (file) => {
-                    try { await uploadToS3(result.ticket_cod_ticket, file); uploaded++; }
-                    catch { failed++; }
-                }));
+            const adjuntos = chatState.context.attachedFiles;
+            if (adjuntos.length > 0) {
+                try { ({ uploaded, failed } = await subirAdjuntos(result.ticket_cod_ticket, adjuntos)); }
+                catch { failed = adjuntos.length; }
             }
             setIsTyping(false);
             let msg = `<div class="ticket-created-box">✅ <strong>Ticket #${result.ticket_id_ticket || result.ticket_cod_ticket} creado exitosamente</strong>`;
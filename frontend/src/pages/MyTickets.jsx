@@ -1,9 +1,10 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useCallback } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { useAuth } from '../context/AuthContext';
 import Sidebar from '../components/Layout/Sidebar';
 import NotificationSystem from '../components/UI/NotificationSystem';
-import api from '../config/axios';
+import { conteosDeFacetas } from '../components/UI/StatsCards';
+import api, { patchTicketAdmin } from '../config/axios';
 import '../styles/Admin.css';
 import '../styles/tickets.css';
 
@@ -36,9 +37,14 @@ const MyTickets = () => {
   const navigate = useNavigate();
   const { user } = useAuth();
 
+  // Solo la página actual; los conteos por estado vienen en facets
   const [tickets,      setTickets]      = useState([]);
+  const [facetas,      setFacetas]      = useState({});
+  const [totalPages,   setTotalPages]   = useState(0);
+  const [currentPage,  setCurrentPage]  = useState(1);
   const [loading,      setLoading]      = useState(true);
   const [activeFilter, setActiveFilter] = useState('PE');
+  const itemsPerPage = 20;
 
   const [selectedTicket, setSelectedTicket] = useState(null);
   const [showModal,      setShowModal]      = useState(false);
@@ -46,32 +52,40 @@ const MyTickets = () => {
   const [observation,    setObservation]    = useState('');
   const [saving,         setSaving]         = useState(false);
 
+  const isStaff = !!user && (user.rol === 'SISTEMAS_ADMIN' || user.rol === 'admin' || user.is_staff);
+
   useEffect(() => {
     if (!user) { navigate('/'); return; }
-    const isStaff = user.rol === 'SISTEMAS_ADMIN' || user.rol === 'admin' || user.is_staff;
-    if (!isStaff) { navigate('/chat'); return; }
-    fetchMyTickets();
-  }, [user, navigate]);
+    if (!isStaff) navigate('/chat');
+  }, [user, isStaff, navigate]);
 
-  const fetchMyTickets = async () => {
+  // El servidor filtra por técnico y estado y devuelve una página + facets
+  const fetchMyTickets = useCallback(async () => {
     try {
       setLoading(true);
-      const response = await api.get('/admin/tickets/');
-      const myTickets = response.data
-        .filter(t => t.ticket_asignado_a === user.username)
-        .map(t => ({ ...t, files: t.archivos || [], id: t.ticket_cod_ticket, displayId: t.ticket_id_ticket }))
-        .sort((a, b) => {
-          const order = { PE: 0, PR: 1, FN: 2 };
-          const diff = (order[a.ticket_est_ticket] ?? 3) - (order[b.ticket_est_ticket] ?? 3);
-          return diff !== 0 ? diff : new Date(b.ticket_fec_ticket) - new Date(a.ticket_fec_ticket);
-        });
-      setTickets(myTickets);
+      const params = { asignado_a: user.username, page: currentPage, page_size: itemsPerPage };
+      if (activeFilter !== 'all') params.estado = activeFilter;
+      const response = await api.get('/admin/tickets/', { params });
+      setTickets(response.data.results.map(t => ({
+        ...t, files: t.archivos || [], id: t.ticket_cod_ticket, displayId: t.ticket_id_ticket
+      })));
+      setFacetas(response.data.facets);
+      setTotalPages(response.data.pages);
     } catch (error) {
       console.error('Error fetching tickets:', error);
       showNotif('Error cargando tickets', 'error');
     } finally {
       setLoading(false);
     }
+  }, [user, activeFilter, currentPage]);
+
+  useEffect(() => {
+    if (isStaff) fetchMyTickets();
+  }, [isStaff, fetchMyTickets]);
+
+  const cambiarFiltro = (filtro) => {
+    setActiveFilter(filtro);
+    setCurrentPage(1);
   };
 
   const showNotif = (message, type = 'info') => {
@@ -83,6 +97,23 @@ const MyTickets = () => {
     setSelectedTicket(prev => prev?.id === id ? { ...prev, ...updates } : prev);
   };
 
+  // If-Match con la versión del ticket; en 412 se cargan los datos actuales
+  const editarTicket = async (cambios) => {
+    try {
+      const res = await patchTicketAdmin(selectedTicket, cambios);
+      updateLocal(selectedTicket.id, { ...cambios, ticket_ver_ticket: res.data.ticket?.ticket_ver_ticket });
+      // Cambió de estado: puede salir de la pestaña y cambian los conteos
+      if ('ticket_est_ticket' in cambios) fetchMyTickets();
+      return true;
+    } catch (error) {
+      if (error.response?.status !== 412) throw error;
+      const actual = error.response.data?.ticket;
+      if (actual) updateLocal(selectedTicket.id, { ...actual, files: actual.archivos || [] });
+      showNotif('Otro usuario modificó este ticket. Revisa los datos actuales y vuelve a intentar.', 'error');
+      return false;
+    }
+  };
+
   const openModal = (ticket) => {
     setSelectedTicket(ticket);
     setSolutionTime(ticket.ticket_treal_ticket || '');
@@ -103,9 +134,9 @@ const MyTickets = () => {
     if (!selectedTicket) return;
     setSaving(true);
     try {
-      await api.patch(`/admin/tickets/${selectedTicket.id}/`, { ticket_est_ticket: 'PR' });
-      updateLocal(selectedTicket.id, { ticket_est_ticket: 'PR' });
-      showNotif('🔧 Ticket tomado — ahora está En Proceso', 'success');
+      if (await editarTicket({ ticket_est_ticket: 'PR' })) {
+        showNotif('🔧 Ticket tomado — ahora está En Proceso', 'success');
+      }
     } catch {
       showNotif('Error al actualizar estado', 'error');
     } finally { setSaving(false); }
@@ -121,18 +152,15 @@ const MyTickets = () => {
     }
     try {
       setSaving(true);
-      await api.patch(`/admin/tickets/${selectedTicket.id}/`, {
+      const aplicado = await editarTicket({
         ticket_est_ticket:   'FN',
         ticket_treal_ticket: minutes,
         ticket_obs_ticket:   observation
       });
-      updateLocal(selectedTicket.id, {
-        ticket_est_ticket:   'FN',
-        ticket_treal_ticket: minutes,
-        ticket_obs_ticket:   observation
-      });
-      showNotif('✅ Ticket finalizado correctamente', 'success');
-      closeModal();
+      if (aplicado) {
+        showNotif('✅ Ticket finalizado correctamente', 'success');
+        closeModal();
+      }
     } catch {
       showNotif('Error al finalizar ticket', 'error');
     } finally { setSaving(false); }
@@ -153,14 +181,7 @@ const MyTickets = () => {
     return `${base}${url}`;
   };
 
-  const filteredTickets = tickets.filter(t => activeFilter === 'all' || t.ticket_est_ticket === activeFilter);
-
-  const counts = {
-    all: tickets.length,
-    PE:  tickets.filter(t => t.ticket_est_ticket === 'PE').length,
-    PR:  tickets.filter(t => t.ticket_est_ticket === 'PR').length,
-    FN:  tickets.filter(t => t.ticket_est_ticket === 'FN').length,
-  };
+  const counts = conteosDeFacetas(facetas);
 
   if (!user || (loading && tickets.length === 0)) {
     return <div className="loading-container"><div className="loading-spinner"></div></div>;
@@ -203,7 +224,7 @@ const MyTickets = () => {
                 { key: 'FN',  label: 'Finalizados', count: counts.FN  },
               ].map(f => (
                 <button key={f.key} className={`filter-btn ${activeFilter === f.key ? 'active' : ''}`}
-                  onClick={() => setActiveFilter(f.key)}>
+                  onClick={() => cambiarFiltro(f.key)}>
                   {f.label}
                   <span className="filter-count-badge" style={{ background: f.key === 'PR' && activeFilter !== f.key ? '#3b82f6' : undefined, color: f.key === 'PR' && activeFilter !== f.key ? 'white' : undefined }}>
                     {f.count}
@@ -213,7 +234,7 @@ const MyTickets = () => {
             </div>
           </div>
 
-          {filteredTickets.length === 0 ? (
+          {tickets.length === 0 ? (
             <div className="mt-empty">
               <i className="fas fa-inbox"></i>
               <p>No hay tickets {activeFilter === 'PE' ? 'pendientes' : activeFilter === 'PR' ? 'en proceso' : activeFilter === 'FN' ? 'finalizados' : ''}</p>
@@ -227,7 +248,7 @@ const MyTickets = () => {
                   </tr>
                 </thead>
                 <tbody>
-                  {filteredTickets.map(ticket => (
+                  {tickets.map(ticket => (
                     <tr key={ticket.id}
                       className={`clickable-row ${ticket.ticket_est_ticket === 'PE' ? 'row-pending' : ticket.ticket_est_ticket === 'PR' ? 'row-inprocess' : 'row-finished'}`}
                       onClick={() => openModal(ticket)}
@@ -253,6 +274,14 @@ const MyTickets = () => {
               </table>
             </div>
           )}
+
+          {totalPages > 1 && (
+            <div className="pagination-container">
+              <button disabled={currentPage === 1} onClick={() => setCurrentPage(c => c - 1)}>Anterior</button>
+              <span>Página {currentPage} de {totalPages}</span>
+              <button disabled={currentPage === totalPages} onClick={() => setCurrentPage(c => c + 1)}>Siguiente</button>
+            </div>
+          )}
         </div>
       </main>
 
@@ -104,6 +104,7 @@ const ReportesPage = () => {
   const admins     = data?.admins || [];
   const porDia     = data?.por_dia || [];
   const totales    = data?.totales || {};
+  const sla        = data?.sla || null;
   const admFiltered = adminFiltro === 'all' ? admins : admins.filter(a => a.username === adminFiltro);
   const maxResueltos = Math.max(...admins.map(a => a.resueltos), 1);
 
@@ -285,6 +286,32 @@ const ReportesPage = () => {
                     sub={totales.avg_calificacion >= 4.5 ? '✨ Excelente' : totales.avg_calificacion >= 3 ? '👍 Bueno' : totales.avg_calificacion > 0 ? '⚠️ Mejorable' : null} />
                 </div>
 
+                {/* SLA de atención (tickets pendientes) */}
+                {sla && (
+                  <Card title="⏱️ SLA de atención (tickets pendientes)">
+                    <div className="stats-grid" style={{ marginBottom: 16 }}>
+                      <KpiCard icon="🎯" label="Cumplimiento SLA (período)"
+                        value={sla.cumplimiento_pct != null ? `${sla.cumplimiento_pct}%` : '—'}
+                        color="#10b981" bg="#f0fdf4"
+                        sub={`${sla.incumplidos} incumplido(s) en el período`} />
+                      <KpiCard icon="🚨" label="Pendientes fuera de SLA" value={sla.vencidos_abiertos}
+                        color="#ef4444" bg="#fef2f2" />
+                      <KpiCard icon="⏰" label="Pendientes por vencer" value={sla.por_vencer}
+                        color="#f59e0b" bg="#fffbeb"
+                        sub={`Más del ${sla.aviso_porcentaje}% del objetivo consumido`} />
+                    </div>
+                    {sla.por_tipo.map(t => (
+                      <div key={t.tipo} style={{ marginBottom: 10 }}>
+                        <div style={{ display: 'flex', justifyContent: 'space-between', fontSize: 12, color: '#475569', marginBottom: 4 }}>
+                          <span><strong>{t.tipo}</strong> · objetivo {hhmm(t.objetivo_min)}</span>
+                          <span>{t.incumplidos} / {t.total} incumplidos</span>
+                        </div>
+                        <ProgressBar value={t.incumplidos} max={t.total} color="#ef4444" />
+                      </div>
+                    ))}
+                  </Card>
+                )}
+
                 <div style={{ display: 'grid', gridTemplateColumns: '1fr 280px', gap: 20, marginBottom: 0 }}>
                   {/* Tickets por día - Area chart */}
                   <Card title="📈 Tickets creados por día">
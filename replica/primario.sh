@@ -0,0 +1,10 @@
+#!/bin/sh
+# Se ejecuta una sola vez, al crear el volumen de la base primaria
+# (docker-entrypoint-initdb.d). Crea el usuario de replicación y le da acceso.
+set -e
+
+psql -v ON_ERROR_STOP=1 --username "$POSTGRES_USER" --dbname "$POSTGRES_DB" <<-SQL
+    CREATE ROLE replicador WITH REPLICATION LOGIN PASSWORD 'replicador_local';
+SQL
+
+echo "host replication replicador all md5" >> "$PGDATA/pg_hba.conf"